@@ -0,0 +1,431 @@
+"""Kiyaslama (benchmark) ve testler icin slicer API'lerinin hafif, numpy tabanli karsiligi.
+
+Yalnizca calculateVolumes'un ve 3D yuzey yolunun kullandigi cagrilar taklit
+edilir; amac gorsellestirme degil, Slicer olmadan ayni veri isinin maliyetini
+olcmek ve modul mantigini (Logic) test etmektir. moduleStandIns() modulun ice
+aktardigi slicer/qt/ctk modullerinin yerine konacak karsiliklari verir; VTK
+gercek kutuphanedir ve yalnizca bu yol icin gereklidir.
+"""
+
+import types
+
+import numpy as np
+
+from VolBrainVolumeCalculatorLib.LabelStatistics import LabelHistogram
+
+# slicer.vtkSegmentationConverter.GetSegmentationClosedSurfaceRepresentationName()
+CLOSED_SURFACE = "Closed surface"
+
+
+class Node:
+    def __init__(self, className):
+        self.className = className
+        self.name = ""
+        self.id = None
+        self.attributes = {}
+        self.displayNode = None
+
+    def GetID(self):
+        return self.id
+
+    def SetName(self, name):
+        self.name = name
+
+    def GetName(self):
+        return self.name
+
+    def SetAttribute(self, name, value):
+        self.attributes[name] = value
+
+    def GetAttribute(self, name):
+        return self.attributes.get(name)
+
+    def GetDisplayNode(self):
+        return self.displayNode
+
+    def IsA(self, className):
+        return className == self.className
+
+    def CreateDefaultDisplayNodes(self):
+        if self.displayNode is None:
+            self.displayNode = DisplayNode()
+
+
+class DisplayNode:
+    def __init__(self):
+        self.colorNodeID = None
+        self.visibility3D = False
+        self.segmentVisibility3D = {}
+        self.preferredRepresentation3D = None
+        # Olusan Modified olaylari (StartModify/EndModify arasinda tek olay)
+        self.modifiedEvents = 0
+        self._modifying = 0
+
+    def SetAndObserveColorNodeID(self, nodeID):
+        self.colorNodeID = nodeID
+
+    def SetVisibility3D(self, visible):
+        self.visibility3D = visible
+
+    def SetVisibility2DFill(self, visible):
+        pass
+
+    def SetVisibility2DOutline(self, visible):
+        pass
+
+    def SetPreferredDisplayRepresentationName3D(self, name):
+        self.preferredRepresentation3D = name
+
+    def GetSegmentVisibility3D(self, segmentId):
+        # Slicer'da yeni segmentler gorunur baslar
+        return self.segmentVisibility3D.get(segmentId, True)
+
+    def SetSegmentVisibility3D(self, segmentId, visible):
+        self.segmentVisibility3D[segmentId] = visible
+        self._modified()
+
+    def StartModify(self):
+        self._modifying += 1
+        return self._modifying > 1
+
+    def EndModify(self, wasModifying):
+        self._modifying -= 1
+        if not wasModifying:
+            self._modified()
+
+    def _modified(self):
+        if not self._modifying:
+            self.modifiedEvents += 1
+
+
+class LabelMapVolumeNode(Node):
+    def __init__(self):
+        super().__init__('vtkMRMLLabelMapVolumeNode')
+        self.array = None
+        self.ijkToRAS = np.eye(4)
+        self.imageData = None
+
+    def SetArray(self, array, ijkToRAS=None):
+        self.array = array
+        if ijkToRAS is not None:
+            self.ijkToRAS = np.array(ijkToRAS)
+
+    def SetAndObserveImageData(self, imageData):
+        """vtkImageData: dizi goruntunun bellegini paylasir (slicer.util.arrayFromVolume gibi)."""
+        from vtk.util.numpy_support import vtk_to_numpy
+        self.imageData = imageData
+        columns, rows, slices = imageData.GetDimensions()
+        self.array = vtk_to_numpy(imageData.GetPointData().GetScalars()).reshape(slices, rows, columns)
+
+    def GetImageData(self):
+        return self.imageData
+
+    def SetIJKToRASMatrix(self, matrix):
+        self.ijkToRAS = _arrayFromVTKMatrix(matrix)
+
+    def GetIJKToRASMatrix(self, matrix):
+        matrix.DeepCopy(_vtkMatrixFromArray(self.ijkToRAS))
+
+    def GetSpacing(self):
+        return tuple(np.linalg.norm(self.ijkToRAS[:3, :3], axis=0).tolist())
+
+
+class ColorTableNode(Node):
+    def __init__(self):
+        super().__init__('vtkMRMLColorTableNode')
+        self.names = []
+        self.colors = np.zeros((0, 4))
+
+    def SetTypeToUser(self):
+        pass
+
+    def NamesInitialisedOn(self):
+        pass
+
+    def SetNumberOfColors(self, count):
+        self.names = [""] * count
+        self.colors = np.zeros((count, 4))
+
+    def SetColor(self, index, name, r, g, b, a=1.0):
+        self.names[index] = name
+        self.colors[index] = (r, g, b, a)
+
+    def SetColorName(self, index, name):
+        self.names[index] = name
+
+    def GetLookupTable(self):
+        return LookupTable(self)
+
+
+class LookupTable:
+    """vtkLookupTable: SetTable (n, 4) uint8 RGBA dizisi alir (VTK dizisi yerine numpy)."""
+
+    def __init__(self, colorNode):
+        self.colorNode = colorNode
+
+    def SetTable(self, table):
+        if hasattr(table, 'GetNumberOfTuples'):
+            # Modul VTK dizisi verir (vtkUnsignedCharArray)
+            from vtk.util.numpy_support import vtk_to_numpy
+            table = vtk_to_numpy(table)
+        self.colorNode.colors = np.asarray(table, dtype=np.float64) / 255.0
+
+
+class Segment:
+    def __init__(self, name, labelValue):
+        self.name = name
+        self.labelValue = labelValue
+        self.color = (0.5, 0.5, 0.5)
+        self.tags = {}
+        self.representations = {}
+
+    def SetName(self, name):
+        self.name = name
+
+    def GetName(self):
+        return self.name
+
+    def SetColor(self, r, g, b):
+        self.color = (r, g, b)
+
+    def SetTag(self, name, value):
+        self.tags[name] = value
+
+    def GetTag(self, name, value):
+        """value: vtk.mutable; etiket yoksa False."""
+        if name not in self.tags:
+            return False
+        value.set(self.tags[name])
+        return True
+
+    def GetRepresentation(self, name):
+        return self.representations.get(name)
+
+    def AddRepresentation(self, name, data):
+        self.representations[name] = data
+
+    def RemoveRepresentation(self, name):
+        self.representations.pop(name, None)
+
+
+class Segmentation:
+    def __init__(self):
+        self.segments = {}
+        self.sharedLabelmap = None
+        self.conversionParameters = {}
+        # Slicer'in standart donusumuyle olusturulan yuzeyler (segment ID'leri)
+        self.convertedSegments = []
+
+    def SetConversionParameter(self, name, value):
+        self.conversionParameters[name] = value
+
+    def ConvertSingleSegment(self, segmentId, representationName):
+        self.convertedSegments.append(segmentId)
+        self.segments[segmentId].AddRepresentation(representationName, object())
+
+    def RemoveAllSegments(self):
+        self.segments.clear()
+        self.sharedLabelmap = None
+
+    def GetNumberOfSegments(self):
+        return len(self.segments)
+
+    def GetNthSegmentID(self, index):
+        return list(self.segments)[index]
+
+    def GetSegment(self, segmentId):
+        return self.segments.get(segmentId)
+
+    def GetSegmentIdBySegmentName(self, name):
+        for segmentId, segment in self.segments.items():
+            if segment.name == name:
+                return segmentId
+        return ""
+
+
+class SegmentationNode(Node):
+    def __init__(self):
+        super().__init__('vtkMRMLSegmentationNode')
+        self.segmentation = Segmentation()
+        self.displayNode = DisplayNode()
+        self.closedSurfaceRequests = 0
+
+    def GetSegmentation(self):
+        return self.segmentation
+
+    def CreateClosedSurfaceRepresentation(self):
+        """Tum segmentlerin yuzeyi Slicer'in donusumuyle (cagri sayisi tutulur)."""
+        self.closedSurfaceRequests += 1
+        for segmentId in list(self.segmentation.segments):
+            self.segmentation.ConvertSingleSegment(segmentId, CLOSED_SURFACE)
+        return True
+
+
+class Scene:
+    _NODE_CLASSES = {
+        'vtkMRMLLabelMapVolumeNode': LabelMapVolumeNode,
+        'vtkMRMLColorTableNode': ColorTableNode,
+        'vtkMRMLSegmentationNode': SegmentationNode,
+    }
+
+    def __init__(self):
+        self.nodes = {}
+
+    def CreateNodeByClass(self, className):
+        return self._NODE_CLASSES[className]()
+
+    def AddNode(self, node):
+        node.id = f"{node.className}{len(self.nodes) + 1}"
+        self.nodes[node.id] = node
+        return node
+
+    def AddNewNodeByClass(self, className, name=""):
+        node = self.CreateNodeByClass(className)
+        node.SetName(name)
+        return self.AddNode(node)
+
+    def GetFirstNodeByName(self, name):
+        for node in self.nodes.values():
+            if node.name == name:
+                return node
+        return None
+
+    def GetFirstNode(self, name, className):
+        for node in self.nodes.values():
+            if node.name == name and node.className == className:
+                return node
+        return None
+
+    def GetNodeByID(self, nodeId):
+        return self.nodes.get(nodeId)
+
+    def Clear(self):
+        self.nodes.clear()
+
+
+class SegmentationsLogic:
+    def ImportLabelmapToSegmentationNode(self, labelNode, segmentationNode):
+        """Paylasilan labelmap ile ice aktarma: hacim bir kez kopyalanir ve
+        taranir, her etiket icin bir segment olusturulur."""
+        segmentation = segmentationNode.GetSegmentation()
+        segmentation.sharedLabelmap = labelNode.array.copy()
+        histogram = LabelHistogram()
+        histogram.update(segmentation.sharedLabelmap)
+        for label in histogram.result()[0]:
+            if label > 0:
+                segmentId = f"Segment_{int(label)}"
+                segmentation.segments[segmentId] = Segment(f"Label_{int(label)}", int(label))
+        return True
+
+
+def _vtkMatrixFromArray(array):
+    import vtk
+    matrix = vtk.vtkMatrix4x4()
+    for row in range(4):
+        for column in range(4):
+            matrix.SetElement(row, column, float(array[row][column]))
+    return matrix
+
+
+def _arrayFromVTKMatrix(matrix):
+    return np.array([[matrix.GetElement(row, column) for column in range(4)] for row in range(4)])
+
+
+class QTimer:
+    """qt.QTimer: olay dongusu yerine fire() ile tetiklenir."""
+
+    def __init__(self):
+        self.interval = 0
+        self.active = False
+        self._callbacks = []
+
+    def setInterval(self, interval):
+        self.interval = interval
+
+    def connect(self, signal, callback):
+        self._callbacks.append(callback)
+
+    def start(self):
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def isActive(self):
+        return self.active
+
+    def fire(self):
+        for callback in self._callbacks:
+            callback()
+
+
+class QLabel:
+    def __init__(self, text=""):
+        self._text = text
+
+    def setText(self, text):
+        self._text = text
+
+    def text(self):
+        return self._text
+
+
+class QProgressBar:
+    def __init__(self):
+        self._value = 0
+
+    def setValue(self, value):
+        self._value = value
+
+    def value(self):
+        return self._value
+
+
+class _ScriptedLoadableModuleBase:
+    def __init__(self, *args):
+        pass
+
+
+class _VTKObservationMixin:
+    def __init__(self):
+        pass
+
+
+def moduleStandIns(scene=None, cachePath=""):
+    """VolBrainVolumeCalculator.py'nin ice aktardigi slicer/qt/ctk modullerinin karsiliklari.
+
+    Donus: sys.modules'e konacak {modul adi: modul} sozlugu (ornegin
+    unittest.mock.patch.dict ile). slicer.mrmlScene verilen (yoksa yeni) Scene'dir.
+    """
+    slicer = types.ModuleType('slicer')
+    slicer.mrmlScene = scene if scene is not None else Scene()
+    slicer.app = types.SimpleNamespace(cachePath=cachePath)
+    segmentationsLogic = SegmentationsLogic()
+    slicer.modules = types.SimpleNamespace(segmentations=types.SimpleNamespace(logic=lambda: segmentationsLogic))
+    slicer.vtkSegmentationConverter = types.SimpleNamespace(
+        GetSegmentationClosedSurfaceRepresentationName=lambda: CLOSED_SURFACE)
+
+    util = types.ModuleType('slicer.util')
+    util.VTKObservationMixin = _VTKObservationMixin
+    util.arrayFromVolume = lambda node: node.array
+    util.vtkMatrixFromArray = _vtkMatrixFromArray
+    util.arrayFromVTKMatrix = _arrayFromVTKMatrix
+    util.getFirstNodeByName = lambda name: slicer.mrmlScene.GetFirstNodeByName(name)
+    slicer.util = util
+
+    scripted = types.ModuleType('slicer.ScriptedLoadableModule')
+    for name in ('ScriptedLoadableModule', 'ScriptedLoadableModuleWidget', 'ScriptedLoadableModuleLogic',
+                 'ScriptedLoadableModuleTest'):
+        setattr(scripted, name, type(name, (_ScriptedLoadableModuleBase,), {}))
+    slicer.ScriptedLoadableModule = scripted
+
+    qt = types.ModuleType('qt')
+    qt.Qt = types.SimpleNamespace(DisplayRole=0, ToolTipRole=3, TextAlignmentRole=7, AlignRight=0x2,
+                                  AlignVCenter=0x80, Horizontal=1, AscendingOrder=0, DescendingOrder=1)
+    qt.QAbstractTableModel = type('QAbstractTableModel', (_ScriptedLoadableModuleBase,), {})
+    qt.QTimer = QTimer
+    qt.QLabel = QLabel
+    qt.QProgressBar = QProgressBar
+
+    return {'slicer': slicer, 'slicer.util': util, 'slicer.ScriptedLoadableModule': scripted, 'qt': qt,
+            'ctk': types.ModuleType('ctk')}
@@ -0,0 +1,417 @@
+"""volBrain hacim hesaplama hattinin performans kiyaslamasi (benchmark).
+
+Her kategori icin gercek etiket setiyle (getLabelNames) sentetik, beyin
+benzeri etiket haritalari uretir ve hattin her asamasini Slicer olmadan,
+SlicerStandIn uzerinden olcer. Sonuclar JSON olarak yazilir ve kayitli bir
+temel (baseline) ile karsilastirilir.
+
+Kullanim:
+    python VolBrainBenchmark.py --output sonuc.json --baseline temel.json
+    python VolBrainBenchmark.py --save-baseline temel.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+# Lib paketi Slicer olmadan da kullanilabilsin
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from VolBrainVolumeCalculatorLib import LabelSchema
+from VolBrainVolumeCalculatorLib.BackgroundTasks import runConcurrently
+from VolBrainVolumeCalculatorLib.LabelRegistry import getLabelSchema
+from VolBrainVolumeCalculatorLib.LabelStatistics import LabelSpatialIndexBuilder, buildLabelSpatialIndex
+from VolBrainVolumeCalculatorLib.LabelVolumes import buildVolumeResults
+from VolBrainVolumeCalculatorLib.MeshCache import DEFAULT_SURFACE_PRESET, SURFACE_PRESETS, surfacePreset
+from VolBrainVolumeCalculatorLib.NiftiLabelReader import (DEFAULT_MEMORY_BUDGET, NiftiLabelReader,
+                                                          smallestLabelDtype, writeNiftiLabelVolume)
+
+import SlicerStandIn
+
+BENCHMARK_SCHEMA_VERSION = 1
+
+# Olculen asamalar (calculateVolumes sirasiyla)
+PHASES = ("read", "convert", "count", "colors", "segmentation")
+
+DEFAULT_SPACINGS = (1.0, 0.7, 0.5)
+
+# MNI benzeri goruntu alani (mm, I-J-K)
+FIELD_OF_VIEW = (181.0, 217.0, 181.0)
+
+# Voronoi hucrelerinin olusturuldugu kaba izgara (mm)
+_COARSE_CELL = 4.0
+
+
+def makeSyntheticLabelVolume(category, spacing, seed=0, dtype=np.float32):
+    """Kategorinin etiketleriyle (K, J, I) sekilli beyin benzeri etiket haritasi uretir.
+
+    Etiketler elipsoid bir beyin maskesi icinde kaba bir Voronoi bolumlemesiyle
+    dagitilir; boylece her etiket bitisik bir bolge olusturur.
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.array(sorted(getLabelSchema(category).names), dtype=np.int64)
+    columns, rows, slices = (int(round(f / spacing)) for f in FIELD_OF_VIEW)
+
+    # Kaba izgarada her hucreyi en yakin tohuma (etikete) ata
+    coarseShape = tuple(int(np.ceil(f / _COARSE_CELL)) for f in FIELD_OF_VIEW[::-1])
+    seeds = rng.uniform(0.2, 0.8, size=(labels.size, 3)) * coarseShape
+    grid = np.stack(np.meshgrid(*[np.arange(n) + 0.5 for n in coarseShape], indexing='ij'), axis=-1)
+    nearest = np.empty(coarseShape, dtype=np.int64)
+    bestDistance = np.full(coarseShape, np.inf)
+    for index, point in enumerate(seeds):
+        distance = np.sum((grid - point) ** 2, axis=-1)
+        closer = distance < bestDistance
+        nearest[closer] = index
+        bestDistance[closer] = distance[closer]
+    coarse = labels[nearest]
+
+    # Kaba hucreleri hedef cozunurluge tasi ve elipsoid disini sifirla
+    coarseIndex = [np.minimum((np.arange(n) * spacing / _COARSE_CELL).astype(np.int64), c - 1)
+                   for n, c in zip((slices, rows, columns), coarseShape)]
+    radius = [np.linspace(-1.0, 1.0, n) / 0.9 for n in (slices, rows, columns)]
+    inPlane = radius[1][:, None] ** 2 + radius[2][None, :] ** 2
+    array = np.zeros((slices, rows, columns), dtype=dtype)
+    for k in range(slices):
+        section = coarse[coarseIndex[0][k]][np.ix_(coarseIndex[1], coarseIndex[2])]
+        array[k] = np.where(inPlane <= 1.0 - radius[0][k] ** 2, section, 0)
+    return array
+
+
+def syntheticVolumePath(workDir, category, spacing, seed=0, dtype=np.float32):
+    """Sentetik dosyayi workDir altinda (yoksa) olusturur ve yolunu dondurur."""
+    fileName = f"native_{category}_synthetic_{spacing:g}mm_s{seed}_{np.dtype(dtype).name}.nii.gz"
+    filePath = os.path.join(workDir, fileName)
+    if not os.path.exists(filePath):
+        os.makedirs(workDir, exist_ok=True)
+        array = makeSyntheticLabelVolume(category, spacing, seed, dtype)
+        writeNiftiLabelVolume(filePath + '.tmp.gz', array, spacing=(spacing,) * 3)
+        os.replace(filePath + '.tmp.gz', filePath)
+    return filePath
+
+
+class _PhaseTimer:
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args):
+        self.timings[self.name] = time.perf_counter() - self.start
+
+
+def runPipeline(filePath, category, scene, segmentationsLogic, memoryBudget=DEFAULT_MEMORY_BUDGET):
+    """calculateVolumes asamalarini stand-in sahne uzerinde calistirir.
+
+    Donus: (asama sureleri {asama: saniye}, bilgi sozlugu)
+    """
+    timings = {}
+    nodeName = f"volBrain_{category}"
+
+    # Okuma: sikistirmayi acip dosyadaki veri tipinde bellege al
+    with _PhaseTimer(timings, "read"):
+        with NiftiLabelReader(filePath, memoryBudget) as reader:
+            header = reader.header
+            raw = np.empty(header.shape, dtype=header.dtype.newbyteorder('='))
+            for start, slab in reader.iterSlabs():
+                raw[start:start + slab.shape[0]] = slab
+
+    # Etiket donusumu: tam sayi kontrolu ve en kucuk etiket tipine indirme
+    with _PhaseTimer(timings, "convert"):
+        if raw.dtype.kind == 'f' and not np.array_equal(raw, np.trunc(raw)):
+            raise ValueError("Etiket haritasi tam sayi olmayan degerler iceriyor: %s" % filePath)
+        labelArray = raw.astype(smallestLabelDtype(raw.min(), raw.max()))
+        del raw
+        labelNode = scene.AddNewNodeByClass('vtkMRMLLabelMapVolumeNode')
+        labelNode.SetName(f"{nodeName}_labels")
+        labelNode.SetArray(labelArray, header.ijkToRAS)
+
+    # Sayim: prepareLabelVolume ile ayni tek gecisli sayim + konum indeksi
+    with _PhaseTimer(timings, "count"):
+        indexBuilder = LabelSpatialIndexBuilder(labelArray.shape)
+        indexBuilder.update(labelArray)
+        labels, counts = indexBuilder.result()
+        foreground = labels > 0
+        uniqueLabels = labels[foreground]
+        results = buildVolumeResults(category, uniqueLabels, counts[foreground], header.voxelVolume)
+
+    # Renk tablosu
+    with _PhaseTimer(timings, "colors"):
+        schema = getLabelSchema(category)
+        colorNode = scene.CreateNodeByClass('vtkMRMLColorTableNode')
+        colorNode.SetName(f"{nodeName}_ColorTable")
+        colorNode.SetTypeToUser()
+        colorNode.NamesInitialisedOn()
+        size = int(np.max(uniqueLabels)) + 1
+        colorNode.SetNumberOfColors(size)
+        colorNode.GetLookupTable().SetTable(np.round(schema.colorLookupTable(size) * 255).astype(np.uint8))
+        colorNode.SetColorName(0, "Background")
+        for data in results.values():
+            colorNode.SetColorName(data["label_id"], data["name"])
+        scene.AddNode(colorNode)
+        labelNode.CreateDefaultDisplayNodes()
+        labelNode.GetDisplayNode().SetAndObserveColorNodeID(colorNode.GetID())
+
+    # Segmentasyona aktarma ve segmentleri adlandirma
+    with _PhaseTimer(timings, "segmentation"):
+        segmentationNode = scene.AddNewNodeByClass('vtkMRMLSegmentationNode')
+        segmentationNode.SetName(f"{nodeName}_Segmentation")
+        segmentationsLogic.ImportLabelmapToSegmentationNode(labelNode, segmentationNode)
+        segmentation = segmentationNode.GetSegmentation()
+        segmentColors = schema.colorsFor(uniqueLabels).tolist()
+        for labelInt, labelName, color in zip(uniqueLabels.tolist(), schema.labelNames(uniqueLabels), segmentColors):
+            segmentId = segmentation.GetSegmentIdBySegmentName(f"Label_{labelInt}")
+            if segmentId:
+                segment = segmentation.GetSegment(segmentId)
+                segment.SetName(labelName)
+                segment.SetColor(*color)
+
+    info = {
+        "shape": list(header.shape),
+        "voxels": int(np.prod(header.shape)),
+        "labels": int(uniqueLabels.size),
+        "file_bytes": os.path.getsize(filePath),
+    }
+    return timings, info
+
+
+def runStreamedPipeline(filePath, memoryBudget=DEFAULT_MEMORY_BUDGET):
+    """Eklentinin kullandigi birlesik yol: okuma, donusum ve sayim tek geciste."""
+    start = time.perf_counter()
+    with NiftiLabelReader(filePath, memoryBudget) as reader:
+        indexBuilder = LabelSpatialIndexBuilder(reader.header.shape)
+        reader.readLabelVolume(histogram=indexBuilder)
+    return time.perf_counter() - start
+
+
+def runConcurrencyBenchmark(categories=None, spacings=DEFAULT_SPACINGS, repeat=3, workDir=None,
+                            dtype=np.float32, memoryBudget=DEFAULT_MEMORY_BUDGET, maxWorkers=None, log=print):
+    """Kategorilerin sirayla ve is parcacigi havuzunda birlikte okunmasini karsilastirir.
+
+    Eklentideki "Kategorileri Paralel Oku" secenegiyle ayni bolusum kullanilir:
+    bellek butcesi iscilere paylastirilir. Donus: cozunurluk basina
+    {spacing, workers, serial, concurrent, speedup}
+    """
+    categories = categories or list(LabelSchema.CATEGORIES)
+    workDir = workDir or os.path.join(os.path.expanduser('~'), '.cache', 'VolBrainVolumeCalculator', 'benchmark')
+    workers = min(maxWorkers or os.cpu_count() or 1, len(categories))
+
+    results = []
+    for spacing in spacings:
+        files = [syntheticVolumePath(workDir, category, spacing, dtype=dtype) for category in categories]
+        serial = []
+        concurrent = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for filePath in files:
+                runStreamedPipeline(filePath, memoryBudget)
+            serial.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            budget = max(memoryBudget // workers, 1)
+            for _, _, error in runConcurrently(lambda path: runStreamedPipeline(path, budget), files, workers):
+                if error is not None:
+                    raise error
+            concurrent.append(time.perf_counter() - start)
+        result = {
+            "spacing": spacing,
+            "categories": len(categories),
+            "workers": workers,
+            "serial": min(serial),
+            "concurrent": min(concurrent),
+            "speedup": min(serial) / min(concurrent),
+        }
+        results.append(result)
+        if log:
+            log(f"paralel {spacing:g} mm  {workers} isci  sirali={result['serial']:.3f}s  "
+                f"paralel={result['concurrent']:.3f}s  hizlanma=x{result['speedup']:.2f}")
+    return results
+
+
+def runSurfaceBenchmark(categories=None, spacings=DEFAULT_SPACINGS, repeat=1, preset=DEFAULT_SURFACE_PRESET,
+                        log=print):
+    """Tum etiketlerin yuzeylerini etiket basina (kirpilmis) ve tek geciste cikarmayi karsilastirir.
+
+    Her iki yol da yuzeyleri MeshCache dizileri olarak uretir (eklentinin
+    disk onbellegine yazdigi bicim). VTK gerektirir. Donus: kategori/cozunurluk
+    basina {category, spacing, labels, triangles, perLabel, multiLabel, speedup}
+    """
+    from VolBrainVolumeCalculatorLib.SurfaceExtraction import (croppedLabelImage, extractLabelSurface,
+                                                               extractLabelSurfaceArrays, polyDataToArrays)
+    categories = categories or list(LabelSchema.CATEGORIES)
+    parameters = surfacePreset(preset)
+
+    results = []
+    for spacing in spacings:
+        ijkToRAS = np.diag([spacing, spacing, spacing, 1.0])
+        for category in categories:
+            array = makeSyntheticLabelVolume(category, spacing, dtype=np.int16)
+            perLabel = []
+            multiLabel = []
+            for _ in range(repeat):
+                # Eklentide konum indeksi okuma sirasinda zaten olusur; sureye katilmaz
+                spatialIndex = buildLabelSpatialIndex(array)
+                labels = [int(label) for label in spatialIndex.labels() if label > 0]
+                triangles = 0
+                start = time.perf_counter()
+                for label in labels:
+                    imageData, cropToIJK = croppedLabelImage(array, spatialIndex.region(label), label)
+                    arrays = polyDataToArrays(extractLabelSurface(imageData, 1, np.dot(ijkToRAS, cropToIJK),
+                                                                  **parameters))
+                    triangles += len(arrays["offsets"]) - 1
+                perLabel.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                extractLabelSurfaceArrays(array, labels, ijkToRAS, **parameters)
+                multiLabel.append(time.perf_counter() - start)
+            result = {
+                "category": category,
+                "spacing": spacing,
+                "preset": preset,
+                "labels": len(labels),
+                "triangles": triangles,
+                "perLabel": min(perLabel),
+                "multiLabel": min(multiLabel),
+                "speedup": min(perLabel) / min(multiLabel),
+            }
+            results.append(result)
+            if log:
+                log(f"yuzey {category:>10} {spacing:g} mm  {result['labels']} etiket  "
+                    f"etiket basina={result['perLabel']:.3f}s  tek gecis={result['multiLabel']:.3f}s  "
+                    f"hizlanma=x{result['speedup']:.2f}")
+    return results
+
+
+def runBenchmarks(categories=None, spacings=DEFAULT_SPACINGS, repeat=3, workDir=None,
+                  dtype=np.float32, memoryBudget=DEFAULT_MEMORY_BUDGET, log=print):
+    """Tum kategori/cozunurluk ciftlerini olcer; her asama icin en iyi sureyi raporlar."""
+    categories = categories or list(LabelSchema.CATEGORIES)
+    workDir = workDir or os.path.join(os.path.expanduser('~'), '.cache', 'VolBrainVolumeCalculator', 'benchmark')
+
+    cases = []
+    for spacing in spacings:
+        for category in categories:
+            filePath = syntheticVolumePath(workDir, category, spacing, dtype=dtype)
+            best = {}
+            streamed = []
+            for _ in range(repeat):
+                scene = SlicerStandIn.Scene()
+                timings, info = runPipeline(filePath, category, scene, SlicerStandIn.SegmentationsLogic(), memoryBudget)
+                scene.Clear()
+                for phase, seconds in timings.items():
+                    best[phase] = min(best.get(phase, seconds), seconds)
+                streamed.append(runStreamedPipeline(filePath, memoryBudget))
+            case = {
+                "category": category,
+                "spacing": spacing,
+                **info,
+                "phases": {phase: best[phase] for phase in PHASES},
+                "total": sum(best.values()),
+                "streamed": min(streamed),
+            }
+            cases.append(case)
+            if log:
+                log(f"{category:>10} {spacing:g} mm  {info['voxels']:>10} voksel  "
+                    + "  ".join(f"{phase}={case['phases'][phase]:.3f}s" for phase in PHASES)
+                    + f"  akis={case['streamed']:.3f}s")
+
+    return {
+        "schema": BENCHMARK_SCHEMA_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec='seconds'),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {"repeat": repeat, "dtype": np.dtype(dtype).name, "memory_budget": memoryBudget},
+        "cases": cases,
+    }
+
+
+def compareToBaseline(report, baseline, tolerance=0.25, minDelta=0.005):
+    """Raporu temel ile karsilastirir.
+
+    Bir asama, sure temelin (1 + tolerance) katini ve en az minDelta saniye
+    asarsa gerileme sayilir. Donus: karsilastirma satirlari listesi; her satir
+    {category, spacing, phase, baseline, current, ratio, regression}.
+    """
+    baselineCases = {(c["category"], c["spacing"]): c for c in baseline.get("cases", [])}
+    comparisons = []
+    for case in report["cases"]:
+        reference = baselineCases.get((case["category"], case["spacing"]))
+        if reference is None:
+            continue
+        measured = dict(case["phases"], total=case["total"], streamed=case["streamed"])
+        expected = dict(reference["phases"], total=reference["total"], streamed=reference.get("streamed"))
+        for phase, current in measured.items():
+            previous = expected.get(phase)
+            if not previous:
+                continue
+            comparisons.append({
+                "category": case["category"],
+                "spacing": case["spacing"],
+                "phase": phase,
+                "baseline": previous,
+                "current": current,
+                "ratio": current / previous,
+                "regression": current > previous * (1.0 + tolerance) and current - previous > minDelta,
+            })
+    return comparisons
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="volBrain hacim hattinin performans kiyaslamasi")
+    parser.add_argument('--categories', nargs='+', choices=list(LabelSchema.CATEGORIES))
+    parser.add_argument('--spacings', nargs='+', type=float, default=list(DEFAULT_SPACINGS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--dtype', default='float32', help="sentetik dosyalarin veri tipi")
+    parser.add_argument('--work-dir', help="sentetik hacimlerin saklandigi klasor")
+    parser.add_argument('--output', help="sonuc JSON dosyasi")
+    parser.add_argument('--baseline', help="karsilastirilacak temel JSON dosyasi")
+    parser.add_argument('--save-baseline', help="sonuclari yeni temel olarak kaydet")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="izin verilen goreli yavaslama")
+    parser.add_argument('--concurrency', action='store_true',
+                        help="kategorilerin sirali ve paralel okunmasini da karsilastir")
+    parser.add_argument('--workers', type=int, help="paralel karsilastirmadaki isci sayisi")
+    parser.add_argument('--surfaces', action='store_true',
+                        help="yuzeylerin etiket basina ve tek geciste cikarilmasini da karsilastir (VTK gerekir)")
+    parser.add_argument('--surface-preset', choices=list(SURFACE_PRESETS), default=DEFAULT_SURFACE_PRESET)
+    args = parser.parse_args(argv)
+
+    report = runBenchmarks(args.categories, args.spacings, args.repeat, args.work_dir, np.dtype(args.dtype))
+    if args.concurrency:
+        report["concurrency"] = runConcurrencyBenchmark(args.categories, args.spacings, args.repeat, args.work_dir,
+                                                        np.dtype(args.dtype), maxWorkers=args.workers)
+    if args.surfaces:
+        report["surfaces"] = runSurfaceBenchmark(args.categories, args.spacings, preset=args.surface_preset)
+
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            comparisons = compareToBaseline(report, json.load(f), args.tolerance)
+        report["comparison"] = {"baseline": os.path.abspath(args.baseline), "tolerance": args.tolerance,
+                                "phases": comparisons}
+        regressions = [c for c in comparisons if c["regression"]]
+        for c in regressions:
+            print(f"GERILEME: {c['category']} {c['spacing']:g} mm {c['phase']}: "
+                  f"{c['baseline']:.3f}s -> {c['current']:.3f}s (x{c['ratio']:.2f})")
+        if not regressions:
+            print(f"Temelle karsilastirildi: {len(comparisons)} olcum, gerileme yok")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
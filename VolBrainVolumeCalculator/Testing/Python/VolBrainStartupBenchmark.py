@@ -0,0 +1,240 @@
+"""volBrain modulunun acilis maliyetinin olcumu (ice aktarma ve arayuz kurulumu).
+
+Duz Python ile her olcum taze bir surecte yapilir: Lib paketi, modulun ust
+seviyede ice aktardigi Lib modulleri ve komut satiri araci. Slicer'in zaten
+yukledigi numpy once yuklenir, boylece yalnizca bu modulun maliyeti olculur.
+Modul acilisinda yuklenmemesi gereken moduller (DEFERRED_MODULES) yuklenirse
+bu da gerileme sayilir.
+
+Slicer icinde calistirilirsa modulun kendisinin ice aktarilmasi, arayuz
+kurulumu (setup) ve 3D kontrol panelinin ilk olusturulmasi da olculur.
+
+Kullanim:
+    python VolBrainStartupBenchmark.py --save-baseline startup.json
+    python VolBrainStartupBenchmark.py --baseline startup.json
+    Slicer --no-main-window --python-script VolBrainStartupBenchmark.py --baseline startup.json
+"""
+
+import argparse
+import ast
+import datetime
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+STARTUP_SCHEMA_VERSION = 1
+
+MODULE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+MODULE_PATH = os.path.join(MODULE_DIR, "VolBrainVolumeCalculator.py")
+LIB_PACKAGE = "VolBrainVolumeCalculatorLib"
+
+# Modul acilisinda degil, ilgili islem ilk kez kullanildiginda yuklenmesi gerekenler
+DEFERRED_MODULES = (
+    LIB_PACKAGE + ".BackgroundTasks",
+    LIB_PACKAGE + ".CohortBatch",
+    LIB_PACKAGE + ".CommandLine",
+    LIB_PACKAGE + ".GzipIndex",
+    LIB_PACKAGE + ".LabelStatistics",
+    LIB_PACKAGE + ".LabelVolumes",
+    LIB_PACKAGE + ".MeshCache",
+    LIB_PACKAGE + ".NiftiLabelReader",
+    LIB_PACKAGE + ".ResultCache",
+    LIB_PACKAGE + ".ResultExport",
+    LIB_PACKAGE + ".SurfaceExtraction",
+    LIB_PACKAGE + ".VisibilityGroups",
+    LIB_PACKAGE + ".WatchFolder",
+    "concurrent.futures.process",
+    "indexed_gzip",
+    "pyarrow",
+)
+
+# Taze surecte calisan olcum: onceden yuklenenler, sonra olculen ice aktarmalar
+_MEASURE_SCRIPT = """
+import importlib, json, sys, time
+sys.path.insert(0, {moduleDir!r})
+for name in {preload!r}:
+    importlib.import_module(name)
+skipped = []
+start = time.perf_counter()
+for name in {modules!r}:
+    try:
+        importlib.import_module(name)
+    except ImportError as e:
+        skipped.append([name, str(e)])
+seconds = time.perf_counter() - start
+json.dump({{"seconds": seconds, "skipped": skipped, "modules": sorted(sys.modules)}}, sys.stdout)
+"""
+
+
+def moduleStartupImports(modulePath=MODULE_PATH):
+    """Modul dosyasinin ust seviyede ice aktardigi Lib modulleri (kaynak sirasiyla)."""
+    with open(modulePath, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), modulePath)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module and node.module.split(".")[0] == LIB_PACKAGE:
+            if node.module not in modules:
+                modules.append(node.module)
+        elif isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names
+                           if alias.name.split(".")[0] == LIB_PACKAGE and alias.name not in modules)
+    return modules
+
+
+def measureImport(modules, preload=("numpy",), repeat=5, python=None):
+    """modules'u taze surecte ice aktarma suresi (en kucugu, saniye), yuklenen moduller ve atlananlar."""
+    script = _MEASURE_SCRIPT.format(moduleDir=MODULE_DIR, preload=tuple(preload), modules=tuple(modules))
+    times = []
+    for _ in range(max(1, repeat)):
+        output = subprocess.run([python or sys.executable, "-c", script], check=True, capture_output=True,
+                                text=True).stdout
+        result = json.loads(output)
+        times.append(result["seconds"])
+    return {"seconds": min(times), "skipped": result["skipped"], "modules": result["modules"]}
+
+
+def deferredModulesLoaded(loadedModules, deferred=DEFERRED_MODULES):
+    loaded = set(loadedModules)
+    return [name for name in deferred if name in loaded]
+
+
+def runImportBenchmarks(repeat=5, log=print):
+    """Duz Python olcumleri: {olcum: {"seconds", ...}}."""
+    cases = {
+        "lib": [LIB_PACKAGE],
+        "moduleImports": moduleStartupImports(),
+        "commandLine": [LIB_PACKAGE + ".CommandLine"],
+    }
+    timings = {}
+    for name, modules in cases.items():
+        result = measureImport(modules, repeat=repeat)
+        timings[name] = {"seconds": result["seconds"], "skipped": [m for m, _ in result["skipped"]]}
+        if name == "moduleImports":
+            timings[name]["deferredLoaded"] = deferredModulesLoaded(result["modules"])
+            timings[name]["libModules"] = sorted(m for m in result["modules"] if m.startswith(LIB_PACKAGE + "."))
+        if log:
+            log(f"{name}: {result['seconds'] * 1000:.1f} ms")
+    return timings
+
+
+def runSlicerBenchmarks(repeat=5, log=print):
+    """Slicer icinde modul ice aktarma, setup ve 3D panelinin ilk olusturulma sureleri."""
+    import qt
+    import slicer
+
+    timings = {}
+    if MODULE_DIR not in sys.path:
+        sys.path.insert(0, MODULE_DIR)
+    importTimes = []
+    for _ in range(max(1, repeat)):
+        for name in [m for m in sys.modules if m == "VolBrainVolumeCalculator" or m.startswith(LIB_PACKAGE)]:
+            del sys.modules[name]
+        start = time.perf_counter()
+        module = importlib.import_module("VolBrainVolumeCalculator")
+        importTimes.append(time.perf_counter() - start)
+    timings["moduleImport"] = {"seconds": min(importTimes),
+                               "deferredLoaded": deferredModulesLoaded(sys.modules)}
+
+    setupTimes = []
+    panelTimes = []
+    for _ in range(max(1, repeat)):
+        parent = slicer.qMRMLWidget()
+        parent.setLayout(qt.QVBoxLayout())
+        parent.setMRMLScene(slicer.mrmlScene)
+        widget = module.VolBrainVolumeCalculatorWidget(parent)
+        start = time.perf_counter()
+        widget.setup()
+        setupTimes.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        widget.ensureVisualizationControls()
+        panelTimes.append(time.perf_counter() - start)
+        widget.cleanup()
+        parent.deleteLater()
+    timings["widgetSetup"] = {"seconds": min(setupTimes)}
+    timings["visualizationPanel"] = {"seconds": min(panelTimes)}
+    if log:
+        for name in ("moduleImport", "widgetSetup", "visualizationPanel"):
+            log(f"{name}: {timings[name]['seconds'] * 1000:.1f} ms")
+    return timings
+
+
+def runStartupBenchmarks(repeat=5, inSlicer=None, log=print):
+    if inSlicer is None:
+        inSlicer = hasattr(sys.modules.get('slicer'), 'app')
+    timings = runImportBenchmarks(repeat, log)
+    if inSlicer:
+        timings.update(runSlicerBenchmarks(repeat, log))
+    return {
+        "schema": STARTUP_SCHEMA_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "timings": timings,
+    }
+
+
+def compareToBaseline(report, baseline, tolerance=0.5, minDelta=0.005):
+    """Raporu temel ile karsilastirir.
+
+    Bir olcum, sure temelin (1 + tolerance) katini ve en az minDelta saniye
+    asarsa ya da acilista ertelenmesi gereken bir modul yuklenmisse gerileme
+    sayilir. Donus: {name, baseline, current, ratio, deferredLoaded, regression} listesi.
+    """
+    expected = baseline.get("timings", {})
+    comparisons = []
+    for name, timing in report["timings"].items():
+        current = timing["seconds"]
+        previous = expected.get(name, {}).get("seconds")
+        slower = bool(previous) and current > previous * (1.0 + tolerance) and current - previous > minDelta
+        deferredLoaded = timing.get("deferredLoaded", [])
+        comparisons.append({
+            "name": name,
+            "baseline": previous,
+            "current": current,
+            "ratio": current / previous if previous else None,
+            "deferredLoaded": deferredLoaded,
+            "regression": slower or bool(deferredLoaded),
+        })
+    return comparisons
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="volBrain modulunun acilis suresi olcumu")
+    parser.add_argument('--repeat', type=int, default=5, help="her olcumun tekrar sayisi (en kucugu alinir)")
+    parser.add_argument('--output', help="sonuc JSON dosyasi")
+    parser.add_argument('--baseline', help="karsilastirilacak temel JSON dosyasi")
+    parser.add_argument('--save-baseline', help="sonuclari yeni temel olarak kaydet")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="izin verilen goreli yavaslama")
+    args = parser.parse_args(argv)
+
+    report = runStartupBenchmarks(args.repeat)
+    comparisons = compareToBaseline(report, {}, args.tolerance)
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            comparisons = compareToBaseline(report, json.load(f), args.tolerance)
+        report["comparison"] = {"baseline": os.path.abspath(args.baseline), "tolerance": args.tolerance,
+                                "timings": comparisons}
+    regressions = [c for c in comparisons if c["regression"]]
+    for c in regressions:
+        if c["deferredLoaded"]:
+            print(f"GERILEME: {c['name']} acilista yukleniyor: {', '.join(c['deferredLoaded'])}")
+        else:
+            print(f"GERILEME: {c['name']}: {c['baseline'] * 1000:.1f} ms -> {c['current'] * 1000:.1f} ms "
+                  f"(x{c['ratio']:.2f})")
+    if args.baseline and not regressions:
+        print(f"Temelle karsilastirildi: {len(comparisons)} olcum, gerileme yok")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
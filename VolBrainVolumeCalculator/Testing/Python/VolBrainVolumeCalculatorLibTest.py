@@ -0,0 +1,1232 @@
+import importlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+# Lib paketi Slicer olmadan da test edilebilsin
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from VolBrainVolumeCalculatorLib import LabelSchema
+from VolBrainVolumeCalculatorLib.BackgroundTasks import (BackgroundTask, CancellationToken, OperationCancelled,
+                                                         runConcurrently)
+from VolBrainVolumeCalculatorLib.CohortBatch import findVolBrainFiles, runCohortBatch, writeLongTable
+from VolBrainVolumeCalculatorLib.GzipIndex import GzipIndexStore, _IndexedGzipExporter, _readCoverage
+from VolBrainVolumeCalculatorLib.Instrumentation import Profiler, currentRSS
+from VolBrainVolumeCalculatorLib.LabelRegistry import LabelRegistry, getLabelSchema
+from VolBrainVolumeCalculatorLib.LabelStatistics import (LabelHistogram, LabelSpatialIndexBuilder, buildLabelSpatialIndex,
+                                                         computeJointVoxelCounts, computeLabelVoxelCounts)
+from VolBrainVolumeCalculatorLib.LabelVolumes import (buildVolumeResults, canSampleSlices, computeLabelComposition,
+                                                      computeLabelVolumes, iterProgressiveVolumes, previewSlabSlices,
+                                                      previewSliceIndices)
+from VolBrainVolumeCalculatorLib.MeshCache import SURFACE_PRESETS, MeshCache, meshCacheKey, surfacePreset
+from VolBrainVolumeCalculatorLib.NiftiLabelReader import NiftiLabelReader, writeNiftiLabelVolume
+from VolBrainVolumeCalculatorLib import CommandLine, Instrumentation, ResultExport
+from VolBrainVolumeCalculatorLib import WatchFolder
+from VolBrainVolumeCalculatorLib.WatchFolder import FolderWatcher, ProcessedStore
+try:
+    from VolBrainVolumeCalculatorLib import SurfaceExtraction
+except ImportError:
+    SurfaceExtraction = None
+from VolBrainVolumeCalculatorLib.ResultCache import ResultCache
+from VolBrainVolumeCalculatorLib.ResultTable import ResultTable, ResultTableView
+from VolBrainVolumeCalculatorLib.VisibilityGroups import VISIBILITY_GROUPS, labelGroups, schemaGroups
+
+import SlicerStandIn
+import VolBrainBenchmark
+import VolBrainStartupBenchmark
+
+
+class LabelStatisticsTest(unittest.TestCase):
+    def test_counts_match_unique(self):
+        """Histogram sayimlari np.unique ile ayni olmali"""
+        rng = np.random.default_rng(0)
+        for dtype in (np.uint8, np.int16, np.uint16, np.int32, np.float32):
+            array = rng.choice([0, 4, 11, 47, 207], size=(7, 9, 11)).astype(dtype)
+            labels, counts = computeLabelVoxelCounts(array)
+            expectedLabels, expectedCounts = np.unique(array, return_counts=True)
+            np.testing.assert_array_equal(labels, expectedLabels.astype(np.int64))
+            np.testing.assert_array_equal(counts, expectedCounts)
+
+    def test_negative_and_large_labels(self):
+        """Negatif ve cok buyuk etiketler dogru sayilmali"""
+        array = np.array([-5, -5, 0, 3, 2 ** 30, 2 ** 30, 2 ** 30], dtype=np.int64)
+        labels, counts = computeLabelVoxelCounts(array)
+        np.testing.assert_array_equal(labels, [-5, 0, 3, 2 ** 30])
+        np.testing.assert_array_equal(counts, [2, 1, 1, 3])
+
+    def test_chunked_updates(self):
+        """Parca parca eklenen sayimlar tek seferlik sonuca esit olmali"""
+        array = np.arange(-20, 300, dtype=np.int16).reshape(8, 40)
+        histogram = LabelHistogram()
+        for chunk in array:
+            histogram.update(chunk)
+        labels, counts = histogram.result()
+        np.testing.assert_array_equal(labels, np.arange(-20, 300))
+        self.assertTrue(np.all(counts == 1))
+        self.assertEqual(histogram.voxelCount, array.size)
+
+    def test_joint_counts(self):
+        """Ortak sayim matrisi cift basina maske sayimina esit olmali"""
+        rng = np.random.default_rng(1)
+        structures = rng.choice([0, 47, 48, 100], size=(6, 7, 8)).astype(np.uint8)
+        tissues = rng.choice([0, 1, 2, 3], size=(6, 7, 8)).astype(np.uint8)
+        labels, byLabels, matrix = computeJointVoxelCounts(structures, tissues)
+        np.testing.assert_array_equal(labels, [0, 47, 48, 100])
+        np.testing.assert_array_equal(byLabels, [0, 1, 2, 3])
+        for i, a in enumerate(labels):
+            for j, b in enumerate(byLabels):
+                self.assertEqual(matrix[i, j], np.sum((structures == a) & (tissues == b)))
+
+    def test_spatial_index(self):
+        """Sinir kutusu, sayim ve merkez maske hesabina esit olmali; bloklar fark etmemeli"""
+        rng = np.random.default_rng(2)
+        array = rng.choice([0, 0, 0, 3, 47, 300], size=(9, 12, 10)).astype(np.uint16)
+        array[array == 47] = 0
+        array[3:6, 5:8, 7:9] = 47
+        index = buildLabelSpatialIndex(array)
+        builder = LabelSpatialIndexBuilder(array.shape)
+        for start in range(0, array.shape[0], 4):
+            builder.update(array[start:start + 4])
+        self.assertEqual(index.labels(), builder.index().labels())
+        np.testing.assert_array_equal(builder.result()[0], [0, 3, 47, 300])
+
+        for label in (3, 47, 300):
+            k, j, i = np.nonzero(array == label)
+            region = index.region(label)
+            self.assertEqual(region.voxelCount, k.size)
+            self.assertEqual(region.bounds, ((k.min(), k.max()), (j.min(), j.max()), (i.min(), i.max())))
+            np.testing.assert_allclose(region.centroid, (i.mean(), j.mean(), k.mean()))
+        self.assertEqual(index.region(47).slices(), (slice(3, 6), slice(5, 8), slice(7, 9)))
+        self.assertNotIn(5, index)
+
+    def test_spatial_index_sparse_labels(self):
+        """Uc degerli etiket numaralari konum indeksini genisletmemeli; sayimlar histogramla ayni olmali"""
+        array = np.zeros((6, 8, 7), dtype=np.uint32)
+        array[1:3, 2:5, 1:4] = 4
+        array[4, 6, 5] = 40000
+        array[5, 0:2, 0] = 1 << 25
+        for dtype in (np.uint32, np.float32):
+            builder = LabelSpatialIndexBuilder(array.shape)
+            builder.update(array[:3].astype(dtype))
+            builder.update(array[3:].astype(dtype))
+            labels, counts = builder.result()
+            expectedLabels, expectedCounts = computeLabelVoxelCounts(array)
+            np.testing.assert_array_equal(labels, expectedLabels)
+            np.testing.assert_array_equal(counts, expectedCounts)
+            index = builder.index()
+            self.assertEqual(index.labels(), [0, 4, 40000, 1 << 25])
+            self.assertEqual(index.region(40000).bounds, ((4, 4), (6, 6), (5, 5)))
+            self.assertEqual(index.region(1 << 25).bounds, ((5, 5), (0, 1), (0, 0)))
+            self.assertEqual(index.region(4).voxelCount, 18)
+        with self.assertRaises(ValueError):
+            LabelSpatialIndexBuilder((1, 2, 2)).update(np.array([[[0.5, 1.0], [1.0, 1.0]]]))
+
+
+class LabelRegistryTest(unittest.TestCase):
+    def test_builtin_schema_lookup_tables(self):
+        """Derlenmis sema LabelSchema ile ayni isim/renkleri vermeli; bilinmeyen renkler sabit olmali"""
+        schema = getLabelSchema("structures")
+        self.assertIs(schema, getLabelSchema("structures"))
+        self.assertEqual(schema.names, LabelSchema.getLabelNames("structures"))
+        self.assertEqual(schema.labelNames([47, 999]), ["Right_Hippocampus", "Label_999"])
+        table = schema.colorLookupTable(300)
+        self.assertIs(table, schema.colorLookupTable(300))
+        np.testing.assert_allclose(table[47], list(LabelSchema.getColorTable("structures")[47]) + [1.0])
+        self.assertEqual(table[0, 3], 0.0)
+        # Semada olmayan etiketler: kayittan bagimsiz, tekrarlanabilir, birbirinden farkli
+        unknown = LabelRegistry().get("structures").colorsFor([250, 251, 999])
+        np.testing.assert_allclose(unknown[:2], table[250:252, :3])
+        self.assertGreater(np.abs(unknown[0] - unknown[1]).sum(), 0.1)
+        self.assertTrue(((unknown >= 0) & (unknown <= 1)).all())
+
+    def test_user_atlases(self):
+        """JSON ve CSV atlaslari kategori olarak kaydedilip hacim sonuclarinda kullanilmali"""
+        registry = LabelRegistry()
+        with tempfile.TemporaryDirectory() as tempDir:
+            jsonPath = os.path.join(tempDir, "myatlas.json")
+            with open(jsonPath, 'w') as f:
+                json.dump({"labels": {"1": {"name": "A", "color": [255, 0, 0]}, "2": "B"}}, f)
+            schema = registry.loadAtlas(jsonPath)
+            csvPath = os.path.join(tempDir, "other.csv")
+            with open(csvPath, 'w') as f:
+                f.write("label_id,name,r,g,b\n5,E,0,0.5,1\n7,G,,,\n")
+            other = registry.loadAtlas(csvPath, "csvatlas")
+        self.assertEqual(registry.categories()[-2:], ["csvatlas", "myatlas"])
+        self.assertEqual(schema.labelNames([1, 2, 3]), ["A", "B", "Label_3"])
+        np.testing.assert_allclose(schema.colorsFor([1])[0], (1.0, 0.0, 0.0))
+        np.testing.assert_allclose(other.colorsFor([5])[0], (0.0, 0.5, 1.0))
+        self.assertEqual(other.name(7), "G")
+        self.assertNotEqual(registry.schemaVersion("myatlas"), registry.schemaVersion("csvatlas"))
+        results = buildVolumeResults("myatlas", np.array([1, 2]), np.array([3, 4]), 1.0, schema.names)
+        self.assertEqual(sorted(results), ["myatlas_1_A", "myatlas_2_B"])
+
+
+class NiftiLabelReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.array = np.zeros((10, 6, 8), dtype=np.uint8)
+        self.array[2:5, 1:4, 2:6] = 47
+        self.array[6:9, :, :3] = 48
+        self.filePath = os.path.join(self.tempDir.name, 'native_structures_test.nii.gz')
+        writeNiftiLabelVolume(self.filePath, self.array, spacing=(0.5, 0.5, 2.0))
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_slabs_cover_volume(self):
+        """Kucuk bellek butcesiyle okunan bloklar hacmin tamamini vermeli"""
+        with NiftiLabelReader(self.filePath, memoryBudget=100) as reader:
+            self.assertEqual(reader.spacing, (0.5, 0.5, 2.0))
+            self.assertEqual(reader.slicesPerSlab(), 2)
+            slabs = [slab.copy() for _, slab in reader.iterSlabs()]
+        np.testing.assert_array_equal(np.concatenate(slabs), self.array)
+
+    def test_memory_mapped_uncompressed(self):
+        """Sikistirilmamis dosya kopyasiz eslenmeli ve akisli okumayla ayni sonucu vermeli"""
+        array = self.array.astype(np.int16) * 3
+        plainPath = os.path.join(self.tempDir.name, 'native_structures_plain.nii')
+        writeNiftiLabelVolume(plainPath, array, spacing=(0.5, 0.5, 2.0))
+        with NiftiLabelReader(plainPath, memoryBudget=100) as reader:
+            self.assertTrue(reader.memoryMapped)
+            voxels = reader.voxelArray()
+            self.assertFalse(voxels.flags.writeable)
+            np.testing.assert_array_equal(voxels, array)
+            slabs = [slab for _, slab in reader.iterSlabs(start=3, stop=8)]
+            self.assertTrue(all(np.shares_memory(slab, voxels) for slab in slabs))
+            np.testing.assert_array_equal(np.concatenate(slabs), array[3:8])
+            del voxels, slabs
+        with NiftiLabelReader(plainPath, memoryMap=False) as reader:
+            self.assertFalse(reader.memoryMapped)
+            np.testing.assert_array_equal(reader.readLabelVolume(), array)
+        with NiftiLabelReader(self.filePath) as reader:
+            self.assertFalse(reader.memoryMapped)
+            with self.assertRaises(ValueError):
+                reader.voxelArray()
+        results = computeLabelVolumes(plainPath, "structures", memoryBudget=100)
+        volumes = {result["label_id"]: result["mm3"] for result in results.values()}
+        self.assertEqual(volumes, {141: 36 * 0.5, 144: 54 * 0.5})
+
+        with open(plainPath, 'r+b') as f:
+            f.truncate(os.path.getsize(plainPath) - 10)
+        with self.assertRaises(IOError):
+            with NiftiLabelReader(plainPath) as reader:
+                list(reader.iterSlabs())
+
+    def test_read_label_volume_smallest_dtype(self):
+        """Hacim en kucuk uygun tipte okunmali ve gerektiginde genisletilmeli"""
+        array = self.array.astype(np.float32)
+        array[9, 0, 0] = 300
+        floatPath = os.path.join(self.tempDir.name, 'native_lobes_float.nii.gz')
+        writeNiftiLabelVolume(floatPath, array)
+        histogram = LabelHistogram()
+        with NiftiLabelReader(floatPath, memoryBudget=100) as reader:
+            labels = reader.readLabelVolume(histogram=histogram)
+        self.assertEqual(labels.dtype, np.uint16)
+        np.testing.assert_array_equal(labels, array)
+        np.testing.assert_array_equal(histogram.result()[0], [0, 47, 48, 300])
+        with NiftiLabelReader(self.filePath) as reader:
+            self.assertEqual(reader.readLabelVolume().dtype, np.uint8)
+
+    def test_progress_and_cancellation(self):
+        """Okuma her blokta ilerleme bildirmeli ve iptal edilebilmeli"""
+        progress = []
+        with NiftiLabelReader(self.filePath, memoryBudget=100) as reader:
+            reader.readLabelVolume(progressCallback=lambda done, total: progress.append((done, total)))
+        self.assertEqual(progress, [(2, 10), (4, 10), (6, 10), (8, 10), (10, 10)])
+
+        token = CancellationToken()
+        def onProgress(done, total):
+            if done >= 4:
+                token.cancel()
+            token.check()
+        with self.assertRaises(OperationCancelled):
+            with NiftiLabelReader(self.filePath, memoryBudget=100) as reader:
+                reader.readLabelVolume(progressCallback=onProgress)
+
+    def test_background_task_messages(self):
+        """Arka plan gorevi mesajlari sirayla iletmeli; iptal ve hata bildirilmeli"""
+        def compute(token, post):
+            with NiftiLabelReader(self.filePath, memoryBudget=100) as reader:
+                for start, slab in reader.iterSlabs():
+                    post("progress", start)
+            return "tamam"
+        task = BackgroundTask(compute).start()
+        self.assertTrue(task.wait(10))
+        self.assertEqual(task.poll(), [("progress", 0), ("progress", 2), ("progress", 4), ("progress", 6),
+                                       ("progress", 8), ("finished", "tamam")])
+
+        def cancelled(token, post):
+            token.cancel()
+            token.check()
+        task = BackgroundTask(cancelled).start()
+        task.wait(10)
+        self.assertEqual(task.poll(), [("cancelled", None)])
+
+        def failing(token, post):
+            raise IOError("bozuk")
+        task = BackgroundTask(failing).start()
+        task.wait(10)
+        kind, error = task.poll()[0]
+        self.assertEqual((kind, str(error)), ("error", "bozuk"))
+
+    def test_concurrent_categories(self):
+        """Paralel okuma sirali okumayla ayni sayimlari vermeli; hata digerlerini durdurmamali"""
+        def count(filePath):
+            return computeLabelVolumes(filePath, "structures", memoryBudget=100)
+        brokenPath = os.path.join(self.tempDir.name, 'native_lobes_broken.nii.gz')
+        with open(brokenPath, 'wb') as f:
+            f.write(b"bozuk")
+        outcomes = {item: (result, error) for item, result, error in
+                    runConcurrently(count, [self.filePath, brokenPath], maxWorkers=2)}
+        self.assertEqual(outcomes[self.filePath], (count(self.filePath), None))
+        self.assertIsNone(outcomes[brokenPath][0])
+        self.assertIsInstance(outcomes[brokenPath][1], Exception)
+
+        token = CancellationToken()
+        token.cancel()
+        with self.assertRaises(OperationCancelled):
+            list(runConcurrently(count, [self.filePath, self.filePath], cancelToken=token))
+
+    def test_headless_volumes(self):
+        """Akisli hesaplama dogru hacimleri vermeli"""
+        results = computeLabelVolumes(self.filePath, "structures", memoryBudget=100)
+        self.assertEqual(sorted(results), ["structures_47_Right_Hippocampus", "structures_48_Left_Hippocampus"])
+        self.assertAlmostEqual(results["structures_47_Right_Hippocampus"]["mm3"], 36 * 0.5)
+        self.assertAlmostEqual(results["structures_48_Left_Hippocampus"]["ml"], 54 * 0.5 / 1000.0)
+
+
+    def test_progressive_volumes(self):
+        """Onizleme ornek dilimlerden olceklenmeli, hata daralmali ve son sonuc kesin olmali"""
+        self.assertEqual(previewSliceIndices(10, 4).tolist(), [1, 4, 7])
+        self.assertEqual(previewSliceIndices(3, 24).tolist(), [0, 1, 2])
+        # Indeksi hazir gzip (veya sikistirilmamis dosya): once ornek dilimler
+        snapshots = list(iterProgressiveVolumes(self.filePath, "structures", memoryBudget=100, previewSlices=4,
+                                                indexed=True))
+        self.assertEqual([fraction for _, fraction in snapshots], [0.0, 0.2, 0.4, 0.6, 0.8, 1.0])
+
+        # Ornekler 1, 4, 7: 47 yalnizca 4'te (12 voksel x 10 / 3), 48 yalnizca 7'de (18 x 10 / 3)
+        preview = {data["label_id"]: data for data in snapshots[0][0].values()}
+        self.assertAlmostEqual(preview[47]["mm3"], 12 * 10 / 3 * 0.5)
+        self.assertAlmostEqual(preview[48]["mm3"], 18 * 10 / 3 * 0.5)
+        self.assertTrue(all(data["approximate"] and data["mm3_error"] > 0 for data in preview.values()))
+
+        # Okunan dilimler kesin: 6 dilim okunduktan sonra 47 tamamen okunmus, hatalar daralir
+        refined = {data["label_id"]: data for data in snapshots[3][0].values()}
+        self.assertAlmostEqual(refined[47]["mm3"], 36 * 0.5)
+        last = {data["label_id"]: data for data in snapshots[-2][0].values()}
+        self.assertLess(last[48]["mm3_error"], preview[48]["mm3_error"])
+        self.assertEqual(snapshots[-1][0], computeLabelVolumes(self.filePath, "structures"))
+
+    def test_progressive_volumes_unindexed_gzip(self):
+        """Indekssiz gzip'te ornek dilim okunmamali; tahmin tek gecisin son blogundan olmali"""
+        with NiftiLabelReader(self.filePath) as reader:
+            self.assertFalse(canSampleSlices(reader))
+            self.assertTrue(canSampleSlices(reader, indexed=True))
+        self.assertEqual(previewSlabSlices(10, 4), 2)
+        snapshots = list(iterProgressiveVolumes(self.filePath, "structures", previewSlices=4))
+        self.assertEqual([fraction for _, fraction in snapshots], [0.2, 0.4, 0.6, 0.8, 1.0])
+        # 4 dilim okundu (47: 2 x 12 kesin), kalan 6 dilim son bloktan (12 voksel/dilim)
+        estimate = {data["label_id"]: data for data in snapshots[1][0].values()}
+        self.assertAlmostEqual(estimate[47]["mm3"], (24 + 6 * 12) * 0.5)
+        self.assertTrue(estimate[47]["approximate"])
+        self.assertEqual(snapshots[-1][0], computeLabelVolumes(self.filePath, "structures"))
+
+        plainPath = os.path.join(self.tempDir.name, 'native_structures_plain.nii')
+        writeNiftiLabelVolume(plainPath, self.array, spacing=(0.5, 0.5, 2.0))
+        with NiftiLabelReader(plainPath) as reader:
+            self.assertTrue(canSampleSlices(reader))
+
+    def test_composition_from_files(self):
+        """Akisli kompozisyon hacimleri ve oranlari dogru olmali; farkli izgara reddedilmeli"""
+        tissues = np.zeros_like(self.array)
+        tissues[:, :3] = 2
+        tissues[:, 3:] = 3
+        tissuesPath = os.path.join(self.tempDir.name, 'native_tissues_test.nii.gz')
+        writeNiftiLabelVolume(tissuesPath, tissues, spacing=(0.5, 0.5, 2.0))
+        results = computeLabelComposition(self.filePath, "structures", tissuesPath, "tissues", memoryBudget=200)
+        gm = results["structures_47_tissues_2"]
+        self.assertEqual((gm["name"], gm["by_name"]), ("Right_Hippocampus", "Cortical_GM"))
+        self.assertAlmostEqual(gm["mm3"], 24 * 0.5)
+        self.assertAlmostEqual(gm["fraction"] + results["structures_47_tissues_3"]["fraction"], 1.0)
+
+        otherPath = os.path.join(self.tempDir.name, 'native_lobes_test.nii.gz')
+        writeNiftiLabelVolume(otherPath, tissues, spacing=(1.0, 1.0, 1.0))
+        with self.assertRaises(ValueError):
+            computeLabelComposition(self.filePath, "structures", otherPath, "lobes")
+
+
+class GzipIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.array = np.random.default_rng(3).integers(0, 8, size=(64, 64, 64), dtype=np.uint8)
+        self.filePath = os.path.join(self.tempDir.name, 'native_tissues_test.nii.gz')
+        writeNiftiLabelVolume(self.filePath, self.array)
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_random_slice_reads(self):
+        """Indeksli okuyucuyla rastgele dilim okumalari tam okumayla ayni olmali"""
+        store = GzipIndexStore(spacing=16 * 1024, persistent=False)
+        with NiftiLabelReader(self.filePath, memoryBudget=8192, opener=store.open) as reader:
+            np.testing.assert_array_equal(reader.readLabelVolume(), self.array)
+        self.assertGreater(len(store.index(self.filePath)), 4)
+        dataEnd = 348 + 4 + self.array.size
+        self.assertTrue(store.hasIndex(self.filePath, dataEnd))
+        self.assertFalse(GzipIndexStore(persistent=False).hasIndex(self.filePath, dataEnd))
+
+        with NiftiLabelReader(self.filePath, opener=store.open) as reader:
+            for start, stop in [(50, 53), (3, 4), (60, 64), (0, 2), (30, 45)]:
+                np.testing.assert_array_equal(reader.readSlices(start, stop), self.array[start:stop])
+            self.assertEqual(reader.readSlices(64, 70).shape, (0, 64, 64))
+
+        with store.open(self.filePath) as f:
+            f.seek(348 + 4 + 40 * 64 * 64)
+            self.assertEqual(f.read(10), self.array[40, 0, :10].tobytes())
+            f.seek(348 + 4)
+            self.assertEqual(f.read(10), self.array[0, 0, :10].tobytes())
+
+
+    def test_partial_index_is_not_coverage(self):
+        """Yalnizca basi okunmus dosyanin indeksi rastgele okuma icin sayilmamali"""
+        store = GzipIndexStore(spacing=16 * 1024, persistent=False)
+        with NiftiLabelReader(self.filePath, opener=store.open) as reader:
+            dataEnd = reader.header.dataEnd
+            reader.readSlices(0, 8)
+        self.assertEqual(dataEnd, 348 + 4 + self.array.size)
+        self.assertFalse(store.hasIndex(self.filePath, dataEnd))
+        with NiftiLabelReader(self.filePath, opener=store.open) as reader:
+            reader.readSlices(60, 64)
+        self.assertTrue(store.hasIndex(self.filePath, dataEnd))
+
+    def test_exporter_rewrites_grown_index(self):
+        """Ice aktarilan kismi indeks yeni noktalar kazanirsa kapatilirken yeniden yazilmali"""
+        class FakeGzipFile:
+            def __init__(self):
+                self.position = 0
+                self.exports = 0
+
+            def tell(self):
+                return self.position
+
+            def seek(self, offset, whence=io.SEEK_SET):
+                self.position = offset
+                return offset
+
+            def readinto(self, buffer):
+                self.position += len(buffer)
+                return len(buffer)
+
+            def export_index(self, path):
+                self.exports += 1
+                with open(path, 'wb') as f:
+                    f.write(b'index')
+
+            def close(self):
+                pass
+
+        store = GzipIndexStore(self.tempDir.name, spacing=1024, persistent=True)
+        indexPath = store.indexPath(self.filePath)
+
+        def session(imported, readTo):
+            gzipFile = FakeGzipFile()
+            coverage = _readCoverage(indexPath)
+            exporter = _IndexedGzipExporter(gzipFile, indexPath, imported, coverage)
+            exporter.seek(readTo)
+            exporter.close()
+            return gzipFile.exports
+
+        self.assertEqual(session(False, 2048), 1)
+        self.assertFalse(store.hasIndex(self.filePath, 8192))
+        self.assertEqual(session(True, 1024), 0)
+        self.assertEqual(session(True, 8192), 1)
+        self.assertTrue(store.hasIndex(self.filePath, 8192))
+        store.clear()
+        self.assertEqual(os.listdir(self.tempDir.name), ['native_tissues_test.nii.gz'])
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.filePath = os.path.join(self.tempDir.name, 'native_tissues_test.nii.gz')
+        writeNiftiLabelVolume(self.filePath, np.full((2, 3, 4), 3, dtype=np.uint8))
+        self.cache = ResultCache(os.path.join(self.tempDir.name, 'cache'))
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_cached_results_skip_reading(self):
+        """Onbellek isabetinde dosya okunmamali; dosya degisince anahtar degismeli"""
+        results = computeLabelVolumes(self.filePath, "tissues", cache=self.cache)
+        self.assertEqual(self.cache.get(self.filePath, "tissues"), results)
+        self.assertIsNone(self.cache.get(self.filePath, "lobes"))
+
+        key = self.cache.key(self.filePath, "tissues")
+        os.utime(self.filePath, ns=(0, 0))
+        self.assertNotEqual(self.cache.key(self.filePath, "tissues"), key)
+
+    def test_lru_eviction(self):
+        """Boyut siniri asildiginda en eski kayit silinmeli"""
+        for category in ("tissues", "lobes", "macro"):
+            self.cache.put(self.filePath, category, {"x": {"mm3": 1.0}})
+        entrySize = os.path.getsize(os.path.join(self.cache.cacheDir, self.cache.key(self.filePath, "macro") + '.json'))
+        os.utime(os.path.join(self.cache.cacheDir, self.cache.key(self.filePath, "tissues") + '.json'), ns=(1, 1))
+        self.cache.maxBytes = 2 * entrySize
+        self.cache.evict()
+        self.assertIsNone(self.cache.get(self.filePath, "tissues"))
+        self.assertIsNotNone(self.cache.get(self.filePath, "macro"))
+
+
+class MeshCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_presets_and_roundtrip(self):
+        """Yuzeyler kaynak + ayar anahtariyla saklanmali; boyut siniri en eskiyi silmeli"""
+        self.assertEqual(set(SURFACE_PRESETS), {"interactive", "balanced", "publication"})
+        self.assertGreater(surfacePreset("interactive")["decimation"], surfacePreset("publication")["decimation"])
+        with self.assertRaises(ValueError):
+            surfacePreset("ultra")
+        self.assertNotEqual(meshCacheKey("abc", "interactive"), meshCacheKey("abc", "balanced"))
+        self.assertNotEqual(meshCacheKey("abc", "balanced"), meshCacheKey("abd", "balanced"))
+
+        cache = MeshCache(self.tempDir.name)
+        key = cache.key("abc", "balanced")
+        self.assertEqual(cache.labels(key), set())
+        self.assertIsNone(cache.get(key, 17))
+        arrays = {"points": np.random.rand(30, 3).astype(np.float32), "offsets": np.arange(0, 31, 3),
+                  "connectivity": np.arange(30)}
+        cache.put(key, 17, arrays)
+        cache.put(key, 4, arrays)
+        self.assertEqual(cache.labels(key), {4, 17})
+        loaded = cache.get(key, 17)
+        self.assertEqual(sorted(loaded), sorted(arrays))
+        np.testing.assert_array_equal(loaded["points"], arrays["points"])
+
+        entrySize = os.path.getsize(os.path.join(self.tempDir.name, key, "4.npz"))
+        os.utime(os.path.join(self.tempDir.name, key, "4.npz"), ns=(1, 1))
+        cache.maxBytes = entrySize
+        cache.evict()
+        self.assertEqual(cache.labels(key), {17})
+        cache.clear()
+        self.assertEqual(cache.labels(key), set())
+
+
+@unittest.skipIf(SurfaceExtraction is None, "VTK yok")
+class SurfaceExtractionTest(unittest.TestCase):
+    def setUp(self):
+        # Iki bitisik kutu ve ayri bir kutu
+        self.labels = np.zeros((20, 24, 28), dtype=np.int16)
+        self.labels[4:12, 4:14, 4:12] = 3
+        self.labels[4:12, 4:14, 12:20] = 7
+        self.labels[14:18, 16:22, 6:26] = 11
+        self.ijkToRAS = np.diag([2.0, 1.0, 0.5, 1.0])
+        self.ijkToRAS[:3, 3] = [10.0, -5.0, 3.0]
+
+    def test_arrays_roundtrip(self):
+        """polyDataToArrays/arraysToPolyData yuzeyi degistirmemeli"""
+        index = buildLabelSpatialIndex(self.labels)
+        imageData, cropToIJK = SurfaceExtraction.croppedLabelImage(self.labels, index.region(11), 11)
+        polyData = SurfaceExtraction.extractLabelSurface(imageData, 1, np.dot(self.ijkToRAS, cropToIJK))
+        arrays = SurfaceExtraction.polyDataToArrays(polyData)
+        self.assertGreater(len(arrays["offsets"]), 1)
+        restored = SurfaceExtraction.polyDataToArrays(SurfaceExtraction.arraysToPolyData(arrays))
+        for name in arrays:
+            np.testing.assert_array_equal(restored[name], arrays[name])
+
+    @unittest.skipUnless(SurfaceExtraction is not None and SurfaceExtraction.MULTI_LABEL_SURFACES,
+                         "vtkSurfaceNets3D yok")
+    def test_single_pass_matches_labels(self):
+        """Tek gecis her etiket icin etiketin kutusunu saran, disa bakan bir yuzey vermeli"""
+        surfaces = SurfaceExtraction.extractLabelSurfaceArrays(self.labels, [3, 7, 11, 42], self.ijkToRAS,
+                                                                smoothingIterations=0)
+        self.assertEqual(sorted(surfaces), [3, 7, 11, 42])
+        self.assertEqual(len(surfaces[42]["offsets"]), 1)
+
+        index = buildLabelSpatialIndex(self.labels)
+        for label in (3, 7, 11):
+            points = surfaces[label]["points"]
+            region = index.region(label)
+            # Yuzey voksel merkezlerinden yarim voksel disarida; RAS'ta (x, y, z) = (i, j, k) * aralik + koken
+            lower = np.array([low for low, _ in region.bounds[::-1]], dtype=float) - 0.5
+            upper = np.array([high for _, high in region.bounds[::-1]], dtype=float) + 0.5
+            np.testing.assert_allclose(points.min(axis=0), lower * [2.0, 1.0, 0.5] + [10.0, -5.0, 3.0], atol=1e-4)
+            np.testing.assert_allclose(points.max(axis=0), upper * [2.0, 1.0, 0.5] + [10.0, -5.0, 3.0], atol=1e-4)
+            # Normaller merkezden disari bakmali
+            normals = surfaces[label]["normals"]
+            center = points.mean(axis=0)
+            self.assertGreater(np.mean(np.sum((points - center) * normals, axis=1) > 0), 0.9)
+
+
+@unittest.skipIf(SurfaceExtraction is None, "VTK yok")
+class LazySurfaceTest(unittest.TestCase):
+    """Modul mantiginin gerektiginde yuzey olusturma yolu (slicer/qt yerine SlicerStandIn)"""
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tempDir.cleanup)
+        array = np.zeros((12, 14, 16), dtype=np.uint8)
+        array[2:6, 3:8, 4:9] = 47
+        array[6:10, 6:11, 8:13] = 48
+        array[3:9, 2:5, 11:15] = 102
+        self.filePath = os.path.join(self.tempDir.name, 'native_structures_lazy.nii.gz')
+        writeNiftiLabelVolume(self.filePath, array)
+
+        self.scene = SlicerStandIn.Scene()
+        standIns = SlicerStandIn.moduleStandIns(self.scene, os.path.join(self.tempDir.name, 'cache'))
+        patcher = mock.patch.dict(sys.modules, standIns)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sys.modules.pop('VolBrainVolumeCalculator', None)
+        self.module = importlib.import_module('VolBrainVolumeCalculator')
+        self.logic = self.newLogic()
+
+    def newLogic(self):
+        logic = self.module.VolBrainVolumeCalculatorLogic()
+        logic.profiler.enabled = True
+        logic.surfaceExtraction = "perLabel"
+        return logic
+
+    def calculate(self, logic, lazySurfaces=True):
+        logic.calculateVolumes(self.filePath, "structures", useCache=False, lazySurfaces=lazySurfaces)
+        segmentationNode = self.scene.GetFirstNodeByName("volBrain_structures_Segmentation")
+        return segmentationNode, logic.allSegmentIds(segmentationNode.GetSegmentation())
+
+    def spanCount(self, logic, name):
+        return sum(1 for record in logic.profiler.spans if record["name"] == name)
+
+    def surfaceOf(self, segmentationNode, segmentId):
+        return segmentationNode.GetSegmentation().GetSegment(segmentId).GetRepresentation(SlicerStandIn.CLOSED_SURFACE)
+
+    def test_lazy_calculation_skips_surfaces(self):
+        """Gecikmeli modda hesaplama hic yuzey olusturmamali; segmentlerin 3D gorunurlugu degismemeli"""
+        segmentationNode, segmentIds = self.calculate(self.logic)
+        self.assertEqual(len(segmentIds), 3)
+        self.assertEqual(segmentationNode.closedSurfaceRequests, 0)
+        self.assertEqual(segmentationNode.GetSegmentation().convertedSegments, [])
+        self.assertEqual(self.spanCount(self.logic, "segmentSurface"), 0)
+        self.assertEqual(self.logic.getMissingSurfaceSegmentIds(segmentationNode, segmentIds), segmentIds)
+        displayNode = segmentationNode.GetDisplayNode()
+        self.assertTrue(all(displayNode.GetSegmentVisibility3D(segmentId) for segmentId in segmentIds))
+        self.assertTrue(displayNode.visibility3D)
+        self.assertEqual(displayNode.modifiedEvents, 0)
+
+        # Gecikmesiz mod tum yuzeyleri hesaplama sirasinda olusturur
+        segmentationNode, segmentIds = self.calculate(self.newLogic(), lazySurfaces=False)
+        self.assertEqual(self.logic.getMissingSurfaceSegmentIds(segmentationNode, segmentIds), [])
+        self.assertEqual(segmentationNode.closedSurfaceRequests, 0)
+
+    def test_surface_built_on_first_show(self):
+        """Yuzey ilk gosterimde bir kez olusturulmali; sonraki gosterimler oturum onbellegini kullanmali"""
+        segmentationNode, segmentIds = self.calculate(self.logic)
+        segmentId = segmentationNode.GetSegmentation().GetSegmentIdBySegmentName("Right_Hippocampus")
+        self.logic.ensureSegmentSurface(segmentationNode, segmentId)
+        self.logic.showOnlySegments3D(segmentationNode, [segmentId])
+        surface = self.surfaceOf(segmentationNode, segmentId)
+        self.assertGreater(surface.GetNumberOfPoints(), 0)
+        self.assertEqual(self.spanCount(self.logic, "segmentSurface"), 1)
+        self.assertEqual(self.logic.getMissingSurfaceSegmentIds(segmentationNode, segmentIds),
+                         [other for other in segmentIds if other != segmentId])
+        self.assertTrue(segmentationNode.GetDisplayNode().GetSegmentVisibility3D(segmentId))
+
+        self.logic.ensureSegmentSurface(segmentationNode, segmentId)
+        self.assertEqual(self.spanCount(self.logic, "segmentSurface"), 1)
+
+        # Ayni dosya yeniden yuklenince segmentler yuzeysiz gelir; yuzey oturum onbelleginden alinir
+        segmentationNode, segmentIds = self.calculate(self.logic)
+        segmentId = segmentationNode.GetSegmentation().GetSegmentIdBySegmentName("Right_Hippocampus")
+        self.assertIsNone(self.surfaceOf(segmentationNode, segmentId))
+        self.logic.ensureSegmentSurface(segmentationNode, segmentId)
+        self.assertIs(self.surfaceOf(segmentationNode, segmentId), surface)
+        self.assertEqual(self.spanCount(self.logic, "segmentSurface"), 1)
+        self.assertEqual(self.spanCount(self.logic, "meshCacheLoad"), 0)
+
+        # Yeni oturum: bellek onbellegi bos, yuzey disk onbelleginden okunur
+        logic = self.newLogic()
+        segmentationNode, _ = self.calculate(logic)
+        logic.ensureSegmentSurface(segmentationNode, segmentId)
+        self.assertEqual(self.surfaceOf(segmentationNode, segmentId).GetNumberOfPoints(), surface.GetNumberOfPoints())
+        self.assertEqual((self.spanCount(logic, "segmentSurface"), self.spanCount(logic, "meshCacheLoad")), (0, 1))
+
+    def test_surface_queue_builds_one_per_tick(self):
+        """Kategori sahneye eklenince yuzeyleri siraya girmeli; her tetiklenmede tek yuzey olusturulmali"""
+        results = self.logic.calculateVolumes(self.filePath, "structures", useCache=False, lazySurfaces=True)
+        segmentationNode = self.scene.GetFirstNodeByName("volBrain_structures_Segmentation")
+        segmentIds = self.logic.allSegmentIds(segmentationNode.GetSegmentation())
+        widget = self.module.VolBrainVolumeCalculatorWidget()
+        widget.logic = self.logic
+        widget.statusLabel = SlicerStandIn.QLabel()
+        widget.progressBar = SlicerStandIn.QProgressBar()
+        widget.surfaceTimer = timer = SlicerStandIn.QTimer()
+        timer.setInterval(0)
+        timer.connect('timeout()', widget.onBuildNextSurface)
+        widget.applyState = {"show3D": True, "lazySurfaces": True, "progressive": False, "estimates": {},
+                             "progress": {"structures": 0.0}, "allResults": ResultTable()}
+
+        widget.onCategoryResults("structures", results)
+        self.assertIs(widget.currentSegmentationNode, segmentationNode)
+        self.assertTrue(timer.isActive())
+        widget.requestSurfaces(segmentationNode, segmentIds[:1])
+        self.assertEqual(len(widget.pendingSurfaces), len(segmentIds))
+        built = []
+        while timer.isActive():
+            timer.fire()
+            built.append(len(segmentIds) - len(self.logic.getMissingSurfaceSegmentIds(segmentationNode, segmentIds)))
+        self.assertEqual(built, [1, 2, 3])
+        self.assertEqual(widget.statusLabel.text(), "3D yuzeyler hazir")
+
+        widget.requestSurfaces(segmentationNode, segmentIds)
+        self.assertFalse(timer.isActive())
+
+
+class VisibilityGroupsTest(unittest.TestCase):
+    def test_structure_groups(self):
+        """Gruplar etiket isimlerinden turetilmeli; benzer isimler karismamali"""
+        schema = getLabelSchema("structures")
+        labels = sorted(schema.names) + [999]
+        groups = schemaGroups(schema, labels)
+        self.assertEqual(list(groups), [name for name in VISIBILITY_GROUPS if name in groups])
+        self.assertEqual(groups["ventricles"], [4, 11, 49, 50, 51, 52])
+        self.assertIn(120, groups["frontal"])  # R_frontal_pole
+        self.assertIn(182, groups["frontal"])  # R_precentral_gyrus
+        self.assertIn(114, groups["occipital"])  # R_cuneus
+        self.assertNotIn(168, groups["occipital"])  # R_precuneus
+        self.assertIn(168, groups["parietal"])
+        self.assertNotIn(160, groups["temporal"])  # R_occipital_fusiform
+        # Hemisferler ayrik; orta hat yapilari ikisinde de yok
+        self.assertFalse(set(groups["left"]) & set(groups["right"]))
+        self.assertEqual(len(groups["left"]), len(groups["right"]))
+        for midline in (4, 35, 71):
+            self.assertNotIn(midline, groups["left"] + groups["right"])
+        # Semada olmayan etiket hicbir gruba girmez
+        self.assertFalse(any(999 in members for members in groups.values()))
+
+    def test_other_categories_and_segment_ids(self):
+        """Lob/doku semalari ve segment ID anahtarlari ayni kurallarla gruplanmali"""
+        lobes = schemaGroups(getLabelSchema("lobes"), range(1, 13))
+        self.assertEqual(lobes["frontal"], [1, 2])
+        self.assertEqual(lobes["left"], [2, 4, 6, 8, 10, 12])
+        self.assertEqual(schemaGroups(getLabelSchema("tissues"), range(1, 8))["ventricles"], [1])
+
+        groups = labelGroups({"Segment_1": "Left_Hippocampus", "Segment_2": "Right_Hippocampus", "Segment_3": "x"})
+        self.assertEqual(groups, {"left": ["Segment_1"], "right": ["Segment_2"],
+                                  "subcortical": ["Segment_1", "Segment_2"]})
+        self.assertEqual(labelGroups({1: "a_b"}, {"custom": r"^a_"}), {"custom": [1]})
+
+
+class ResultTableTest(unittest.TestCase):
+    def test_append_sort_and_summary(self):
+        """Sutun tabanli tablo siralama, ozet ve sozluk donusumunde eski bicimle ayni olmali"""
+        structures = buildVolumeResults("structures", np.array([0, 48, 47, 102]), np.array([9, 20, 10, 4]), 0.5)
+        tissues = buildVolumeResults("tissues", np.array([3, 1]), np.array([100, 50]), 0.5)
+        table = ResultTable.fromResults(tissues)
+        table.appendResults(structures)
+        for i in range(300):
+            table.append("lobes", [1, 2], ["Frontal_R", "Frontal_L"], [1.0, 2.0], subject=f"s{i:03d}")
+
+        self.assertEqual(len(table), 5 + 600)
+        self.assertEqual(len(table.names), 2 + 3 + 2)
+        rows = list(table.rows())
+        self.assertEqual([(r[1], r[2]) for r in rows[:5]],
+                         [("structures", 47), ("structures", 48), ("structures", 102), ("tissues", 1), ("tissues", 3)])
+        self.assertEqual(rows[5][:3], ("s000", "lobes", 1))
+        self.assertEqual(rows[-1][:3], ("s299", "lobes", 2))
+
+        summary = {cat: (count, ml) for cat, count, _, ml in table.summarizeByCategory()}
+        self.assertEqual(summary["structures"][0], 3)
+        self.assertAlmostEqual(summary["tissues"][1], 75 / 1000.0)
+        self.assertAlmostEqual(summary["lobes"][1], 300 * 3.0 / 1000.0)
+        self.assertEqual(table.toResults(table.select(category="structures")), structures)
+        self.assertEqual(len(table.select(category="lobes", subject="s007")), 2)
+        self.assertEqual(len(table.select(category="macro")), 0)
+
+        merged = ResultTable()
+        merged.extend(table)
+        self.assertEqual(list(merged.rows()), rows)
+
+    def test_replace_category(self):
+        """Ayni etiketlerde hacimler yerinde guncellenmeli; etiketler degisince satirlar degismeli"""
+        table = ResultTable.fromResults(buildVolumeResults("tissues", np.array([1, 2]), np.array([5, 6]), 1.0))
+        table.appendResults(buildVolumeResults("structures", np.array([47, 48]), np.array([10, 20]), 1.0))
+        before = table.select(category="structures")
+        self.assertFalse(table.replaceCategory("structures",
+                                               buildVolumeResults("structures", np.array([48, 47]), [21, 11], 1.0)))
+        np.testing.assert_array_equal(table.select(category="structures"), before)
+        self.assertEqual([r[4] for r in table.rows()], [11.0, 21.0, 5.0, 6.0])
+
+        exact = buildVolumeResults("structures", np.array([47, 102]), np.array([12, 3]), 1.0)
+        self.assertTrue(table.replaceCategory("structures", exact))
+        self.assertEqual(table.toResults(table.select(category="structures")), exact)
+        self.assertEqual(len(table), 4)
+        self.assertTrue(table.replaceCategory("structures", {}))
+        self.assertEqual([r[1] for r in table.rows()], ["tissues", "tissues"])
+
+    def test_large_label_ids(self):
+        """int32 sinirini asan etiket kimlikleri kesilmeden saklanmali ve disa aktarilmali"""
+        largeId = 2 ** 31 + 5
+        table = ResultTable.fromResults(buildVolumeResults("structures", np.array([largeId, 4]), np.array([3, 1]), 1.0))
+        self.assertEqual([row[2] for row in table.rows()], [4, largeId])
+        self.assertEqual(table.toResults()[f"structures_{largeId}_Label_{largeId}"]["label_id"], largeId)
+        with tempfile.TemporaryDirectory() as tempDir:
+            path = os.path.join(tempDir, "results.npz")
+            ResultExport.writeResultTable(table, path)
+            self.assertEqual(list(ResultExport.readResultTable(path).rows()), list(table.rows()))
+
+    @unittest.skipIf(os.name == 'nt', "POSIX izinleri")
+    def test_export_file_mode(self):
+        """Ikili tablo ve bolum dosyalari metin ciktisi gibi 0666 & ~umask izniyle yazilmali"""
+        table = ResultTable.fromResults(buildVolumeResults("tissues", np.array([1, 2]), np.array([5, 6]), 1.0))
+        previous = os.umask(0o027)
+        try:
+            with tempfile.TemporaryDirectory() as tempDir:
+                csvPath = os.path.join(tempDir, "results.csv")
+                ResultExport.writeDelimited(csvPath, table, ",")
+                npzPath = os.path.join(tempDir, "results.npz")
+                ResultExport.writeResultTable(table, npzPath)
+                partitionPath = ResultExport.appendPartition(os.path.join(tempDir, "cohort"), table, "sub01", "npz")
+                modes = [os.stat(path).st_mode & 0o777 for path in (csvPath, npzPath, partitionPath)]
+        finally:
+            os.umask(previous)
+        self.assertEqual(modes, [0o640] * 3)
+
+    def test_write_delimited_platform_newlines(self):
+        """Metin ciktisi onceki CSV/Excel ciktilari gibi platformun satir sonlariyla yazilmali"""
+        table = ResultTable.fromResults(buildVolumeResults("tissues", np.array([1, 2]), np.array([5, 6]), 1.0))
+        with tempfile.TemporaryDirectory() as tempDir:
+            csvPath = os.path.join(tempDir, "results.csv")
+            ResultExport.writeDelimited(csvPath, table, ",", header=ResultExport.TEXT_COLUMNS)
+            with open(csvPath, 'rb') as f:
+                data = f.read()
+        text = "".join(ResultExport.formatDelimited(table, ",", header=ResultExport.TEXT_COLUMNS))
+        self.assertEqual(data, text.replace("\n", os.linesep).encode('utf-8'))
+
+    def test_filtered_sorted_view(self):
+        """Gorunum filtreleri ve siralama tablo kopyalamadan satir indeksleri uretmeli"""
+        table = ResultTable()
+        table.append("structures", [47, 48, 102], ["Right_Hippocampus", "Left_Hippocampus", "Right_ACgG"],
+                     [4000.0, 3900.0, 5000.0])
+        table.append("tissues", [1, 2], ["CSF", "Cortical_GM"], [250000.0, 600000.0])
+        view = ResultTableView(table)
+        self.assertEqual(view.rowCount(), 5)
+        self.assertEqual([view.displayText(r, 1) for r in range(5)], ["47", "48", "102", "1", "2"])
+
+        view.setFilter(nameContains="hippo")
+        self.assertEqual([view.value(r, 2) for r in range(view.rowCount())], ["Right_Hippocampus", "Left_Hippocampus"])
+        view.sort(4)
+        self.assertEqual([view.value(r, 1) for r in range(view.rowCount())], [48, 47])
+        view.setFilter(volumeRange=(3.95, None))
+        self.assertEqual([view.value(r, 1) for r in range(view.rowCount())], [47, 102, 1, 2])
+        view.sort(0, descending=True)
+        self.assertEqual([view.displayText(r, 0) for r in range(view.rowCount())],
+                         ["TISSUES", "TISSUES", "STRUCTURES", "STRUCTURES"])
+        self.assertEqual(view.displayText(0, 3), "250000.00")
+        view.setFilter(category="tissues", volumeRange=(None, 300.0))
+        self.assertEqual(view.rowIndex(0), 3)
+        view.setFilter(category="macro")
+        self.assertEqual(view.rowCount(), 0)
+
+    def test_binary_and_text_export(self):
+        """Ikili dosyalar tabloyu aynen geri vermeli; metin ciktisi eski satir bicimini korumali"""
+        table = ResultTable()
+        table.append("structures", [48, 47], ["Left_Hippocampus", 'Name, "quoted"'], [1.234, 20.0])
+        table.append("tissues", [1], ["CSF"], [5.5], subject="sub/01")
+        with tempfile.TemporaryDirectory() as tempDir:
+            formats = ["npz"] + (["arrow"] if ResultExport.pyarrow is not None else [])
+            for format in formats:
+                path = os.path.join(tempDir, "results" + ResultExport.BINARY_EXTENSIONS[format])
+                ResultExport.writeResultTable(table, path)
+                loaded = ResultExport.readResultTable(path)
+                self.assertEqual(list(loaded.rows()), list(table.rows()))
+
+            partitionDir = os.path.join(tempDir, "cohort")
+            ResultExport.appendPartition(partitionDir, ResultTable(), "empty", "npz")
+            ResultExport.appendPartition(partitionDir, table, "sub/01", "npz")
+            self.assertEqual(list(ResultExport.readPartitions(partitionDir).rows()), list(table.rows()))
+            self.assertEqual(len(ResultExport.readPartitions(partitionDir, ["empty"])), 0)
+
+        text = "".join(ResultExport.formatDelimited(table, ",", header=("A", "B", "C", "D", "E"), chunkRows=2))
+        self.assertEqual(text.splitlines(), [
+            "A,B,C,D,E",
+            'structures,47,"Name, ""quoted""",20.00,0.0200',
+            "structures,48,Left_Hippocampus,1.23,0.0012",
+            "tissues,1,CSF,5.50,0.0055",
+        ])
+
+
+class CohortBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        root = self.tempDir.name
+        for subject, value in (("sub01", 1), ("sub02", 2)):
+            folder = os.path.join(root, subject)
+            os.makedirs(folder)
+            array = np.full((3, 4, 5), value, dtype=np.uint8)
+            writeNiftiLabelVolume(os.path.join(folder, f"native_tissues_{subject}.nii.gz"), array)
+            writeNiftiLabelVolume(os.path.join(folder, f"native_macrostructures_{subject}.nii"), array)
+            open(os.path.join(folder, f"native_structures_{subject}.csv"), 'w').close()
+        broken = os.path.join(root, "sub03")
+        os.makedirs(broken)
+        with open(os.path.join(broken, "native_lobes_sub03.nii.gz"), 'wb') as f:
+            f.write(b"bozuk")
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_file_matching(self):
+        """Klasor eslestirmesi onQuickLoad kurallarini izlemeli"""
+        files = findVolBrainFiles(os.path.join(self.tempDir.name, "sub01"))
+        self.assertEqual(sorted(files), ["macro", "tissues"])
+
+    def test_batch_continues_after_failure(self):
+        """Hatali denek loglanip atlanmali, digerleri hesaplanmali"""
+        partitionDir = os.path.join(self.tempDir.name, "partitions")
+        rows, errors = runCohortBatch(self.tempDir.name, maxWorkers=2, partitionDir=partitionDir)
+        self.assertEqual([(r["subject"], r["category"], r["label_id"]) for r in rows], [
+            ("sub01", "macro", 1), ("sub01", "tissues", 1),
+            ("sub02", "macro", 2), ("sub02", "tissues", 2),
+        ])
+        self.assertEqual(rows[0]["mm3"], 60.0)
+        self.assertEqual([(e[0], e[1]) for e in errors], [("sub03", "lobes")])
+
+        # Denek bolumleri birlikte okundugunda ayni satirlari vermeli
+        self.assertEqual([p for p, _ in ResultExport.listPartitions(partitionDir)], ["sub01", "sub02"])
+        table = ResultExport.readResultTable(partitionDir)
+        self.assertEqual([(r[0], r[1], r[2], r[4]) for r in table.rows()],
+                         [(r["subject"], r["category"], r["label_id"], r["mm3"]) for r in rows])
+
+        csvPath = os.path.join(self.tempDir.name, "long.csv")
+        writeLongTable(rows, csvPath)
+        with open(csvPath, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], "subject,category,label_id,name,mm3,ml")
+        self.assertEqual(lines[1], "sub01,macro,1,Left_Cerebrum,60.00,0.0600")
+        self.assertEqual(len(lines), 5)
+
+
+    def test_spawn_workers_without_environment_change(self):
+        """spawn alt surecleri paketi PYTHONPATH degistirilmeden import edebilmeli"""
+        import multiprocessing
+        libParent = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+        # Ust surecin sys.path'i alt surece kopyalanir; paket klasoru olmadan da calismali
+        parentPath = [p for p in sys.path if os.path.abspath(p or os.curdir) != libParent]
+        environment = os.environ.get('PYTHONPATH')
+        with mock.patch.object(sys, 'path', parentPath):
+            rows, errors = runCohortBatch(self.tempDir.name, maxWorkers=2,
+                                          mpContext=multiprocessing.get_context('spawn'))
+        self.assertEqual(os.environ.get('PYTHONPATH'), environment)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual([(e[0], e[1]) for e in errors], [("sub03", "lobes")])
+
+
+class CommandLineTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.tempDir.name, "sub01")
+        os.makedirs(self.folder)
+        array = np.full((3, 4, 5), 2, dtype=np.uint8)
+        writeNiftiLabelVolume(os.path.join(self.folder, "native_tissues_sub01.nii.gz"), array)
+        writeNiftiLabelVolume(os.path.join(self.folder, "native_lobes_sub01.nii"), array)
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_outputs_and_exit_codes(self):
+        """Klasor ve dosya girdileri tablo uretmeli; kismi hata cikis koduna yansimali"""
+        csvPath = os.path.join(self.tempDir.name, "out.csv")
+        self.assertEqual(CommandLine.main([self.folder, "-o", csvPath, "-q"]), CommandLine.EXIT_OK)
+        with open(csvPath, encoding='utf-8') as f:
+            self.assertEqual(f.read().splitlines(), ["subject,category,label_id,name,mm3,ml",
+                                                     "sub01,lobes,2,Left_Frontal_Lobe,60.00,0.0600",
+                                                     "sub01,tissues,2,Cortical_GM,60.00,0.0600"])
+
+        jsonPath = os.path.join(self.tempDir.name, "out.json")
+        missing = os.path.join(self.tempDir.name, "missing.nii.gz")
+        code = CommandLine.main(["--tissues", os.path.join(self.folder, "native_tissues_sub01.nii.gz"),
+                                 "--macro", missing, "--subject", "s1", "-o", jsonPath, "-q"])
+        self.assertEqual(code, CommandLine.EXIT_PARTIAL)
+        with open(jsonPath, encoding='utf-8') as f:
+            document = json.load(f)
+        self.assertEqual([(r["subject"], r["category"]) for r in document["rows"]], [("s1", "tissues")])
+        self.assertEqual([(e["subject"], e["category"]) for e in document["errors"]], [("s1", "macro")])
+
+        self.assertEqual(CommandLine.main([self.tempDir.name, "-o", jsonPath, "-q"]), CommandLine.EXIT_FAILED)
+        self.assertEqual(CommandLine.main([self.tempDir.name, "-r", "-o", jsonPath, "-q"]), CommandLine.EXIT_OK)
+
+
+class WatchFolderTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tempDir.name, "incoming")
+        self.storeDir = os.path.join(self.tempDir.name, "store")
+        for subject, value in (("site1/sub01", 1), ("sub02", 2)):
+            self.writeSubject(subject, value)
+        # Eksik klasor: doku dosyasi henuz gelmemis
+        folder = os.path.join(self.root, "sub03")
+        os.makedirs(folder)
+        writeNiftiLabelVolume(os.path.join(folder, "native_macrostructures_sub03.nii"), np.ones((2, 2, 2), np.uint8))
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def writeSubject(self, subject, value):
+        folder = os.path.join(self.root, subject)
+        os.makedirs(folder, exist_ok=True)
+        array = np.full((3, 4, 5), value, dtype=np.uint8)
+        writeNiftiLabelVolume(os.path.join(folder, "native_tissues_x.nii.gz"), array)
+        writeNiftiLabelVolume(os.path.join(folder, "native_macrostructures_x.nii"), array)
+
+    def copySubject(self, subject, copy):
+        # Gercek kopya: gzip basligindaki zaman damgasi da ayni kalir
+        shutil.copytree(os.path.join(self.root, subject), os.path.join(self.root, copy))
+
+    def watcher(self, settleSeconds=0):
+        return FolderWatcher(self.root, self.storeDir, maxWorkers=2, requiredCategories=("tissues", "macro"),
+                             settleSeconds=settleSeconds)
+
+    def test_incremental_processing_and_deduplication(self):
+        """Tamamlanmis klasorler bir kez islenmeli; ayni icerik tekrar hesaplanmamali"""
+        with self.watcher(settleSeconds=3600) as watcher:
+            self.assertEqual(watcher.processOnce(), [])
+        with self.watcher() as watcher:
+            entries = watcher.processOnce()
+            self.assertEqual(sorted(e["subject"] for e in entries), ["site1/sub01", "sub02"])
+            self.assertEqual(watcher.processOnce(), [])
+
+            # Kopyalanan klasor ayni icerik: atlanir; degisen klasor yeniden islenir
+            self.copySubject("site1/sub01", "sub04")
+            self.writeSubject("sub02", 5)
+            os.utime(os.path.join(self.root, "sub02", "native_tissues_x.nii.gz"), (0, 0))
+            self.assertEqual([e["subject"] for e in watcher.processOnce()], ["sub02"])
+
+        store = ProcessedStore(self.storeDir)
+        self.assertEqual(len(store.entries()), 3)
+        self.assertTrue(store.isProcessed(entries[0]["fingerprint"]))
+        table = store.readTable()
+        self.assertEqual(sorted(set((r[0], r[2], r[4]) for r in table.rows())),
+                         [("site1/sub01", 1, 60.0), ("sub02", 5, 60.0)])
+        with self.watcher() as watcher:
+            self.assertEqual(watcher.processOnce(), [])
+
+    def test_restart_hashes_only_changed_folders(self):
+        """Yeniden baslatmada yalnizca boyutu/zamani degisen klasorler hash'lenmeli"""
+        with self.watcher() as watcher:
+            watcher.processOnce()
+        self.copySubject("site1/sub01", "sub04")
+        with self.watcher() as watcher:
+            self.assertEqual(watcher.processOnce(), [])
+
+        hashed = []
+        fingerprint = WatchFolder.folderFingerprint
+
+        def countingFingerprint(files):
+            hashed.append(os.path.basename(os.path.dirname(next(iter(files.values())))))
+            return fingerprint(files)
+
+        with mock.patch.object(WatchFolder, 'folderFingerprint', countingFingerprint):
+            with self.watcher() as watcher:
+                self.assertEqual(watcher.processOnce(), [])
+            self.assertEqual(hashed, [])
+            os.utime(os.path.join(self.root, "sub02", "native_tissues_x.nii.gz"), (0, 0))
+            with self.watcher() as watcher:
+                self.assertEqual(watcher.processOnce(), [])
+            self.assertEqual(hashed, ["sub02"])
+
+    def test_failed_folder_is_retried(self):
+        """Yalnizca hata veren klasor islenmis sayilmamali; yeniden baslatmada tekrar denenmeli"""
+        folder = os.path.join(self.root, "sub05")
+        os.makedirs(folder)
+        for fileName in ("native_tissues_x.nii", "native_macrostructures_x.nii"):
+            with open(os.path.join(folder, fileName), 'wb') as f:
+                f.write(b'bozuk')
+        with self.watcher() as watcher:
+            entries = {e["subject"]: e for e in watcher.processOnce()}
+            self.assertTrue(entries["sub05"]["failed"])
+            self.assertEqual(watcher.processOnce(), [])
+        self.assertFalse(ProcessedStore(self.storeDir).isProcessed(entries["sub05"]["fingerprint"]))
+        with self.watcher() as watcher:
+            self.assertEqual([e["subject"] for e in watcher.processOnce()], ["sub05"])
+
+
+class InstrumentationTest(unittest.TestCase):
+    def test_disabled_profiler_records_nothing(self):
+        """Kapali profil olcum yapmamali"""
+        profiler = Profiler()
+        with profiler.span("okuma") as span:
+            span.set(voxels=10)
+        self.assertEqual(profiler.spans, [])
+        self.assertEqual(profiler.chromeTrace()["traceEvents"], [])
+
+    def test_nested_spans_and_trace(self):
+        """Ic ice asamalar derinlik, sayac ve trace olaylariyla kaydedilmeli"""
+        profiler = Profiler(enabled=True)
+        with profiler.span("calculateVolumes", category="tissues"):
+            for _ in range(2):
+                with profiler.span("loadLabelVolume") as span:
+                    span.set(voxels=100, labels=3)
+            with self.assertRaises(ValueError):
+                with profiler.span("colorTable"):
+                    raise ValueError("hata")
+
+        summary = {phase["name"]: phase for phase in profiler.summary()}
+        self.assertEqual([p["name"] for p in profiler.summary()], ["calculateVolumes", "loadLabelVolume", "colorTable"])
+        self.assertEqual(summary["loadLabelVolume"]["count"], 2)
+        self.assertEqual(summary["loadLabelVolume"]["depth"], 1)
+        self.assertEqual(summary["loadLabelVolume"]["counters"], {"voxels": 200, "labels": 6})
+        self.assertIn("loadLabelVolume", profiler.formatSummary())
+
+        events = json.loads(json.dumps(profiler.chromeTrace()))["traceEvents"]
+        self.assertEqual({e["ph"] for e in events}, {"X"})
+        outer = next(e for e in events if e["name"] == "calculateVolumes")
+        self.assertEqual(outer["args"]["category"], "tissues")
+        self.assertTrue(all(e["ts"] >= outer["ts"] and e["dur"] <= outer["dur"] for e in events))
+        self.assertEqual(next(e for e in events if e["name"] == "colorTable")["args"]["error"], "ValueError")
+
+    @unittest.skipIf(currentRSS() is None, "RSS olculemiyor")
+    def test_rss_peak_and_delta(self):
+        """Tepe bellek gecici tamponlari da gostermeli; son fark surecin eski tepesinden etkilenmemeli"""
+        profiler = Profiler(enabled=True)
+        peak = np.ones(64 * 1024 * 1024, dtype=np.uint8)
+        del peak
+        with profiler.span("allocate"):
+            kept = np.ones(32 * 1024 * 1024, dtype=np.uint8)
+            with profiler.span("transient"):
+                buffer = np.ones(48 * 1024 * 1024, dtype=np.uint8)
+                del buffer
+        with profiler.span("release"):
+            del kept
+        summary = {phase["name"]: phase for phase in profiler.summary()}
+        self.assertGreater(summary["allocate"]["rssDelta"], 16 * 1024 * 1024)
+        self.assertGreater(summary["allocate"]["rssPeak"], 64 * 1024 * 1024)
+        self.assertGreater(summary["transient"]["rssPeak"], 32 * 1024 * 1024)
+        self.assertLess(summary["transient"]["rssDelta"], 16 * 1024 * 1024)
+        self.assertLess(summary["release"]["rssDelta"], -16 * 1024 * 1024)
+        self.assertFalse(summary["allocate"]["rssShared"])
+        self.assertRegex(profiler.formatSummary(), r"allocate: .*, tepe \+\d+ MB")
+        args = profiler.chromeTrace()["traceEvents"][0]["args"]
+        self.assertIn("rss_peak_bytes", args)
+        self.assertIn("rss_delta_bytes", args)
+
+    @unittest.skipIf(currentRSS() is None, "RSS olculemiyor")
+    def test_rss_peak_sampled_without_high_water_mark(self):
+        """VmHWM sifirlanamiyorsa tepe, acik asamalarda orneklenen RSS'ten bulunmali"""
+        profiler = Profiler(enabled=True)
+        with mock.patch.object(Instrumentation, '_peakTracker', Instrumentation._PeakTracker()), \
+                mock.patch.object(Instrumentation, '_resetHighWaterMark', return_value=False):
+            with profiler.span("transient"):
+                buffer = np.ones(48 * 1024 * 1024, dtype=np.uint8)
+                time.sleep(5 * Instrumentation.PEAK_SAMPLE_INTERVAL)
+                del buffer
+        self.assertGreater(profiler.summary()[0]["rssPeak"], 32 * 1024 * 1024)
+
+    def test_cpu_time_is_per_thread(self):
+        """CPU suresi yalnizca asamayi calistiran is parcacigini saymali"""
+        profiler = Profiler(enabled=True)
+        stop = threading.Event()
+
+        def spin():
+            while not stop.is_set():
+                pass
+
+        thread = threading.Thread(target=spin)
+        thread.start()
+        try:
+            with profiler.span("waiting"):
+                time.sleep(0.2)
+        finally:
+            stop.set()
+            thread.join()
+        self.assertLess(profiler.summary()[0]["cpu"], 0.1)
+
+    def test_rss_shared_between_threads(self):
+        """Baska is parcacigindaki asamayla ortusen olcumler isaretlenmeli"""
+        profiler = Profiler(enabled=True)
+        barrier = threading.Barrier(2)
+
+        def work(name):
+            with profiler.span(name):
+                barrier.wait()
+                barrier.wait()
+
+        threads = [threading.Thread(target=work, args=(name,)) for name in ("a", "b")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with profiler.span("alone"):
+            pass
+        shared = {record["name"]: record["rssShared"] for record in profiler.spans}
+        self.assertEqual(shared, {"a": True, "b": True, "alone": False})
+
+
+class BenchmarkTest(unittest.TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_synthetic_volume_and_baseline(self):
+        """Sentetik hacim gercek etiket setini kullanmali; yavaslama gerileme sayilmali"""
+        report = VolBrainBenchmark.runBenchmarks(["tissues"], spacings=(8.0,), repeat=1,
+                                                 workDir=self.tempDir.name, log=None)
+        case = report["cases"][0]
+        self.assertEqual(case["labels"], len(LabelSchema.getLabelNames("tissues")))
+        self.assertEqual(sorted(case["phases"]), sorted(VolBrainBenchmark.PHASES))
+
+        baseline = json.loads(json.dumps(report))
+        self.assertFalse(any(c["regression"] for c in VolBrainBenchmark.compareToBaseline(report, baseline)))
+        baseline["cases"][0]["phases"]["read"] = case["phases"]["read"] / 10.0 - 0.01
+        regressions = [c["phase"] for c in VolBrainBenchmark.compareToBaseline(report, baseline, minDelta=0.0)
+                       if c["regression"]]
+        self.assertIn("read", regressions)
+
+
+
+class StartupTest(unittest.TestCase):
+    def test_module_startup_defers_heavy_imports(self):
+        """Modulun acilis ice aktarmalari hesaplama, yuzey, toplu isleme ve disa aktarma modullerini yuklememeli"""
+        modules = VolBrainStartupBenchmark.moduleStartupImports()
+        self.assertIn("VolBrainVolumeCalculatorLib.ResultTable", modules)
+        self.assertEqual([m for m in modules if m in VolBrainStartupBenchmark.DEFERRED_MODULES], [])
+        result = VolBrainStartupBenchmark.measureImport(modules, repeat=1)
+        self.assertEqual(VolBrainStartupBenchmark.deferredModulesLoaded(result["modules"]), [])
+        self.assertIn("VolBrainVolumeCalculatorLib.ResultTable", result["modules"])
+
+        # Paket disa acilan adlari ilk erisimde yukler
+        result = VolBrainStartupBenchmark.measureImport(["VolBrainVolumeCalculatorLib"], repeat=1)
+        self.assertEqual(VolBrainStartupBenchmark.deferredModulesLoaded(result["modules"]), [])
+        import VolBrainVolumeCalculatorLib
+        self.assertIs(VolBrainVolumeCalculatorLib.FolderWatcher, FolderWatcher)
+        self.assertIs(VolBrainVolumeCalculatorLib.ResultTable, ResultTable)
+        # Ayni adli alt modul yuklendikten sonra da paket ozniteligi sinif kalir
+        self.assertIs(VolBrainVolumeCalculatorLib.MeshCache, MeshCache)
+        self.assertIs(VolBrainVolumeCalculatorLib.NiftiLabelReader, NiftiLabelReader)
+        with self.assertRaises(AttributeError):
+            VolBrainVolumeCalculatorLib.noSuchName
+
+    def test_baseline_comparison(self):
+        report = {"timings": {"lib": {"seconds": 0.05}, "moduleImports": {"seconds": 0.02, "deferredLoaded": []}}}
+        baseline = {"timings": {"lib": {"seconds": 0.01}, "moduleImports": {"seconds": 0.02}}}
+        comparisons = {c["name"]: c for c in VolBrainStartupBenchmark.compareToBaseline(report, baseline)}
+        self.assertTrue(comparisons["lib"]["regression"])
+        self.assertFalse(comparisons["moduleImports"]["regression"])
+        report["timings"]["moduleImports"]["deferredLoaded"] = ["pyarrow"]
+        comparisons = {c["name"]: c for c in VolBrainStartupBenchmark.compareToBaseline(report, baseline)}
+        self.assertTrue(comparisons["moduleImports"]["regression"])
+
+
+if __name__ == '__main__':
+    unittest.main()
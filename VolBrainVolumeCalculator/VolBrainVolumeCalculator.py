@@ -1,5 +1,8 @@
+import contextlib
 import os
+import threading
 import vtk
+import vtk.util.numpy_support
 import qt
 import ctk
 import slicer
@@ -7,6 +10,11 @@ from slicer.ScriptedLoadableModule import *
 from slicer.util import VTKObservationMixin
 import numpy as np
 
+# Diger Lib modulleri kullanan metotlarda yuklenir (bkz. VolBrainStartupBenchmark.DEFERRED_MODULES)
+from VolBrainVolumeCalculatorLib.Instrumentation import Profiler
+from VolBrainVolumeCalculatorLib.LabelRegistry import defaultRegistry, getLabelSchema
+from VolBrainVolumeCalculatorLib.ResultTable import ResultTable, ResultTableView
+
 class VolBrainVolumeCalculator(ScriptedLoadableModule):
     """3D Slicer modülü için temel sınıf."""
     
@@ -22,14 +30,43 @@ class VolBrainVolumeCalculator(ScriptedLoadableModule):
 class VolBrainVolumeCalculatorWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     """Modulun kullanici arayuzu."""
     
+    # Dosya basina ilerleme: asama -> (baslangic, agirlik); kalan pay sahneye ekleme icindir
+    PROGRESS_PHASES = {"read": (0.0, 0.8), "count": (0.8, 0.05), "names": (0.85, 0.05)}
+    PROGRESS_PHASE_NAMES = {"read": "okunuyor", "count": "sayiliyor", "names": "isimlendiriliyor"}
+    # CSV/Excel/pano ciktisinin basliklari (ResultExport.TEXT_COLUMNS sirasinda)
+    TEXT_EXPORT_HEADER = ("Kategori", "Label_ID", "Yapi_Adi", "Hacim_mm3", "Hacim_ml")
+    # Yuzey ayarlarinin arayuzdeki adlari (MeshCache.SURFACE_PRESETS sirasinda)
+    SURFACE_PRESET_NAMES = {"interactive": "Etkilesimli (Hizli)", "balanced": "Dengeli",
+                            "publication": "Yayin (Ayrintili)"}
+    # Gorunurluk gruplarinin arayuzdeki adlari (VisibilityGroups.VISIBILITY_GROUPS anahtarlari)
+    VISIBILITY_GROUP_NAMES = {"left": "Sol Hemisfer", "right": "Sag Hemisfer", "frontal": "Frontal",
+                              "temporal": "Temporal", "parietal": "Parietal", "occipital": "Oksipital",
+                              "limbic": "Limbik / Singulat", "insula": "Insula", "subcortical": "Subkortikal",
+                              "ventricles": "Ventrikuller", "whiteMatter": "Beyaz Madde", "cerebellum": "Serebellum",
+                              "brainstem": "Beyin Sapi"}
+    
     def __init__(self, parent=None):
         ScriptedLoadableModuleWidget.__init__(self, parent)
         VTKObservationMixin.__init__(self)
         self.logic = None
-        self.volumeResults = {}
+        # Tum kategorilerin hacimleri (sutun tabanli ResultTable)
+        self.volumeResults = ResultTable()
+        self.compositionResults = {}
         self.loadedNodes = []
         self.currentSegmentationNode = None
         self.currentOpacity = 1.0
+        # Arka planda (olay dongusu bosken) olusturulacak yuzeyler: [(segNode, segmentId)]
+        self.pendingSurfaces = []
+        self.surfaceTimer = None
+        # Arka plan hacim hesaplamasi (BackgroundTask) ve durumu
+        self.volumeTask = None
+        self.volumeTaskTimer = None
+        self.applyState = None
+        self.applySpan = None
+        # 3D kontrolleri panel ilk acildiginda olusturulur (bkz. ensureVisualizationControls)
+        self.segmentSelector = None
+        # Mevcut segmentasyonun gorunurluk gruplari: {grup adi: [segment ID'leri]}
+        self.segmentGroups = {}
         
     def setup(self):
         """Arayuz bilesenlerini olusturur."""
@@ -66,6 +103,10 @@ class VolBrainVolumeCalculatorWidget(ScriptedLoadableModuleWidget, VTKObservatio
         self.quickLoadButton = qt.QPushButton("Klasorden Otomatik Yukle")
         inputsFormLayout.addRow(self.quickLoadButton)
         
+        self.batchButton = qt.QPushButton("Kohort Toplu Isleme")
+        self.batchButton.toolTip = "Kok klasordeki tum deneklerin hacimlerini paralel hesaplar ve tek tabloya yazar"
+        inputsFormLayout.addRow(self.batchButton)
+        
         # Hesaplama
         calcCollapsibleButton = ctk.ctkCollapsibleButton()
         calcCollapsibleButton.text = "Hesaplama ve Gorsellestirme"
@@ -85,9 +126,45 @@ class VolBrainVolumeCalculatorWidget(ScriptedLoadableModuleWidget, VTKObservatio
         self.show3DCheckbox.checked = True
         calcFormLayout.addRow(self.show3DCheckbox)
         
+        self.lazySurfacesCheckbox = qt.QCheckBox("3D Yuzeyleri Gerektiginde Olustur")
+        self.lazySurfacesCheckbox.toolTip = ("Hesaplama yuzeyleri beklemez; segmentler gorunur kalir ve yuzeyleri "
+                                             "arka planda sirayla olusturulur")
+        self.lazySurfacesCheckbox.checked = True
+        calcFormLayout.addRow(self.lazySurfacesCheckbox)
+        
+        self.compositionCheckbox = qt.QCheckBox("Yapi x Doku Kompozisyonu")
+        self.compositionCheckbox.toolTip = "Her yapinin icindeki doku hacimlerini (structures x tissues) hesaplar"
+        self.compositionCheckbox.checked = False
+        calcFormLayout.addRow(self.compositionCheckbox)
+        
+        self.concurrentCheckbox = qt.QCheckBox("Kategorileri Paralel Oku")
+        self.concurrentCheckbox.toolTip = "Secili dosyalari ayni anda acar ve sayar; sahneye ekleme sirayla yapilir"
+        # Cok cekirdekli kazanc olculene kadar kapali (bkz. VolBrainBenchmark.py --concurrency)
+        self.concurrentCheckbox.checked = False
+        calcFormLayout.addRow(self.concurrentCheckbox)
+        
+        self.progressiveCheckbox = qt.QCheckBox("Hizli Onizleme (Yaklasik Hacimler)")
+        self.progressiveCheckbox.toolTip = ("Once ornek dilimlerden yaklasik hacimleri gosterir; okuma ilerledikce "
+                                            "satirlar kesin degerlerle guncellenir")
+        self.progressiveCheckbox.checked = False
+        calcFormLayout.addRow(self.progressiveCheckbox)
+        
+        self.profileCheckbox = qt.QCheckBox("Asama Zamanlamasi (Profil)")
+        self.profileCheckbox.toolTip = "Her asamanin suresini, CPU zamanini ve bellek artisini olcer; trace olarak kaydedilebilir"
+        self.profileCheckbox.checked = False
+        calcFormLayout.addRow(self.profileCheckbox)
+        
         self.applyButton = qt.QPushButton("Hacimleri Hesapla ve Gorsellestir")
         self.applyButton.setStyleSheet("QPushButton { font-weight: bold; padding: 10px; }")
-        calcFormLayout.addRow(self.applyButton)
+        
+        self.cancelButton = qt.QPushButton("Iptal")
+        self.cancelButton.toolTip = "Arka planda suren hesaplamayi durdurur"
+        self.cancelButton.enabled = False
+        
+        applyLayout = qt.QHBoxLayout()
+        applyLayout.addWidget(self.applyButton, 1)
+        applyLayout.addWidget(self.cancelButton)
+        calcFormLayout.addRow(applyLayout)
         
         # Sonuclar
         resultsCollapsibleButton = ctk.ctkCollapsibleButton()
@@ -96,9 +173,31 @@ class VolBrainVolumeCalculatorWidget(ScriptedLoadableModuleWidget, VTKObservatio
         self.layout.addWidget(resultsCollapsibleButton)
         resultsFormLayout = qt.QFormLayout(resultsCollapsibleButton)
         
-        self.resultsTable = qt.QTableWidget()
-        self.resultsTable.setColumnCount(5)
-        self.resultsTable.setHorizontalHeaderLabels(["Kategori", "Label ID", "Yapi Adi", "Hacim (mm3)", "Hacim (ml)"])
+        # Sonuc filtresi: kategori, isim alt dizgisi, hacim (ml) araligi
+        filterLayout = qt.QHBoxLayout()
+        self.resultsCategoryFilter = qt.QComboBox()
+        self.resultsCategoryFilter.addItem("Tum Kategoriler")
+        self.resultsNameFilter = qt.QLineEdit()
+        self.resultsNameFilter.placeholderText = "Yapi adi ara..."
+        self.resultsMinVolume = qt.QDoubleSpinBox()
+        self.resultsMaxVolume = qt.QDoubleSpinBox()
+        for spinBox, specialText in ((self.resultsMinVolume, "min ml"), (self.resultsMaxVolume, "max ml")):
+            # 0 = sinir yok
+            spinBox.decimals = 4
+            spinBox.maximum = 1e6
+            spinBox.specialValueText = specialText
+        filterLayout.addWidget(self.resultsCategoryFilter)
+        filterLayout.addWidget(self.resultsNameFilter, 1)
+        filterLayout.addWidget(self.resultsMinVolume)
+        filterLayout.addWidget(self.resultsMaxVolume)
+        resultsFormLayout.addRow(filterLayout)
+        
+        # Sanal tablo: satirlar sonuc dizilerinden yalnizca gorunurken okunur
+        self.resultsModel = VolBrainResultsModel()
+        self.resultsTable = qt.QTableView()
+        self.resultsTable.setModel(self.resultsModel)
+        self.resultsTable.verticalHeader().setSectionResizeMode(qt.QHeaderView.Fixed)
+        self.resultsTable.horizontalHeader().setSortIndicator(-1, qt.Qt.AscendingOrder)
         self.resultsTable.setColumnWidth(0, 120)
         self.resultsTable.setColumnWidth(1, 80)
         self.resultsTable.setColumnWidth(2, 250)
@@ -127,6 +226,19 @@ class VolBrainVolumeCalculatorWidget(ScriptedLoadableModuleWidget, VTKObservatio
         self.copyButton.enabled = False
         self.copyButton.setMaximumWidth(100)
         
+        self.exportBinaryButton = qt.QPushButton("📦 Ikili")
+        self.exportBinaryButton.toolTip = "Sonuclari Arrow (.arrow) veya NumPy (.npz) olarak kaydet"
+        self.exportBinaryButton.enabled = False
+        self.exportBinaryButton.setMaximumWidth(100)
+        
+        self.exportCompositionButton = qt.QPushButton("🧩 Kompozisyon")
+        self.exportCompositionButton.enabled = False
+        self.exportCompositionButton.setMaximumWidth(120)
+        
+        self.traceButton = qt.QPushButton("⏱️ Trace")
+        self.traceButton.toolTip = "Asama olcumlerini Chrome trace (JSON) olarak kaydet"
+        self.traceButton.enabled = False
+        
         self.clearButton = qt.QPushButton("🗑️ Temizle")
         self.clearButton.enabled = False
         self.clearButton.setMaximumWidth(100)
@@ -134,80 +246,197 @@ class VolBrainVolumeCalculatorWidget(ScriptedLoadableModuleWidget, VTKObservatio
         exportLayout.addWidget(self.exportCSVButton)
         exportLayout.addWidget(self.exportExcelButton)
         exportLayout.addWidget(self.copyButton)
+        exportLayout.addWidget(self.exportBinaryButton)
+        exportLayout.addWidget(self.exportCompositionButton)
+        exportLayout.addWidget(self.traceButton)
         exportLayout.addWidget(self.clearButton)
         exportLayout.addStretch()
         resultsFormLayout.addRow(exportLayout)
         
-        # 3D Gorsellestime Kontrolleri
-        visualCollapsibleButton = ctk.ctkCollapsibleButton()
-        visualCollapsibleButton.text = "3D Gorsellestime Kontrolleri"
-        visualCollapsibleButton.collapsed = True
-        self.layout.addWidget(visualCollapsibleButton)
-        visualFormLayout = qt.QFormLayout(visualCollapsibleButton)
+        # 3D Gorsellestime Kontrolleri (kapali baslar; icerigi ilk acilista olusturulur)
+        self.visualCollapsibleButton = ctk.ctkCollapsibleButton()
+        self.visualCollapsibleButton.text = "3D Gorsellestime Kontrolleri"
+        self.visualCollapsibleButton.collapsed = True
+        self.layout.addWidget(self.visualCollapsibleButton)
+        
+        # Baglanti
+        self.quickLoadButton.connect('clicked(bool)', self.onQuickLoad)
+        self.batchButton.connect('clicked(bool)', self.onCohortBatch)
+        self.applyButton.connect('clicked(bool)', self.onApplyButton)
+        self.cancelButton.connect('clicked(bool)', self.onCancelButton)
+        self.exportCSVButton.connect('clicked(bool)', self.onExportCSV)
+        self.exportExcelButton.connect('clicked(bool)', self.onExportExcel)
+        self.copyButton.connect('clicked(bool)', self.onCopyToClipboard)
+        self.exportBinaryButton.connect('clicked(bool)', self.onExportBinary)
+        self.exportCompositionButton.connect('clicked(bool)', self.onExportComposition)
+        self.traceButton.connect('clicked(bool)', self.onExportTrace)
+        self.clearButton.connect('clicked(bool)', self.onClear)
+        self.resultsCategoryFilter.connect('currentIndexChanged(int)', self.onResultsFilterChanged)
+        self.resultsNameFilter.connect('textChanged(QString)', self.onResultsFilterChanged)
+        self.resultsMinVolume.connect('valueChanged(double)', self.onResultsFilterChanged)
+        self.resultsMaxVolume.connect('valueChanged(double)', self.onResultsFilterChanged)
+        self.visualCollapsibleButton.connect('contentsCollapsed(bool)', self.onVisualizationPanelCollapsed)
+        
+        self.surfaceTimer = qt.QTimer()
+        self.surfaceTimer.setInterval(0)
+        self.surfaceTimer.connect('timeout()', self.onBuildNextSurface)
+        
+        self.volumeTaskTimer = qt.QTimer()
+        self.volumeTaskTimer.setInterval(50)
+        self.volumeTaskTimer.connect('timeout()', self.onVolumeTaskTimer)
+        
+        self.layout.addStretch(1)
+        
+    def onVisualizationPanelCollapsed(self, collapsed):
+        if not collapsed:
+            self.ensureVisualizationControls()
+    
+    def ensureVisualizationControls(self):
+        """3D kontrol panelinin icerigini ilk kullanimda olusturur ve mevcut sahneyle esler."""
+        if self.segmentSelector is not None:
+            return
+        from VolBrainVolumeCalculatorLib.MeshCache import SURFACE_PRESETS
+        visualFormLayout = qt.QFormLayout(self.visualCollapsibleButton)
         
         # Segment secimi
         self.segmentSelector = qt.QComboBox()
         self.segmentSelector.addItem("-- Tum Yapilar --")
-        self.segmentSelector.enabled = False
         visualFormLayout.addRow("3D'de Goster:", self.segmentSelector)
         
+        # Adlandirilmis gruplar (etiket isimlerinden; tek islemde gosterilir)
+        self.groupSelector = qt.QComboBox()
+        self.groupSelector.addItem("-- Grup Sec --")
+        self.groupSelector.setToolTip("Yalnizca secilen gruptaki yapilari 3D'de goster")
+        visualFormLayout.addRow("Grup Goster:", self.groupSelector)
+        
+        # Yuzey ayari (mevcut segmentasyona ve sonraki hesaplamalara uygulanir)
+        self.surfacePresetSelector = qt.QComboBox()
+        for preset in SURFACE_PRESETS:
+            self.surfacePresetSelector.addItem(self.SURFACE_PRESET_NAMES.get(preset, preset), preset)
+        self.surfacePresetSelector.setCurrentIndex(list(SURFACE_PRESETS).index(self.logic.surfacePreset))
+        self.surfacePresetSelector.setToolTip("Yuzey seyreltme/yumusatma ayari; uretilen yuzeyler diskte saklanir")
+        visualFormLayout.addRow("Yuzey Kalitesi:", self.surfacePresetSelector)
+        
         # Gorunurluk butonlari
         visibilityLayout = qt.QHBoxLayout()
         self.showAllButton = qt.QPushButton("👁️ Hepsini Goster")
-        self.showAllButton.enabled = False
         self.hideAllButton = qt.QPushButton("🚫 Hepsini Gizle")
-        self.hideAllButton.enabled = False
         self.toggleOpacityButton = qt.QPushButton("🌓 Saydamlik Degistir")
-        self.toggleOpacityButton.enabled = False
         visibilityLayout.addWidget(self.showAllButton)
         visibilityLayout.addWidget(self.hideAllButton)
         visibilityLayout.addWidget(self.toggleOpacityButton)
         visualFormLayout.addRow(visibilityLayout)
         
-        # Baglanti
-        self.quickLoadButton.connect('clicked(bool)', self.onQuickLoad)
-        self.applyButton.connect('clicked(bool)', self.onApplyButton)
-        self.exportCSVButton.connect('clicked(bool)', self.onExportCSV)
-        self.exportExcelButton.connect('clicked(bool)', self.onExportExcel)
-        self.copyButton.connect('clicked(bool)', self.onCopyToClipboard)
-        self.clearButton.connect('clicked(bool)', self.onClear)
         self.segmentSelector.connect('currentIndexChanged(int)', self.onSegmentSelected)
+        self.groupSelector.connect('currentIndexChanged(int)', self.onGroupSelected)
         self.showAllButton.connect('clicked(bool)', self.onShowAll)
         self.hideAllButton.connect('clicked(bool)', self.onHideAll)
         self.toggleOpacityButton.connect('clicked(bool)', self.onToggleOpacity)
+        self.surfacePresetSelector.connect('currentIndexChanged(int)', self.onSurfacePresetChanged)
         
-        self.layout.addStretch(1)
-        
+        self.updateSegmentSelector()
+        self.setVisualizationControlsEnabled(self.currentSegmentationNode is not None)
+    
+    def setVisualizationControlsEnabled(self, enabled):
+        if self.segmentSelector is None:
+            return
+        self.segmentSelector.enabled = enabled
+        self.groupSelector.enabled = enabled
+        self.showAllButton.enabled = enabled
+        self.hideAllButton.enabled = enabled
+        self.toggleOpacityButton.enabled = enabled
+    
     def cleanup(self):
         """Temizlik islemleri."""
-        pass
+        if self.surfaceTimer:
+            self.surfaceTimer.stop()
+        self.pendingSurfaces = []
+        if self.volumeTask:
+            self.volumeTask.cancel()
+            self.volumeTask = None
+        if self.volumeTaskTimer:
+            self.volumeTaskTimer.stop()
     
     def onQuickLoad(self):
         """Klasorden otomatik dosya yukleme."""
         folder = qt.QFileDialog.getExistingDirectory(self.parent, "volBrain Sonuc Klasorunu Secin")
         
         if folder:
-            files = os.listdir(folder)
-            for f in files:
-                fullPath = os.path.join(folder, f)
-                if 'structures' in f.lower() and 'native' in f.lower() and not 'macro' in f.lower():
-                    self.structuresSelector.setCurrentPath(fullPath)
-                elif 'tissues' in f.lower() and 'native' in f.lower():
-                    self.tissuesSelector.setCurrentPath(fullPath)
-                elif 'lobes' in f.lower() and 'native' in f.lower():
-                    self.lobesSelector.setCurrentPath(fullPath)
-                elif 'macrostructures' in f.lower() and 'native' in f.lower():
-                    self.macroSelector.setCurrentPath(fullPath)
+            selectors = {
+                "structures": self.structuresSelector,
+                "tissues": self.tissuesSelector,
+                "lobes": self.lobesSelector,
+                "macro": self.macroSelector
+            }
+            from VolBrainVolumeCalculatorLib.CohortBatch import findVolBrainFiles
+            for category, fullPath in findVolBrainFiles(folder).items():
+                selectors[category].setCurrentPath(fullPath)
             
             self.statusLabel.setText("Dosyalar otomatik yuklendi")
     
+    def onCohortBatch(self):
+        """Kok klasordeki tum denekler icin toplu hacim hesaplama."""
+        rootDir = qt.QFileDialog.getExistingDirectory(self.parent, "Kohort Kok Klasorunu Secin")
+        if not rootDir:
+            return
+        
+        fileName = qt.QFileDialog.getSaveFileName(
+            self.parent, "Kohort Tablosunu Kaydet",
+            os.path.join(rootDir, "volbrain_cohort_volumes.csv"),
+            "CSV Files (*.csv);;Arrow IPC (*.arrow);;NumPy (*.npz)")
+        if not fileName:
+            return
+        from VolBrainVolumeCalculatorLib.CohortBatch import writeLongTable
+        from VolBrainVolumeCalculatorLib.ResultExport import binaryFormatForPath, writeResultTable
+        binaryFormat = binaryFormatForPath(fileName)
+        
+        self.progressBar.setValue(0)
+        self.statusLabel.setText("Kohort hesaplaniyor...")
+        slicer.app.processEvents()
+        
+        def onProgress(done, total, subjectId):
+            self.progressBar.setValue(int(done / total * 100))
+            self.statusLabel.setText(f"{subjectId} tamamlandi ({done}/{total})")
+            slicer.app.processEvents()
+        
+        try:
+            rows, errors = self.logic.runCohortBatch(rootDir, progressCallback=onProgress)
+            if binaryFormat:
+                writeResultTable(ResultTable.fromRows(rows), fileName, binaryFormat)
+            else:
+                writeLongTable(rows, fileName)
+        except Exception as e:
+            slicer.util.errorDisplay(f"Toplu isleme hatasi: {str(e)}")
+            self.statusLabel.setText("Hata: Toplu isleme basarisiz")
+            return
+        
+        subjects = len(set(row["subject"] for row in rows))
+        self.progressBar.setValue(100)
+        self.statusLabel.setText(f"Kohort tamamlandi: {subjects} denek, {len(errors)} hata")
+        message = f"Kohort tablosu kaydedildi:\n{fileName}\n\n{subjects} denek, {len(rows)} satir"
+        if errors:
+            message += f"\n\n{len(errors)} hata (ayrintilar Python konsolunda)"
+        slicer.util.messageBox(message)
+    
     def onApplyButton(self):
-        """Hacim hesaplama islemini baslatir."""
-        self.volumeResults = {}
-        self.resultsTable.setRowCount(0)
+        """Hacim hesaplama islemini arka planda baslatir.
+        
+        Dosya okuma, sayim ve isimlendirme bir is parcaciginda yapilir; her
+        kategori hazir oldugunda sahneye ana is parcaciginda eklenir. Arayuz bu
+        sirada yanit vermeye devam eder ve islem Iptal ile durdurulabilir.
+        """
+        if self.volumeTask and self.volumeTask.running:
+            return
+        
+        profiler = self.logic.profiler
+        profiler.enabled = self.profileCheckbox.checked or bool(os.environ.get('VOLBRAIN_PROFILE'))
+        profiler.reset()
+        
+        self.volumeResults = ResultTable()
+        self.compositionResults = {}
+        self.resultsModel.setTable(self.volumeResults)
         self.progressBar.setValue(0)
         self.statusLabel.setText("Hesaplama basliyor...")
-        slicer.app.processEvents()
         
         # Dosya yollarini topla
         files = [
@@ -224,95 +453,262 @@ class VolBrainVolumeCalculatorWidget(ScriptedLoadableModuleWidget, VTKObservatio
             self.statusLabel.setText("Hata: Dosya secilmedi")
             return
         
-        totalSteps = len(validFiles)
-        currentStep = 0
-        allResults = {}
-        
+        self.applySpan = profiler.span("onApplyButton")
+        self.applySpan.__enter__()
+        self.applyState = {
+            "categories": [cat for _, cat in validFiles],
+            "show3D": self.show3DCheckbox.checked,
+            "lazySurfaces": self.lazySurfacesCheckbox.checked,
+            "allResults": ResultTable(),
+            # Kategori basina tamamlanma orani (paralel islemede birlikte ilerler)
+            "progress": {cat: 0.0 for _, cat in validFiles},
+            "progressive": self.progressiveCheckbox.checked,
+            # Yaklasik gosterilen kategoriler: kategori -> {etiket: mm3 hatasi}
+            "estimates": {},
+        }
+        if self.applyState["progressive"]:
+            # Tablo hesaplama boyunca ayni sonuc tablosunu gosterir
+            self.volumeResults = self.applyState["allResults"]
+            self.resultsModel.setTable(self.volumeResults)
+        
+        # Onbellekte olan ve sahnesi hazir kategoriler icin dosya okunmaz
+        pendingFiles = []
         for filePath, category in validFiles:
-            currentStep += 1
-            self.progressBar.setValue(int(currentStep / totalSteps * 100))
-            self.statusLabel.setText(f"{category} hesaplaniyor...")
+            cachedResults = self.logic.getCachedVolumes(filePath, category, self.applyState["show3D"])
+            if cachedResults is None:
+                pendingFiles.append((filePath, category))
+            else:
+                self.onCategoryResults(category, cachedResults)
+        
+        if not pendingFiles:
+            self.finishVolumeCalculation()
+            return
+        
+        logic = self.logic
+        concurrent = self.concurrentCheckbox.checked
+        progressive = self.applyState["progressive"]
+        def computeInBackground(token, post):
+            def onProgress(category, phase, fraction):
+                post("progress", (category, phase, fraction))
+            def onPreview(category, results, fraction):
+                post("estimate", (category, results, fraction))
+            outcomes = logic.prepareLabelVolumes(pendingFiles, concurrent=concurrent,
+                                                 progressCallback=onProgress, cancelToken=token,
+                                                 previewCallback=onPreview if progressive else None)
+            for category, prepared, error in outcomes:
+                if error is not None:
+                    post("categoryError", (category, error))
+                else:
+                    post("prepared", prepared)
+        
+        from VolBrainVolumeCalculatorLib.BackgroundTasks import BackgroundTask
+        self.applyButton.enabled = False
+        self.cancelButton.enabled = True
+        self.volumeTask = BackgroundTask(computeInBackground).start()
+        self.volumeTaskTimer.start()
+    
+    def onCancelButton(self):
+        """Arka plandaki hesaplamayi iptal eder; o ana kadar eklenen kategoriler korunur."""
+        if self.volumeTask and self.volumeTask.running:
+            self.volumeTask.cancel()
+            self.cancelButton.enabled = False
+            self.statusLabel.setText("Iptal ediliyor...")
+    
+    def onVolumeTaskTimer(self):
+        """Is parcaciginin mesajlarini ana is parcaciginda isler."""
+        if not self.volumeTask:
+            self.volumeTaskTimer.stop()
+            return
+        state = self.applyState
+        # Ayni kategorinin art arda gelen tahminlerinden yalnizca sonuncusu gosterilir
+        estimates = {}
+        for kind, payload in self.volumeTask.poll():
+            if kind == "estimate":
+                estimates[payload[0]] = payload
+            elif kind == "progress":
+                category, phase, fraction = payload
+                phaseStart, phaseWeight = self.PROGRESS_PHASES[phase]
+                self.setCategoryProgress(category, phaseStart + phaseWeight * fraction)
+                self.statusLabel.setText(f"{category}: {self.PROGRESS_PHASE_NAMES[phase]} ({int(fraction * 100)}%)")
+            elif kind == "prepared":
+                estimates.pop(payload.category, None)
+                self.statusLabel.setText(f"{payload.category} sahneye ekleniyor...")
+                try:
+                    results = self.logic.applyLabelVolume(payload, show3D=state["show3D"], lazySurfaces=state["lazySurfaces"])
+                    self.onCategoryResults(payload.category, results)
+                except Exception as e:
+                    self.onCategoryError(payload.category, e)
+            elif kind == "categoryError":
+                estimates.pop(payload[0], None)
+                self.onCategoryError(*payload)
+            elif kind in ("finished", "cancelled", "error"):
+                self.volumeTaskTimer.stop()
+                self.volumeTask = None
+                if kind == "error":
+                    self.onCategoryError("arka plan", payload)
+                self.finishVolumeCalculation(cancelled=(kind == "cancelled"))
+                return
+        for category, results, fraction in estimates.values():
+            self.onCategoryEstimate(category, results, fraction)
+    
+    def setCategoryProgress(self, category, fraction):
+        progress = self.applyState["progress"]
+        progress[category] = fraction
+        self.progressBar.setValue(int(sum(progress.values()) / len(progress) * 100))
+    
+    def onCategoryEstimate(self, category, results, fraction):
+        """Yaklasik hacimleri tabloya yazar; kategorinin satirlari yerinde guncellenir."""
+        state = self.applyState
+        state["estimates"][category] = {data["label_id"]: data["mm3_error"] for data in results.values()}
+        self.updateProgressiveRows(category, results)
+        totalMl = sum(data["ml"] for data in results.values())
+        errorMl = np.sqrt(sum(data["ml_error"] ** 2 for data in results.values()))
+        self.statusLabel.setText(f"{category}: yaklasik {totalMl:.2f} ± {errorMl:.2f} ml "
+                                 f"({int(fraction * 100)}% kesin)")
+    
+    def updateProgressiveRows(self, category, results):
+        """Ilerlemeli modda kategorinin satirlarini degistirir ve tabloyu yeniler."""
+        state = self.applyState
+        structural = state["allResults"].replaceCategory(category, results)
+        if not state["progressive"]:
+            return
+        self.resultsModel.setApproximate(state["estimates"])
+        if structural:
+            self.updateResultsTable()
+        else:
+            self.resultsModel.refreshValues()
+        self.updateSummary()
+    
+    def onCategoryResults(self, category, results):
+        """Bir kategorinin sonuclarini toplar ve segmentasyon node'unu kaydeder."""
+        state = self.applyState
+        # Ilerlemeli modda tahmini satirlar kesin degerlerle degistirilir
+        state["estimates"].pop(category, None)
+        self.updateProgressiveRows(category, results)
+        self.setCategoryProgress(category, 1.0)
+        
+        # Node'u kaydet
+        if state["show3D"]:
+            # Segmentation node'u bul ve kaydet
+            segNodeName = f"volBrain_{category}_Segmentation"
+            segNode = slicer.util.getFirstNodeByName(segNodeName)
+            if segNode and segNode not in self.loadedNodes:
+                self.loadedNodes.append(segNode)
+                if not self.currentSegmentationNode:
+                    self.currentSegmentationNode = segNode
+            if segNode and state["lazySurfaces"]:
+                # Segmentler gorunur; yuzeyleri olay dongusu bosken sirayla olusturulur
+                self.requestSurfaces(segNode, self.allSegmentIds(segNode.GetSegmentation()))
+    
+    def onCategoryError(self, category, error):
+        if category in self.applyState["progress"]:
+            self.setCategoryProgress(category, 1.0)
+        if self.applyState["estimates"].pop(category, None) is not None:
+            self.updateProgressiveRows(category, {})
+        print(f"HATA {category}: {str(error)}")
+        import traceback
+        traceback.print_exception(type(error), error, error.__traceback__)
+    
+    def finishVolumeCalculation(self, cancelled=False):
+        """Tum kategoriler bittiginde (veya iptalde) arayuzu gunceller."""
+        state = self.applyState
+        allResults = state["allResults"]
+        self.applyButton.enabled = True
+        self.cancelButton.enabled = False
+        
+        # Iptalde yarim kalan kategorilerin yaklasik satirlari sonuca girmez
+        for category in list(state["estimates"]):
+            del state["estimates"][category]
+            allResults.replaceCategory(category, {})
+        self.resultsModel.setApproximate({})
+        
+        self.volumeResults = allResults
+        
+        # Yapi x doku kompozisyonu (iki harita ayni izgaradaysa)
+        loadedCategories = state["categories"]
+        if (not cancelled and self.compositionCheckbox.checked
+                and "structures" in loadedCategories and "tissues" in loadedCategories):
+            self.statusLabel.setText("Kompozisyon hesaplaniyor...")
             slicer.app.processEvents()
-            
             try:
-                results = self.logic.calculateVolumes(
-                    filePath, 
-                    category, 
-                    show3D=self.show3DCheckbox.checked
-                )
-                allResults.update(results)
-                
-                # Node'u kaydet
-                if self.show3DCheckbox.checked:
-                    # Segmentation node'u bul ve kaydet
-                    segNodeName = f"volBrain_{category}_Segmentation"
-                    segNode = slicer.util.getFirstNodeByName(segNodeName)
-                    if segNode:
-                        self.loadedNodes.append(segNode)
-                        if not self.currentSegmentationNode:
-                            self.currentSegmentationNode = segNode
-                
+                self.compositionResults = self.logic.calculateComposition("structures", "tissues")
             except Exception as e:
-                print(f"HATA {category}: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                print(f"HATA kompozisyon: {str(e)}")
+                slicer.util.errorDisplay(f"Kompozisyon hesaplanamadi: {str(e)}")
+        self.exportCompositionButton.enabled = bool(self.compositionResults)
         
-        self.volumeResults = allResults
-        self.updateResultsTable()
-        self.updateSummary()
+        with self.logic.profiler.span("updateResultsTable", rows=len(allResults)):
+            self.updateResultsTable()
+            self.updateSummary()
         
         self.exportCSVButton.enabled = True
         self.exportExcelButton.enabled = True
         self.copyButton.enabled = True
+        self.exportBinaryButton.enabled = True
         self.clearButton.enabled = True
-        self.segmentSelector.enabled = True
-        self.showAllButton.enabled = True
-        self.hideAllButton.enabled = True
-        self.toggleOpacityButton.enabled = True
         
         # Segment secici'yi doldur
-        self.updateSegmentSelector()
+        with self.logic.profiler.span("updateSegmentSelector"):
+            self.updateSegmentSelector()
+        self.setVisualizationControlsEnabled(True)
         
-        self.progressBar.setValue(100)
-        self.statusLabel.setText(f"Tamamlandi! {len(allResults)} yapi hesaplandi")
+        if cancelled:
+            self.statusLabel.setText(f"Iptal edildi: {len(allResults)} yapi hesaplandi")
+        else:
+            self.progressBar.setValue(100)
+            self.statusLabel.setText(f"Tamamlandi! {len(allResults)} yapi hesaplandi")
         
         # 3D görünümü ayarla
-        if self.show3DCheckbox.checked:
-            layoutManager = slicer.app.layoutManager()
-            layoutManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutFourUpView)
-            slicer.util.resetSliceViews()
-        
-        slicer.util.messageBox(f"Hacim hesaplamasi tamamlandi!\n\n{len(allResults)} beyin yapisi analiz edildi.")
+        if state["show3D"] and allResults:
+            with self.logic.profiler.span("resetViews"):
+                layoutManager = slicer.app.layoutManager()
+                layoutManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutFourUpView)
+                slicer.util.resetSliceViews()
+        
+        self.applySpan.__exit__(None, None, None)
+        profiler = self.logic.profiler
+        if profiler.enabled:
+            # Asama dokumu durum alaninda; ayrintisi Trace ile kaydedilebilir
+            breakdown = profiler.formatSummary()
+            self.statusLabel.setText(f"{self.statusLabel.text}\n{breakdown}")
+            self.traceButton.enabled = True
+            print(f"volBrain asama olcumleri:\n{breakdown}")
+        
+        if not cancelled:
+            slicer.util.messageBox(f"Hacim hesaplamasi tamamlandi!\n\n{len(allResults)} beyin yapisi analiz edildi.")
     
     def updateResultsTable(self):
-        """Sonuc tablosunu gunceller."""
-        self.resultsTable.setRowCount(len(self.volumeResults))
-        row = 0
-        
-        for structureKey, data in sorted(self.volumeResults.items()):
-            self.resultsTable.setItem(row, 0, qt.QTableWidgetItem(data['category'].upper()))
-            self.resultsTable.setItem(row, 1, qt.QTableWidgetItem(str(data['label_id'])))
-            self.resultsTable.setItem(row, 2, qt.QTableWidgetItem(data['name']))
-            self.resultsTable.setItem(row, 3, qt.QTableWidgetItem(f"{data['mm3']:.2f}"))
-            self.resultsTable.setItem(row, 4, qt.QTableWidgetItem(f"{data['ml']:.4f}"))
-            row += 1
+        """Sonuc tablosunu gunceller (model sonuc dizilerini dogrudan kullanir, satir ogesi olusturulmaz)."""
+        currentCategory = self.resultsCategoryFilter.currentText
+        self.resultsCategoryFilter.blockSignals(True)
+        self.resultsCategoryFilter.clear()
+        self.resultsCategoryFilter.addItem("Tum Kategoriler")
+        for category, _, _, _ in self.volumeResults.summarizeByCategory():
+            self.resultsCategoryFilter.addItem(category)
+        self.resultsCategoryFilter.setCurrentIndex(max(self.resultsCategoryFilter.findText(currentCategory), 0))
+        self.resultsCategoryFilter.blockSignals(False)
+        self.resultsModel.setTable(self.volumeResults)
+        self.onResultsFilterChanged()
+    
+    def onResultsFilterChanged(self, *args):
+        """Filtre alanlari degistiginde modelin satirlarini yeniden hesaplar."""
+        categoryIndex = self.resultsCategoryFilter.currentIndex
+        category = self.resultsCategoryFilter.currentText if categoryIndex > 0 else None
+        minimum = self.resultsMinVolume.value or None
+        maximum = self.resultsMaxVolume.value or None
+        self.resultsModel.setFilter(category, self.resultsNameFilter.text.strip(), (minimum, maximum))
     
     def updateSummary(self):
         """Ozet istatistikleri gunceller."""
         if not self.volumeResults:
             return
         
-        categories = {}
-        for data in self.volumeResults.values():
-            cat = data['category']
-            if cat not in categories:
-                categories[cat] = {'count': 0, 'total_ml': 0}
-            categories[cat]['count'] += 1
-            categories[cat]['total_ml'] += data['ml']
-        
         summary = "<b>Kategori Ozeti:</b><br>"
-        for cat, stats in sorted(categories.items()):
-            summary += f"{cat.upper()}: {stats['count']} yapi, Toplam: {stats['total_ml']:.2f} ml<br>"
+        for cat, count, _, totalMl in self.volumeResults.summarizeByCategory():
+            summary += f"{cat.upper()}: {count} yapi, Toplam: {totalMl:.2f} ml<br>"
+        if self.compositionResults:
+            structures = len(set(data['label_id'] for data in self.compositionResults.values()))
+            summary += f"KOMPOZISYON: {structures} yapi x doku, {len(self.compositionResults)} satir<br>"
         
         self.summaryLabel.setText(summary)
     
@@ -324,22 +720,73 @@ class VolBrainVolumeCalculatorWidget(ScriptedLoadableModuleWidget, VTKObservatio
             "CSV Files (*.csv)")
         
         if fileName:
+            from VolBrainVolumeCalculatorLib.ResultExport import writeDelimited
             try:
-                with open(fileName, 'w', encoding='utf-8') as f:
-                    f.write("Kategori,Label_ID,Yapi_Adi,Hacim_mm3,Hacim_ml\n")
-                    for data in sorted(self.volumeResults.values(), key=lambda x: (x['category'], x['label_id'])):
-                        f.write(f"{data['category']},{data['label_id']},{data['name']},{data['mm3']:.2f},{data['ml']:.4f}\n")
+                writeDelimited(fileName, self.volumeResults, ",", header=self.TEXT_EXPORT_HEADER)
                 
                 slicer.util.messageBox(f"Sonuclar kaydedildi:\n{fileName}")
                 self.statusLabel.setText("CSV kaydedildi")
             except Exception as e:
                 slicer.util.errorDisplay(f"Kaydetme hatasi: {str(e)}")
     
+    def onExportBinary(self):
+        """Sonuclari ikili sutun tabanli dosya olarak (Arrow IPC veya NumPy .npz) disa aktarir."""
+        from VolBrainVolumeCalculatorLib.ResultExport import defaultBinaryFormat, writeResultTable
+        extension = ".arrow" if defaultBinaryFormat() == "arrow" else ".npz"
+        fileName = qt.QFileDialog.getSaveFileName(
+            self.parent, "Ikili Dosyayi Kaydet", 
+            os.path.expanduser(f"~/volbrain_volumes{extension}"), 
+            "Arrow IPC (*.arrow);;NumPy (*.npz)")
+        
+        if fileName:
+            try:
+                writeResultTable(self.volumeResults, fileName)
+                self.statusLabel.setText("Ikili dosya kaydedildi")
+            except Exception as e:
+                slicer.util.errorDisplay(f"Kaydetme hatasi: {str(e)}")
+    
+    def onExportComposition(self):
+        """Yapi x doku kompozisyonunu CSV olarak disa aktarir."""
+        fileName = qt.QFileDialog.getSaveFileName(
+            self.parent, "Kompozisyon Dosyasini Kaydet", 
+            os.path.expanduser("~/volbrain_composition.csv"), 
+            "CSV Files (*.csv)")
+        
+        if fileName:
+            try:
+                with open(fileName, 'w', encoding='utf-8') as f:
+                    f.write("Kategori,Label_ID,Yapi_Adi,Doku_Kategori,Doku_ID,Doku_Adi,Hacim_mm3,Hacim_ml,Oran\n")
+                    for data in sorted(self.compositionResults.values(), key=lambda x: (x['label_id'], x['by_label_id'])):
+                        f.write(f"{data['category']},{data['label_id']},{data['name']},"
+                                f"{data['by_category']},{data['by_label_id']},{data['by_name']},"
+                                f"{data['mm3']:.2f},{data['ml']:.4f},{data['fraction']:.4f}\n")
+                
+                slicer.util.messageBox(f"Kompozisyon kaydedildi:\n{fileName}")
+                self.statusLabel.setText("Kompozisyon CSV kaydedildi")
+            except Exception as e:
+                slicer.util.errorDisplay(f"Kaydetme hatasi: {str(e)}")
+    
+    def onExportTrace(self):
+        """Son hesaplamanin asama olcumlerini Chrome trace (JSON) olarak kaydeder.
+        
+        Dosya chrome://tracing veya https://ui.perfetto.dev ile acilabilir.
+        """
+        fileName = qt.QFileDialog.getSaveFileName(
+            self.parent, "Trace Dosyasini Kaydet", 
+            os.path.expanduser("~/volbrain_trace.json"), 
+            "JSON Files (*.json)")
+        
+        if fileName:
+            try:
+                self.logic.profiler.exportChromeTrace(fileName)
+                self.statusLabel.setText("Trace kaydedildi")
+            except Exception as e:
+                slicer.util.errorDisplay(f"Kaydetme hatasi: {str(e)}")
+    
     def onCopyToClipboard(self):
         """Sonuclari panoya kopyala."""
-        text = "Kategori\tLabel_ID\tYapi_Adi\tHacim_mm3\tHacim_ml\n"
-        for data in sorted(self.volumeResults.values(), key=lambda x: (x['category'], x['label_id'])):
-            text += f"{data['category']}\t{data['label_id']}\t{data['name']}\t{data['mm3']:.2f}\t{data['ml']:.4f}\n"
+        from VolBrainVolumeCalculatorLib.ResultExport import formatDelimited
+        text = "".join(formatDelimited(self.volumeResults, "\t", header=self.TEXT_EXPORT_HEADER))
         
         clipboard = qt.QApplication.clipboard()
         clipboard.setText(text)
@@ -352,28 +799,63 @@ class VolBrainVolumeCalculatorWidget(ScriptedLoadableModuleWidget, VTKObservatio
             slicer.mrmlScene.RemoveNode(node)
         self.loadedNodes = []
         self.currentSegmentationNode = None
-        self.segmentSelector.clear()
-        self.segmentSelector.addItem("-- Tum Yapilar --")
-        self.segmentSelector.enabled = False
-        self.showAllButton.enabled = False
-        self.hideAllButton.enabled = False
-        self.toggleOpacityButton.enabled = False
+        self.surfaceTimer.stop()
+        self.pendingSurfaces = []
+        self.segmentGroups = {}
+        if self.segmentSelector is not None:
+            self.segmentSelector.clear()
+            self.segmentSelector.addItem("-- Tum Yapilar --")
+            self.updateGroupSelector()
+        self.setVisualizationControlsEnabled(False)
         self.statusLabel.setText("Temizlendi")
     
     def updateSegmentSelector(self):
-        """Segment secici'yi guncelle."""
-        self.segmentSelector.clear()
-        self.segmentSelector.addItem("-- Tum Yapilar --")
+        """Segment secici'yi guncelle (panel henuz olusturulmadiysa yalnizca segmentasyonu bulur)."""
+        if self.segmentSelector is not None:
+            self.segmentSelector.clear()
+            self.segmentSelector.addItem("-- Tum Yapilar --")
         
         # Tum segmentation node'lari bul
         for node in self.loadedNodes:
             if node.IsA('vtkMRMLSegmentationNode'):
                 self.currentSegmentationNode = node
+                if self.segmentSelector is None:
+                    continue
                 segmentation = node.GetSegmentation()
                 for i in range(segmentation.GetNumberOfSegments()):
                     segmentId = segmentation.GetNthSegmentID(i)
                     segment = segmentation.GetSegment(segmentId)
                     self.segmentSelector.addItem(segment.GetName(), segmentId)
+        
+        if self.segmentSelector is not None:
+            self.segmentGroups = (self.logic.getSegmentGroups(self.currentSegmentationNode)
+                                  if self.currentSegmentationNode else {})
+            self.updateGroupSelector()
+    
+    def updateGroupSelector(self):
+        """Grup secicisini mevcut segmentasyonda bulunan gruplarla doldurur."""
+        wasBlocked = self.groupSelector.blockSignals(True)
+        self.groupSelector.clear()
+        self.groupSelector.addItem("-- Grup Sec --")
+        for groupName, segmentIds in self.segmentGroups.items():
+            self.groupSelector.addItem(f"{self.VISIBILITY_GROUP_NAMES.get(groupName, groupName)} ({len(segmentIds)})",
+                                       groupName)
+        self.groupSelector.blockSignals(wasBlocked)
+    
+    def onGroupSelected(self, index):
+        """Yalnizca secilen gruptaki segmentleri 3D'de gosterir."""
+        if index <= 0 or not self.currentSegmentationNode:
+            return
+        segmentIds = self.segmentGroups.get(self.groupSelector.itemData(index), [])
+        self.logic.showOnlySegments3D(self.currentSegmentationNode, segmentIds)
+        self.statusLabel.setText(f"Grup gosteriliyor: {self.groupSelector.currentText}")
+        self.requestSurfaces(self.currentSegmentationNode, segmentIds)
+    
+    def resetGroupSelector(self):
+        # Ayni grup tekrar secilebilsin diye secici "Grup Sec" durumuna doner
+        wasBlocked = self.groupSelector.blockSignals(True)
+        self.groupSelector.setCurrentIndex(0)
+        self.groupSelector.blockSignals(wasBlocked)
     
     def onSegmentSelected(self, index):
         """Secilen segment'i 3D'de goster."""
@@ -381,22 +863,17 @@ class VolBrainVolumeCalculatorWidget(ScriptedLoadableModuleWidget, VTKObservatio
             return
         
         segmentation = self.currentSegmentationNode.GetSegmentation()
-        displayNode = self.currentSegmentationNode.GetDisplayNode()
         
         if index == 0:  # "Tum Yapilar" secildi
             # Hepsini goster
-            for i in range(segmentation.GetNumberOfSegments()):
-                segmentId = segmentation.GetNthSegmentID(i)
-                displayNode.SetSegmentVisibility3D(segmentId, True)
+            self.logic.showOnlySegments3D(self.currentSegmentationNode, self.allSegmentIds(segmentation))
+            self.requestSurfaces(self.currentSegmentationNode, self.allSegmentIds(segmentation))
         else:
-            # Sadece secileni goster
+            # Sadece secileni goster (yuzeyi yoksa hemen olustur)
             selectedSegmentId = self.segmentSelector.itemData(index)
-            for i in range(segmentation.GetNumberOfSegments()):
-                segmentId = segmentation.GetNthSegmentID(i)
-                if segmentId == selectedSegmentId:
-                    displayNode.SetSegmentVisibility3D(segmentId, True)
-                else:
-                    displayNode.SetSegmentVisibility3D(segmentId, False)
+            self.logic.ensureSegmentSurface(self.currentSegmentationNode, selectedSegmentId)
+            self.logic.showOnlySegments3D(self.currentSegmentationNode, [selectedSegmentId])
+        self.resetGroupSelector()
     
     def onShowAll(self):
         """Tum segmentleri goster."""
@@ -404,27 +881,62 @@ class VolBrainVolumeCalculatorWidget(ScriptedLoadableModuleWidget, VTKObservatio
             return
         
         segmentation = self.currentSegmentationNode.GetSegmentation()
-        displayNode = self.currentSegmentationNode.GetDisplayNode()
-        
-        for i in range(segmentation.GetNumberOfSegments()):
-            segmentId = segmentation.GetNthSegmentID(i)
-            displayNode.SetSegmentVisibility3D(segmentId, True)
+        self.logic.showOnlySegments3D(self.currentSegmentationNode, self.allSegmentIds(segmentation))
         
         self.segmentSelector.setCurrentIndex(0)
+        self.resetGroupSelector()
         self.statusLabel.setText("Tum yapilar gosteriliyor")
+        self.requestSurfaces(self.currentSegmentationNode, self.allSegmentIds(segmentation))
+    
+    def allSegmentIds(self, segmentation):
+        return [segmentation.GetNthSegmentID(i) for i in range(segmentation.GetNumberOfSegments())]
+    
+    def onSurfacePresetChanged(self, index):
+        """Yuzey ayarini mevcut segmentasyona uygular; gorunen yuzeyler yeniden olusturulur."""
+        preset = self.surfacePresetSelector.itemData(index)
+        self.logic.surfacePreset = preset
+        if not self.currentSegmentationNode:
+            return
+        segmentationNode = self.currentSegmentationNode
+        removed = self.logic.setSurfacePreset(segmentationNode, preset)
+        displayNode = segmentationNode.GetDisplayNode()
+        visible = [segmentId for segmentId in removed
+                   if not displayNode or displayNode.GetSegmentVisibility3D(segmentId)]
+        self.requestSurfaces(segmentationNode, visible)
+        self.statusLabel.setText(f"Yuzey ayari: {self.surfacePresetSelector.currentText}")
+    
+    def requestSurfaces(self, segmentationNode, segmentIds):
+        """Yuzeyi olmayan segmentleri olay dongusu bosken tek tek olusturmak icin siraya koyar."""
+        queued = set(self.pendingSurfaces)
+        for segmentId in self.logic.getMissingSurfaceSegmentIds(segmentationNode, segmentIds):
+            if (segmentationNode, segmentId) not in queued:
+                self.pendingSurfaces.append((segmentationNode, segmentId))
+        if self.pendingSurfaces:
+            self.surfaceTimer.start()
+    
+    def onBuildNextSurface(self):
+        """Siradaki tek segmentin yuzeyini olusturur; arayuz bloklanmaz."""
+        if not self.pendingSurfaces:
+            self.surfaceTimer.stop()
+            return
+        segmentationNode, segmentId = self.pendingSurfaces.pop(0)
+        try:
+            self.logic.ensureSegmentSurface(segmentationNode, segmentId)
+        except Exception as e:
+            print(f"HATA yuzey {segmentId}: {str(e)}")
+        if self.pendingSurfaces:
+            self.statusLabel.setText(f"3D yuzeyler olusturuluyor... {len(self.pendingSurfaces)} kaldi")
+        else:
+            self.surfaceTimer.stop()
+            self.statusLabel.setText("3D yuzeyler hazir")
     
     def onHideAll(self):
         """Tum segmentleri gizle."""
         if not self.currentSegmentationNode:
             return
         
-        segmentation = self.currentSegmentationNode.GetSegmentation()
-        displayNode = self.currentSegmentationNode.GetDisplayNode()
-        
-        for i in range(segmentation.GetNumberOfSegments()):
-            segmentId = segmentation.GetNthSegmentID(i)
-            displayNode.SetSegmentVisibility3D(segmentId, False)
-        
+        self.logic.showOnlySegments3D(self.currentSegmentationNode, [])
+        self.resetGroupSelector()
         self.statusLabel.setText("Tum yapilar gizlendi")
     
     def onToggleOpacity(self):
@@ -453,422 +965,848 @@ class VolBrainVolumeCalculatorWidget(ScriptedLoadableModuleWidget, VTKObservatio
             "CSV Files (*.csv)")
         
         if fileName:
+            from VolBrainVolumeCalculatorLib.ResultExport import writeDelimited
             try:
-                # Excel icin tab-delimited CSV
-                with open(fileName, 'w', encoding='utf-8-sig') as f:  # BOM ekle Excel icin
-                    f.write("Kategori\tLabel_ID\tYapi_Adi\tHacim_mm3\tHacim_ml\n")
-                    for data in sorted(self.volumeResults.values(), key=lambda x: (x['category'], x['label_id'])):
-                        f.write(f"{data['category']}\t{data['label_id']}\t{data['name']}\t{data['mm3']:.2f}\t{data['ml']:.4f}\n")
+                # Excel icin tab-delimited CSV (BOM ekle Excel icin)
+                writeDelimited(fileName, self.volumeResults, "\t", header=self.TEXT_EXPORT_HEADER,
+                               encoding='utf-8-sig')
                 
                 slicer.util.messageBox(f"Excel dosyasi kaydedildi:\n{fileName}\n\nExcel'de acmak icin:\n1. Excel'i acin\n2. Dosya > Ac\n3. 'Tum Dosyalar' secin\n4. CSV dosyasini secin")
                 self.statusLabel.setText("Excel dosyasi kaydedildi")
             except Exception as e:
                 slicer.util.errorDisplay(f"Kaydetme hatasi: {str(e)}")
 
+class VolBrainResultsModel(qt.QAbstractTableModel):
+    """ResultTableView'i saran sanal Qt tablo modeli.
+    
+    Hucreler yalnizca gorunum istediginde bicimlendirilir; siralama ve
+    filtreleme modelde vektorel yapilir, boylece 100k+ satirda da tablo
+    akici kalir.
+    """
+    
+    HEADERS = ["Kategori", "Label ID", "Yapi Adi", "Hacim (mm3)", "Hacim (ml)"]
+    NUMERIC_COLUMNS = (1, 3, 4)
+    VOLUME_COLUMNS = (3, 4)
+    
+    def __init__(self, parent=None):
+        qt.QAbstractTableModel.__init__(self, parent)
+        self.view = ResultTableView()
+        # Yaklasik (onizleme) kategoriler: kategori -> {etiket: mm3 hatasi}
+        self.approximate = {}
+    
+    def setTable(self, table):
+        self.beginResetModel()
+        self.view.setTable(table)
+        self.endResetModel()
+    
+    def setApproximate(self, approximate):
+        self.approximate = dict(approximate)
+    
+    def refreshValues(self):
+        """Tablo yerinde guncellendikten sonra cagrilir; satirlar degismediyse yalnizca hucreler yenilenir."""
+        rows = self.view.rowIndices()
+        self.view.refresh()
+        if rows.size and np.array_equal(rows, self.view.rowIndices()):
+            self.dataChanged.emit(self.index(0, 0), self.index(rows.size - 1, len(self.HEADERS) - 1))
+        else:
+            self.beginResetModel()
+            self.endResetModel()
+    
+    def setFilter(self, category=None, nameContains="", volumeRange=(None, None)):
+        self.beginResetModel()
+        self.view.setFilter(category, nameContains, volumeRange)
+        self.endResetModel()
+    
+    def rowCount(self, parent=None):
+        if parent is not None and parent.isValid():
+            return 0
+        return self.view.rowCount()
+    
+    def columnCount(self, parent=None):
+        if parent is not None and parent.isValid():
+            return 0
+        return len(self.HEADERS)
+    
+    def data(self, index, role=qt.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == qt.Qt.DisplayRole:
+            text = self.view.displayText(index.row(), index.column())
+            if index.column() in self.VOLUME_COLUMNS and self.rowError(index.row()) is not None:
+                return "~" + text
+            return text
+        if role == qt.Qt.ToolTipRole:
+            error = self.rowError(index.row())
+            if error is not None:
+                return f"Yaklasik deger: ± {error:.2f} mm3 (ornek dilimlerden)"
+            return None
+        if role == qt.Qt.TextAlignmentRole and index.column() in self.NUMERIC_COLUMNS:
+            return int(qt.Qt.AlignRight | qt.Qt.AlignVCenter)
+        return None
+    
+    def rowError(self, row):
+        """Satir yaklasiksa mm3 hatasi, kesinse None."""
+        if not self.approximate:
+            return None
+        errors = self.approximate.get(self.view.value(row, 0))
+        return None if errors is None else errors.get(self.view.value(row, 1), 0.0)
+    
+    def headerData(self, section, orientation, role=qt.Qt.DisplayRole):
+        if role != qt.Qt.DisplayRole:
+            return None
+        if orientation == qt.Qt.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+    
+    def sort(self, column, order=qt.Qt.AscendingOrder):
+        self.beginResetModel()
+        self.view.sort(column if column >= 0 else None, order == qt.Qt.DescendingOrder)
+        self.endResetModel()
+
+class PreparedLabelVolume:
+    """Arka planda okunmus, henuz sahneye eklenmemis bir volBrain etiket haritasi.
+    
+    imageData None ise dosya akisli okuyucuyla okunamamistir; applyLabelVolume
+    onu Slicer'in okuyucusuyla ana is parcaciginda yukler.
+    """
+    
+    def __init__(self, filePath, category, cacheKey):
+        self.filePath = filePath
+        self.category = category
+        self.cacheKey = cacheKey
+        self.imageData = None
+        self.ijkToRAS = None
+        self.spatialIndex = None
+        self.labels = None
+        self.counts = None
+        self.voxelVolume = None
+        self.results = None
+
 class VolBrainVolumeCalculatorLogic(ScriptedLoadableModuleLogic):
     """Hacim hesaplama mantigi."""
     
+    # Etiket node'unda sonuclarin hangi onbellek kaydindan geldigini tutan oznitelik
+    CACHE_KEY_ATTRIBUTE = "volBrain.CacheKey"
+    # Segmentasyon node'unda kaynak etiket haritasi node'unun ID'si
+    LABEL_NODE_ATTRIBUTE = "volBrain.LabelNodeID"
+    # Segmentasyon node'unda yuzey ayari (bkz. MeshCache.SURFACE_PRESETS)
+    SURFACE_PRESET_ATTRIBUTE = "volBrain.SurfacePreset"
+    
     def __init__(self):
+        from VolBrainVolumeCalculatorLib.MeshCache import DEFAULT_SURFACE_PRESET
         ScriptedLoadableModuleLogic.__init__(self)
+        # Onbellek ve gzip indeksi ilk kullanimda olusturulur (bkz. resultCache, gzipIndex)
+        self._resultCache = None
+        self._gzipIndex = None
+        self._meshCache = None
+        self._helperLock = threading.Lock()
+        # Oturum boyunca uretilen yuzeyler: (kaynak anahtari, ayar, etiket) -> vtkPolyData
+        self.surfaceCache = {}
+        # Yeni segmentasyonlarin yuzey ayari
+        self.surfacePreset = DEFAULT_SURFACE_PRESET
+        # Coklu segment yuzey cikarimi: "auto", "singlePass" veya "perLabel" (bkz. useSinglePassSurfaces)
+        self.surfaceExtraction = "auto"
+        # Etiket node ID'si -> LabelSpatialIndex (sinir kutusu, sayim, merkez)
+        self.spatialIndices = {}
+        # Asama olcumleri; varsayilan kapali (VOLBRAIN_PROFILE=1 ile acilir)
+        self.profiler = Profiler(enabled=bool(os.environ.get('VOLBRAIN_PROFILE')))
     
-    def calculateVolumes(self, filePath, category, show3D=True):
-        """Belirtilen dosyadan hacim hesaplar."""
-        
-        nodeName = f"volBrain_{category}"
-        
-        # Eski node varsa sil
+    @property
+    def resultCache(self):
+        """Dosya basina hacim onbellegi (Slicer onbellek klasorunde)."""
+        if self._resultCache is None:
+            from VolBrainVolumeCalculatorLib.ResultCache import ResultCache
+            with self._helperLock:
+                if self._resultCache is None:
+                    self._resultCache = ResultCache(os.path.join(slicer.app.cachePath, "VolBrainVolumeCalculator"))
+        return self._resultCache
+    
+    @property
+    def gzipIndex(self):
+        """.nii.gz dosyalarinda dilimlere rastgele erisim icin erisim noktasi indeksleri."""
+        if self._gzipIndex is None:
+            # indexed_gzip (varsa) ancak ilk .nii.gz okumasinda yuklenir
+            from VolBrainVolumeCalculatorLib.GzipIndex import GzipIndexStore
+            cacheDir = os.path.join(self.resultCache.cacheDir, "gzindex")
+            with self._helperLock:
+                if self._gzipIndex is None:
+                    self._gzipIndex = GzipIndexStore(cacheDir)
+        return self._gzipIndex
+    
+    @property
+    def meshCache(self):
+        """Etiket yuzeylerinin disk onbellegi (dosya parmak izi + yuzey ayari)."""
+        if self._meshCache is None:
+            from VolBrainVolumeCalculatorLib.MeshCache import MeshCache
+            cacheDir = os.path.join(self.resultCache.cacheDir, "meshes")
+            with self._helperLock:
+                if self._meshCache is None:
+                    self._meshCache = MeshCache(cacheDir)
+        return self._meshCache
+    
+    def calculateVolumes(self, filePath, category, show3D=True, useCache=True, lazySurfaces=False,
+                         previewCallback=None):
+        """Belirtilen dosyadan hacim hesaplar.
+        
+        useCache acikken ayni dosya icin sonuclar onbellekteyse ve sahnede bu
+        dosyadan olusturulmus node'lar duruyorsa dosya yeniden yuklenmez.
+        lazySurfaces acikken 3D yuzeyler burada olusturulmaz; segmentler gorunur
+        kalir ve yuzeyleri ensureSegmentSurface ile sonradan (arayuzde olay dongusu
+        bosken, bkz. Widget.requestSurfaces) uretilir.
+        previewCallback(sonuclar, oran) verilirse once yaklasik, sonra okundukca
+        daralan hacimler bildirilir (bkz. prepareLabelVolume).
+        """
+        with self.profiler.span("calculateVolumes", category=category):
+            if useCache:
+                cachedResults = self.getCachedVolumes(filePath, category, show3D)
+                if cachedResults is not None:
+                    return cachedResults
+            prepared = self.prepareLabelVolume(filePath, category, previewCallback=previewCallback)
+            return self.applyLabelVolume(prepared, show3D, useCache, lazySurfaces)
+    
+    def getCachedVolumes(self, filePath, category, show3D=True):
+        """Sonuclar onbellekte ve sahnedeki node'lar ayni dosyadan uretilmisse sonuclari, yoksa None dondurur."""
+        with self.profiler.span("resultCacheLookup") as span:
+            cacheKey = self.resultCache.key(filePath, category)
+            cachedResults = self.resultCache.get(filePath, category, cacheKey)
+            if cachedResults is not None and not self._sceneHasNodesForKey(f"volBrain_{category}", cacheKey, show3D):
+                cachedResults = None
+            span.set(hit=cachedResults is not None)
+        return cachedResults
+    
+    def prepareLabelVolume(self, filePath, category, memoryBudget=None,
+                           progressCallback=None, cancelToken=None, previewCallback=None):
+        """Hacim hesaplamasinin agir kismini sahneye dokunmadan yapar.
+        
+        Dosya bloklar halinde dogrudan bir vtkImageData'ya okunur, etiketler
+        sayilir, konum indeksi ve isimli sonuclar olusturulur. Sahne (MRML)
+        kullanilmadigi icin arka plan is parcaciginda calisabilir; sonuc
+        applyLabelVolume ile ana is parcaciginda sahneye eklenir.
+        
+        progressCallback(asama, oran): asama "read", "count" veya "names";
+        okuma sirasinda her blokta cagrilir. cancelToken verilirse ayni
+        noktalarda kontrol edilir ve iptalde OperationCancelled firlatilir.
+        
+        previewCallback(sonuclar, oran) verilirse okumadan once esit aralikli
+        ornek dilimlerden yaklasik hacimler (buildEstimatedResults: hata ve
+        approximate alanlariyla) bildirilir; ardindan her blokta okunan
+        dilimlerin kesin sayimiyla daraltilmis tahmin gonderilir. Indeksi
+        olmayan .nii.gz dosyalarinda ornekleme yapilmaz: hacim kucuk bloklarla
+        okunur ve tahmin son okunan bloktan yapilir (bkz. canSampleSlices).
+        memoryBudget verilmezse NiftiLabelReader.DEFAULT_MEMORY_BUDGET.
+        """
+        from VolBrainVolumeCalculatorLib.LabelStatistics import LabelSpatialIndexBuilder
+        from VolBrainVolumeCalculatorLib.LabelVolumes import (SliceSampleEstimator, buildEstimatedResults,
+                                                              canSampleSlices, previewSlabSlices)
+        from VolBrainVolumeCalculatorLib.NiftiLabelReader import DEFAULT_MEMORY_BUDGET, NiftiLabelReader
+        if memoryBudget is None:
+            memoryBudget = DEFAULT_MEMORY_BUDGET
+        
+        def report(phase, fraction):
+            if cancelToken:
+                cancelToken.check()
+            if progressCallback:
+                progressCallback(phase, fraction)
+        
+        # Anahtar (dosya parmak izi) onbellek kapali olsa da node'lari etiketlemek icin kullanilir
+        prepared = PreparedLabelVolume(filePath, category, self.resultCache.key(filePath, category))
+        report("read", 0.0)
         try:
-            oldNode = slicer.util.getNode(nodeName)
-            if oldNode:
-                slicer.mrmlScene.RemoveNode(oldNode)
-        except:
-            pass  # Node yoksa sorun yok
-        
-        # NIfTI dosyasini yukle
-        volumeNode = slicer.util.loadVolume(filePath, returnNode=True)[1]
-        volumeNode.SetName(nodeName)
-        
-        # Voxel boyutlarini al
-        spacing = volumeNode.GetSpacing()
-        voxelVolume = spacing[0] * spacing[1] * spacing[2]
+            reader = NiftiLabelReader(filePath, memoryBudget, self.gzipIndex.open)
+        except ValueError:
+            # Akisli okuyucunun desteklemedigi bicimler applyLabelVolume'da Slicer ile yuklenir
+            return prepared
+        
+        imageHolder = []
+        arrayHolder = []
+        def allocate(shape, dtype):
+            imageData = vtk.vtkImageData()
+            imageData.SetDimensions(shape[2], shape[1], shape[0])
+            imageData.AllocateScalars(vtk.util.numpy_support.get_vtk_array_type(dtype), 1)
+            imageHolder[:] = [imageData]
+            arrayHolder[:] = [vtk.util.numpy_support.vtk_to_numpy(imageData.GetPointData().GetScalars()).reshape(shape)]
+            return arrayHolder[0]
+        
+        with reader:
+            header = reader.header
+            indexBuilder = LabelSpatialIndexBuilder(header.shape)
+            estimator = None
+            slabSlices = None
+            readSlices = [0]
+            if previewCallback is not None:
+                names = getLabelSchema(category).names
+                if canSampleSlices(reader, self.gzipIndex.hasIndex(filePath, header.dataEnd)):
+                    with self.profiler.span("previewVolumes", category=category):
+                        estimator = SliceSampleEstimator.fromReader(reader)
+                        previewCallback(buildEstimatedResults(category, *estimator.estimate(), header.voxelVolume,
+                                                              names), 0.0)
+                else:
+                    # Indekssiz .nii.gz: tahmin tek gecisin kucuk bloklarindan (bkz. canSampleSlices)
+                    slabSlices = previewSlabSlices(header.shape[0])
+            
+            def onSlab(done, total):
+                nonlocal estimator
+                if previewCallback is not None and done < total:
+                    if slabSlices is not None:
+                        estimator = SliceSampleEstimator.fromSlab(total, readSlices[0],
+                                                                  arrayHolder[0][readSlices[0]:done])
+                    # Okunan dilimler kesin, kalanlar orneklerden
+                    labels, counts, errors = estimator.estimate(done, *indexBuilder.result())
+                    previewCallback(buildEstimatedResults(category, labels, counts, errors, header.voxelVolume, names),
+                                    done / total)
+                readSlices[0] = done
+                report("read", done / total)
+            
+            with self.profiler.span("readLabelVolume", category=category) as span:
+                reader.readLabelVolume(allocate, indexBuilder, onSlab, slabSlices)
+            span.set(voxels=int(np.prod(reader.header.shape)))
+        
+        report("count", 0.0)
+        with self.profiler.span("countLabels", category=category) as span:
+            prepared.imageData = imageHolder[0]
+            prepared.ijkToRAS = reader.header.ijkToRAS
+            prepared.spatialIndex = indexBuilder.index()
+            labels, counts = indexBuilder.result()
+            span.set(labels=int(np.count_nonzero(labels > 0)))
+        
+        report("names", 0.0)
+        self._setLabelCounts(prepared, labels, counts, reader.header.voxelVolume)
+        report("names", 1.0)
+        return prepared
+    
+    def _setLabelCounts(self, prepared, labels, counts, voxelVolume):
+        from VolBrainVolumeCalculatorLib.LabelVolumes import buildVolumeResults
+        prepared.labels = labels
+        prepared.counts = counts
+        prepared.voxelVolume = voxelVolume
+        prepared.results = buildVolumeResults(prepared.category, labels, counts, voxelVolume,
+                                              getLabelSchema(prepared.category).names)
+    
+    def prepareLabelVolumes(self, files, concurrent=False, memoryBudget=None,
+                            progressCallback=None, cancelToken=None, maxWorkers=None, previewCallback=None):
+        """Birden fazla kategoriyi prepareLabelVolume ile hazirlar.
+        
+        concurrent acikken dosyalar bir is parcacigi havuzunda ayni anda acilir
+        ve sayilir; bellek butcesi isciler arasinda paylastirilir. Tamamlanma
+        sirasiyla (kategori, PreparedLabelVolume, hata) uretir; bir kategorideki
+        hata digerlerini durdurmaz. progressCallback(kategori, asama, oran),
+        previewCallback(kategori, sonuclar, oran).
+        """
+        from VolBrainVolumeCalculatorLib.BackgroundTasks import OperationCancelled, runConcurrently
+        from VolBrainVolumeCalculatorLib.NiftiLabelReader import DEFAULT_MEMORY_BUDGET
+        if memoryBudget is None:
+            memoryBudget = DEFAULT_MEMORY_BUDGET
+        
+        def prepare(item):
+            filePath, category = item
+            def onProgress(phase, fraction):
+                if progressCallback:
+                    progressCallback(category, phase, fraction)
+            onPreview = None
+            if previewCallback:
+                onPreview = lambda results, fraction: previewCallback(category, results, fraction)
+            return self.prepareLabelVolume(filePath, category, budget, onProgress, cancelToken, onPreview)
+        
+        files = list(files)
+        if concurrent and len(files) > 1:
+            workers = min(maxWorkers or os.cpu_count() or 1, len(files))
+            budget = max(memoryBudget // workers, 1)
+            with self.profiler.span("prepareConcurrently", files=len(files), workers=workers):
+                for (_, category), prepared, error in runConcurrently(prepare, files, workers, cancelToken):
+                    yield category, prepared, error
+            return
         
-        # Label haritasina donustur
-        labelNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLLabelMapVolumeNode')
-        labelNode.SetName(f"{nodeName}_labels")
-        slicer.modules.volumes.logic().CreateLabelVolumeFromVolume(slicer.mrmlScene, labelNode, volumeNode)
+        budget = memoryBudget
+        for item in files:
+            try:
+                prepared, error = prepare(item), None
+            except OperationCancelled:
+                raise
+            except Exception as e:
+                prepared, error = None, e
+            yield item[1], prepared, error
+    
+    def applyLabelVolume(self, prepared, show3D=True, useCache=True, lazySurfaces=False):
+        """prepareLabelVolume sonucunu sahneye ekler (ana is parcaciginda cagrilmali).
+        
+        Etiket, renk tablosu ve segmentasyon node'lari olusturulur ya da yeniden
+        kullanilir; sonuclar onbellege yazilir. Donus: hacim sonuclari
+        """
+        with self.profiler.span("applyLabelVolume", category=prepared.category):
+            return self._applyLabelVolume(prepared, show3D, useCache, lazySurfaces)
+    
+    def _applyLabelVolume(self, prepared, show3D, useCache, lazySurfaces):
+        filePath, category, cacheKey = prepared.filePath, prepared.category, prepared.cacheKey
+        nodeName = f"volBrain_{category}"
         
-        # Array'i al
-        array = slicer.util.arrayFromVolume(labelNode)
-        uniqueLabels = np.unique(array)
-        uniqueLabels = uniqueLabels[uniqueLabels > 0]
-        
-        results = {}
-        labelNames = self.getLabelNames(category)
-        colorTable = self.getColorTable(category)
-        
-        # Renk tablosu olustur
-        colorNode = slicer.mrmlScene.CreateNodeByClass('vtkMRMLColorTableNode')
-        colorNode.SetName(f"{nodeName}_ColorTable")
-        colorNode.SetTypeToUser()
-        colorNode.SetNumberOfColors(int(np.max(uniqueLabels)) + 1)
-        colorNode.NamesInitialisedOn()
-        
-        # Arka plan
-        colorNode.SetColor(0, "Background", 0.0, 0.0, 0.0, 0.0)
-        
-        for label in uniqueLabels:
-            labelInt = int(label)
-            voxelCount = np.sum(array == label)
-            volumeMm3 = float(voxelCount * voxelVolume)
-            volumeMl = volumeMm3 / 1000.0
+        # Etiket haritasini labelmap node'una yerlestir (onceki node yerinde yeniden kullanilir)
+        labelNode = self._attachLabelVolume(prepared, f"{nodeName}_labels")
+        uniqueLabels = prepared.labels[prepared.labels > 0]
+        
+        schema = getLabelSchema(category)
+        results = prepared.results
+        
+        with self.profiler.span("colorTable", labels=len(results)):
+            # Renk tablosu olustur (varsa yeniden kullan)
+            colorNode = self._getReusableNode('vtkMRMLColorTableNode', f"{nodeName}_ColorTable")
+            colorNodeIsNew = colorNode is None
+            if colorNodeIsNew:
+                colorNode = slicer.mrmlScene.CreateNodeByClass('vtkMRMLColorTableNode')
+                colorNode.SetName(f"{nodeName}_ColorTable")
+            colorNode.SetTypeToUser()
+            colorNode.NamesInitialisedOn()
+            self._fillColorTable(colorNode, schema, int(np.max(uniqueLabels)) + 1, results)
             
-            labelName = labelNames.get(labelInt, f"Label_{labelInt}")
-            structureKey = f"{category}_{labelInt}_{labelName}"
+            if colorNodeIsNew:
+                slicer.mrmlScene.AddNode(colorNode)
             
-            results[structureKey] = {
-                "category": category,
-                "label_id": labelInt,
-                "name": labelName,
-                "mm3": volumeMm3, 
-                "ml": volumeMl
-            }
+            # Label node'a renk tablosunu ata
+            displayNode = labelNode.GetDisplayNode()
+            if not displayNode:
+                labelNode.CreateDefaultDisplayNodes()
+                displayNode = labelNode.GetDisplayNode()
             
-            # Renk ata
-            if labelInt in colorTable:
-                r, g, b = colorTable[labelInt]
-                colorNode.SetColor(labelInt, labelName, r, g, b, 1.0)
-            else:
-                # Rastgele renk
-                import random
-                r, g, b = random.random(), random.random(), random.random()
-                colorNode.SetColor(labelInt, labelName, r, g, b, 1.0)
-        
-        slicer.mrmlScene.AddNode(colorNode)
-        
-        # Label node'a renk tablosunu ata
-        displayNode = labelNode.GetDisplayNode()
-        if not displayNode:
-            displayNode = slicer.mrmlScene.CreateNodeByClass('vtkMRMLLabelMapVolumeDisplayNode')
-            slicer.mrmlScene.AddNode(displayNode)
-            labelNode.SetAndObserveDisplayNodeID(displayNode.GetID())
-        
-        displayNode.SetAndObserveColorNodeID(colorNode.GetID())
+            displayNode.SetAndObserveColorNodeID(colorNode.GetID())
         
         # 3D gorsellestirme
         if show3D:
-            # Segmentation olustur
-            segmentationNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLSegmentationNode')
-            segmentationNode.SetName(f"{nodeName}_Segmentation")
+            # Segmentation olustur (varsa segmentlerini bosaltip yeniden kullan)
+            segmentationNode = self._getReusableNode('vtkMRMLSegmentationNode', f"{nodeName}_Segmentation")
+            if segmentationNode:
+                segmentationNode.GetSegmentation().RemoveAllSegments()
+            else:
+                segmentationNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLSegmentationNode')
+                segmentationNode.SetName(f"{nodeName}_Segmentation")
             
-            # Label map'i segmentasyona cevir
-            slicer.modules.segmentations.logic().ImportLabelmapToSegmentationNode(labelNode, segmentationNode)
+            with self.profiler.span("importLabelmapToSegmentation"):
+                # Label map'i segmentasyona cevir
+                slicer.modules.segmentations.logic().ImportLabelmapToSegmentationNode(labelNode, segmentationNode)
             
-            # Her segment icin isim ata
-            segmentation = segmentationNode.GetSegmentation()
-            for labelInt in uniqueLabels:
-                labelName = labelNames.get(int(labelInt), f"Label_{int(labelInt)}")
-                segmentId = segmentation.GetSegmentIdBySegmentName(f"Label_{int(labelInt)}")
-                if segmentId:
-                    segment = segmentation.GetSegment(segmentId)
-                    segment.SetName(labelName)
-                    
-                    # Renk ata
-                    if int(labelInt) in colorTable:
-                        r, g, b = colorTable[int(labelInt)]
+            segmentationNode.SetAttribute(self.LABEL_NODE_ATTRIBUTE, labelNode.GetID())
+            # Yuzeyler bu anahtarla disk onbelleginde aranir
+            segmentationNode.SetAttribute(self.CACHE_KEY_ATTRIBUTE, cacheKey)
+            
+            with self.profiler.span("segmentNames"):
+                from VolBrainVolumeCalculatorLib.SurfaceExtraction import LABEL_VALUE_TAG
+                # Her segment icin isim ata
+                segmentation = segmentationNode.GetSegmentation()
+                segmentColors = schema.colorsFor(uniqueLabels).tolist()
+                for labelInt, labelName, (r, g, b) in zip(uniqueLabels.tolist(), schema.labelNames(uniqueLabels),
+                                                         segmentColors):
+                    segmentId = (segmentation.GetSegmentIdBySegmentName(f"Label_{labelInt}")
+                                 or segmentation.GetSegmentIdBySegmentName(labelName))
+                    if segmentId:
+                        segment = segmentation.GetSegment(segmentId)
+                        segment.SetName(labelName)
+                        segment.SetTag(LABEL_VALUE_TAG, str(labelInt))
                         segment.SetColor(r, g, b)
             
             # 3D gosterimi aktif et
-            segmentationNode.CreateClosedSurfaceRepresentation()
+            self.setSurfacePreset(segmentationNode, self.surfacePreset)
+            if not lazySurfaces:
+                with self.profiler.span("closedSurfaces", segments=segmentation.GetNumberOfSegments()):
+                    self.ensureSegmentSurfaces(segmentationNode, [segmentation.GetNthSegmentID(i)
+                                                                  for i in range(segmentation.GetNumberOfSegments())])
             displayNode = segmentationNode.GetDisplayNode()
             if displayNode:
+                displayNode.SetPreferredDisplayRepresentationName3D(
+                    slicer.vtkSegmentationConverter.GetSegmentationClosedSurfaceRepresentationName())
                 displayNode.SetVisibility3D(True)
                 displayNode.SetVisibility2DFill(True)
                 displayNode.SetVisibility2DOutline(True)
         
-        # Orjinal volume node'u sil
-        slicer.mrmlScene.RemoveNode(volumeNode)
+        labelNode.SetAttribute(self.CACHE_KEY_ATTRIBUTE, cacheKey)
+        if useCache:
+            with self.profiler.span("resultCachePut"):
+                self.resultCache.put(filePath, category, results, cacheKey)
         
         return results
     
+    def _fillColorTable(self, colorNode, schema, size, results):
+        """Renk tablosunu semanin RGBA dizisinden tek seferde doldurur.
+        
+        Renkler dogrudan vtkLookupTable'a kopyalanir; yalnizca hacimde bulunan
+        etiketlere isim verilir. Semada olmayan etiketler deterministik renk alir.
+        """
+        colorNode.SetNumberOfColors(size)
+        rgba = np.round(schema.colorLookupTable(size) * 255).astype(np.uint8)
+        colorNode.GetLookupTable().SetTable(
+            vtk.util.numpy_support.numpy_to_vtk(rgba, deep=True, array_type=vtk.VTK_UNSIGNED_CHAR))
+        colorNode.SetColorName(0, "Background")
+        for data in results.values():
+            colorNode.SetColorName(data["label_id"], data["name"])
+    
+    def _attachLabelVolume(self, prepared, nodeName):
+        """Hazirlanan goruntuyu ayni isimli (yoksa yeni) labelmap node'una yerlestirir."""
+        labelNode = self._getReusableNode('vtkMRMLLabelMapVolumeNode', nodeName)
+        if not labelNode:
+            labelNode = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLLabelMapVolumeNode', nodeName)
+        
+        if prepared.imageData is None:
+            # Akisli okuyucunun desteklemedigi bicimler icin Slicer'in okuyucusu
+            _, labels, counts, voxelVolume = self._loadLabelVolumeWithSlicer(prepared.filePath, labelNode)
+            self._setLabelCounts(prepared, labels, counts, voxelVolume)
+            return labelNode
+        
+        labelNode.SetAndObserveImageData(prepared.imageData)
+        labelNode.SetIJKToRASMatrix(slicer.util.vtkMatrixFromArray(prepared.ijkToRAS))
+        self.spatialIndices[labelNode.GetID()] = prepared.spatialIndex
+        return labelNode
+    
+    def _loadLabelVolumeWithSlicer(self, filePath, labelNode):
+        loadedNode = slicer.util.loadLabelVolume(filePath)
+        labelNode.SetAndObserveImageData(loadedNode.GetImageData())
+        ijkToRAS = vtk.vtkMatrix4x4()
+        loadedNode.GetIJKToRASMatrix(ijkToRAS)
+        labelNode.SetIJKToRASMatrix(ijkToRAS)
+        slicer.mrmlScene.RemoveNode(loadedNode)
+        
+        spacing = labelNode.GetSpacing()
+        from VolBrainVolumeCalculatorLib.LabelStatistics import LabelSpatialIndexBuilder
+        array = slicer.util.arrayFromVolume(labelNode)
+        indexBuilder = LabelSpatialIndexBuilder(array.shape)
+        indexBuilder.update(array)
+        self.spatialIndices[labelNode.GetID()] = indexBuilder.index()
+        labels, counts = indexBuilder.result()
+        return labelNode, labels, counts, spacing[0] * spacing[1] * spacing[2]
+    
+    def getLabelSpatialIndex(self, labelNode):
+        """Etiket node'unun konum indeksi; yoksa bir kez hesaplanip saklanir."""
+        index = self.spatialIndices.get(labelNode.GetID())
+        array = slicer.util.arrayFromVolume(labelNode)
+        if index is None or index.shape != array.shape:
+            from VolBrainVolumeCalculatorLib.LabelStatistics import buildLabelSpatialIndex
+            index = buildLabelSpatialIndex(array)
+            self.spatialIndices[labelNode.GetID()] = index
+        return index
+    
+    def getLabelRegion(self, category, labelId):
+        """Bir etiketin konumu: LabelRegion (voksel sayisi, IJK sinir kutusu, merkez).
+        
+        Ornek: region = logic.getLabelRegion("structures", 47)
+               region.bounds, region.centroidRAS(ijkToRAS)
+        Etiket yuklu haritada yoksa None dondurur.
+        """
+        labelNode = slicer.util.getFirstNodeByName(f"volBrain_{category}_labels")
+        if not labelNode:
+            raise ValueError(f"{category} etiket haritasi yuklu degil")
+        return self.getLabelSpatialIndex(labelNode).region(labelId)
+    
+    def _getReusableNode(self, className, nodeName):
+        """Ayni isim ve siniftaki mevcut node'u dondurur (yoksa None)."""
+        node = slicer.mrmlScene.GetFirstNode(nodeName, className)
+        return node if node and node.IsA(className) else None
+    
+    def _sceneHasNodesForKey(self, nodeName, cacheKey, show3D):
+        """Ayni kaynaktan uretilmis etiket (ve istenirse segmentasyon) node'u var mi."""
+        names = [f"{nodeName}_labels"]
+        if show3D:
+            names.append(f"{nodeName}_Segmentation")
+        for name in names:
+            node = slicer.util.getFirstNodeByName(name)
+            if not node or node.GetAttribute(self.CACHE_KEY_ATTRIBUTE) != cacheKey:
+                return False
+        return True
+    
+    def computeVolumesFromFile(self, filePath, category, memoryBudget=None, useCache=True):
+        """Dosyayi Slicer'a yuklemeden, bloklar halinde akitarak hacim hesaplar.
+        
+        Sonuc calculateVolumes ile ayni bicimdedir; tepe bellek kullanimi
+        memoryBudget ile sinirlidir ve cozunurlukten bagimsizdir.
+        """
+        from VolBrainVolumeCalculatorLib.LabelVolumes import computeLabelVolumes
+        from VolBrainVolumeCalculatorLib.NiftiLabelReader import DEFAULT_MEMORY_BUDGET
+        if memoryBudget is None:
+            memoryBudget = DEFAULT_MEMORY_BUDGET
+        return computeLabelVolumes(filePath, category, memoryBudget, self.resultCache if useCache else None)
+    
+    def readLabelSlices(self, filePath, start, stop):
+        """Dosyadan yalnizca [start, stop) K dilimlerini okur: (n, J, I) dizisi.
+        
+        Onizleme ve ROI sorgulari icindir. .nii.gz dosyalarinda dosya bir kez
+        okunduktan sonra (ornegin hacim hesabinda) erisim noktasi indeksi
+        sayesinde akisin basindan itibaren acilmaz.
+        """
+        from VolBrainVolumeCalculatorLib.NiftiLabelReader import NiftiLabelReader
+        with self.profiler.span("readLabelSlices", start=start, stop=stop):
+            with NiftiLabelReader(filePath, opener=self.gzipIndex.open) as reader:
+                return reader.readSlices(start, stop)
+    
+    def runCohortBatch(self, rootDir, maxWorkers=None, memoryBudget=None, progressCallback=None,
+                       partitionDir=None):
+        """Kok klasordeki tum volBrain deneklerini surec havuzunda hesaplar.
+        
+        partitionDir verilirse her denek bittikce sonuclari oraya ikili bolum
+        olarak eklenir (ResultExport.readResultTable ile tek tablo okunur).
+        Donus: (uzun bicimli satirlar, hatalar) - bkz. CohortBatch.runCohortBatch
+        """
+        # Surec havuzu yalnizca toplu islemede gerekir; modul acilisinda yuklenmez
+        import multiprocessing
+        import shutil
+        from VolBrainVolumeCalculatorLib.CohortBatch import runCohortBatch
+        from VolBrainVolumeCalculatorLib.NiftiLabelReader import DEFAULT_MEMORY_BUDGET
+        if memoryBudget is None:
+            memoryBudget = DEFAULT_MEMORY_BUDGET
+        # Slicer icinde alt surecler uygulamanin kendisini degil PythonSlicer'i baslatmali
+        mpContext = multiprocessing.get_context('spawn')
+        pythonSlicer = shutil.which('PythonSlicer')
+        if pythonSlicer:
+            mpContext.set_executable(pythonSlicer)
+        return runCohortBatch(rootDir, maxWorkers, memoryBudget, progressCallback, mpContext,
+                              cacheDir=self.resultCache.cacheDir, partitionDir=partitionDir)
+    
+    def getMissingSurfaceSegmentIds(self, segmentationNode, segmentIds):
+        """Verilen segmentlerden henuz kapali yuzeyi olmayanlari dondurur."""
+        segmentation = segmentationNode.GetSegmentation()
+        closedSurfaceName = slicer.vtkSegmentationConverter.GetSegmentationClosedSurfaceRepresentationName()
+        missing = []
+        for segmentId in segmentIds:
+            segment = segmentation.GetSegment(segmentId)
+            if segment and not segment.GetRepresentation(closedSurfaceName):
+                missing.append(segmentId)
+        return missing
+    
+    def getSurfacePreset(self, segmentationNode):
+        """Segmentasyonun yuzey ayari (atanmamissa varsayilan)."""
+        return segmentationNode.GetAttribute(self.SURFACE_PRESET_ATTRIBUTE) or self.surfacePreset
+    
+    def setSurfacePreset(self, segmentationNode, preset):
+        """Segmentasyonun yuzey ayarini degistirir.
+        
+        Ayar Slicer'in kendi donusum parametrelerine de yazilir. Ayar degistiyse
+        mevcut yuzeyler kaldirilir; donus: yuzeyi kaldirilan segment ID'leri
+        (yeniden olusturulmak uzere).
+        """
+        from VolBrainVolumeCalculatorLib.MeshCache import surfacePreset
+        parameters = surfacePreset(preset)
+        previous = segmentationNode.GetAttribute(self.SURFACE_PRESET_ATTRIBUTE)
+        segmentationNode.SetAttribute(self.SURFACE_PRESET_ATTRIBUTE, preset)
+        segmentation = segmentationNode.GetSegmentation()
+        segmentation.SetConversionParameter("Decimation factor", str(parameters["decimation"]))
+        # Slicer: passBand = 10^(-4 * smoothingFactor)
+        segmentation.SetConversionParameter("Smoothing factor", str(-np.log10(parameters["passBand"]) / 4.0))
+        if previous is None or previous == preset:
+            return []
+        
+        closedSurfaceName = slicer.vtkSegmentationConverter.GetSegmentationClosedSurfaceRepresentationName()
+        removed = []
+        for segmentId in self.allSegmentIds(segmentation):
+            segment = segmentation.GetSegment(segmentId)
+            if segment.GetRepresentation(closedSurfaceName):
+                segment.RemoveRepresentation(closedSurfaceName)
+                removed.append(segmentId)
+        return removed
+    
+    def allSegmentIds(self, segmentation):
+        return [segmentation.GetNthSegmentID(i) for i in range(segmentation.GetNumberOfSegments())]
+    
+    def showOnlySegments3D(self, segmentationNode, segmentIds):
+        """Yalnizca verilen segmentleri 3D'de gosterir, digerlerini gizler.
+        
+        Her SetSegmentVisibility3D cagrisi ayri bir Modified olayi (ve yeniden
+        cizim) uretir; degisiklikler StartModify/EndModify arasinda tek olaya
+        toplanir ve bitene kadar gorunumler cizilmez. Gorunurlugu zaten dogru
+        olan segmentlere dokunulmaz. Donus: gorunurlugu degisen segment sayisi.
+        """
+        displayNode = segmentationNode.GetDisplayNode()
+        if not displayNode:
+            return 0
+        visible = set(segmentIds)
+        changes = [(segmentId, segmentId in visible) for segmentId in self.allSegmentIds(segmentationNode.GetSegmentation())
+                   if bool(displayNode.GetSegmentVisibility3D(segmentId)) != (segmentId in visible)]
+        if not changes:
+            return 0
+        with self.profiler.span("segmentVisibility", segments=len(changes)), self._renderBlocker():
+            wasModifying = displayNode.StartModify()
+            try:
+                for segmentId, visibility in changes:
+                    displayNode.SetSegmentVisibility3D(segmentId, visibility)
+            finally:
+                displayNode.EndModify(wasModifying)
+        return len(changes)
+    
+    def _renderBlocker(self):
+        # slicer.util.RenderBlocker Slicer 5.2+ ile gelir; eski surumlerde yalnizca olaylar toplanir
+        renderBlocker = getattr(slicer.util, 'RenderBlocker', None)
+        return renderBlocker() if renderBlocker else contextlib.nullcontext()
+    
+    def getSegmentGroups(self, segmentationNode):
+        """Segment isimlerinden gorunurluk gruplari: {grup adi: [segment ID'leri]} (bkz. VisibilityGroups)."""
+        from VolBrainVolumeCalculatorLib.VisibilityGroups import labelGroups
+        segmentation = segmentationNode.GetSegmentation()
+        return labelGroups({segmentId: segmentation.GetSegment(segmentId).GetName()
+                            for segmentId in self.allSegmentIds(segmentation)})
+    
+    def ensureSegmentSurface(self, segmentationNode, segmentId):
+        """Tek bir segmentin kapali yuzeyini (yoksa) olusturur (bkz. ensureSegmentSurfaces)."""
+        self.ensureSegmentSurfaces(segmentationNode, [segmentId])
+    
+    def ensureSegmentSurfaces(self, segmentationNode, segmentIds):
+        """Segmentlerin kapali yuzeylerini (yoksa) segmentasyonun yuzey ayariyla olusturur.
+        
+        Yuzey, segmentin kaynak etiket haritasindan yalnizca o etiket icin
+        cikarilir; birden fazla eksik yuzey uygun ayarda tek geciste uretilir
+        (bkz. useSinglePassSurfaces). Once oturum onbellegine, sonra disk onbellegine (dosya parmak
+        izi + ayar) bakilir; yeni uretilen yuzeyler diske yazilir, boylece ayni
+        denek tekrar acildiginda yuzeyler yeniden hesaplanmaz.
+        """
+        from VolBrainVolumeCalculatorLib.MeshCache import surfacePreset
+        from VolBrainVolumeCalculatorLib.SurfaceExtraction import (arraysToPolyData, extractLabelSurfaceArrays,
+                                                                   polyDataToArrays)
+        segmentation = segmentationNode.GetSegmentation()
+        closedSurfaceName = slicer.vtkSegmentationConverter.GetSegmentationClosedSurfaceRepresentationName()
+        labelNode = slicer.mrmlScene.GetNodeByID(segmentationNode.GetAttribute(self.LABEL_NODE_ATTRIBUTE) or "")
+        pending = []
+        for segmentId in segmentIds:
+            segment = segmentation.GetSegment(segmentId)
+            if not segment or segment.GetRepresentation(closedSurfaceName):
+                continue
+            labelValue = self._segmentLabelValue(segment)
+            if not labelNode or labelValue is None:
+                # Kaynak etiket haritasi yoksa standart donusume geri don
+                segmentation.ConvertSingleSegment(segmentId, closedSurfaceName)
+                continue
+            pending.append((segment, labelValue))
+        if not pending:
+            return
+        
+        preset = self.getSurfacePreset(segmentationNode)
+        sourceKey = segmentationNode.GetAttribute(self.CACHE_KEY_ATTRIBUTE)
+        meshKey = self.meshCache.key(sourceKey, preset) if sourceKey else None
+        storedLabels = self.meshCache.labels(meshKey) if meshKey else set()
+        surfaces = {}
+        for segment, labelValue in pending:
+            memoryKey = (sourceKey or labelNode.GetID(), preset, labelValue)
+            polyData = self.surfaceCache.get(memoryKey)
+            if polyData is None and labelValue in storedLabels:
+                with self.profiler.span("meshCacheLoad", label=labelValue):
+                    arrays = self.meshCache.get(meshKey, labelValue)
+                    polyData = arraysToPolyData(arrays) if arrays is not None else None
+            if polyData is not None:
+                surfaces[labelValue] = polyData
+        
+        missing = sorted({labelValue for _, labelValue in pending if labelValue not in surfaces})
+        if len(missing) > 1 and self.useSinglePassSurfaces(preset):
+            with self.profiler.span("singlePassSurfaces", labels=len(missing), preset=preset):
+                ijkToRAS = vtk.vtkMatrix4x4()
+                labelNode.GetIJKToRASMatrix(ijkToRAS)
+                labelArrays = extractLabelSurfaceArrays(slicer.util.arrayFromVolume(labelNode), missing, ijkToRAS,
+                                                        **surfacePreset(preset))
+            for labelValue, arrays in labelArrays.items():
+                surfaces[labelValue] = arraysToPolyData(arrays)
+                if meshKey:
+                    self.meshCache.put(meshKey, labelValue, arrays, evict=False)
+        else:
+            for labelValue in missing:
+                with self.profiler.span("segmentSurface", label=labelValue, preset=preset):
+                    surfaces[labelValue] = self._extractCroppedSurface(labelNode, labelValue, preset)
+                if meshKey:
+                    self.meshCache.put(meshKey, labelValue, polyDataToArrays(surfaces[labelValue]), evict=False)
+        if missing and meshKey:
+            self.meshCache.evict()
+        
+        for segment, labelValue in pending:
+            self.surfaceCache[(sourceKey or labelNode.GetID(), preset, labelValue)] = surfaces[labelValue]
+            segment.AddRepresentation(closedSurfaceName, surfaces[labelValue])
+    
+    def useSinglePassSurfaces(self, preset):
+        """Eksik yuzeyler tek geciste mi (SurfaceExtraction.extractLabelSurfaceArrays) cikarilsin.
+        
+        "auto": tek gecis yalnizca seyreltmesiz ayarlarda secilir; seyreltmede
+        sure etiket basina vtkDecimatePro'ya bagli oldugundan iki yol esit kalir
+        (bkz. VolBrainBenchmark.py --surfaces).
+        """
+        from VolBrainVolumeCalculatorLib.MeshCache import surfacePreset
+        from VolBrainVolumeCalculatorLib.SurfaceExtraction import MULTI_LABEL_SURFACES
+        if not MULTI_LABEL_SURFACES or self.surfaceExtraction == "perLabel":
+            return False
+        if self.surfaceExtraction == "singlePass":
+            return True
+        return surfacePreset(preset)["decimation"] == 0
+    
+    def _extractCroppedSurface(self, labelNode, labelValue, preset=None):
+        """Yuzeyi tum hacim yerine yalnizca etiketin sinir kutusundan cikarir (ayar verilmezse varsayilan)."""
+        from VolBrainVolumeCalculatorLib.MeshCache import DEFAULT_SURFACE_PRESET, surfacePreset
+        from VolBrainVolumeCalculatorLib.SurfaceExtraction import croppedLabelImage, extractLabelSurface
+        preset = preset or DEFAULT_SURFACE_PRESET
+        region = self.getLabelSpatialIndex(labelNode).region(labelValue)
+        if region is None:
+            return vtk.vtkPolyData()
+        imageData, cropToIJK = croppedLabelImage(slicer.util.arrayFromVolume(labelNode), region, labelValue)
+        ijkToRAS = vtk.vtkMatrix4x4()
+        labelNode.GetIJKToRASMatrix(ijkToRAS)
+        cropToRAS = np.dot(slicer.util.arrayFromVTKMatrix(ijkToRAS), cropToIJK)
+        return extractLabelSurface(imageData, 1, cropToRAS, **surfacePreset(preset))
+    
+    def _segmentLabelValue(self, segment):
+        from VolBrainVolumeCalculatorLib.SurfaceExtraction import LABEL_VALUE_TAG
+        tagValue = vtk.mutable("")
+        if segment.GetTag(LABEL_VALUE_TAG, tagValue):
+            return int(str(tagValue))
+        return None
+    
+    def calculateComposition(self, category, byCategory):
+        """Sahnede yuklu iki kategorinin etiket haritalarindan kompozisyon hesaplar.
+        
+        Ornegin ("structures", "tissues"): her yapinin icindeki doku hacimleri.
+        """
+        labelNode = slicer.util.getFirstNodeByName(f"volBrain_{category}_labels")
+        byLabelNode = slicer.util.getFirstNodeByName(f"volBrain_{byCategory}_labels")
+        if not labelNode or not byLabelNode:
+            raise ValueError(f"Once {category} ve {byCategory} haritalari yuklenmeli")
+        with self.profiler.span("composition", category=category, byCategory=byCategory):
+            return self.calculateCompositionFromNodes(labelNode, category, byLabelNode, byCategory)
+    
+    def calculateCompositionFromNodes(self, labelNode, category, byLabelNode, byCategory):
+        """Iki etiket node'unun ortak voksel sayimlarini tek geciste hesaplar."""
+        from VolBrainVolumeCalculatorLib.LabelStatistics import computeJointVoxelCounts
+        from VolBrainVolumeCalculatorLib.LabelVolumes import buildCompositionResults, checkSameGrid
+        array = slicer.util.arrayFromVolume(labelNode)
+        byArray = slicer.util.arrayFromVolume(byLabelNode)
+        
+        matrices = []
+        for node in (labelNode, byLabelNode):
+            ijkToRAS = vtk.vtkMatrix4x4()
+            node.GetIJKToRASMatrix(ijkToRAS)
+            matrices.append(slicer.util.arrayFromVTKMatrix(ijkToRAS))
+        checkSameGrid(array.shape, labelNode.GetSpacing(), matrices[0],
+                      byArray.shape, byLabelNode.GetSpacing(), matrices[1])
+        
+        spacing = labelNode.GetSpacing()
+        voxelVolume = spacing[0] * spacing[1] * spacing[2]
+        labels, byLabels, matrix = computeJointVoxelCounts(array, byArray)
+        return buildCompositionResults(category, labels, byCategory, byLabels, matrix, voxelVolume)
+    
+    def computeCompositionFromFiles(self, filePath, category, byFilePath, byCategory, memoryBudget=None):
+        """Kompozisyonu Slicer'a yuklemeden, iki dosyayi esli akitarak hesaplar."""
+        from VolBrainVolumeCalculatorLib.LabelVolumes import computeLabelComposition
+        from VolBrainVolumeCalculatorLib.NiftiLabelReader import DEFAULT_MEMORY_BUDGET
+        if memoryBudget is None:
+            memoryBudget = DEFAULT_MEMORY_BUDGET
+        return computeLabelComposition(filePath, category, byFilePath, byCategory, memoryBudget)
+    
+    def getLabelVoxelCounts(self, array):
+        """Etiket dizisindeki her etiketin voksel sayisini tek geciste dondurur.
+        
+        Donus: (etiketler, sayimlar) - artan etiket sirasinda numpy dizileri.
+        """
+        from VolBrainVolumeCalculatorLib.LabelStatistics import computeLabelVoxelCounts
+        return computeLabelVoxelCounts(array)
+    
     def getLabelNames(self, category):
         """volBrain etiket isimlendirmelerini dondurur - README.pdf'e gore."""
-        labels = {}
-        
-        if category == "structures":
-            # README.pdf'deki native_structures etiketleri
-            labels = {
-                4: "3rd_Ventricle", 11: "4th_Ventricle",
-                23: "Right_Accumbens", 30: "Left_Accumbens",
-                31: "Right_Amygdala", 32: "Left_Amygdala",
-                35: "Brainstem",
-                36: "Right_Caudate", 37: "Left_Caudate",
-                38: "Right_Cerebellum_Exterior", 39: "Left_Cerebellum_Exterior",
-                40: "Right_Cerebellum_White_Matter", 41: "Left_Cerebellum_White_Matter",
-                44: "Right_Cerebral_White_Matter", 45: "Left_Cerebral_White_Matter",
-                47: "Right_Hippocampus", 48: "Left_Hippocampus",
-                49: "Right_Inf_Lat_Vent", 50: "Left_Inf_Lat_Vent",
-                51: "Right_Lateral_Ventricle", 52: "Left_Lateral_Ventricle",
-                55: "Right_Pallidum", 56: "Left_Pallidum",
-                57: "Right_Putamen", 58: "Left_Putamen",
-                59: "Right_Thalamus", 60: "Left_Thalamus",
-                61: "Right_Ventral_DC", 62: "Left_Ventral_DC",
-                71: "Lobules_I-V", 72: "Lobules_VI-VII", 73: "Lobules_VIII-X",
-                75: "Left_Basal_Forebrain", 76: "Right_Basal_Forebrain",
-                # Kortikal yapilar (100-207)
-                100: "R_anterior_cingulate", 101: "L_anterior_cingulate",
-                102: "R_anterior_insula", 103: "L_anterior_insula",
-                104: "R_anterior_orbital", 105: "L_anterior_orbital",
-                106: "R_angular_gyrus", 107: "L_angular_gyrus",
-                108: "R_calcarine_cortex", 109: "L_calcarine_cortex",
-                112: "R_central_operculum", 113: "L_central_operculum",
-                114: "R_cuneus", 115: "L_cuneus",
-                116: "R_entorhinal", 117: "L_entorhinal",
-                118: "R_frontal_operculum", 119: "L_frontal_operculum",
-                120: "R_frontal_pole", 121: "L_frontal_pole",
-                122: "R_fusiform_gyrus", 123: "L_fusiform_gyrus",
-                124: "R_gyrus_rectus", 125: "L_gyrus_rectus",
-                128: "R_inf_occipital", 129: "L_inf_occipital",
-                132: "R_inf_temporal", 133: "L_inf_temporal",
-                134: "R_lingual_gyrus", 135: "L_lingual_gyrus",
-                136: "R_lateral_orbital", 137: "L_lateral_orbital",
-                138: "R_middle_cingulate", 139: "L_middle_cingulate",
-                140: "R_medial_frontal", 141: "L_medial_frontal",
-                142: "R_middle_frontal", 143: "L_middle_frontal",
-                144: "R_middle_occipital", 145: "L_middle_occipital",
-                146: "R_medial_orbital", 147: "L_medial_orbital",
-                148: "R_postcentral_medial", 149: "L_postcentral_medial",
-                150: "R_precentral_medial", 151: "L_precentral_medial",
-                152: "R_sup_frontal_medial", 153: "L_sup_frontal_medial",
-                154: "R_middle_temporal", 155: "L_middle_temporal",
-                156: "R_occipital_pole", 157: "L_occipital_pole",
-                160: "R_occipital_fusiform", 161: "L_occipital_fusiform",
-                162: "R_opercular_inf_frontal", 163: "L_opercular_inf_frontal",
-                164: "R_orbital_inf_frontal", 165: "L_orbital_inf_frontal",
-                166: "R_posterior_cingulate", 167: "L_posterior_cingulate",
-                168: "R_precuneus", 169: "L_precuneus",
-                170: "R_parahippocampal", 171: "L_parahippocampal",
-                172: "R_posterior_insula", 173: "L_posterior_insula",
-                174: "R_parietal_operculum", 175: "L_parietal_operculum",
-                176: "R_postcentral_gyrus", 177: "L_postcentral_gyrus",
-                178: "R_posterior_orbital", 179: "L_posterior_orbital",
-                180: "R_planum_polare", 181: "L_planum_polare",
-                182: "R_precentral_gyrus", 183: "L_precentral_gyrus",
-                184: "R_planum_temporale", 185: "L_planum_temporale",
-                186: "R_subcallosal", 187: "L_subcallosal",
-                190: "R_sup_frontal", 191: "L_sup_frontal",
-                192: "R_supplementary_motor", 193: "L_supplementary_motor",
-                194: "R_supramarginal", 195: "L_supramarginal",
-                196: "R_sup_occipital", 197: "L_sup_occipital",
-                198: "R_sup_parietal_lobule", 199: "L_sup_parietal_lobule",
-                200: "R_sup_temporal", 201: "L_sup_temporal",
-                202: "R_temporal_pole", 203: "L_temporal_pole",
-                204: "R_triangular_inf_frontal", 205: "L_triangular_inf_frontal",
-                206: "R_transverse_temporal", 207: "L_transverse_temporal"
-            }
-        elif category == "tissues":
-            # README.pdf'deki native_tissues etiketleri
-            labels = {
-                1: "CSF",
-                2: "Cortical_GM",
-                3: "Cerebrum_WM",
-                4: "Subcortical_GM",
-                5: "Cerebellum_GM",
-                6: "Cerebellum_WM",
-                7: "Brainstem"
-            }
-        elif category == "lobes":
-            # README.pdf'deki native_lobes etiketleri
-            labels = {
-                1: "Right_Frontal_Lobe",
-                2: "Left_Frontal_Lobe",
-                3: "Right_Temporal_Lobe",
-                4: "Left_Temporal_Lobe",
-                5: "Right_Parietal_Lobe",
-                6: "Left_Parietal_Lobe",
-                7: "Right_Occipital_Lobe",
-                8: "Left_Occipital_Lobe",
-                9: "Right_Limbic_Lobe",
-                10: "Left_Limbic_Lobe",
-                11: "Right_Insular_Lobe",
-                12: "Left_Insular_Lobe"
-            }
-        elif category == "macro":
-            # README.pdf'deki native_macrostructures etiketleri
-            labels = {
-                1: "Left_Cerebrum",
-                2: "Right_Cerebrum",
-                3: "Left_Cerebellum",
-                4: "Right_Cerebellum",
-                5: "Vermal",
-                6: "Brainstem"
-            }
-        
-        return labels
+        return dict(getLabelSchema(category).names)
     
     def getColorTable(self, category):
         """Her kategori icin renk tablosu - README.pdf'e gore."""
-        colors = {}
-        
-        if category == "structures":
-            # Ventrikuller - Mavi tonlari
-            colors[4] = (0.2, 0.4, 0.9)   # 3rd Ventricle
-            colors[11] = (0.3, 0.5, 0.95)  # 4th Ventricle
-            colors[49] = (0.25, 0.45, 0.85) # Right Inf Lat Vent
-            colors[50] = (0.35, 0.55, 0.9)  # Left Inf Lat Vent
-            colors[51] = (0.2, 0.5, 1.0)    # Right Lateral Ventricle
-            colors[52] = (0.3, 0.6, 1.0)    # Left Lateral Ventricle
-            
-            # Accumbens - Pembe
-            colors[23] = (0.9, 0.3, 0.5)
-            colors[30] = (0.95, 0.35, 0.55)
-            
-            # Amygdala - Kirmizi
-            colors[31] = (0.8, 0.2, 0.2)
-            colors[32] = (0.85, 0.25, 0.25)
-            
-            # Brainstem - Gri
-            colors[35] = (0.5, 0.5, 0.5)
-            
-            # Caudate - Acik yesil
-            colors[36] = (0.3, 0.7, 0.4)
-            colors[37] = (0.35, 0.75, 0.45)
-            
-            # Cerebellum Exterior - Turuncu
-            colors[38] = (0.9, 0.6, 0.3)
-            colors[39] = (0.95, 0.65, 0.35)
-            
-            # Cerebellum WM - Kahverengi
-            colors[40] = (0.7, 0.5, 0.3)
-            colors[41] = (0.75, 0.55, 0.35)
-            
-            # Cerebral WM - Beyaz/Acik gri
-            colors[44] = (0.9, 0.9, 0.9)
-            colors[45] = (0.85, 0.85, 0.85)
-            
-            # Hippocampus - Sari
-            colors[47] = (0.9, 0.8, 0.2)
-            colors[48] = (0.95, 0.85, 0.25)
-            
-            # Pallidum - Koyu yesil
-            colors[55] = (0.4, 0.6, 0.3)
-            colors[56] = (0.45, 0.65, 0.35)
-            
-            # Putamen - Yesil
-            colors[57] = (0.3, 0.8, 0.4)
-            colors[58] = (0.35, 0.85, 0.45)
-            
-            # Thalamus - Mor
-            colors[59] = (0.6, 0.2, 0.6)
-            colors[60] = (0.65, 0.25, 0.65)
-            
-            # Ventral DC - Acik mor
-            colors[61] = (0.7, 0.4, 0.7)
-            colors[62] = (0.75, 0.45, 0.75)
-            
-            # Cerebellum Lobules - Turuncu tonlari
-            colors[71] = (0.85, 0.5, 0.2)
-            colors[72] = (0.9, 0.55, 0.25)
-            colors[73] = (0.95, 0.6, 0.3)
-            
-            # Basal Forebrain - Acik pembe
-            colors[75] = (0.8, 0.5, 0.6)
-            colors[76] = (0.85, 0.55, 0.65)
-            
-            # Kortikal yapilar (100-207) - Spektrum renkleri
-            # Frontal - Kirmizi tonlari
-            for label in [100, 101, 104, 105, 118, 119, 120, 121, 124, 125, 136, 137, 
-                         140, 141, 142, 143, 146, 147, 150, 151, 152, 153, 162, 163, 
-                         164, 165, 178, 179, 182, 183, 186, 187, 190, 191, 192, 193, 
-                         204, 205]:
-                if label % 2 == 0:
-                    colors[label] = (0.8, 0.2, 0.2)
-                else:
-                    colors[label] = (0.85, 0.25, 0.25)
-            
-            # Temporal - Mavi tonlari
-            for label in [122, 123, 132, 133, 154, 155, 180, 181, 184, 185, 200, 201, 
-                         202, 203, 206, 207]:
-                if label % 2 == 0:
-                    colors[label] = (0.2, 0.2, 0.8)
-                else:
-                    colors[label] = (0.25, 0.25, 0.85)
-            
-            # Parietal - Yesil tonlari
-            for label in [106, 107, 148, 149, 168, 169, 174, 175, 176, 177, 194, 195, 
-                         198, 199]:
-                if label % 2 == 0:
-                    colors[label] = (0.2, 0.7, 0.3)
-                else:
-                    colors[label] = (0.25, 0.75, 0.35)
-            
-            # Occipital - Sari tonlari
-            for label in [108, 109, 114, 115, 128, 129, 134, 135, 144, 145, 156, 157, 
-                         160, 161, 196, 197]:
-                if label % 2 == 0:
-                    colors[label] = (0.9, 0.8, 0.2)
-                else:
-                    colors[label] = (0.95, 0.85, 0.25)
-            
-            # Cingulate - Mor tonlari
-            for label in [138, 139, 166, 167]:
-                if label % 2 == 0:
-                    colors[label] = (0.6, 0.2, 0.6)
-                else:
-                    colors[label] = (0.65, 0.25, 0.65)
-            
-            # Insula - Turuncu
-            for label in [102, 103, 172, 173]:
-                if label % 2 == 0:
-                    colors[label] = (0.9, 0.5, 0.2)
-                else:
-                    colors[label] = (0.95, 0.55, 0.25)
-            
-            # Parahippocampal/Entorhinal - Acik sari
-            for label in [116, 117, 170, 171]:
-                if label % 2 == 0:
-                    colors[label] = (0.8, 0.7, 0.3)
-                else:
-                    colors[label] = (0.85, 0.75, 0.35)
-            
-            # Central operculum - Pembe
-            for label in [112, 113]:
-                if label % 2 == 0:
-                    colors[label] = (0.9, 0.4, 0.5)
-                else:
-                    colors[label] = (0.95, 0.45, 0.55)
-                    
-        elif category == "tissues":
-            colors[1] = (0.3, 0.6, 0.9)   # CSF - Mavi
-            colors[2] = (0.7, 0.7, 0.7)   # Cortical GM - Gri
-            colors[3] = (0.9, 0.9, 0.9)   # Cerebrum WM - Beyaz
-            colors[4] = (0.5, 0.7, 0.4)   # Subcortical GM - Yesil
-            colors[5] = (0.9, 0.6, 0.3)   # Cerebellum GM - Turuncu
-            colors[6] = (0.8, 0.5, 0.2)   # Cerebellum WM - Kahverengi
-            colors[7] = (0.5, 0.5, 0.5)   # Brainstem - Gri
-            
-        elif category == "lobes":
-            colors[1] = (0.9, 0.3, 0.3)   # Right Frontal - Kirmizi
-            colors[2] = (0.95, 0.35, 0.35) # Left Frontal
-            colors[3] = (0.3, 0.3, 0.9)   # Right Temporal - Mavi
-            colors[4] = (0.35, 0.35, 0.95) # Left Temporal
-            colors[5] = (0.3, 0.8, 0.3)   # Right Parietal - Yesil
-            colors[6] = (0.35, 0.85, 0.35) # Left Parietal
-            colors[7] = (0.9, 0.9, 0.3)   # Right Occipital - Sari
-            colors[8] = (0.95, 0.95, 0.35) # Left Occipital
-            colors[9] = (0.7, 0.3, 0.7)   # Right Limbic - Mor
-            colors[10] = (0.75, 0.35, 0.75) # Left Limbic
-            colors[11] = (0.9, 0.5, 0.3)  # Right Insular - Turuncu
-            colors[12] = (0.95, 0.55, 0.35) # Left Insular
-            
-        elif category == "macro":
-            colors[1] = (0.8, 0.7, 0.7)   # Left Cerebrum - Acik gri
-            colors[2] = (0.75, 0.65, 0.65) # Right Cerebrum
-            colors[3] = (0.9, 0.6, 0.3)   # Left Cerebellum - Turuncu
-            colors[4] = (0.85, 0.55, 0.25) # Right Cerebellum
-            colors[5] = (0.95, 0.65, 0.35) # Vermal - Acik turuncu
-            colors[6] = (0.5, 0.5, 0.5)   # Brainstem - Gri
-        
-        return colors
+        return dict(getLabelSchema(category).colors)
+    
+    def loadAtlas(self, filePath, category=None):
+        """Kullanici atlasini (JSON/CSV) kategori olarak kaydeder; bkz. LabelRegistry.loadAtlas.
+        
+        Kategori adi verilmezse dosya adindan alinir. Donus: CompiledLabelSchema
+        """
+        return defaultRegistry.loadAtlas(filePath, category)
 
 class VolBrainVolumeCalculatorTest(ScriptedLoadableModuleTest):
     """Test sinifi."""
@@ -0,0 +1,112 @@
+"""Arka plan is parcacigi, ilerleme mesajlari ve iptal destegi.
+
+Is parcacigi sahneye (MRML) dokunmaz: urettigi sonuclari bir kuyruga koyar,
+ana is parcacigi (Qt zamanlayicisi) poll() ile bunlari alip sahneye uygular.
+"""
+
+import concurrent.futures
+import os
+import queue
+import threading
+
+
+class OperationCancelled(Exception):
+    """Islem kullanici tarafindan iptal edildi."""
+
+
+class CancellationToken:
+    """Uzun islemlerin duzenli araliklarla kontrol ettigi iptal bayragi."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """Iptal istenmisse OperationCancelled firlatir."""
+        if self._event.is_set():
+            raise OperationCancelled()
+
+
+class BackgroundTask:
+    """function(token, post) cagrisini ayri bir is parcaciginda calistirir.
+
+    post(tur, veri) ile gonderilen mesajlar ve bitis mesaji ("finished",
+    "cancelled" veya "error") poll() ile ana is parcaciginda sirayla alinir.
+    """
+
+    def __init__(self, function, name="volBrainWorker"):
+        self.function = function
+        self.token = CancellationToken()
+        self._messages = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.token.cancel()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def post(self, kind, payload=None):
+        self._messages.put((kind, payload))
+
+    def _run(self):
+        try:
+            result = self.function(self.token, self.post)
+        except OperationCancelled:
+            self.post("cancelled")
+        except Exception as e:
+            self.post("error", e)
+        else:
+            self.post("finished", result)
+
+    def poll(self):
+        """Biriken mesajlari [(tur, veri), ...] olarak dondurur (beklemez)."""
+        messages = []
+        while True:
+            try:
+                messages.append(self._messages.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+
+def runConcurrently(function, items, maxWorkers=None, cancelToken=None):
+    """function(oge) cagrilarini bir is parcacigi havuzunda calistirir.
+
+    zlib ve NumPy agir islerde GIL'i biraktigi icin dosya acma ve sayim
+    islemleri gercekten ust uste biner. Tamamlanma sirasiyla (oge, sonuc, hata)
+    uclusu uretir; bir is OperationCancelled firlatirsa veya cancelToken iptal
+    edilmisse baslamamis isler iptal edilir ve OperationCancelled firlatilir.
+    """
+    items = list(items)
+    maxWorkers = min(maxWorkers or os.cpu_count() or 1, max(len(items), 1))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix="volBrain") as executor:
+        futures = {executor.submit(function, item): item for item in items}
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    result, error = future.result(), None
+                except OperationCancelled:
+                    raise
+                except Exception as e:
+                    result, error = None, e
+                if cancelToken:
+                    cancelToken.check()
+                yield futures[future], result, error
+        finally:
+            for future in futures:
+                future.cancel()
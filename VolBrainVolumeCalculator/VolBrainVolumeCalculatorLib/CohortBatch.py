@@ -0,0 +1,175 @@
+import concurrent.futures
+import logging
+import os
+import site
+
+import numpy as np
+
+from .LabelVolumes import computeLabelVolumes
+from .NiftiLabelReader import DEFAULT_MEMORY_BUDGET
+from .ResultCache import ResultCache
+from .ResultExport import appendPartition, writeDelimited
+from .ResultTable import ResultTable
+
+# Uzun bicimli sonuc tablosunun sutunlari
+LONG_TABLE_COLUMNS = ("subject", "category", "label_id", "name", "mm3", "ml")
+
+_NIFTI_EXTENSIONS = ('.nii', '.nii.gz')
+
+
+def matchCategory(fileName):
+    """volBrain dosya adindan kategoriyi bulur (onQuickLoad kurallari), yoksa None."""
+    name = fileName.lower()
+    if not name.endswith(_NIFTI_EXTENSIONS) or 'native' not in name:
+        return None
+    if 'structures' in name and 'macro' not in name:
+        return "structures"
+    elif 'tissues' in name:
+        return "tissues"
+    elif 'lobes' in name:
+        return "lobes"
+    elif 'macrostructures' in name:
+        return "macro"
+    return None
+
+
+def findVolBrainFiles(folder):
+    """Bir klasordeki native_* dosyalarini {kategori: yol} olarak dondurur."""
+    files = {}
+    for fileName in sorted(os.listdir(folder)):
+        category = matchCategory(fileName)
+        fullPath = os.path.join(folder, fileName)
+        if category and os.path.isfile(fullPath):
+            files[category] = fullPath
+    return files
+
+
+def findSubjectFolders(rootDir):
+    """Kok dizin altinda volBrain sonucu iceren her klasoru bulur.
+
+    Donus: [(denekKimligi, {kategori: yol}), ...] - kimlik kok dizine gore goreli yoldur.
+    """
+    subjects = []
+    for folder, dirNames, fileNames in os.walk(rootDir):
+        dirNames.sort()
+        if not any(matchCategory(f) for f in fileNames):
+            continue
+        subjectId = os.path.relpath(folder, rootDir)
+        if subjectId == os.curdir:
+            subjectId = os.path.basename(os.path.abspath(rootDir))
+        subjects.append((subjectId.replace(os.sep, '/'), findVolBrainFiles(folder)))
+    return subjects
+
+
+def computeSubjectVolumes(subjectId, files, memoryBudget=DEFAULT_MEMORY_BUDGET, cacheDir=None,
+                          computeFunction=computeLabelVolumes):
+    """Bir denegin tum kategorilerini hesaplar (is parcacigi/sureci icinde calisir).
+
+    cacheDir verilirse sonuclar o klasordeki ResultCache ile paylasilir.
+    computeFunction computeLabelVolumes ile ayni imzaya sahip olmalidir
+    (surec havuzunda kullanilacaksa modul duzeyinde tanimli).
+    Donus: (satirlar, hatalar) - bir kategorideki hata digerlerini durdurmaz.
+    """
+    cache = ResultCache(cacheDir) if cacheDir else None
+    rows = []
+    errors = []
+    for category, filePath in sorted(files.items()):
+        try:
+            results = computeFunction(filePath, category, memoryBudget, cache)
+        except Exception as e:
+            errors.append((subjectId, category, f"{filePath}: {e}"))
+            continue
+        for data in sorted(results.values(), key=lambda x: x['label_id']):
+            rows.append({"subject": subjectId, **data})
+    return rows, errors
+
+
+def _processPool(maxWorkers, mpContext=None):
+    """Alt sureclerinde (spawn) bu paketin import edilebildigi surec havuzu.
+
+    Paketin klasoru her alt surecin sys.path'ine baslaticida eklenir; ust
+    surecin ortami (PYTHONPATH) degistirilmez. Baslatici standart kutuphaneden
+    secilir, cunku alt surec onu bu paketi import etmeden cozebilmelidir.
+    """
+    libParent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return concurrent.futures.ProcessPoolExecutor(max_workers=maxWorkers, mp_context=mpContext,
+                                                  initializer=site.addsitedir, initargs=(libParent,))
+
+
+def runCohortBatch(rootDir, maxWorkers=None, memoryBudget=DEFAULT_MEMORY_BUDGET,
+                   progressCallback=None, mpContext=None, cacheDir=None, partitionDir=None):
+    """Kok dizindeki tum denekleri bir surec havuzunda hesaplar.
+
+    maxWorkers verilmezse makinedeki cekirdek sayisi kullanilir; cacheDir
+    verilirse daha once hesaplanmis dosyalar onbellekten okunur. Basarisiz
+    denekler loglanir ve atlanir; progressCallback(tamamlanan, toplam, denek)
+    her denek bittiginde cagrilir. partitionDir verilirse her denek bittiginde
+    sonuclari o klasore ikili bir bolum olarak eklenir (bkz. ResultExport).
+
+    Donus: (satirlar, hatalar) - satirlar LONG_TABLE_COLUMNS alanlarina sahip
+    sozluklerdir, hatalar (denek, kategori, mesaj) uclusudur.
+    """
+    return computeSubjects(findSubjectFolders(rootDir), maxWorkers, memoryBudget, progressCallback, mpContext,
+                           cacheDir, partitionDir)
+
+
+def computeSubjects(subjects, maxWorkers=None, memoryBudget=DEFAULT_MEMORY_BUDGET, progressCallback=None,
+                    mpContext=None, cacheDir=None, partitionDir=None, computeFunction=computeLabelVolumes):
+    """[(denek, {kategori: yol}), ...] listesini hesaplar (runCohortBatch ile ayni donus).
+
+    maxWorkers 1 ise (veya tek denek varsa) surec havuzu kurulmaz, denekler
+    bu surecte sirayla hesaplanir.
+    """
+    subjects = list(subjects)
+    if not subjects:
+        return [], []
+
+    maxWorkers = min(maxWorkers or os.cpu_count() or 1, len(subjects))
+
+    def completed():
+        if maxWorkers == 1:
+            for subjectId, files in subjects:
+                try:
+                    yield subjectId, computeSubjectVolumes(subjectId, files, memoryBudget, cacheDir, computeFunction)
+                except Exception as e:
+                    yield subjectId, ([], [(subjectId, None, str(e))])
+            return
+        with _processPool(maxWorkers, mpContext) as executor:
+            futures = {
+                executor.submit(computeSubjectVolumes, subjectId, files, memoryBudget, cacheDir,
+                                computeFunction): subjectId
+                for subjectId, files in subjects
+            }
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], ([], [(futures[future], None, str(e))])
+
+    rowsBySubject = {}
+    errors = []
+    for done, (subjectId, (rows, subjectErrors)) in enumerate(completed(), 1):
+        rowsBySubject[subjectId] = rows
+        if partitionDir and rows:
+            appendPartition(partitionDir, ResultTable.fromRows(rows), subjectId)
+        for error in subjectErrors:
+            logging.error("volBrain toplu isleme hatasi (%s, %s): %s" % error)
+        errors.extend(subjectErrors)
+        if progressCallback:
+            progressCallback(done, len(subjects), subjectId)
+
+    # Cikti denek sirasina gore deterministik olsun
+    allRows = []
+    for subjectId, _ in subjects:
+        allRows.extend(rowsBySubject.get(subjectId, []))
+    return allRows, errors
+
+
+def writeLongTable(rows, filePath):
+    """Uzun bicimli sonuc tablosunu (satir sozlukleri veya ResultTable) CSV olarak yazar.
+
+    Satirlar verildigi sirada yazilir.
+    """
+    table = rows if isinstance(rows, ResultTable) else ResultTable.fromRows(rows)
+    writeDelimited(filePath, table, ",", LONG_TABLE_COLUMNS, LONG_TABLE_COLUMNS,
+                   order=None if isinstance(rows, ResultTable) else np.arange(len(table)))
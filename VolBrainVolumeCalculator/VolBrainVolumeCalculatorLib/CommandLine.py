@@ -0,0 +1,175 @@
+"""Arayuzsuz komut satiri: denek klasorleri veya kategori dosyalari -> hacim tablosu.
+
+Qt/Slicer gerektirmez; duz Python ile calisir:
+
+    python -m VolBrainVolumeCalculatorLib.CommandLine sub01/ sub02/ --output volumes.csv
+    python -m VolBrainVolumeCalculatorLib.CommandLine --structures a.nii.gz --tissues b.nii.gz --format json
+
+Akisli okuyucunun desteklemedigi dosyalar icin Slicer icinden calistirilabilir
+(dosya Slicer'in okuyucusuyla yuklenir, pencere olusturulmaz):
+
+    Slicer --no-main-window --python-script VolBrainVolumeCalculatorLib/CommandLine.py sub01/ -o out.csv
+
+Cikis kodlari: 0 tamam, 1 kismi hata (bazi kategori/denekler hesaplanamadi),
+2 kullanim hatasi, 3 hicbir sonuc uretilemedi.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+if __name__ == '__main__' and not __package__:
+    # Slicer --python-script ile dosya yolu olarak calistirildiginda paket icinden import edilebilsin
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "VolBrainVolumeCalculatorLib"
+
+from . import LabelSchema
+from .CohortBatch import LONG_TABLE_COLUMNS, computeSubjects, findSubjectFolders, findVolBrainFiles
+from .LabelStatistics import computeLabelVoxelCounts
+from .LabelVolumes import buildVolumeResults, computeLabelVolumes
+from .NiftiLabelReader import DEFAULT_MEMORY_BUDGET
+from .ResultExport import formatDelimited, writeDelimited, writeResultTable
+from .ResultTable import ResultTable
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_USAGE = 2
+EXIT_FAILED = 3
+
+OUTPUT_FORMATS = ("csv", "tsv", "json", "arrow", "npz")
+_FORMAT_EXTENSIONS = {".csv": "csv", ".tsv": "tsv", ".json": "json", ".arrow": "arrow", ".feather": "arrow",
+                      ".npz": "npz"}
+
+
+def computeVolumesWithFallback(filePath, category, memoryBudget=DEFAULT_MEMORY_BUDGET, cache=None):
+    """computeLabelVolumes; akisli okuyucu dosyayi desteklemezse ve Slicer icindeysek Slicer ile yukler."""
+    try:
+        return computeLabelVolumes(filePath, category, memoryBudget, cache)
+    except ValueError:
+        slicer = sys.modules.get('slicer')
+        if slicer is None or not hasattr(slicer, 'mrmlScene'):
+            raise
+    node = slicer.util.loadLabelVolume(filePath)
+    try:
+        labels, counts = computeLabelVoxelCounts(slicer.util.arrayFromVolume(node))
+        spacing = node.GetSpacing()
+    finally:
+        slicer.mrmlScene.RemoveNode(node)
+    return buildVolumeResults(category, labels, counts, spacing[0] * spacing[1] * spacing[2])
+
+
+def collectSubjects(folders, explicitFiles=None, subject=None, recursive=False):
+    """Komut satiri girdilerinden [(denek, {kategori: yol}), ...] ve girdi hatalari listesi.
+
+    subject yalnizca explicitFiles ile verilen denegin kimligidir; klasorlerde
+    kimlik klasor adidir (recursive ise kok klasore gore goreli yol).
+    """
+    subjects = []
+    errors = []
+    if explicitFiles:
+        firstFile = os.path.abspath(next(iter(explicitFiles.values())))
+        subjects.append((subject or os.path.basename(os.path.dirname(firstFile)), dict(explicitFiles)))
+    for folder in folders:
+        if not os.path.isdir(folder):
+            errors.append((folder, None, "klasor bulunamadi"))
+            continue
+        if recursive:
+            found = findSubjectFolders(folder)
+        else:
+            files = findVolBrainFiles(folder)
+            found = [(os.path.basename(os.path.abspath(folder)), files)] if files else []
+        if not found:
+            errors.append((folder, None, "volBrain native_* dosyasi bulunamadi"))
+        subjects.extend(found)
+    return subjects, errors
+
+
+def outputFormat(format, outputPath):
+    if format:
+        return format
+    if outputPath and outputPath != "-":
+        return _FORMAT_EXTENSIONS.get(os.path.splitext(outputPath)[1].lower(), "csv")
+    return "csv"
+
+
+def writeOutput(rows, errors, format, outputPath):
+    """Satirlari istenen bicimde dosyaya veya (yol '-' ise) standart ciktiya yazar."""
+    toStdout = not outputPath or outputPath == "-"
+    if format == "json":
+        document = {"rows": rows,
+                    "errors": [{"subject": s, "category": c, "message": m} for s, c, m in errors]}
+        if toStdout:
+            json.dump(document, sys.stdout)
+            sys.stdout.write("\n")
+        else:
+            with open(outputPath, 'w', encoding='utf-8') as f:
+                json.dump(document, f)
+        return
+
+    table = ResultTable.fromRows(rows)
+    if format in ("arrow", "npz"):
+        if toStdout:
+            raise ValueError(f"{format} bicimi icin --output dosyasi gerekli")
+        writeResultTable(table, outputPath, format)
+        return
+    delimiter = "\t" if format == "tsv" else ","
+    order = np.arange(len(table))
+    if toStdout:
+        for chunk in formatDelimited(table, delimiter, LONG_TABLE_COLUMNS, LONG_TABLE_COLUMNS, order):
+            sys.stdout.write(chunk)
+    else:
+        writeDelimited(outputPath, table, delimiter, LONG_TABLE_COLUMNS, LONG_TABLE_COLUMNS, order=order)
+
+
+def buildParser():
+    parser = argparse.ArgumentParser(description="volBrain etiket haritalarindan yapi hacimlerini hesaplar")
+    parser.add_argument('folders', nargs='*', help="volBrain sonuc (denek) klasorleri")
+    for category in LabelSchema.CATEGORIES:
+        parser.add_argument(f'--{category}', metavar='DOSYA', help=f"{category} etiket haritasi")
+    parser.add_argument('--subject', help="dosyalarla verilen denegin kimligi (varsayilan: klasor adi)")
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help="klasorlerin altindaki tum denek klasorlerini bul (kohort)")
+    parser.add_argument('-o', '--output', default="-", help="cikti dosyasi ('-' standart cikti)")
+    parser.add_argument('-f', '--format', choices=OUTPUT_FORMATS, help="cikti bicimi (varsayilan: uzantidan, csv)")
+    parser.add_argument('-j', '--workers', type=int, default=1, help="paralel surec sayisi (1: surec havuzu yok)")
+    parser.add_argument('--memory-budget', type=int, default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+                        help="okuma blogu bellek butcesi (MB)")
+    parser.add_argument('--cache-dir', help="dosya basina sonuc onbellegi klasoru")
+    parser.add_argument('-q', '--quiet', action='store_true', help="hata ayrintilarini yazma")
+    return parser
+
+
+def main(argv=None):
+    parser = buildParser()
+    args = parser.parse_args(argv)
+    explicitFiles = {category: getattr(args, category) for category in LabelSchema.CATEGORIES
+                     if getattr(args, category)}
+    if not args.folders and not explicitFiles:
+        parser.print_usage(sys.stderr)
+        print("hata: en az bir klasor veya kategori dosyasi gerekli", file=sys.stderr)
+        return EXIT_USAGE
+
+    format = outputFormat(args.format, args.output)
+    subjects, errors = collectSubjects(args.folders, explicitFiles, args.subject, args.recursive)
+    rows, computeErrors = computeSubjects(subjects, args.workers, args.memory_budget * 1024 * 1024,
+                                          cacheDir=args.cache_dir, computeFunction=computeVolumesWithFallback)
+    errors.extend(computeErrors)
+    try:
+        writeOutput(rows, errors, format, args.output)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"hata: cikti yazilamadi: {e}", file=sys.stderr)
+        return EXIT_FAILED
+
+    if not args.quiet:
+        for subjectId, category, message in errors:
+            print(f"hata: {subjectId} {category or ''}: {message}", file=sys.stderr)
+    if not rows:
+        return EXIT_FAILED
+    return EXIT_PARTIAL if errors else EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""Sikistirilmis (.nii.gz) dosyalarda rastgele erisim icin erisim noktasi indeksi.
+
+Ilk tam okuma sirasinda belirli araliklarla acici (inflate) durumu saklanir;
+sonraki okumalar istenen konuma en yakin noktadan devam eder, akisin basindan
+itibaren acmak gerekmez.
+
+indexed_gzip paketi kuruluysa (pip install indexed_gzip) indeks zran bicimiyle
+onbellek klasorune yazilir ve oturumlar arasinda kullanilir. Kurulu degilse
+ayni indeks saf Python ile (zlib durum kopyalari) yalnizca oturum boyunca bellekte
+tutulur, diske yazilmaz: bir noktadan devam etmek icin acicinin bayta hizali
+olmayan artik bitleri de yuklenmeli (zlib inflatePrime), Python'un zlib modulu
+bunu sunmadigindan her oturumun ilk okumasi indeksi yeniden olusturur.
+"""
+
+import bisect
+import collections
+import hashlib
+import io
+import json
+import os
+import threading
+import zlib
+
+from .ResultCache import fileFingerprint
+
+try:
+    import indexed_gzip
+except ImportError:
+    indexed_gzip = None
+
+# Iki erisim noktasi arasindaki acilmis veri miktari (bayt)
+DEFAULT_CHECKPOINT_SPACING = 4 * 1024 * 1024
+
+# Bellekteki indekslerin tutuldugu en fazla dosya sayisi
+DEFAULT_MAX_INDEXES = 16
+
+# Tek seferde acilan sikistirilmis parca; erisim noktalari bu parcalarin sinirlarina konur
+_COMPRESSED_CHUNK = 16 * 1024
+_READ_CHUNK = 64 * 1024
+_INDEX_SUFFIX = '.gzidx'
+_COVERAGE_SUFFIX = '.gzidx.json'
+
+
+def isGzipFile(filePath):
+    with open(filePath, 'rb') as f:
+        return f.read(2) == b'\x1f\x8b'
+
+
+class CheckpointIndex:
+    """Bir gzip dosyasinin (acilmis konum, sikistirilmis konum, acici durumu) listesi.
+
+    coverage: indekse eklenirken acilmis en ileri konum.
+    """
+
+    def __init__(self, spacing=DEFAULT_CHECKPOINT_SPACING):
+        self.spacing = spacing
+        self.offsets = [0]
+        self.points = [(0, None)]
+        self.coverage = 0
+        self._lock = threading.Lock()
+
+    def add(self, uncompressedOffset, compressedOffset, decompressor):
+        with self._lock:
+            self.coverage = max(self.coverage, uncompressedOffset)
+            if uncompressedOffset - self.offsets[-1] >= self.spacing:
+                self.offsets.append(uncompressedOffset)
+                self.points.append((compressedOffset, decompressor.copy()))
+
+    def nearest(self, uncompressedOffset):
+        """Konumdan once gelen en yakin nokta: (acilmis, sikistirilmis, acici kopyasi)."""
+        with self._lock:
+            i = bisect.bisect_right(self.offsets, uncompressedOffset) - 1
+            compressedOffset, decompressor = self.points[i]
+            return self.offsets[i], compressedOffset, decompressor.copy() if decompressor else None
+
+    def __len__(self):
+        return len(self.offsets)
+
+
+class IndexedGzipReader(io.RawIOBase):
+    """CheckpointIndex kullanan, ileri ve geri konumlanabilen gzip okuyucu.
+
+    Sirayla okundukca indekse yeni noktalar eklenir; seek() en yakin noktadan
+    acmaya devam eder.
+    """
+
+    def __init__(self, filePath, index):
+        self.filePath = filePath
+        self.index = index
+        self._file = open(filePath, 'rb')
+        self._restart(0, 0, None)
+
+    def _restart(self, uncompressedOffset, compressedOffset, decompressor):
+        self._file.seek(compressedOffset)
+        self._compressedOffset = compressedOffset
+        self._position = uncompressedOffset
+        # wbits=31: gzip basligi ve sonu zlib tarafindan islenir
+        self._decompressor = decompressor or zlib.decompressobj(31)
+        self._pending = memoryview(b'')
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("Yalnizca SEEK_SET ve SEEK_CUR destekleniyor")
+        if offset < self._position or offset - self._position > self.index.spacing:
+            start, compressedOffset, decompressor = self.index.nearest(offset)
+            if not (start <= self._position <= offset):
+                self._restart(start, compressedOffset, decompressor)
+        self._skip(offset - self._position)
+        return self._position
+
+    def _skip(self, count):
+        while count > 0:
+            data = self.read(min(count, _READ_CHUNK * 16))
+            if not data:
+                break
+            count -= len(data)
+
+    def _fill(self):
+        """Bir sikistirilmis parca acar; veri kalmadiysa False."""
+        while not self._pending and not self._eof:
+            chunk = self._file.read(_COMPRESSED_CHUNK)
+            if not chunk:
+                self._eof = True
+                break
+            self._compressedOffset += len(chunk)
+            data = self._decompressor.decompress(chunk)
+            while self._decompressor.eof and self._decompressor.unused_data:
+                # Cok uyeli gzip: sonraki uye yeni bir acici ile devam eder
+                rest = self._decompressor.unused_data
+                self._decompressor = zlib.decompressobj(31)
+                data += self._decompressor.decompress(rest)
+            self._pending = memoryview(data)
+            self.index.add(self._position + len(data), self._compressedOffset, self._decompressor)
+        return bool(self._pending)
+
+    def readinto(self, buffer):
+        view = memoryview(buffer).cast('B')
+        if not self._fill():
+            return 0
+        count = min(len(view), len(self._pending))
+        view[:count] = self._pending[:count]
+        self._pending = self._pending[count:]
+        self._position += count
+        return count
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        super().close()
+
+
+class _IndexedGzipExporter(io.RawIOBase):
+    """indexed_gzip dosyasini sarar; indeks yeni noktalar kazandiysa kapatilirken yazar.
+
+    Kismi indeks de yazilir: sonraki acilista eksik kisim okundukca tamamlanir.
+    indexed_gzip okunan en ileri konuma kadar nokta ekler; bu konum (kapsam)
+    indeksin yanina yazilir ve diskteki kapsami asan bir okuma yeniden yazdirir.
+    """
+
+    def __init__(self, gzipFile, indexPath, imported, coverage=0):
+        self._gzipFile = gzipFile
+        self.indexPath = indexPath
+        self.imported = imported
+        self.coverage = coverage
+        self._furthest = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._gzipFile.tell()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        position = self._gzipFile.seek(offset, whence)
+        self._furthest = max(self._furthest, self._gzipFile.tell())
+        return position
+
+    def readinto(self, buffer):
+        count = self._gzipFile.readinto(buffer)
+        self._furthest = max(self._furthest, self._gzipFile.tell())
+        return count
+
+    def _export(self):
+        tempPath = f"{self.indexPath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self._gzipFile.export_index(tempPath)
+            os.replace(tempPath, self.indexPath)
+            coverage = max(self.coverage, self._furthest)
+            with open(tempPath, 'w', encoding='utf-8') as f:
+                json.dump({"coverage": coverage}, f)
+            os.replace(tempPath, _coveragePath(self.indexPath))
+            self.imported = True
+            self.coverage = coverage
+        except Exception:
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+
+    def close(self):
+        if self._gzipFile:
+            if not self.imported or self._furthest > self.coverage:
+                self._export()
+            self._gzipFile.close()
+            self._gzipFile = None
+        super().close()
+
+
+def _coveragePath(indexPath):
+    return indexPath[:-len(_INDEX_SUFFIX)] + _COVERAGE_SUFFIX
+
+
+def _readCoverage(indexPath):
+    """Diskteki indeksin kapsami (acilmis bayt); bilinmiyorsa 0."""
+    try:
+        with open(_coveragePath(indexPath), 'r', encoding='utf-8') as f:
+            return int(json.load(f)["coverage"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return 0
+
+
+class GzipIndexStore:
+    """Dosya basina erisim noktasi indekslerini yonetir.
+
+    open(yol) dosyayi ikili, konumlanabilir bir akis olarak acar: gzip degilse
+    normal dosya, degilse indeksli okuyucu. Indeks dosya parmak iziyle
+    eslenir; dosya degisirse yeniden olusturulur.
+    """
+
+    def __init__(self, cacheDir=None, spacing=DEFAULT_CHECKPOINT_SPACING, maxIndexes=DEFAULT_MAX_INDEXES,
+                 persistent=None):
+        self.cacheDir = cacheDir
+        self.spacing = spacing
+        self.maxIndexes = maxIndexes
+        self.persistent = indexed_gzip is not None and cacheDir is not None if persistent is None else persistent
+        self._indexes = collections.OrderedDict()
+        self._lock = threading.Lock()
+        if self.persistent:
+            os.makedirs(cacheDir, exist_ok=True)
+
+    def _key(self, filePath):
+        payload = json.dumps(fileFingerprint(filePath), sort_keys=True).encode('utf-8')
+        return hashlib.sha1(payload).hexdigest()
+
+    def indexPath(self, filePath):
+        return os.path.join(self.cacheDir, self._key(filePath) + _INDEX_SUFFIX)
+
+    def index(self, filePath):
+        """Dosyanin bellekteki indeksi (yoksa bos bir indeks olusturulur)."""
+        key = self._key(filePath)
+        with self._lock:
+            index = self._indexes.pop(key, None) or CheckpointIndex(self.spacing)
+            self._indexes[key] = index
+            while len(self._indexes) > self.maxIndexes:
+                self._indexes.popitem(last=False)
+            return index
+
+    def hasIndex(self, filePath, uncompressedSize):
+        """Onceki okumalardan kalan indeks dosyanin ilk uncompressedSize baytini kapsiyor mu.
+
+        Kapsam sona bir aralik (spacing) kadar yaklasmali ve birden fazla nokta
+        olmali; kismi okumalardan kalan indeks veya tek aralikliktan kucuk
+        dosyalar icin False (rastgele okumalar yine bastan acmayi gerektirir).
+        """
+        if self.persistent:
+            indexPath = self.indexPath(filePath)
+            coverage = _readCoverage(indexPath) if os.path.exists(indexPath) else 0
+        else:
+            with self._lock:
+                index = self._indexes.get(self._key(filePath))
+            coverage = index.coverage if index is not None else 0
+        return coverage >= max(uncompressedSize - self.spacing, self.spacing)
+
+    def open(self, filePath):
+        if not isGzipFile(filePath):
+            return open(filePath, 'rb')
+        if self.persistent:
+            return self._openPersistent(filePath)
+        return io.BufferedReader(IndexedGzipReader(filePath, self.index(filePath)), _READ_CHUNK)
+
+    def _openPersistent(self, filePath):
+        indexPath = self.indexPath(filePath)
+        gzipFile = indexed_gzip.IndexedGzipFile(filePath, spacing=self.spacing)
+        imported = False
+        coverage = 0
+        if os.path.exists(indexPath):
+            try:
+                gzipFile.import_index(indexPath)
+                imported = True
+                coverage = _readCoverage(indexPath)
+            except Exception:
+                # Bozuk/uyumsuz indeks: yeniden olusturulur
+                gzipFile.close()
+                gzipFile = indexed_gzip.IndexedGzipFile(filePath, spacing=self.spacing)
+        exporter = _IndexedGzipExporter(gzipFile, indexPath, imported, coverage)
+        return io.BufferedReader(exporter, _READ_CHUNK)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+        if self.persistent:
+            for fileName in os.listdir(self.cacheDir):
+                if fileName.endswith((_INDEX_SUFFIX, _COVERAGE_SUFFIX)):
+                    os.remove(os.path.join(self.cacheDir, fileName))
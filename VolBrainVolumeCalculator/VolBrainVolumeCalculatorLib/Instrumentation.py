@@ -0,0 +1,309 @@
+"""Asama bazli zamanlama ve bellek olcumu (profil) ile Chrome-trace disa aktarimi.
+
+Varsayilan olarak kapalidir; kapaliyken span() paylasilan bos bir nesne
+dondurur, boylece olcum noktalarinin maliyeti bir nitelik okumasindan ibarettir.
+
+CPU suresi asamayi calistiran is parcacigininkidir (time.thread_time).
+
+Bellek icin iki deger tutulur: rssPeak asama boyunca gorulen en yuksek RSS ile
+baslangictaki RSS farki (gecici tamponlar dahil), rssDelta asama sonundaki
+fark (bos birakilan bellek negatif olabilir). Tepe degeri Linux'ta cekirdegin
+VmHWM sayacindan okunur; sayac her asama basinda /proc/self/clear_refs ile
+sifirlanir, once acik asamalar o ana kadarki tepeyi alir. Sifirlanamayan
+sistemlerde asamalar acikken RSS bir is parcaciginda 10 ms arayla orneklenir.
+RSS tum surece aittir: baska bir is parcaciginin asamasiyla ortusen olcumler
+rssShared ile isaretlenir, farklari o asamanin ayirdiklarini da icerir.
+"""
+
+import json
+import os
+import threading
+import time
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# VmHWM sayaci yokken acik asamalarin RSS ornekleme araligi (saniye)
+PEAK_SAMPLE_INTERVAL = 0.01
+
+
+def currentRSS():
+    """Surecin anlik bellek kullanimi (bayt), olculemiyorsa None.
+
+    Linux'ta /proc/self/statm okunur; diger sistemlerde psutil (kuruluysa).
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+def _highWaterMark():
+    """Son sifirlamadan beri en yuksek RSS (VmHWM, bayt); okunamiyorsa None."""
+    try:
+        with open('/proc/self/status', 'rb') as f:
+            for line in f:
+                if line.startswith(b'VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _resetHighWaterMark():
+    """VmHWM'i anlik RSS'e indirir; desteklenmiyorsa False."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class _PeakTracker:
+    """Acik asamalarin (Span.peakRSS) tepe RSS degerlerini gunceller.
+
+    Sayac sifirlanmadan (ve asama kapanmadan) once okunan tepe tum acik
+    asamalara islenir; boylece ic ice ve paralel asamalar birbirinin tepesini
+    kaybetmez.
+    """
+
+    def __init__(self):
+        self._open = set()
+        self._lock = threading.Lock()
+        self._useHighWaterMark = None
+        self._sampler = None
+        self._stopSampler = None
+
+    def begin(self, span):
+        with self._lock:
+            self._harvest()
+            span.peakRSS = span.startRSS
+            self._open.add(span)
+            if self._useHighWaterMark is None:
+                self._useHighWaterMark = _highWaterMark() is not None and _resetHighWaterMark()
+            elif self._useHighWaterMark:
+                _resetHighWaterMark()
+            if not self._useHighWaterMark and self._sampler is None:
+                self._stopSampler = threading.Event()
+                self._sampler = threading.Thread(target=self._sample, args=(self._stopSampler,),
+                                                 name="volBrainPeakRSS", daemon=True)
+                self._sampler.start()
+
+    def end(self, span):
+        with self._lock:
+            self._harvest()
+            self._open.discard(span)
+            if not self._open and self._sampler is not None:
+                self._stopSampler.set()
+                self._sampler = None
+
+    def _harvest(self):
+        value = _highWaterMark() if self._useHighWaterMark else currentRSS()
+        if value is None:
+            return
+        for span in self._open:
+            if span.peakRSS is not None:
+                span.peakRSS = max(span.peakRSS, value)
+
+    def _sample(self, stopEvent):
+        while not stopEvent.wait(PEAK_SAMPLE_INTERVAL):
+            with self._lock:
+                self._harvest()
+
+
+_peakTracker = _PeakTracker()
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def set(self, **counters):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Tek bir asama olcumu; set() ile voksel/etiket sayisi gibi sayaclar eklenir."""
+
+    def __init__(self, profiler, name, counters):
+        self.profiler = profiler
+        self.name = name
+        self.counters = counters
+
+    def set(self, **counters):
+        self.counters.update(counters)
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        self.depth = len(stack)
+        stack.append(self)
+        self.thread = threading.get_ident()
+        self.othersState = self.profiler._enter(self.thread)
+        self.startRSS = currentRSS()
+        _peakTracker.begin(self)
+        self.startCPU = time.thread_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, *args):
+        wall = time.perf_counter() - self.start
+        cpu = time.thread_time() - self.startCPU
+        _peakTracker.end(self)
+        endRSS = currentRSS()
+        self.profiler._stack().pop()
+        shared = self.profiler._exit(self.thread, *self.othersState)
+        self.profiler._record({
+            "name": self.name,
+            "depth": self.depth,
+            "start": self.start - self.profiler.origin,
+            "wall": wall,
+            "cpu": cpu,
+            "rssDelta": None if endRSS is None or self.startRSS is None else endRSS - self.startRSS,
+            "rssPeak": None if self.startRSS is None else max(self.peakRSS, endRSS or 0) - self.startRSS,
+            "rssShared": shared,
+            "thread": self.thread,
+            "error": excType.__name__ if excType else None,
+            "counters": dict(self.counters),
+        })
+        return False
+
+
+class Profiler:
+    """Ic ice olcum noktalarini (span) toplar.
+
+    Kullanim:
+        with profiler.span("okuma", category="structures") as span:
+            ...
+            span.set(voxels=n)
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self.origin = time.perf_counter()
+            # Is parcacigi -> acik asama sayisi ve simdiye kadar baslattigi asama sayisi
+            self._openSpans = {}
+            self._startedSpans = {}
+            self._totalStarted = 0
+
+    def _enter(self, thread):
+        """Asama basi; donus: (baska is parcaciginda acik asama var mi, onlarin baslattigi asama sayisi)."""
+        with self._lock:
+            othersOpen = any(count for other, count in self._openSpans.items() if other != thread)
+            othersStarted = self._totalStarted - self._startedSpans.get(thread, 0)
+            self._openSpans[thread] = self._openSpans.get(thread, 0) + 1
+            self._startedSpans[thread] = self._startedSpans.get(thread, 0) + 1
+            self._totalStarted += 1
+            return othersOpen, othersStarted
+
+    def _exit(self, thread, othersOpen, othersStarted):
+        """Asama sonu; donus: asama boyunca baska bir is parcaciginda asama acik miydi."""
+        with self._lock:
+            # reset() acik asamalar varken cagrilmis olabilir
+            self._openSpans[thread] = max(0, self._openSpans.get(thread, 0) - 1)
+            return othersOpen or self._totalStarted - self._startedSpans.get(thread, 0) != othersStarted
+
+    def span(self, name, **counters):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, counters)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+    def summary(self):
+        """Asama adina gore toplanmis olcumler, ilk gorulme sirasiyla.
+
+        Donus: [{name, depth, count, wall, cpu, rssPeak, rssDelta, rssShared, counters}, ...];
+        rssPeak ve rssDelta asamanin olcumlerinden en buyuk degerlerdir.
+        """
+        phases = {}
+        for record in sorted(self.spans, key=lambda r: r["start"]):
+            phase = phases.get(record["name"])
+            if phase is None:
+                phase = phases[record["name"]] = {
+                    "name": record["name"], "depth": record["depth"], "count": 0,
+                    "wall": 0.0, "cpu": 0.0, "rssPeak": None, "rssDelta": None, "rssShared": False,
+                    "counters": {},
+                }
+            phase["count"] += 1
+            phase["wall"] += record["wall"]
+            phase["cpu"] += record["cpu"]
+            for key in ("rssPeak", "rssDelta"):
+                if record[key] is not None:
+                    phase[key] = record[key] if phase[key] is None else max(phase[key], record[key])
+                    phase["rssShared"] = phase["rssShared"] or record["rssShared"]
+            for key, value in record["counters"].items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    phase["counters"][key] = phase["counters"].get(key, 0) + value
+        return list(phases.values())
+
+    def formatSummary(self):
+        """Durum alaninda gosterilecek asama dokumu (her satir bir asama)."""
+        lines = []
+        for phase in self.summary():
+            line = "  " * phase["depth"] + f"{phase['name']}: {phase['wall'] * 1000:.0f} ms"
+            line += f" (CPU {phase['cpu'] * 1000:.0f} ms"
+            if phase["rssPeak"]:
+                # ~: baska is parcaciklarinin bellegini de iceren olcum
+                line += f", {'~' if phase['rssShared'] else ''}tepe {phase['rssPeak'] / (1024 * 1024):+.0f} MB"
+            line += ")"
+            if phase["count"] > 1:
+                line += f" x{phase['count']}"
+            for key in ("voxels", "labels"):
+                if key in phase["counters"]:
+                    line += f" {key}={phase['counters'][key]}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def chromeTrace(self):
+        """chrome://tracing ve Perfetto ile acilabilen trace sozlugu."""
+        pid = os.getpid()
+        events = []
+        for record in self.spans:
+            args = dict(record["counters"], cpu_ms=round(record["cpu"] * 1000, 3))
+            if record["rssDelta"] is not None:
+                args["rss_peak_bytes"] = record["rssPeak"]
+                args["rss_delta_bytes"] = record["rssDelta"]
+                args["rss_shared"] = record["rssShared"]
+            if record["error"]:
+                args["error"] = record["error"]
+            events.append({
+                "name": record["name"],
+                "ph": "X",
+                "ts": round(record["start"] * 1e6, 1),
+                "dur": round(record["wall"] * 1e6, 1),
+                "pid": pid,
+                "tid": record["thread"],
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def exportChromeTrace(self, filePath):
+        with open(filePath, 'w', encoding='utf-8') as f:
+            json.dump(self.chromeTrace(), f, indent=1, default=str)
@@ -0,0 +1,234 @@
+"""Derlenmis etiket semalari: kategori/atlas basina yogun (dense) arama tablolari.
+
+Her volBrain kategorisi (LabelSchema) ve kullanici atlaslari (JSON/CSV) bir
+kez yuklenir ve etiket numarasiyla indekslenen NumPy dizilerine derlenir:
+isim indeksi ve RGBA renk. Renk tablosu node'lari bu dizilerden toplu
+doldurulur. Semada olmayan etiketler etiket numarasindan uretilen, her
+calismada ayni olan bir renk alir.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from . import LabelSchema
+
+# Bilinmeyen etiket renkleri: altin oran adimli renk tonu, sabit doygunluk/parlaklik
+_GOLDEN_RATIO = 0.6180339887498949
+_UNKNOWN_SATURATION = 0.6
+_UNKNOWN_VALUE = 0.9
+
+_ATLAS_EXTENSIONS = ('.json', '.csv', '.tsv')
+
+
+def deterministicColors(labelIds, seed=0.0):
+    """Etiket numaralarindan tekrarlanabilir RGB renkler, (n, 3) dizisi."""
+    labelIds = np.asarray(labelIds, dtype=np.float64).reshape(-1)
+    hue = np.mod(labelIds * _GOLDEN_RATIO + seed, 1.0) * 6.0
+    sector = np.floor(hue).astype(np.int64) % 6
+    fraction = hue - np.floor(hue)
+    v = _UNKNOWN_VALUE
+    p = v * (1.0 - _UNKNOWN_SATURATION)
+    q = v * (1.0 - _UNKNOWN_SATURATION * fraction)
+    t = v * (1.0 - _UNKNOWN_SATURATION * (1.0 - fraction))
+    full = np.full_like(hue, v)
+    low = np.full_like(hue, p)
+    # HSV -> RGB: her altili dilim icin (r, g, b) kaynaklari
+    choices = [(full, t, low), (q, full, low), (low, full, t), (low, q, full), (t, low, full), (full, low, q)]
+    rgb = np.empty((labelIds.size, 3))
+    for channel in range(3):
+        rgb[:, channel] = np.choose(sector, [choice[channel] for choice in choices])
+    return rgb
+
+
+class CompiledLabelSchema:
+    """Bir kategorinin isim/renk semasi; etiket numarasiyla indekslenen diziler.
+
+    nameIndex[etiket] isim tablosundaki sira (yoksa -1), rgba[etiket] renk
+    (bilinmeyenlerde alfa 0). Semadaki en buyuk etiketten buyuk numaralar
+    da desteklenir (bilinmeyen sayilir).
+    """
+
+    def __init__(self, category, names, colors=None, version=None):
+        self.category = category
+        self.names = dict(names)
+        self.colors = {label: tuple(float(c) for c in color[:3]) for label, color in (colors or {}).items()}
+        self.version = version if version is not None else self._fingerprint()
+        labels = sorted(set(self.names) | set(self.colors))
+        if labels and labels[0] < 0:
+            raise ValueError(f"{category}: negatif etiket numarasi")
+        self.maxLabel = labels[-1] if labels else 0
+
+        self.nameTable = [self.names[label] for label in sorted(self.names)]
+        self.nameIndex = np.full(self.maxLabel + 1, -1, dtype=np.int32)
+        self.nameIndex[sorted(self.names)] = np.arange(len(self.nameTable), dtype=np.int32)
+        self.rgba = np.zeros((self.maxLabel + 1, 4))
+        if self.colors:
+            colorLabels = sorted(self.colors)
+            self.rgba[colorLabels, :3] = [self.colors[label] for label in colorLabels]
+            self.rgba[colorLabels, 3] = 1.0
+        self._seed = int(hashlib.sha1(category.encode('utf-8')).hexdigest()[:8], 16) / float(1 << 32)
+        self._lookupTables = {}
+        self._lock = threading.Lock()
+
+    def _fingerprint(self):
+        payload = json.dumps([sorted(self.names.items()), sorted(self.colors.items())])
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+    def name(self, labelId):
+        labelId = int(labelId)
+        if 0 <= labelId <= self.maxLabel and self.nameIndex[labelId] >= 0:
+            return self.nameTable[self.nameIndex[labelId]]
+        return f"Label_{labelId}"
+
+    def labelNames(self, labelIds):
+        """Etiket numaralari icin isim listesi (bilinmeyenler Label_<n>)."""
+        return [self.name(labelId) for labelId in np.asarray(labelIds).tolist()]
+
+    def colorsFor(self, labelIds):
+        """Etiket numaralari icin (n, 3) RGB; semada rengi olmayanlar deterministicColors."""
+        labelIds = np.asarray(labelIds, dtype=np.int64).reshape(-1)
+        rgb = deterministicColors(labelIds, self._seed)
+        inRange = (labelIds >= 0) & (labelIds <= self.maxLabel)
+        known = np.zeros(labelIds.size, dtype=bool)
+        known[inRange] = self.rgba[labelIds[inRange], 3] > 0
+        rgb[known] = self.rgba[labelIds[known], :3]
+        return rgb
+
+    def colorLookupTable(self, size=None):
+        """0..size-1 etiketleri icin (size, 4) RGBA tablosu; 0 (arka plan) saydam.
+
+        Ayni boyut icin tablo bir kez hesaplanir ve saklanir (salt okunur).
+        """
+        size = self.maxLabel + 1 if size is None else int(size)
+        with self._lock:
+            table = self._lookupTables.get(size)
+            if table is None:
+                table = np.ones((size, 4))
+                table[:, :3] = self.colorsFor(np.arange(size))
+                if size:
+                    table[0] = 0.0
+                table.flags.writeable = False
+                self._lookupTables[size] = table
+        return table
+
+    def __contains__(self, labelId):
+        labelId = int(labelId)
+        return 0 <= labelId <= self.maxLabel and self.nameIndex[labelId] >= 0
+
+
+class LabelRegistry:
+    """Kategori adi -> CompiledLabelSchema; her sema ilk kullanimda bir kez derlenir.
+
+    Yerlesik volBrain kategorileri LabelSchema'dan gelir; registerAtlas veya
+    loadAtlas ile ek atlaslar (kategori adlari) eklenebilir.
+    """
+
+    def __init__(self):
+        self._schemas = {}
+        self._atlases = {}
+        self._lock = threading.Lock()
+
+    def categories(self):
+        return list(LabelSchema.CATEGORIES) + sorted(self._atlases)
+
+    def get(self, category):
+        schema = self._schemas.get(category)
+        if schema is not None:
+            return schema
+        with self._lock:
+            schema = self._schemas.get(category)
+            if schema is None:
+                if category in self._atlases:
+                    names, colors = self._atlases[category]
+                    schema = CompiledLabelSchema(category, names, colors)
+                else:
+                    # Yerlesik kategoriler (bilinmeyen kategori bos sema verir)
+                    schema = CompiledLabelSchema(category, LabelSchema.getLabelNames(category),
+                                                 LabelSchema.getColorTable(category),
+                                                 version=LabelSchema.LABEL_SCHEMA_VERSION)
+                self._schemas[category] = schema
+        return schema
+
+    def registerAtlas(self, category, names, colors=None):
+        """Kullanici atlasi ekler (ayni adli atlas veya yerlesik sema yerine gecer)."""
+        names = {int(label): str(name) for label, name in names.items()}
+        colors = {int(label): tuple(color) for label, color in (colors or {}).items()}
+        with self._lock:
+            self._atlases[category] = (names, colors)
+            self._schemas.pop(category, None)
+        return self.get(category)
+
+    def loadAtlas(self, filePath, category=None):
+        """JSON veya CSV/TSV atlas dosyasini yukler; kategori adi verilmezse dosya adindan.
+
+        JSON: {"etiket": "isim"} veya {"etiket": {"name": ..., "color": [r, g, b]}}
+        ya da bunlari "labels" anahtari altinda iceren nesne.
+        CSV/TSV: label_id, name ve istege bagli r, g, b sutunlari (baslik satiri zorunlu).
+        Renkler 0-1 veya 0-255 araliginda olabilir.
+        """
+        category = category or os.path.splitext(os.path.basename(filePath))[0]
+        extension = os.path.splitext(filePath)[1].lower()
+        if extension not in _ATLAS_EXTENSIONS:
+            raise ValueError(f"Desteklenmeyen atlas dosyasi: {filePath}")
+        if extension == '.json':
+            names, colors = _readJsonAtlas(filePath)
+        else:
+            names, colors = _readDelimitedAtlas(filePath, '\t' if extension == '.tsv' else ',')
+        return self.registerAtlas(category, names, _normalizeColors(colors))
+
+    def schemaVersion(self, category):
+        """Onbellek anahtarlarina giren sema surumu (atlaslarda icerik parmak izi)."""
+        return self.get(category).version
+
+
+def _readJsonAtlas(filePath):
+    with open(filePath, encoding='utf-8') as f:
+        data = json.load(f)
+    entries = data.get("labels", data) if isinstance(data, dict) else None
+    if not isinstance(entries, dict):
+        raise ValueError(f"Atlas JSON bir nesne olmali: {filePath}")
+    names = {}
+    colors = {}
+    for label, entry in entries.items():
+        label = int(label)
+        if isinstance(entry, dict):
+            names[label] = entry["name"]
+            if entry.get("color") is not None:
+                colors[label] = entry["color"]
+        else:
+            names[label] = entry
+    return names, colors
+
+
+def _readDelimitedAtlas(filePath, delimiter):
+    names = {}
+    colors = {}
+    with open(filePath, encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f, delimiter=delimiter):
+            row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+            label = int(row.get("label_id") or row["label"])
+            names[label] = row["name"]
+            if all(row.get(channel) for channel in "rgb"):
+                colors[label] = [float(row[channel]) for channel in "rgb"]
+    return names, colors
+
+
+def _normalizeColors(colors):
+    # 0-255 araligindaki renkler 0-1'e olceklenir
+    if colors and max(max(color[:3]) for color in colors.values()) > 1.0:
+        return {label: tuple(c / 255.0 for c in color[:3]) for label, color in colors.items()}
+    return colors
+
+
+# Modul genelinde paylasilan kayit
+defaultRegistry = LabelRegistry()
+
+
+def getLabelSchema(category):
+    """Varsayilan kayittan kategorinin derlenmis semasi."""
+    return defaultRegistry.get(category)
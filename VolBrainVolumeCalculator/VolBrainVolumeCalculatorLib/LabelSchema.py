@@ -0,0 +1,288 @@
+"""volBrain etiket semalari: kategori basina etiket isimleri ve renkleri."""
+
+CATEGORIES = ("structures", "tissues", "lobes", "macro")
+
+# Etiket isimleri/renkleri degistiginde artirilir (onbellek anahtarlarina girer)
+LABEL_SCHEMA_VERSION = 1
+
+
+def getLabelNames(category):
+    """volBrain etiket isimlendirmelerini dondurur - README.pdf'e gore."""
+    labels = {}
+    
+    if category == "structures":
+        # README.pdf'deki native_structures etiketleri
+        labels = {
+            4: "3rd_Ventricle", 11: "4th_Ventricle",
+            23: "Right_Accumbens", 30: "Left_Accumbens",
+            31: "Right_Amygdala", 32: "Left_Amygdala",
+            35: "Brainstem",
+            36: "Right_Caudate", 37: "Left_Caudate",
+            38: "Right_Cerebellum_Exterior", 39: "Left_Cerebellum_Exterior",
+            40: "Right_Cerebellum_White_Matter", 41: "Left_Cerebellum_White_Matter",
+            44: "Right_Cerebral_White_Matter", 45: "Left_Cerebral_White_Matter",
+            47: "Right_Hippocampus", 48: "Left_Hippocampus",
+            49: "Right_Inf_Lat_Vent", 50: "Left_Inf_Lat_Vent",
+            51: "Right_Lateral_Ventricle", 52: "Left_Lateral_Ventricle",
+            55: "Right_Pallidum", 56: "Left_Pallidum",
+            57: "Right_Putamen", 58: "Left_Putamen",
+            59: "Right_Thalamus", 60: "Left_Thalamus",
+            61: "Right_Ventral_DC", 62: "Left_Ventral_DC",
+            71: "Lobules_I-V", 72: "Lobules_VI-VII", 73: "Lobules_VIII-X",
+            75: "Left_Basal_Forebrain", 76: "Right_Basal_Forebrain",
+            # Kortikal yapilar (100-207)
+            100: "R_anterior_cingulate", 101: "L_anterior_cingulate",
+            102: "R_anterior_insula", 103: "L_anterior_insula",
+            104: "R_anterior_orbital", 105: "L_anterior_orbital",
+            106: "R_angular_gyrus", 107: "L_angular_gyrus",
+            108: "R_calcarine_cortex", 109: "L_calcarine_cortex",
+            112: "R_central_operculum", 113: "L_central_operculum",
+            114: "R_cuneus", 115: "L_cuneus",
+            116: "R_entorhinal", 117: "L_entorhinal",
+            118: "R_frontal_operculum", 119: "L_frontal_operculum",
+            120: "R_frontal_pole", 121: "L_frontal_pole",
+            122: "R_fusiform_gyrus", 123: "L_fusiform_gyrus",
+            124: "R_gyrus_rectus", 125: "L_gyrus_rectus",
+            128: "R_inf_occipital", 129: "L_inf_occipital",
+            132: "R_inf_temporal", 133: "L_inf_temporal",
+            134: "R_lingual_gyrus", 135: "L_lingual_gyrus",
+            136: "R_lateral_orbital", 137: "L_lateral_orbital",
+            138: "R_middle_cingulate", 139: "L_middle_cingulate",
+            140: "R_medial_frontal", 141: "L_medial_frontal",
+            142: "R_middle_frontal", 143: "L_middle_frontal",
+            144: "R_middle_occipital", 145: "L_middle_occipital",
+            146: "R_medial_orbital", 147: "L_medial_orbital",
+            148: "R_postcentral_medial", 149: "L_postcentral_medial",
+            150: "R_precentral_medial", 151: "L_precentral_medial",
+            152: "R_sup_frontal_medial", 153: "L_sup_frontal_medial",
+            154: "R_middle_temporal", 155: "L_middle_temporal",
+            156: "R_occipital_pole", 157: "L_occipital_pole",
+            160: "R_occipital_fusiform", 161: "L_occipital_fusiform",
+            162: "R_opercular_inf_frontal", 163: "L_opercular_inf_frontal",
+            164: "R_orbital_inf_frontal", 165: "L_orbital_inf_frontal",
+            166: "R_posterior_cingulate", 167: "L_posterior_cingulate",
+            168: "R_precuneus", 169: "L_precuneus",
+            170: "R_parahippocampal", 171: "L_parahippocampal",
+            172: "R_posterior_insula", 173: "L_posterior_insula",
+            174: "R_parietal_operculum", 175: "L_parietal_operculum",
+            176: "R_postcentral_gyrus", 177: "L_postcentral_gyrus",
+            178: "R_posterior_orbital", 179: "L_posterior_orbital",
+            180: "R_planum_polare", 181: "L_planum_polare",
+            182: "R_precentral_gyrus", 183: "L_precentral_gyrus",
+            184: "R_planum_temporale", 185: "L_planum_temporale",
+            186: "R_subcallosal", 187: "L_subcallosal",
+            190: "R_sup_frontal", 191: "L_sup_frontal",
+            192: "R_supplementary_motor", 193: "L_supplementary_motor",
+            194: "R_supramarginal", 195: "L_supramarginal",
+            196: "R_sup_occipital", 197: "L_sup_occipital",
+            198: "R_sup_parietal_lobule", 199: "L_sup_parietal_lobule",
+            200: "R_sup_temporal", 201: "L_sup_temporal",
+            202: "R_temporal_pole", 203: "L_temporal_pole",
+            204: "R_triangular_inf_frontal", 205: "L_triangular_inf_frontal",
+            206: "R_transverse_temporal", 207: "L_transverse_temporal"
+        }
+    elif category == "tissues":
+        # README.pdf'deki native_tissues etiketleri
+        labels = {
+            1: "CSF",
+            2: "Cortical_GM",
+            3: "Cerebrum_WM",
+            4: "Subcortical_GM",
+            5: "Cerebellum_GM",
+            6: "Cerebellum_WM",
+            7: "Brainstem"
+        }
+    elif category == "lobes":
+        # README.pdf'deki native_lobes etiketleri
+        labels = {
+            1: "Right_Frontal_Lobe",
+            2: "Left_Frontal_Lobe",
+            3: "Right_Temporal_Lobe",
+            4: "Left_Temporal_Lobe",
+            5: "Right_Parietal_Lobe",
+            6: "Left_Parietal_Lobe",
+            7: "Right_Occipital_Lobe",
+            8: "Left_Occipital_Lobe",
+            9: "Right_Limbic_Lobe",
+            10: "Left_Limbic_Lobe",
+            11: "Right_Insular_Lobe",
+            12: "Left_Insular_Lobe"
+        }
+    elif category == "macro":
+        # README.pdf'deki native_macrostructures etiketleri
+        labels = {
+            1: "Left_Cerebrum",
+            2: "Right_Cerebrum",
+            3: "Left_Cerebellum",
+            4: "Right_Cerebellum",
+            5: "Vermal",
+            6: "Brainstem"
+        }
+    
+    return labels
+
+
+def getColorTable(category):
+    """Her kategori icin renk tablosu - README.pdf'e gore."""
+    colors = {}
+    
+    if category == "structures":
+        # Ventrikuller - Mavi tonlari
+        colors[4] = (0.2, 0.4, 0.9)   # 3rd Ventricle
+        colors[11] = (0.3, 0.5, 0.95)  # 4th Ventricle
+        colors[49] = (0.25, 0.45, 0.85) # Right Inf Lat Vent
+        colors[50] = (0.35, 0.55, 0.9)  # Left Inf Lat Vent
+        colors[51] = (0.2, 0.5, 1.0)    # Right Lateral Ventricle
+        colors[52] = (0.3, 0.6, 1.0)    # Left Lateral Ventricle
+        
+        # Accumbens - Pembe
+        colors[23] = (0.9, 0.3, 0.5)
+        colors[30] = (0.95, 0.35, 0.55)
+        
+        # Amygdala - Kirmizi
+        colors[31] = (0.8, 0.2, 0.2)
+        colors[32] = (0.85, 0.25, 0.25)
+        
+        # Brainstem - Gri
+        colors[35] = (0.5, 0.5, 0.5)
+        
+        # Caudate - Acik yesil
+        colors[36] = (0.3, 0.7, 0.4)
+        colors[37] = (0.35, 0.75, 0.45)
+        
+        # Cerebellum Exterior - Turuncu
+        colors[38] = (0.9, 0.6, 0.3)
+        colors[39] = (0.95, 0.65, 0.35)
+        
+        # Cerebellum WM - Kahverengi
+        colors[40] = (0.7, 0.5, 0.3)
+        colors[41] = (0.75, 0.55, 0.35)
+        
+        # Cerebral WM - Beyaz/Acik gri
+        colors[44] = (0.9, 0.9, 0.9)
+        colors[45] = (0.85, 0.85, 0.85)
+        
+        # Hippocampus - Sari
+        colors[47] = (0.9, 0.8, 0.2)
+        colors[48] = (0.95, 0.85, 0.25)
+        
+        # Pallidum - Koyu yesil
+        colors[55] = (0.4, 0.6, 0.3)
+        colors[56] = (0.45, 0.65, 0.35)
+        
+        # Putamen - Yesil
+        colors[57] = (0.3, 0.8, 0.4)
+        colors[58] = (0.35, 0.85, 0.45)
+        
+        # Thalamus - Mor
+        colors[59] = (0.6, 0.2, 0.6)
+        colors[60] = (0.65, 0.25, 0.65)
+        
+        # Ventral DC - Acik mor
+        colors[61] = (0.7, 0.4, 0.7)
+        colors[62] = (0.75, 0.45, 0.75)
+        
+        # Cerebellum Lobules - Turuncu tonlari
+        colors[71] = (0.85, 0.5, 0.2)
+        colors[72] = (0.9, 0.55, 0.25)
+        colors[73] = (0.95, 0.6, 0.3)
+        
+        # Basal Forebrain - Acik pembe
+        colors[75] = (0.8, 0.5, 0.6)
+        colors[76] = (0.85, 0.55, 0.65)
+        
+        # Kortikal yapilar (100-207) - Spektrum renkleri
+        # Frontal - Kirmizi tonlari
+        for label in [100, 101, 104, 105, 118, 119, 120, 121, 124, 125, 136, 137, 
+                     140, 141, 142, 143, 146, 147, 150, 151, 152, 153, 162, 163, 
+                     164, 165, 178, 179, 182, 183, 186, 187, 190, 191, 192, 193, 
+                     204, 205]:
+            if label % 2 == 0:
+                colors[label] = (0.8, 0.2, 0.2)
+            else:
+                colors[label] = (0.85, 0.25, 0.25)
+        
+        # Temporal - Mavi tonlari
+        for label in [122, 123, 132, 133, 154, 155, 180, 181, 184, 185, 200, 201, 
+                     202, 203, 206, 207]:
+            if label % 2 == 0:
+                colors[label] = (0.2, 0.2, 0.8)
+            else:
+                colors[label] = (0.25, 0.25, 0.85)
+        
+        # Parietal - Yesil tonlari
+        for label in [106, 107, 148, 149, 168, 169, 174, 175, 176, 177, 194, 195, 
+                     198, 199]:
+            if label % 2 == 0:
+                colors[label] = (0.2, 0.7, 0.3)
+            else:
+                colors[label] = (0.25, 0.75, 0.35)
+        
+        # Occipital - Sari tonlari
+        for label in [108, 109, 114, 115, 128, 129, 134, 135, 144, 145, 156, 157, 
+                     160, 161, 196, 197]:
+            if label % 2 == 0:
+                colors[label] = (0.9, 0.8, 0.2)
+            else:
+                colors[label] = (0.95, 0.85, 0.25)
+        
+        # Cingulate - Mor tonlari
+        for label in [138, 139, 166, 167]:
+            if label % 2 == 0:
+                colors[label] = (0.6, 0.2, 0.6)
+            else:
+                colors[label] = (0.65, 0.25, 0.65)
+        
+        # Insula - Turuncu
+        for label in [102, 103, 172, 173]:
+            if label % 2 == 0:
+                colors[label] = (0.9, 0.5, 0.2)
+            else:
+                colors[label] = (0.95, 0.55, 0.25)
+        
+        # Parahippocampal/Entorhinal - Acik sari
+        for label in [116, 117, 170, 171]:
+            if label % 2 == 0:
+                colors[label] = (0.8, 0.7, 0.3)
+            else:
+                colors[label] = (0.85, 0.75, 0.35)
+        
+        # Central operculum - Pembe
+        for label in [112, 113]:
+            if label % 2 == 0:
+                colors[label] = (0.9, 0.4, 0.5)
+            else:
+                colors[label] = (0.95, 0.45, 0.55)
+                
+    elif category == "tissues":
+        colors[1] = (0.3, 0.6, 0.9)   # CSF - Mavi
+        colors[2] = (0.7, 0.7, 0.7)   # Cortical GM - Gri
+        colors[3] = (0.9, 0.9, 0.9)   # Cerebrum WM - Beyaz
+        colors[4] = (0.5, 0.7, 0.4)   # Subcortical GM - Yesil
+        colors[5] = (0.9, 0.6, 0.3)   # Cerebellum GM - Turuncu
+        colors[6] = (0.8, 0.5, 0.2)   # Cerebellum WM - Kahverengi
+        colors[7] = (0.5, 0.5, 0.5)   # Brainstem - Gri
+        
+    elif category == "lobes":
+        colors[1] = (0.9, 0.3, 0.3)   # Right Frontal - Kirmizi
+        colors[2] = (0.95, 0.35, 0.35) # Left Frontal
+        colors[3] = (0.3, 0.3, 0.9)   # Right Temporal - Mavi
+        colors[4] = (0.35, 0.35, 0.95) # Left Temporal
+        colors[5] = (0.3, 0.8, 0.3)   # Right Parietal - Yesil
+        colors[6] = (0.35, 0.85, 0.35) # Left Parietal
+        colors[7] = (0.9, 0.9, 0.3)   # Right Occipital - Sari
+        colors[8] = (0.95, 0.95, 0.35) # Left Occipital
+        colors[9] = (0.7, 0.3, 0.7)   # Right Limbic - Mor
+        colors[10] = (0.75, 0.35, 0.75) # Left Limbic
+        colors[11] = (0.9, 0.5, 0.3)  # Right Insular - Turuncu
+        colors[12] = (0.95, 0.55, 0.35) # Left Insular
+        
+    elif category == "macro":
+        colors[1] = (0.8, 0.7, 0.7)   # Left Cerebrum - Acik gri
+        colors[2] = (0.75, 0.65, 0.65) # Right Cerebrum
+        colors[3] = (0.9, 0.6, 0.3)   # Left Cerebellum - Turuncu
+        colors[4] = (0.85, 0.55, 0.25) # Right Cerebellum
+        colors[5] = (0.95, 0.65, 0.35) # Vermal - Acik turuncu
+        colors[6] = (0.5, 0.5, 0.5)   # Brainstem - Gri
+    
+    return colors
@@ -0,0 +1,405 @@
+import numpy as np
+
+# bincount icin tek seferde islenen eleman sayisi (gecici intp kopyasini sinirlar)
+_BLOCK_SIZE = 1 << 20
+
+# Bu araliktan genis etiket araliklarinda yogun histogram yerine np.unique kullanilir
+_MAX_DENSE_RANGE = 1 << 24
+
+# Konum indeksinde etiketleri sira numarasina esitleyen arama tablosunun en buyuk boyu
+_MAX_LOOKUP_RANGE = 1 << 20
+
+
+def _integerView(array):
+    """Diziyi tam sayi etiket dizisine cevirir (gerekirse)."""
+    if not array.dtype.isnative:
+        array = array.astype(array.dtype.newbyteorder('='))
+    if array.dtype.kind == 'b':
+        return array.view(np.uint8)
+    if array.dtype.kind == 'f':
+        # Slicer bazen etiketleri float olarak dondurur; tam sayi degilse None
+        if not np.array_equal(array, np.trunc(array)):
+            return None
+        return array.astype(np.int64)
+    return array
+
+
+class LabelHistogram:
+    """Etiket basina voksel sayilarini tek lineer geciste biriktirir.
+
+    Dizi parca parca (ornegin dilim bloklari halinde) verilebilir; her parca
+    yalnizca bir kez okunur. Kucuk tam sayi tipleri (8/16 bit) icin ofset
+    tipten belirlenir, daha genis tiplerde min/max'tan hesaplanir.
+    """
+
+    def __init__(self):
+        self._offset = 0
+        self._bins = np.zeros(0, dtype=np.int64)
+        self._sparse = {}
+        self.voxelCount = 0
+
+    def update(self, array):
+        """Bir dizi parcasinin sayimlarini histograma ekler."""
+        flat = np.asarray(array).reshape(-1)
+        if flat.size == 0:
+            return
+        self.voxelCount += flat.size
+
+        flat = _integerView(flat)
+        if flat is None:
+            values, counts = np.unique(np.asarray(array).reshape(-1), return_counts=True)
+            self._addSparse(values, counts)
+            return
+
+        if flat.dtype.itemsize <= 2:
+            self._updateSmall(flat)
+        else:
+            self._updateWide(flat)
+
+    def _updateSmall(self, flat):
+        # 8/16 bit: isaretli tipler isaretsiz olarak goruntulenir, kutular sonra kaydirilir
+        signed = flat.dtype.kind == 'i'
+        nbins = 1 << (8 * flat.dtype.itemsize)
+        unsignedView = flat.view(np.dtype('u%d' % flat.dtype.itemsize))
+        bins = np.zeros(nbins, dtype=np.int64)
+        for start in range(0, unsignedView.size, _BLOCK_SIZE):
+            bins += np.bincount(unsignedView[start:start + _BLOCK_SIZE], minlength=nbins)
+        if signed:
+            half = nbins // 2
+            bins = np.concatenate([bins[half:], bins[:half]])
+            self._addDense(-half, bins)
+        else:
+            self._addDense(0, bins)
+
+    def _updateWide(self, flat):
+        low = int(flat.min())
+        high = int(flat.max())
+        if high - low >= _MAX_DENSE_RANGE:
+            values, counts = np.unique(flat, return_counts=True)
+            self._addSparse(values, counts)
+            return
+        nbins = high - low + 1
+        bins = np.zeros(nbins, dtype=np.int64)
+        for start in range(0, flat.size, _BLOCK_SIZE):
+            block = flat[start:start + _BLOCK_SIZE]
+            if low != 0:
+                block = block.astype(np.int64) - low
+            bins += np.bincount(block, minlength=nbins)
+        self._addDense(low, bins)
+
+    def addCounts(self, labels, counts):
+        """Baska yerde sayilmis (etiket, sayim) ciftlerini histograma ekler."""
+        counts = np.asarray(counts, dtype=np.int64)
+        self.voxelCount += int(counts.sum())
+        self._addSparse(np.asarray(labels), counts)
+
+    def _addDense(self, offset, bins):
+        nonzero = np.flatnonzero(bins)
+        if nonzero.size == 0:
+            return
+        # Bos kenarlari at, mevcut kutu dizisini gerekirse genislet
+        first, last = int(nonzero[0]), int(nonzero[-1])
+        offset += first
+        bins = bins[first:last + 1]
+        if self._bins.size == 0:
+            self._offset, self._bins = offset, bins.copy()
+            return
+        newLow = min(self._offset, offset)
+        newHigh = max(self._offset + self._bins.size, offset + bins.size)
+        if newLow != self._offset or newHigh != self._offset + self._bins.size:
+            merged = np.zeros(newHigh - newLow, dtype=np.int64)
+            merged[self._offset - newLow:self._offset - newLow + self._bins.size] = self._bins
+            self._offset, self._bins = newLow, merged
+        self._bins[offset - self._offset:offset - self._offset + bins.size] += bins
+
+    def _addSparse(self, values, counts):
+        for value, count in zip(values.tolist(), counts.tolist()):
+            self._sparse[value] = self._sparse.get(value, 0) + count
+
+    def result(self):
+        """(etiketler, sayimlar) dizilerini artan etiket sirasinda dondurur.
+
+        Yalnizca en az bir vokseli olan etiketler dondurulur.
+        """
+        nonzero = np.flatnonzero(self._bins)
+        labels = nonzero.astype(np.int64) + self._offset
+        counts = self._bins[nonzero]
+        if not self._sparse:
+            return labels, counts
+
+        merged = dict(zip(labels.tolist(), counts.tolist()))
+        for value, count in self._sparse.items():
+            merged[value] = merged.get(value, 0) + count
+        keys = sorted(merged)
+        labelDtype = np.float64 if any(isinstance(k, float) and not k.is_integer() for k in keys) else np.int64
+        return np.array(keys, dtype=labelDtype), np.array([merged[k] for k in keys], dtype=np.int64)
+
+
+def computeLabelVoxelCounts(array):
+    """Bir etiket dizisindeki her etiketin voksel sayisini tek geciste hesaplar."""
+    histogram = LabelHistogram()
+    histogram.update(array)
+    return histogram.result()
+
+
+class JointLabelHistogram:
+    """Ayni izgaradaki iki etiket haritasinin ortak voksel sayim matrisini biriktirir.
+
+    Her (etiketA, etiketB) cifti tek bir 2 boyutlu bincount ile sayilir;
+    cift basina maske olusturulmaz.
+    """
+
+    def __init__(self):
+        self._offsets = (0, 0)
+        self._matrix = np.zeros((0, 0), dtype=np.int64)
+
+    def update(self, arrayA, arrayB):
+        """Ayni sekilli iki dizi parcasinin ortak sayimlarini ekler."""
+        if np.shape(arrayA) != np.shape(arrayB):
+            raise ValueError("Etiket dizilerinin sekilleri farkli: %s / %s" % (np.shape(arrayA), np.shape(arrayB)))
+        flatA = _integerView(np.asarray(arrayA).reshape(-1))
+        flatB = _integerView(np.asarray(arrayB).reshape(-1))
+        if flatA is None or flatB is None:
+            raise ValueError("Ortak histogram icin tam sayi etiketler gerekli")
+        if flatA.size == 0:
+            return
+
+        lowA, highA = int(flatA.min()), int(flatA.max())
+        lowB, highB = int(flatB.min()), int(flatB.max())
+        rowsA, columnsB = highA - lowA + 1, highB - lowB + 1
+        if rowsA * columnsB >= _MAX_DENSE_RANGE:
+            raise ValueError("Etiket araliklari ortak histogram icin cok genis")
+
+        bins = np.zeros(rowsA * columnsB, dtype=np.int64)
+        for start in range(0, flatA.size, _BLOCK_SIZE):
+            blockA = flatA[start:start + _BLOCK_SIZE].astype(np.int64) - lowA
+            blockB = flatB[start:start + _BLOCK_SIZE].astype(np.int64) - lowB
+            blockA *= columnsB
+            blockA += blockB
+            bins += np.bincount(blockA, minlength=bins.size)
+        self._addDense((lowA, lowB), bins.reshape(rowsA, columnsB))
+
+    def _addDense(self, offsets, matrix):
+        if self._matrix.size == 0:
+            self._offsets, self._matrix = offsets, matrix
+            return
+        low = [min(a, b) for a, b in zip(self._offsets, offsets)]
+        high = [max(o1 + s1, o2 + s2) for o1, s1, o2, s2 in
+                zip(self._offsets, self._matrix.shape, offsets, matrix.shape)]
+        merged = np.zeros((high[0] - low[0], high[1] - low[1]), dtype=np.int64)
+        for o, m in ((self._offsets, self._matrix), (offsets, matrix)):
+            merged[o[0] - low[0]:o[0] - low[0] + m.shape[0], o[1] - low[1]:o[1] - low[1] + m.shape[1]] += m
+        self._offsets, self._matrix = tuple(low), merged
+
+    def result(self):
+        """(etiketlerA, etiketlerB, sayimMatrisi) dondurur.
+
+        Matrisin satirlari etiketlerA, sutunlari etiketlerB'dir; yalnizca en az
+        bir vokseli olan etiketler tutulur.
+        """
+        rows = np.flatnonzero(self._matrix.sum(axis=1))
+        columns = np.flatnonzero(self._matrix.sum(axis=0))
+        matrix = self._matrix[np.ix_(rows, columns)]
+        return rows + self._offsets[0], columns + self._offsets[1], matrix
+
+
+def computeJointVoxelCounts(arrayA, arrayB):
+    """Iki etiket dizisinin ortak voksel sayim matrisini tek geciste hesaplar."""
+    histogram = JointLabelHistogram()
+    histogram.update(arrayA, arrayB)
+    return histogram.result()
+
+
+class LabelRegion:
+    """Bir etiketin konum ozeti: voksel sayisi, sinir kutusu ve agirlik merkezi.
+
+    bounds dizi sirasindadir: ((kMin, kMax), (jMin, jMax), (iMin, iMax)), uclar dahil.
+    centroid IJK sirasindadir (i, j, k).
+    """
+
+    def __init__(self, labelId, voxelCount, bounds, centroid):
+        self.labelId = labelId
+        self.voxelCount = voxelCount
+        self.bounds = bounds
+        self.centroid = centroid
+
+    def slices(self, margin=0, shape=None):
+        """Diziden bu etiketin alt hacmini kesen (K, J, I) dilim uclusu."""
+        result = []
+        for axis, (low, high) in enumerate(self.bounds):
+            low = max(low - margin, 0)
+            high = high + margin + 1
+            if shape is not None:
+                high = min(high, shape[axis])
+            result.append(slice(low, high))
+        return tuple(result)
+
+    def centroidRAS(self, ijkToRAS):
+        """Agirlik merkezini 4x4 IJK->RAS matrisiyle RAS koordinatina cevirir."""
+        point = np.dot(np.asarray(ijkToRAS, dtype=np.float64), list(self.centroid) + [1.0])
+        return tuple(float(v) for v in point[:3])
+
+    def toDict(self):
+        return {"label_id": self.labelId, "voxel_count": self.voxelCount,
+                "bounds": [list(b) for b in self.bounds], "centroid": list(self.centroid)}
+
+    def __repr__(self):
+        return f"LabelRegion({self.labelId}, voxels={self.voxelCount}, bounds={self.bounds})"
+
+
+class LabelSpatialIndex:
+    """Etiket kimligi -> LabelRegion; hacmi yeniden taramadan konum sorgulari icin."""
+
+    def __init__(self, shape, regions):
+        self.shape = tuple(shape)
+        self.regions = regions
+
+    def labels(self):
+        return sorted(self.regions)
+
+    def region(self, labelId):
+        """Etiketin LabelRegion nesnesi (hacimde yoksa None)."""
+        return self.regions.get(int(labelId))
+
+    def __contains__(self, labelId):
+        return int(labelId) in self.regions
+
+    def __len__(self):
+        return len(self.regions)
+
+
+def _profileColumns(array, maxWidth):
+    """Profil sutunlari: (sutun basina etiket, voksel basina sutun numarasi).
+
+    Etiket araligi maxWidth'ten darsa sutun dogrudan etiket - en kucuk etiket
+    olur; daha genis araliklarda yalnizca dizide bulunan etiketler ardisik
+    sutunlara esitlenir (arama tablosu veya seyrek araliklarda np.unique).
+    Sutun numaralari diziyle ayni sekilde, intp.
+    """
+    low, high = int(array.min()), int(array.max())
+    if high - low >= _MAX_LOOKUP_RANGE:
+        labels, inverse = np.unique(array, return_inverse=True)
+        return labels.astype(np.int64), inverse.reshape(array.shape).astype(np.intp)
+    shifted = array.astype(np.intp)
+    if low:
+        shifted -= low
+    if high - low < maxWidth:
+        return np.arange(low, high + 1, dtype=np.int64), shifted
+    present = np.flatnonzero(np.bincount(shifted.reshape(-1)))
+    lookup = np.zeros(high - low + 1, dtype=np.intp)
+    lookup[present] = np.arange(present.size, dtype=np.intp)
+    return present.astype(np.int64) + low, lookup[shifted]
+
+
+def _profileStats(profile, offset):
+    """(konum, etiket) profilinden etiket basina ilk/son konum ve konum toplami."""
+    present = profile > 0
+    first = present.argmax(axis=0)
+    last = profile.shape[0] - 1 - present[::-1].argmax(axis=0)
+    positions = np.arange(offset, offset + profile.shape[0], dtype=np.float64)
+    return first + offset, last + offset, np.dot(positions, profile)
+
+
+class LabelSpatialIndexBuilder:
+    """Sayimlarla ayni geciste her etiketin sinir kutusunu ve merkezini cikarir.
+
+    LabelHistogram ile ayni arayuzu sunar (update/result); dilim bloklari K
+    ekseni boyunca sirayla verilmelidir. Her blok icin (dilim, satir) ve sutun
+    profilleri bincount ile cikarilir; etiket araligi genis bloklarda yalnizca
+    blokta bulunan etiketler ardisik sutunlara esitlenir (bkz. _profileColumns),
+    boylece bellek ve sure uc degerli etiket numaralarina baglanmaz. Sayimlar
+    profillerden LabelHistogram'a eklenir.
+    """
+
+    def __init__(self, shape):
+        self.shape = tuple(shape)
+        self._histogram = LabelHistogram()
+        self._nextSlice = 0
+        # Etiket -> birikim dizilerindeki sira
+        self._labelIndex = {}
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._lower = np.zeros((0, 3), dtype=np.int64)
+        self._upper = np.zeros((0, 3), dtype=np.int64)
+        self._sums = np.zeros((0, 3), dtype=np.float64)
+
+    @property
+    def voxelCount(self):
+        return self._histogram.voxelCount
+
+    def update(self, slab):
+        """K ekseni boyunca siradaki dilim blogunu (n, J, I) ekler."""
+        slab = np.asarray(slab)
+        if slab.ndim == 2:
+            slab = slab[None]
+        if slab.shape[1:] != self.shape[1:] or self._nextSlice + slab.shape[0] > self.shape[0]:
+            raise ValueError("Dilim blogu hacim sekliyle uyusmuyor")
+        if slab.size == 0:
+            return
+        integerSlab = _integerView(slab)
+        if integerSlab is None:
+            raise ValueError("Konum indeksi icin tam sayi etiketler gerekli")
+        # Gecici profiller blok basina yaklasik _BLOCK_SIZE voksel ile sinirli
+        step = max(1, _BLOCK_SIZE // max(1, self.shape[1] * self.shape[2]))
+        for start in range(0, slab.shape[0], step):
+            self._addRegions(integerSlab[start:start + step], self._nextSlice + start)
+        self._nextSlice += slab.shape[0]
+
+    def _addRegions(self, chunk, firstSlice):
+        slices, rows, columns = chunk.shape
+        # Profiller bloktan en cok birkac kat buyuk olsun
+        labels, compact = _profileColumns(chunk, 4 * columns)
+        size = labels.size
+        columnIndex = compact + np.arange(columns, dtype=np.intp) * size
+        columnProfile = np.bincount(columnIndex.reshape(-1), minlength=columns * size).reshape(columns, size)
+        del columnIndex
+        compact += (np.arange(slices * rows, dtype=np.intp) * size).reshape(slices, rows, 1)
+        sliceRowProfile = np.bincount(compact.reshape(-1), minlength=slices * rows * size).reshape(slices, rows, size)
+        del compact
+
+        counts = columnProfile.sum(axis=0)
+        present = np.flatnonzero(counts)
+        labels, counts = labels[present], counts[present]
+        # Sayimlar histograma eklenir (hacim ikinci kez taranmaz)
+        self._histogram.addCounts(labels, counts)
+        stats = [_profileStats(sliceRowProfile.sum(axis=1)[:, present], firstSlice),
+                 _profileStats(sliceRowProfile.sum(axis=0)[:, present], 0),
+                 _profileStats(columnProfile[:, present], 0)]
+        rowsOf = self._indicesFor(labels)
+        self._counts[rowsOf] += counts
+        self._lower[rowsOf] = np.minimum(self._lower[rowsOf], np.stack([first for first, _, _ in stats], axis=1))
+        self._upper[rowsOf] = np.maximum(self._upper[rowsOf], np.stack([last for _, last, _ in stats], axis=1))
+        self._sums[rowsOf] += np.stack([sums for _, _, sums in stats], axis=1)
+
+    def _indicesFor(self, labels):
+        labels = labels.tolist()
+        new = [label for label in labels if label not in self._labelIndex]
+        if new:
+            for label in new:
+                self._labelIndex[label] = len(self._labelIndex)
+            grow = len(new)
+            self._counts = np.concatenate([self._counts, np.zeros(grow, dtype=np.int64)])
+            self._lower = np.concatenate([self._lower, np.full((grow, 3), np.iinfo(np.int64).max, dtype=np.int64)])
+            self._upper = np.concatenate([self._upper, np.full((grow, 3), -1, dtype=np.int64)])
+            self._sums = np.concatenate([self._sums, np.zeros((grow, 3), dtype=np.float64)])
+        return np.array([self._labelIndex[label] for label in labels], dtype=np.intp)
+
+    def result(self):
+        """(etiketler, sayimlar) - LabelHistogram.result ile ayni bicim."""
+        return self._histogram.result()
+
+    def index(self):
+        """Biriktirilen sinir kutularindan ve konum toplamlarindan LabelSpatialIndex olusturur."""
+        regions = {}
+        for labelId, row in sorted(self._labelIndex.items()):
+            count = int(self._counts[row])
+            bounds = tuple((int(low), int(high)) for low, high in zip(self._lower[row], self._upper[row]))
+            centroid = tuple(float(value) for value in (self._sums[row] / count)[::-1])
+            regions[int(labelId)] = LabelRegion(int(labelId), count, bounds, centroid)
+        return LabelSpatialIndex(self.shape, regions)
+
+
+def buildLabelSpatialIndex(array):
+    """Bellekteki bir (K, J, I) etiket dizisi icin konum indeksi olusturur."""
+    builder = LabelSpatialIndexBuilder(np.shape(array))
+    builder.update(array)
+    return builder.index()
@@ -0,0 +1,286 @@
+import numpy as np
+
+from .LabelRegistry import getLabelSchema
+from .LabelStatistics import JointLabelHistogram, LabelHistogram, computeLabelVoxelCounts
+from .NiftiLabelReader import DEFAULT_MEMORY_BUDGET, NiftiLabelReader
+
+# Hizli onizlemede sayilan (esit aralikli) dilim sayisi
+PREVIEW_SLICES = 24
+
+# Tek gecisli onizlemede okunan bloktan sayilan en fazla dilim
+SLAB_SAMPLE_SLICES = 8
+
+
+def buildVolumeResults(category, labels, counts, voxelVolume, labelNames=None):
+    """Etiket sayimlarindan calculateVolumes ile ayni bicimde sonuc sozlugu olusturur.
+
+    Arka plan (0) ve negatif etiketler atlanir.
+    """
+    if labelNames is None:
+        labelNames = getLabelSchema(category).names
+
+    results = {}
+    for label, voxelCount in zip(labels, counts):
+        if label <= 0:
+            continue
+        labelInt = int(label)
+        volumeMm3 = float(voxelCount * voxelVolume)
+        volumeMl = volumeMm3 / 1000.0
+
+        labelName = labelNames.get(labelInt, f"Label_{labelInt}")
+        structureKey = f"{category}_{labelInt}_{labelName}"
+
+        results[structureKey] = {
+            "category": category,
+            "label_id": labelInt,
+            "name": labelName,
+            "mm3": volumeMm3,
+            "ml": volumeMl
+        }
+    return results
+
+
+def countLabelsInFile(filePath, memoryBudget=DEFAULT_MEMORY_BUDGET):
+    """Dosyayi bloklar halinde akitarak etiket sayimlarini hesaplar.
+
+    Donus: (etiketler, sayimlar, NiftiHeader)
+    """
+    histogram = LabelHistogram()
+    with NiftiLabelReader(filePath, memoryBudget) as reader:
+        for _, slab in reader.iterSlabs():
+            histogram.update(slab)
+    labels, counts = histogram.result()
+    return labels, counts, reader.header
+
+
+def computeLabelVolumes(filePath, category, memoryBudget=DEFAULT_MEMORY_BUDGET, cache=None):
+    """Slicer olmadan bir volBrain etiket dosyasinin hacimlerini hesaplar.
+
+    cache (ResultCache) verilirse once onbellege bakilir; isabet halinde
+    dosya hic acilmaz.
+    """
+    if cache is not None:
+        key = cache.key(filePath, category)
+        results = cache.get(filePath, category, key)
+        if results is not None:
+            return results
+
+    labels, counts, header = countLabelsInFile(filePath, memoryBudget)
+    results = buildVolumeResults(category, labels, counts, header.voxelVolume)
+    if cache is not None:
+        cache.put(filePath, category, results, key)
+    return results
+
+
+def previewSliceIndices(sliceCount, previewSlices=PREVIEW_SLICES):
+    """Onizleme icin esit adimli ornek dilimler (her adim araliginin ortasindan)."""
+    stride = max(1, -(-sliceCount // max(previewSlices, 1)))
+    return np.arange(stride // 2, sliceCount, stride)
+
+
+def previewSlabSlices(sliceCount, previewSlices=PREVIEW_SLICES):
+    """Ornek dilim okunamadiginda onizlemenin kac dilimde bir yenilenecegi."""
+    return max(1, sliceCount // max(previewSlices, 1))
+
+
+def canSampleSlices(reader, indexed=False):
+    """Ornek dilimler ucuz okunabilir mi: sikistirilmamis dosya veya indeksi hazir gzip.
+
+    Indekssiz .nii.gz'de hacme yayilmis ornekler akisin neredeyse tamamini
+    acar; ardindan tam okuma akisi bastan bir kez daha acacagindan ornekleme
+    toplam sureyi artirir.
+    """
+    return not reader.compressed or indexed
+
+
+class SliceSampleEstimator:
+    """Ornek dilim sayimlarindan etiket basina voksel sayisi tahmini.
+
+    Kalan dilimlerin toplami, kalan araliktaki orneklerin ortalamasi ile
+    olceklenir; hata, sonlu evren duzeltmeli standart hatadir (1 sigma).
+    Okuma ilerledikce tamamlanmis dilimlerin kesin sayimlari eklenir ve
+    tahmin sona dogru kesin sonuca daralir.
+    """
+
+    def __init__(self, sliceCount, sampleIndices, labels, sampleCounts):
+        self.sliceCount = sliceCount
+        self.sampleIndices = np.asarray(sampleIndices)
+        self.labels = np.asarray(labels, dtype=np.int64)
+        # (ornek dilim, etiket) sayim matrisi
+        self.sampleCounts = np.asarray(sampleCounts, dtype=np.float64).reshape(len(self.sampleIndices), -1)
+
+    @classmethod
+    def fromReader(cls, reader, previewSlices=PREVIEW_SLICES):
+        """Okuyucudan yalnizca ornek dilimleri okuyarak tahminciyi olusturur."""
+        sliceCount = reader.header.shape[0]
+        indices = previewSliceIndices(sliceCount, previewSlices)
+        perSlice = []
+        for k in indices.tolist():
+            histogram = LabelHistogram()
+            for _, slab in reader.iterSlabs(1, k, k + 1):
+                histogram.update(slab)
+            perSlice.append(histogram.result())
+        return cls._fromSliceCounts(sliceCount, indices, perSlice)
+
+    @classmethod
+    def fromSlab(cls, sliceCount, start, slab, maxSlices=SLAB_SAMPLE_SLICES):
+        """Tek gecisin okudugu bloktan esit aralikli en fazla maxSlices dilimi sayan tahminci.
+
+        Ornekleme pahaliyken (bkz. canSampleSlices) kullanilir: kalan dilimler
+        son okunan bloktan olceklenir, bu nedenle tahmin ornekli yola gore
+        kabadir; okuma ilerledikce kesin sayimlarla daralir. Blok zaten tam
+        sayildigindan yalnizca birkac dilim yeniden sayilir.
+        """
+        rows = previewSliceIndices(len(slab), maxSlices)
+        perSlice = [computeLabelVoxelCounts(slab[row]) for row in rows.tolist()]
+        return cls._fromSliceCounts(sliceCount, start + rows, perSlice)
+
+    @classmethod
+    def _fromSliceCounts(cls, sliceCount, indices, perSlice):
+        labels = np.unique(np.concatenate([sliceLabels for sliceLabels, _ in perSlice])) if perSlice \
+            else np.zeros(0, dtype=np.int64)
+        counts = np.zeros((len(perSlice), labels.size))
+        for row, (sliceLabels, sliceCounts) in enumerate(perSlice):
+            counts[row, np.searchsorted(labels, sliceLabels)] = sliceCounts
+        return cls(sliceCount, indices, labels, counts)
+
+    def estimate(self, doneSlices=0, exactLabels=None, exactCounts=None):
+        """(etiketler, tahmini sayimlar, standart hatalar).
+
+        exactLabels/exactCounts: ilk doneSlices dilimin kesin sayimlari.
+        """
+        remaining = self.sliceCount - doneSlices
+        samples = self.sampleCounts[self.sampleIndices >= doneSlices]
+        # Ornekler kalan dilimlerin bir alt kumesiyse sonlu evren duzeltmesi uygulanir
+        subset = len(samples) > 0
+        if remaining > 0 and not subset:
+            # Son ornekten sonraki kisa kuyruk: tum ornekler kullanilir
+            samples = self.sampleCounts
+        if remaining <= 0 or not len(samples):
+            estimated = np.zeros(self.labels.size)
+            errors = np.zeros(self.labels.size)
+        else:
+            estimated = remaining * samples.mean(axis=0)
+            if len(samples) > 1:
+                correction = np.sqrt(max(0.0, 1.0 - len(samples) / remaining)) if subset else 1.0
+                errors = remaining * samples.std(axis=0, ddof=1) / np.sqrt(len(samples)) * correction
+            else:
+                errors = estimated.copy()
+            # Kalan orneklerde hic gorulmeyen etiketler: bir ornek araliginin en buyuk dilim sayimi kadar belirsizlik
+            unseen = estimated == 0
+            errors[unseen] = remaining / len(samples) * self.sampleCounts[:, unseen].max(axis=0, initial=0.0)
+
+        if exactLabels is None or not len(exactLabels):
+            return self.labels, estimated, errors
+        labels = np.union1d(self.labels, exactLabels)
+        counts = np.zeros(labels.size)
+        errorsAll = np.zeros(labels.size)
+        positions = np.searchsorted(labels, self.labels)
+        counts[positions] = estimated
+        errorsAll[positions] = errors
+        counts[np.searchsorted(labels, exactLabels)] += exactCounts
+        return labels, counts, errorsAll
+
+
+def buildEstimatedResults(category, labels, counts, errors, voxelVolume, labelNames=None):
+    """Tahmini sayimlardan buildVolumeResults bicimi; her satira hata ve approximate eklenir."""
+    results = buildVolumeResults(category, labels, counts, voxelVolume, labelNames)
+    errorByLabel = dict(zip(np.asarray(labels).tolist(), np.asarray(errors).tolist()))
+    for data in results.values():
+        errorMm3 = errorByLabel[data["label_id"]] * voxelVolume
+        data.update(mm3_error=errorMm3, ml_error=errorMm3 / 1000.0, approximate=True)
+    return results
+
+
+def iterProgressiveVolumes(filePath, category, memoryBudget=DEFAULT_MEMORY_BUDGET, previewSlices=PREVIEW_SLICES,
+                           opener=None, indexed=False):
+    """Once ornek dilimlerden yaklasik, sonra bloklar okundukca daralan hacimler uretir.
+
+    (sonuclar, tamamlanma orani) ciftleri verir: ilki yalnizca orneklerden
+    (oran 0), araliklar buildEstimatedResults bicimindedir; sonuncusu (oran 1)
+    computeLabelVolumes ile ayni kesin sonuctur. Ornekleme pahaliysa
+    (indexed=False iken .nii.gz, bkz. canSampleSlices) oran 0 sonucu verilmez;
+    hacim kucuk bloklarla okunur ve her tahmin son okunan bloktan yapilir.
+    """
+    with NiftiLabelReader(filePath, memoryBudget, opener) as reader:
+        header = reader.header
+        names = getLabelSchema(category).names
+        sliceCount = header.shape[0]
+        slabSlices = None
+        if canSampleSlices(reader, indexed):
+            estimator = SliceSampleEstimator.fromReader(reader, previewSlices)
+            yield buildEstimatedResults(category, *estimator.estimate(), header.voxelVolume, names), 0.0
+        else:
+            slabSlices = min(previewSlabSlices(sliceCount, previewSlices), reader.slicesPerSlab())
+
+        histogram = LabelHistogram()
+        for start, slab in reader.iterSlabs(slabSlices):
+            histogram.update(slab)
+            done = start + slab.shape[0]
+            if done < sliceCount:
+                if slabSlices is not None:
+                    estimator = SliceSampleEstimator.fromSlab(sliceCount, start, slab)
+                labels, counts, errors = estimator.estimate(done, *histogram.result())
+                yield buildEstimatedResults(category, labels, counts, errors, header.voxelVolume, names), \
+                    done / sliceCount
+        labels, counts = histogram.result()
+    yield buildVolumeResults(category, labels, counts, header.voxelVolume, names), 1.0
+
+
+def checkSameGrid(shapeA, spacingA, ijkToRASA, shapeB, spacingB, ijkToRASB, tolerance=1e-3):
+    """Iki etiket haritasi ayni voksel izgarasinda degilse ValueError firlatir."""
+    if tuple(shapeA) != tuple(shapeB):
+        raise ValueError(f"Etiket haritalarinin boyutlari farkli: {tuple(shapeA)} / {tuple(shapeB)}")
+    if not np.allclose(spacingA, spacingB, atol=tolerance):
+        raise ValueError(f"Etiket haritalarinin voksel boyutlari farkli: {tuple(spacingA)} / {tuple(spacingB)}")
+    if not np.allclose(ijkToRASA, ijkToRASB, atol=tolerance):
+        raise ValueError("Etiket haritalarinin konum/yonelimi farkli")
+
+
+def buildCompositionResults(category, labels, byCategory, byLabels, matrix, voxelVolume):
+    """Ortak sayim matrisinden yapi basina kompozisyon sonuclari olusturur.
+
+    Anahtar: f"{category}_{etiket}_{byCategory}_{byEtiket}". fraction, yapinin
+    toplam hacmi icindeki payidir (ikinci haritanin 0 etiketi "Background").
+    """
+    names = getLabelSchema(category).names
+    byNames = getLabelSchema(byCategory).names
+    totals = matrix.sum(axis=1)
+
+    results = {}
+    for row, label in enumerate(labels):
+        if label <= 0:
+            continue
+        labelInt = int(label)
+        for column in np.flatnonzero(matrix[row]):
+            byLabelInt = int(byLabels[column])
+            voxelCount = matrix[row, column]
+            volumeMm3 = float(voxelCount * voxelVolume)
+            byName = "Background" if byLabelInt == 0 else byNames.get(byLabelInt, f"Label_{byLabelInt}")
+            results[f"{category}_{labelInt}_{byCategory}_{byLabelInt}"] = {
+                "category": category,
+                "label_id": labelInt,
+                "name": names.get(labelInt, f"Label_{labelInt}"),
+                "by_category": byCategory,
+                "by_label_id": byLabelInt,
+                "by_name": byName,
+                "mm3": volumeMm3,
+                "ml": volumeMm3 / 1000.0,
+                "fraction": float(voxelCount / totals[row])
+            }
+    return results
+
+
+def computeLabelComposition(filePath, category, byFilePath, byCategory, memoryBudget=DEFAULT_MEMORY_BUDGET):
+    """Iki volBrain etiket dosyasini esli bloklar halinde akitarak kompozisyon hesaplar."""
+    histogram = JointLabelHistogram()
+    with NiftiLabelReader(filePath, memoryBudget // 2) as reader, \
+            NiftiLabelReader(byFilePath, memoryBudget // 2) as byReader:
+        headerA, headerB = reader.header, byReader.header
+        checkSameGrid(headerA.shape, headerA.spacing, headerA.ijkToRAS,
+                      headerB.shape, headerB.spacing, headerB.ijkToRAS)
+        slabSlices = min(reader.slicesPerSlab(), byReader.slicesPerSlab())
+        for (_, slab), (_, bySlab) in zip(reader.iterSlabs(slabSlices), byReader.iterSlabs(slabSlices)):
+            histogram.update(slab, bySlab)
+    labels, byLabels, matrix = histogram.result()
+    return buildCompositionResults(category, labels, byCategory, byLabels, matrix, headerA.voxelVolume)
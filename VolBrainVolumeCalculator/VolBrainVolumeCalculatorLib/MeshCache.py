@@ -0,0 +1,139 @@
+"""Yuzey ayarlari (preset) ve etiket yuzeylerinin disk onbellegi.
+
+Yuzeyler VTK'siz, nokta/hucre dizileri olarak saklanir (bkz.
+SurfaceExtraction.polyDataToArrays): her kaynak dosya + ayar icin bir klasor,
+klasorde etiket basina bir .npz dosyasi. Anahtar, hacim onbelleginin dosya
+parmak izinden uretilen anahtari ile ayarin parametrelerinden turetilir; dosya
+veya ayar degisince eski yuzeyler kullanilmaz.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from .ResultCache import defaultCacheDirectory
+
+# Yuzey ayarlari: decimation ucgenlerin atilacak orani (0: hic), smoothingIterations
+# ve passBand vtkWindowedSincPolyDataFilter parametreleri
+SURFACE_PRESETS = {
+    "interactive": {"decimation": 0.8, "smoothingIterations": 10, "passBand": 0.1},
+    "balanced": {"decimation": 0.5, "smoothingIterations": 15, "passBand": 0.1},
+    "publication": {"decimation": 0.0, "smoothingIterations": 30, "passBand": 0.03},
+}
+
+DEFAULT_SURFACE_PRESET = "balanced"
+
+# Varsayilan onbellek boyut siniri (bayt)
+DEFAULT_MESH_CACHE_SIZE = 1024 * 1024 * 1024
+
+# Saklanan dizilerin bicimi degisirse artirilir
+MESH_FORMAT_VERSION = 1
+
+_ENTRY_SUFFIX = '.npz'
+
+
+def surfacePreset(name):
+    """Ayarin parametreleri (extractLabelSurface anahtar kelimeleri)."""
+    try:
+        return dict(SURFACE_PRESETS[name])
+    except KeyError:
+        raise ValueError(f"Bilinmeyen yuzey ayari: {name} (gecerli: {', '.join(SURFACE_PRESETS)})")
+
+
+def meshCacheKey(sourceKey, preset):
+    """Kaynak anahtari (bkz. ResultCache.cacheKey) ve ayardan yuzey onbellegi anahtari."""
+    payload = {"source": sourceKey, "preset": preset, "parameters": surfacePreset(preset),
+               "version": MESH_FORMAT_VERSION}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class MeshCache:
+    """Etiket yuzeylerini diskte tutan, boyut sinirli LRU onbellek.
+
+    Kayitlar {dizi adi: numpy dizisi} sozlukleridir. Erisim zamani dosyanin
+    mtime degerinde tutulur (ResultCache gibi); yazim gecici dosya + os.replace
+    ile yapildigindan birden fazla surec klasoru paylasabilir.
+    """
+
+    def __init__(self, cacheDir=None, maxBytes=DEFAULT_MESH_CACHE_SIZE):
+        self.cacheDir = cacheDir or os.path.join(defaultCacheDirectory(), "meshes")
+        self.maxBytes = maxBytes
+        os.makedirs(self.cacheDir, exist_ok=True)
+
+    def key(self, sourceKey, preset):
+        return meshCacheKey(sourceKey, preset)
+
+    def _entryPath(self, key, label):
+        return os.path.join(self.cacheDir, key, f"{int(label)}{_ENTRY_SUFFIX}")
+
+    def labels(self, key):
+        """Anahtar icin diskte yuzeyi bulunan etiketler."""
+        try:
+            fileNames = os.listdir(os.path.join(self.cacheDir, key))
+        except OSError:
+            return set()
+        return {int(fileName[:-len(_ENTRY_SUFFIX)]) for fileName in fileNames if fileName.endswith(_ENTRY_SUFFIX)}
+
+    def get(self, key, label):
+        """Kayitli diziler, yoksa (veya okunamazsa) None."""
+        entryPath = self._entryPath(key, label)
+        try:
+            with np.load(entryPath) as entry:
+                arrays = {name: entry[name] for name in entry.files}
+            os.utime(entryPath)
+        except (OSError, ValueError):
+            return None
+        return arrays
+
+    def put(self, key, label, arrays, evict=True):
+        """Dizileri kaydeder; evict acikken boyut siniri asilirsa en eski kayitlari siler."""
+        entryDir = os.path.join(self.cacheDir, key)
+        os.makedirs(entryDir, exist_ok=True)
+        fd, tempPath = tempfile.mkstemp(dir=entryDir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tempPath, self._entryPath(key, label))
+        except Exception:
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+            raise
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Toplam boyut maxBytes altina inene kadar en az yeni kullanilan yuzeyleri siler."""
+        entries = []
+        total = 0
+        for key in os.listdir(self.cacheDir):
+            entryDir = os.path.join(self.cacheDir, key)
+            if not os.path.isdir(entryDir):
+                continue
+            for fileName in os.listdir(entryDir):
+                if not fileName.endswith(_ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(entryDir, fileName))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entryDir, fileName))
+                total += stat.st_size
+
+        for _, size, entryDir, fileName in sorted(entries):
+            if total <= self.maxBytes:
+                break
+            try:
+                os.remove(os.path.join(entryDir, fileName))
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        for key in os.listdir(self.cacheDir):
+            entryDir = os.path.join(self.cacheDir, key)
+            if os.path.isdir(entryDir):
+                shutil.rmtree(entryDir, ignore_errors=True)
@@ -0,0 +1,325 @@
+import gzip
+import mmap
+import struct
+
+import numpy as np
+
+# Varsayilan bellek butcesi: bir dilim blogu icin ayrilan tampon boyutu (bayt)
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+NIFTI1_HEADER_SIZE = 348
+
+# NIfTI-1 datatype kodu -> numpy tipi
+NIFTI_DTYPES = {
+    2: np.uint8,
+    4: np.int16,
+    8: np.int32,
+    16: np.float32,
+    64: np.float64,
+    256: np.int8,
+    512: np.uint16,
+    768: np.uint32,
+    1024: np.int64,
+    1280: np.uint64,
+}
+
+# xyzt_units uzaysal birim kodu -> mm carpani
+_SPATIAL_UNIT_SCALE = {0: 1.0, 1: 1000.0, 2: 1.0, 3: 0.001}
+
+
+class NiftiHeader:
+    """NIfTI-1 basligindan etiket okumasi icin gereken alanlar."""
+
+    def __init__(self, data):
+        if len(data) < NIFTI1_HEADER_SIZE:
+            raise ValueError("NIfTI basligi eksik")
+
+        sizeofHdr = struct.unpack('<i', data[0:4])[0]
+        if sizeofHdr == NIFTI1_HEADER_SIZE:
+            endian = '<'
+        elif struct.unpack('>i', data[0:4])[0] == NIFTI1_HEADER_SIZE:
+            endian = '>'
+        else:
+            raise ValueError("NIfTI-1 dosyasi degil (sizeof_hdr=%d)" % sizeofHdr)
+
+        magic = data[344:348]
+        if magic[:3] != b'n+1':
+            raise ValueError("Yalnizca tek dosyali NIfTI-1 (n+1) destekleniyor")
+
+        self.endian = endian
+        dim = struct.unpack(endian + '8h', data[40:56])
+        self.datatype, self.bitpix = struct.unpack(endian + '2h', data[70:74])
+        pixdim = struct.unpack(endian + '8f', data[76:108])
+        self.voxOffset = int(struct.unpack(endian + 'f', data[108:112])[0])
+        self.sclSlope, self.sclInter = struct.unpack(endian + '2f', data[112:120])
+        xyztUnits = data[123]
+        self.qformCode, self.sformCode = struct.unpack(endian + '2h', data[252:256])
+        quatern = struct.unpack(endian + '6f', data[256:280])
+        srow = struct.unpack(endian + '12f', data[280:328])
+
+        if self.datatype not in NIFTI_DTYPES:
+            raise ValueError("Desteklenmeyen NIfTI veri tipi: %d" % self.datatype)
+        if dim[0] > 3 and any(d > 1 for d in dim[4:dim[0] + 1]):
+            raise ValueError("Yalnizca 3 boyutlu etiket haritalari destekleniyor")
+
+        # IJK sirasinda boyutlar (x en hizli degisen eksen)
+        self.dimensions = tuple(max(int(d), 1) for d in dim[1:4])
+        self.dtype = np.dtype(NIFTI_DTYPES[self.datatype]).newbyteorder(endian)
+        unitScale = _SPATIAL_UNIT_SCALE.get(xyztUnits & 0x07, 1.0)
+        self.spacing = tuple(abs(float(p)) * unitScale for p in pixdim[1:4])
+        self.ijkToRAS = self._computeIJKToRAS(pixdim, quatern, srow, unitScale)
+        self.voxOffset = max(self.voxOffset, NIFTI1_HEADER_SIZE)
+
+    @property
+    def shape(self):
+        """Numpy dizi sekli (K, J, I) - slicer.util.arrayFromVolume ile ayni sira."""
+        return self.dimensions[::-1]
+
+    @property
+    def dataEnd(self):
+        """Voksel verisinin bittigi (acilmis) dosya konumu."""
+        return self.voxOffset + int(np.prod(self.dimensions)) * self.dtype.itemsize
+
+    @property
+    def voxelVolume(self):
+        return self.spacing[0] * self.spacing[1] * self.spacing[2]
+
+    @property
+    def hasScaling(self):
+        return self.sclSlope not in (0.0, 1.0) or (self.sclSlope != 0.0 and self.sclInter != 0.0)
+
+    def _computeIJKToRAS(self, pixdim, quatern, srow, unitScale):
+        matrix = np.eye(4)
+        if self.sformCode > 0:
+            matrix[:3, :] = np.array(srow, dtype=np.float64).reshape(3, 4)
+        elif self.qformCode > 0:
+            b, c, d, qx, qy, qz = quatern
+            a = np.sqrt(max(0.0, 1.0 - (b * b + c * c + d * d)))
+            rotation = np.array([
+                [a * a + b * b - c * c - d * d, 2 * (b * c - a * d), 2 * (b * d + a * c)],
+                [2 * (b * c + a * d), a * a + c * c - b * b - d * d, 2 * (c * d - a * b)],
+                [2 * (b * d - a * c), 2 * (c * d + a * b), a * a + d * d - c * c - b * b],
+            ])
+            qfac = -1.0 if pixdim[0] < 0 else 1.0
+            scale = np.array([pixdim[1], pixdim[2], pixdim[3] * qfac])
+            matrix[:3, :3] = rotation * scale
+            matrix[:3, 3] = (qx, qy, qz)
+        else:
+            matrix[:3, :3] = np.diag([abs(p) for p in pixdim[1:4]])
+        matrix[:3, :] *= unitScale
+        return matrix
+
+
+def isCompressedFile(filePath):
+    """Dosya gzip ile sikistirilmis mi (uzantiya degil imzaya bakilir)."""
+    with open(filePath, 'rb') as f:
+        return f.read(2) == b'\x1f\x8b'
+
+
+def openNiftiFile(filePath):
+    """Dosyayi (gzip ise acarak) ikili akis olarak acar."""
+    if isCompressedFile(filePath):
+        return gzip.open(filePath, 'rb')
+    return open(filePath, 'rb')
+
+
+def readNiftiHeader(filePath):
+    """Yalnizca basligi okur (gzip akisinin basini acar)."""
+    with openNiftiFile(filePath) as f:
+        return NiftiHeader(f.read(NIFTI1_HEADER_SIZE))
+
+
+class NiftiLabelReader:
+    """volBrain native_* etiket dosyalarini dilim bloklari halinde akitan okuyucu.
+
+    Tum hacim hicbir zaman bellege alinmaz: her blok en fazla memoryBudget
+    bayt yer kaplar ve ayni tampon tekrar kullanilir. Slicer gerektirmez.
+    opener(yol) konumlanabilir bir ikili akis dondurur (ornegin
+    GzipIndexStore.open); verilmezse openNiftiFile kullanilir.
+
+    Sikistirilmamis .nii dosyalarinda (memoryMap acikken) voksel blogu
+    bellege eslenir (mmap): bloklar dosyanin kopyasiz, salt okunur
+    goruntuleridir ve sayfalar yalnizca okundukca diskten gelir.
+    """
+
+    def __init__(self, filePath, memoryBudget=DEFAULT_MEMORY_BUDGET, opener=None, memoryMap=True):
+        self.filePath = filePath
+        self.memoryBudget = memoryBudget
+        self.compressed = isCompressedFile(filePath)
+        self.memoryMapped = memoryMap and not self.compressed
+        self._mmap = None
+        self._file = (opener or openNiftiFile)(filePath)
+        try:
+            self.header = NiftiHeader(self._file.read(NIFTI1_HEADER_SIZE))
+        except Exception:
+            self._file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Disariya verilmis goruntuler varken esleme, son goruntuyle birlikte kapanir
+                pass
+            self._mmap = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    @property
+    def spacing(self):
+        return self.header.spacing
+
+    @property
+    def voxelVolume(self):
+        return self.header.voxelVolume
+
+    def slicesPerSlab(self):
+        """Bellek butcesine sigan dilim sayisi (en az 1)."""
+        columns, rows, _ = self.header.dimensions
+        sliceBytes = columns * rows * self.header.dtype.itemsize
+        return max(1, int(self.memoryBudget // sliceBytes))
+
+    def voxelArray(self):
+        """Sikistirilmamis dosyanin (K, J, I) sekilli, kopyasiz ve salt okunur voksel dizisi.
+
+        Olcekleme (scl_slope/scl_inter) uygulanmaz; iterSlabs bloklarinda uygulanir.
+        """
+        if not self.memoryMapped:
+            raise ValueError("Bellek eslemesi yalnizca sikistirilmamis .nii dosyalarinda kullanilabilir")
+        header = self.header
+        voxelCount = int(np.prod(header.shape))
+        if self._mmap is None:
+            with open(self.filePath, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self._mmap, 'madvise'):
+                self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+        if len(self._mmap) < header.voxOffset + voxelCount * header.dtype.itemsize:
+            raise IOError("NIfTI dosyasi beklenenden kisa: %s" % self.filePath)
+        array = np.frombuffer(self._mmap, dtype=header.dtype, count=voxelCount, offset=header.voxOffset)
+        return array.reshape(header.shape)
+
+    def iterSlabs(self, slabSlices=None, start=0, stop=None):
+        """(ilkDilim, blok) ciftleri uretir; blok sekli (n, J, I).
+
+        slabSlices verilmezse bellek butcesinden hesaplanir. [start, stop)
+        disindaki dilimler okunmaz. Bloklar paylasilan bir tamponun (bellek
+        eslemesinde dosyanin salt okunur) goruntuleridir: bir sonraki blok
+        istenmeden once tuketilmelidir.
+        """
+        header = self.header
+        columns, rows, slices = header.dimensions
+        sliceVoxels = columns * rows
+        sliceBytes = sliceVoxels * header.dtype.itemsize
+        stop = slices if stop is None else min(stop, slices)
+        if start < 0 or start >= stop:
+            return
+        slabSlices = min(slabSlices or self.slicesPerSlab(), stop - start)
+
+        if self.memoryMapped:
+            voxels = self.voxelArray()
+            for start in range(start, stop, slabSlices):
+                slab = voxels[start:min(start + slabSlices, stop)]
+                if header.hasScaling:
+                    slab = slab * header.sclSlope + header.sclInter
+                yield start, slab
+            return
+
+        # Istenen ilk dilimin basina konumlan (gzip'te indeks varsa en yakin noktadan)
+        self._file.seek(header.voxOffset + start * sliceBytes)
+
+        buffer = bytearray(slabSlices * sliceBytes)
+        for start in range(start, stop, slabSlices):
+            count = min(slabSlices, stop - start)
+            nbytes = count * sliceVoxels * header.dtype.itemsize
+            view = memoryview(buffer)[:nbytes]
+            readBytes = 0
+            while readBytes < nbytes:
+                n = self._file.readinto(view[readBytes:])
+                if not n:
+                    raise IOError("NIfTI dosyasi beklenenden kisa: %s" % self.filePath)
+                readBytes += n
+            slab = np.frombuffer(buffer, dtype=header.dtype, count=count * sliceVoxels)
+            slab = slab.reshape(count, rows, columns)
+            if header.hasScaling:
+                slab = slab * header.sclSlope + header.sclInter
+            yield start, slab
+
+    def readSlices(self, start, stop):
+        """[start, stop) K dilimlerini (n, J, I) sekilli yeni bir dizi olarak okur."""
+        parts = [np.array(slab) for _, slab in self.iterSlabs(start=start, stop=stop)]
+        if not parts:
+            return np.empty((0,) + self.header.shape[1:], self.header.dtype)
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def readLabelVolume(self, allocate=np.empty, histogram=None, progressCallback=None, slabSlices=None):
+        """Tum hacmi etiket araligina uyan en kucuk tam sayi tipinde okur.
+
+        allocate(shape, dtype) hedef diziyi saglar (ornegin VTK bellegine bir
+        goruntu); boylece hacim yalnizca bir kez kopyalanir. uint8 ile baslanir,
+        daha genis bir etiket gorulurse hedef bir kez genisletilir. histogram
+        verilirse sayimlar ayni geciste eklenir. progressCallback(okunanDilim,
+        toplamDilim) her bloktan sonra cagrilir; firlattigi istisna (ornegin
+        OperationCancelled) okumayi durdurur. slabSlices verilirse bloklar
+        (ve ilerleme bildirimleri) bu kadar dilimdir (bellek butcesini asmadan).
+        """
+        array = allocate(self.header.shape, np.dtype(np.uint8))
+        if slabSlices:
+            slabSlices = min(slabSlices, self.slicesPerSlab())
+        for start, slab in self.iterSlabs(slabSlices):
+            if slab.dtype.kind == 'f':
+                if not np.array_equal(slab, np.trunc(slab)):
+                    raise ValueError("Etiket haritasi tam sayi olmayan degerler iceriyor: %s" % self.filePath)
+            if histogram is not None:
+                histogram.update(slab)
+            if not np.can_cast(slab.dtype, array.dtype):
+                required = smallestLabelDtype(slab.min(), slab.max())
+                if np.result_type(required, array.dtype) != array.dtype:
+                    wider = allocate(self.header.shape, np.result_type(required, array.dtype))
+                    wider[:start] = array[:start]
+                    array = wider
+            array[start:start + slab.shape[0]] = slab
+            if progressCallback:
+                progressCallback(start + slab.shape[0], self.header.shape[0])
+        return array
+
+
+def smallestLabelDtype(low, high):
+    """[low, high] etiket araligini tutan en kucuk tam sayi tipi."""
+    return np.result_type(np.min_scalar_type(int(low)), np.min_scalar_type(int(high)))
+
+
+def writeNiftiLabelVolume(filePath, array, spacing=(1.0, 1.0, 1.0)):
+    """(K, J, I) sekilli etiket dizisini tek dosyali NIfTI-1 olarak yazar.
+
+    Test ve sentetik veri uretimi icindir; .gz uzantisinda gzip ile sikistirir.
+    """
+    array = np.ascontiguousarray(array)
+    datatype = {np.dtype(v): k for k, v in NIFTI_DTYPES.items()}[array.dtype.newbyteorder('=')]
+    slices, rows, columns = array.shape
+
+    header = bytearray(NIFTI1_HEADER_SIZE + 4)
+    struct.pack_into('<i', header, 0, NIFTI1_HEADER_SIZE)
+    struct.pack_into('<8h', header, 40, 3, columns, rows, slices, 1, 1, 1, 1)
+    struct.pack_into('<2h', header, 70, datatype, array.dtype.itemsize * 8)
+    struct.pack_into('<8f', header, 76, 1.0, spacing[0], spacing[1], spacing[2], 0, 0, 0, 0)
+    struct.pack_into('<f', header, 108, float(NIFTI1_HEADER_SIZE + 4))
+    struct.pack_into('<f', header, 112, 1.0)
+    header[123] = 2  # mm
+    struct.pack_into('<2h', header, 252, 0, 1)
+    struct.pack_into('<4f', header, 280, spacing[0], 0, 0, 0)
+    struct.pack_into('<4f', header, 296, 0, spacing[1], 0, 0)
+    struct.pack_into('<4f', header, 312, 0, 0, spacing[2], 0)
+    header[344:348] = b'n+1\x00'
+
+    opener = gzip.open if filePath.endswith('.gz') else open
+    with opener(filePath, 'wb') as f:
+        f.write(bytes(header))
+        f.write(array.astype(array.dtype.newbyteorder('<'), copy=False).tobytes())
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from .LabelRegistry import defaultRegistry
+
+# Varsayilan onbellek boyut siniri (bayt)
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+
+_ENTRY_SUFFIX = '.json'
+
+
+def defaultCacheDirectory():
+    """VOLBRAIN_CACHE_DIR ortam degiskeni veya kullanici onbellek klasoru."""
+    return os.environ.get('VOLBRAIN_CACHE_DIR') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'VolBrainVolumeCalculator')
+
+
+def fileFingerprint(filePath, contentHash=False):
+    """Dosyanin icerik parmak izi: yol, boyut, degisiklik zamani ve istege bagli SHA-256."""
+    stat = os.stat(filePath)
+    fingerprint = {
+        "path": os.path.abspath(filePath),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+    if contentHash:
+        digest = hashlib.sha256()
+        with open(filePath, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        fingerprint["sha256"] = digest.hexdigest()
+    return fingerprint
+
+
+def cacheKey(filePath, category, contentHash=False):
+    """Parmak izi, kategori ve etiket sema surumunden onbellek anahtari uretir."""
+    payload = {
+        "fingerprint": fileFingerprint(filePath, contentHash),
+        "category": category,
+        "schema": defaultRegistry.schemaVersion(category),
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Dosya basina hacim sonuclarini diskte tutan, boyut sinirli LRU onbellek.
+
+    Her kayit ayri bir JSON dosyasidir; erisim zamani dosyanin mtime degerinde
+    tutulur, boylece birden fazla surec ayni klasoru guvenle paylasabilir.
+    """
+
+    def __init__(self, cacheDir=None, maxBytes=DEFAULT_CACHE_SIZE, contentHash=False):
+        self.cacheDir = cacheDir or defaultCacheDirectory()
+        self.maxBytes = maxBytes
+        self.contentHash = contentHash
+        os.makedirs(self.cacheDir, exist_ok=True)
+
+    def key(self, filePath, category):
+        return cacheKey(filePath, category, self.contentHash)
+
+    def _entryPath(self, key):
+        return os.path.join(self.cacheDir, key + _ENTRY_SUFFIX)
+
+    def get(self, filePath, category, key=None):
+        """Kayitli sonuclari dondurur, yoksa None. Dosya hic acilmaz."""
+        entryPath = self._entryPath(key or self.key(filePath, category))
+        try:
+            with open(entryPath, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(entryPath)
+        except (OSError, ValueError):
+            return None
+        return entry["results"]
+
+    def put(self, filePath, category, results, key=None):
+        """Sonuclari kaydeder ve gerekirse en eski kayitlari siler."""
+        key = key or self.key(filePath, category)
+        entry = {"path": os.path.abspath(filePath), "category": category, "results": results}
+        fd, tempPath = tempfile.mkstemp(dir=self.cacheDir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tempPath, self._entryPath(key))
+        except Exception:
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+            raise
+        self.evict()
+        return key
+
+    def evict(self):
+        """Toplam boyut maxBytes altina inene kadar en az yeni kullanilanlari siler."""
+        entries = []
+        total = 0
+        for fileName in os.listdir(self.cacheDir):
+            if not fileName.endswith(_ENTRY_SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cacheDir, fileName))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, fileName))
+            total += stat.st_size
+
+        for _, size, fileName in sorted(entries):
+            if total <= self.maxBytes:
+                break
+            try:
+                os.remove(os.path.join(self.cacheDir, fileName))
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        for fileName in os.listdir(self.cacheDir):
+            if fileName.endswith(_ENTRY_SUFFIX):
+                os.remove(os.path.join(self.cacheDir, fileName))
@@ -0,0 +1,244 @@
+"""ResultTable icin toplu (sutun tabanli) ikili ve metin disa aktarim.
+
+Ikili bicimler sutunlari tek seferde yazar: pyarrow kuruluysa Arrow IPC
+(.arrow / .feather, kategori/isim/denek sozluk kodlu), degilse NumPy .npz.
+Kohortlar icin her denek ayri bir bolum (partition) dosyasi olarak bir klasore
+eklenebilir; readResultTable klasoru tek tablo olarak okur.
+
+Metin (CSV/TSV) ciktilari satir satir degil, bloklar halinde bicimlendirilip
+yazilir; metin sutunlari tekil tablo uzerinden bir kez hazirlanir.
+"""
+
+import itertools
+import os
+import tempfile
+import urllib.parse
+
+import numpy as np
+
+from .ResultTable import RESULT_COLUMNS, ResultTable
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+# Ikili bicim -> dosya uzantisi
+BINARY_EXTENSIONS = {"arrow": ".arrow", "npz": ".npz"}
+
+# Widget CSV/Excel/pano ciktisinin sutunlari ve sayi bicimleri
+TEXT_COLUMNS = ("category", "label_id", "name", "mm3", "ml")
+NUMBER_FORMATS = {"label_id": "%d", "mm3": "%.2f", "ml": "%.4f"}
+
+# Metin ciktisinda bir blokta bicimlendirilen satir sayisi
+TEXT_CHUNK_ROWS = 65536
+
+_FORMAT_VERSION = 1
+_CODE_COLUMNS = ("subject", "category", "name")
+_STRING_TABLES = {"subject": "subjects", "category": "categories", "name": "names"}
+
+
+def defaultBinaryFormat():
+    return "arrow" if pyarrow is not None else "npz"
+
+
+def binaryFormatForPath(filePath):
+    """Uzantidan ikili bicimi bulur (.arrow/.feather -> arrow, .npz -> npz), yoksa None."""
+    extension = os.path.splitext(filePath)[1].lower()
+    if extension in (".arrow", ".feather"):
+        return "arrow"
+    if extension == ".npz":
+        return "npz"
+    return None
+
+
+def _currentUmask():
+    """Surecin umask degeri; Linux'ta degistirmeden okunur (os.umask tum is parcaciklarini etkiler)."""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+def _atomicWrite(filePath, writer):
+    """writer(dosya) ile gecici dosyaya yazar, sonra hedefin yerine koyar.
+
+    mkstemp dosyayi 0600 ile olusturur; yerine konmadan once open() ile
+    yazilan dosyalar gibi 0666 & ~umask izni verilir.
+    """
+    directory = os.path.dirname(os.path.abspath(filePath))
+    fd, tempPath = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            writer(f)
+        os.chmod(tempPath, 0o666 & ~_currentUmask())
+        os.replace(tempPath, filePath)
+    except BaseException:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+        raise
+
+
+def writeResultTable(table, filePath, format=None):
+    """Tabloyu ikili olarak yazar; bicim verilmezse uzantidan (yoksa varsayilandan) secilir."""
+    format = format or binaryFormatForPath(filePath) or defaultBinaryFormat()
+    if format == "arrow":
+        if pyarrow is None:
+            raise ImportError("Arrow disa aktarimi icin pyarrow gerekli (pip install pyarrow)")
+        _atomicWrite(filePath, lambda f: _writeArrow(table, f))
+    elif format == "npz":
+        _atomicWrite(filePath, lambda f: _writeNpz(table, f))
+    else:
+        raise ValueError(f"Bilinmeyen ikili bicim: {format}")
+
+
+def _writeNpz(table, f):
+    arrays = {name: table.column(name) for name in RESULT_COLUMNS}
+    for tableName in _STRING_TABLES.values():
+        # 'U' tipi: okurken pickle gerekmez
+        arrays[tableName] = np.array(getattr(table, tableName).values, dtype=str)
+    arrays["formatVersion"] = np.array(_FORMAT_VERSION)
+    np.savez(f, **arrays)
+
+
+def _writeArrow(table, f):
+    columns = []
+    for name in RESULT_COLUMNS:
+        values = table.column(name)
+        if name in _CODE_COLUMNS:
+            dictionary = pyarrow.array(getattr(table, _STRING_TABLES[name]).values, type=pyarrow.string())
+            columns.append(pyarrow.DictionaryArray.from_arrays(pyarrow.array(values.astype(np.int32)), dictionary))
+        else:
+            columns.append(pyarrow.array(values))
+    arrowTable = pyarrow.Table.from_arrays(columns, names=list(RESULT_COLUMNS))
+    arrowTable = arrowTable.replace_schema_metadata({"volBrain.formatVersion": str(_FORMAT_VERSION)})
+    with pyarrow.ipc.new_file(f, arrowTable.schema) as writer:
+        writer.write_table(arrowTable)
+
+
+def readResultTable(path):
+    """Ikili tablo dosyasini veya bolum klasorunu (readPartitions) okur."""
+    if os.path.isdir(path):
+        return readPartitions(path)
+    format = binaryFormatForPath(path)
+    if format == "arrow":
+        return _readArrow(path)
+    if format == "npz":
+        return _readNpz(path)
+    raise ValueError(f"Bilinmeyen ikili tablo dosyasi: {path}")
+
+
+def _readNpz(filePath):
+    with np.load(filePath, allow_pickle=False) as data:
+        if int(data["formatVersion"]) > _FORMAT_VERSION:
+            raise ValueError(f"Desteklenmeyen tablo surumu: {filePath}")
+        columns = {name: data[name] for name in RESULT_COLUMNS}
+        strings = {tableName: data[tableName].tolist() for tableName in _STRING_TABLES.values()}
+    return ResultTable.fromColumns(columns, **strings)
+
+
+def _readArrow(filePath):
+    if pyarrow is None:
+        raise ImportError("Arrow dosyalarini okumak icin pyarrow gerekli (pip install pyarrow)")
+    with pyarrow.memory_map(filePath, 'r') as source:
+        arrowTable = pyarrow.ipc.open_file(source).read_all()
+    columns = {}
+    strings = {}
+    for name in RESULT_COLUMNS:
+        column = arrowTable.column(name).combine_chunks()
+        if name in _CODE_COLUMNS:
+            columns[name] = column.indices.to_numpy(zero_copy_only=False)
+            strings[_STRING_TABLES[name]] = column.dictionary.to_pylist()
+        else:
+            columns[name] = column.to_numpy(zero_copy_only=False)
+    return ResultTable.fromColumns(columns, **strings)
+
+
+def partitionPath(directory, partition, format=None):
+    """Bolum dosyasinin yolu; bolum adi (ornegin 'site1/sub01') dosya adina kodlanir."""
+    format = format or defaultBinaryFormat()
+    return os.path.join(directory, urllib.parse.quote(partition, safe='') + BINARY_EXTENSIONS[format])
+
+
+def appendPartition(directory, table, partition, format=None):
+    """Tabloyu klasore bir bolum olarak ekler; ayni adli bolum varsa yerine yazilir.
+
+    Yazma atomiktir: yarida kalan bir kohort calismasi yalnizca tamamlanmis
+    bolumleri birakir. Donus: bolum dosyasinin yolu.
+    """
+    os.makedirs(directory, exist_ok=True)
+    filePath = partitionPath(directory, partition, format)
+    writeResultTable(table, filePath, format)
+    return filePath
+
+
+def listPartitions(directory):
+    """Klasordeki bolumler: [(bolum adi, yol), ...] ada gore sirali."""
+    partitions = []
+    for fileName in os.listdir(directory):
+        if binaryFormatForPath(fileName):
+            stem = os.path.splitext(fileName)[0]
+            partitions.append((urllib.parse.unquote(stem), os.path.join(directory, fileName)))
+    return sorted(partitions)
+
+
+def readPartitions(directory, partitions=None):
+    """Bolum dosyalarini tek bir ResultTable olarak okur (istenirse yalnizca verilen bolumler)."""
+    table = ResultTable()
+    for partition, filePath in listPartitions(directory):
+        if partitions is None or partition in partitions:
+            table.extend(readResultTable(filePath))
+    return table
+
+
+def _quoteText(value, delimiter):
+    if delimiter in value or '"' in value or '\n' in value or '\r' in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def formatDelimited(table, delimiter=",", columns=TEXT_COLUMNS, header=None, order=None,
+                    chunkRows=TEXT_CHUNK_ROWS):
+    """Tabloyu ayrac ile ayrilmis metin bloklari olarak uretir (satir sonu '\\n').
+
+    Her blok tek bir % bicimlendirmesiyle olusturulur (satir basina f-string
+    yok); metin sutunlari tekil degerler uzerinden bir kez (gerekirse
+    tirnaklanarak) hazirlanir. order verilmezse table.sortOrder() kullanilir.
+    """
+    if header:
+        yield delimiter.join(header) + "\n"
+    if order is None:
+        order = table.sortOrder()
+    lookups = {}
+    formats = []
+    for name in columns:
+        tableName = _STRING_TABLES.get(name)
+        if tableName:
+            values = [_quoteText(v, delimiter) for v in getattr(table, tableName).values]
+            lookups[name] = np.array(values, dtype=object)
+            formats.append("%s")
+        else:
+            formats.append(NUMBER_FORMATS.get(name, "%s"))
+    rowFormat = delimiter.replace('%', '%%').join(formats) + "\n"
+    for start in range(0, len(order), chunkRows):
+        rows = order[start:start + chunkRows]
+        values = []
+        for name in columns:
+            column = table.column(name)[rows]
+            values.append((lookups[name][column] if name in lookups else column).tolist())
+        yield (rowFormat * len(rows)) % tuple(itertools.chain.from_iterable(zip(*values)))
+
+
+def writeDelimited(filePath, table, delimiter=",", columns=TEXT_COLUMNS, header=None, encoding='utf-8',
+                   order=None):
+    """formatDelimited ciktisini tamponlu olarak dosyaya yazar; satir sonlari platformunkidir (os.linesep)."""
+    with open(filePath, 'w', encoding=encoding, buffering=1 << 20) as f:
+        for chunk in formatDelimited(table, delimiter, columns, header, order):
+            f.write(chunk)
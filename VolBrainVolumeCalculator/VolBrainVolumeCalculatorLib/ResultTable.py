@@ -0,0 +1,374 @@
+"""Hacim sonuclari icin sutun tabanli (columnar) tablo.
+
+Her satir bir (denek, kategori, etiket) hacmidir. Sayisal sutunlar tipli NumPy
+dizilerinde, kategori/isim/denek metinleri ise tekil (interned) tablolarda
+tutulur; satir basina Python sozlugu olusturulmaz. Siralama ve kategori
+ozetleri vektorel yapilir.
+"""
+
+import numpy as np
+
+# Tablonun sutunlari (uzun bicimli tablo ile ayni sira)
+RESULT_COLUMNS = ("subject", "category", "label_id", "name", "mm3", "ml")
+
+_INITIAL_CAPACITY = 256
+
+
+class StringTable:
+    """Metinleri bir kez saklar ve her birine kalici bir tam sayi kodu verir."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def intern(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def internAll(self, values):
+        return np.fromiter((self.intern(v) for v in values), dtype=np.int32)
+
+    def code(self, value):
+        """Metnin kodu; tabloda yoksa -1."""
+        return self._codes.get(value, -1)
+
+    def decode(self, codes):
+        return [self.values[c] for c in np.asarray(codes).tolist()]
+
+    def sortRanks(self):
+        """kod -> alfabetik sira dizisi (kodlari metin sirasinda siralamak icin)."""
+        ranks = np.empty(len(self.values), dtype=np.int32)
+        ranks[sorted(range(len(self.values)), key=self.values.__getitem__)] = np.arange(len(self.values))
+        return ranks
+
+
+class ResultTable:
+    """Denek/kategori/etiket hacimlerinin sutun tabanli tablosu.
+
+    append ile satirlar toplu eklenir (kapasite iki katina cikarak buyur).
+    Hesaplama sonuclarinin sozluk bicimi (buildVolumeResults) appendResults ile
+    eklenir, toResults ile geri uretilir.
+    """
+
+    def __init__(self):
+        self.subjects = StringTable()
+        self.categories = StringTable()
+        self.names = StringTable()
+        self._size = 0
+        self._columns = {
+            "subject": np.empty(_INITIAL_CAPACITY, dtype=np.int32),
+            "category": np.empty(_INITIAL_CAPACITY, dtype=np.uint8),
+            # uint32 etiket haritalarinin kimlikleri int32 sinirini asabilir
+            "label_id": np.empty(_INITIAL_CAPACITY, dtype=np.int64),
+            "name": np.empty(_INITIAL_CAPACITY, dtype=np.int32),
+            "mm3": np.empty(_INITIAL_CAPACITY, dtype=np.float64),
+            "ml": np.empty(_INITIAL_CAPACITY, dtype=np.float64),
+        }
+
+    @classmethod
+    def fromResults(cls, results, subject=""):
+        table = cls()
+        table.appendResults(results, subject)
+        return table
+
+    @classmethod
+    def fromColumns(cls, columns, subjects, categories, names):
+        """Kod sutunlari ve metin tablolarindan tablo olusturur (ikili dosya okuma icin).
+
+        columns: RESULT_COLUMNS anahtarli diziler; subject/category/name
+        sutunlari verilen metin listelerine indekstir.
+        """
+        table = cls()
+        for stringTable, values in ((table.subjects, subjects), (table.categories, categories), (table.names, names)):
+            for value in values:
+                stringTable.intern(value)
+            if len(stringTable) != len(values):
+                raise ValueError("Metin tablosunda tekrarlanan deger var")
+        table._appendCodes(columns)
+        return table
+
+    @classmethod
+    def fromRows(cls, rows):
+        """Uzun bicimli satir sozluklerinden (CohortBatch) tablo olusturur."""
+        table = cls()
+        rows = list(rows)
+        if rows:
+            table.append(**{column: [row.get(column, "") for row in rows] for column in RESULT_COLUMNS})
+        return table
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    @property
+    def nbytes(self):
+        """Sayisal sutunlarin kapladigi bayt (metin tablolari haric)."""
+        return sum(column[:self._size].nbytes for column in self._columns.values())
+
+    def column(self, name):
+        """Sutunun salt okunur goruntusu (kod sutunlari icin tam sayi kodlari)."""
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def _reserve(self, count):
+        required = self._size + count
+        capacity = len(self._columns["mm3"])
+        if required <= capacity:
+            return
+        while capacity < required:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def append(self, category, label_id, name, mm3, ml=None, subject=""):
+        """Satirlari toplu ekler; category/name/subject tek metin veya metin listesi olabilir."""
+        labelIds = np.asarray(label_id, dtype=np.int64).reshape(-1)
+        count = labelIds.size
+        mm3 = np.broadcast_to(np.asarray(mm3, dtype=np.float64), (count,))
+        ml = mm3 / 1000.0 if ml is None else np.broadcast_to(np.asarray(ml, dtype=np.float64), (count,))
+        codes = {}
+        for columnName, values, table in (("category", category, self.categories),
+                                          ("name", name, self.names),
+                                          ("subject", subject, self.subjects)):
+            if isinstance(values, str):
+                codes[columnName] = np.full(count, table.intern(values), dtype=np.int32)
+            else:
+                codes[columnName] = table.internAll(values)
+                if codes[columnName].size != count:
+                    raise ValueError(f"{columnName} sutunu {count} satir olmali")
+        codes.update(label_id=labelIds, mm3=mm3, ml=ml)
+        self._appendCodes(codes)
+
+    def _appendCodes(self, columns):
+        """Bu tablonun kodlariyla verilmis sutunlari ekler."""
+        if len(self.categories) > np.iinfo(np.uint8).max + 1:
+            raise ValueError("En fazla 256 kategori desteklenir")
+        count = len(columns["label_id"])
+        self._reserve(count)
+        rows = slice(self._size, self._size + count)
+        for name in RESULT_COLUMNS:
+            self._columns[name][rows] = columns[name]
+        self._size += count
+
+    def appendResults(self, results, subject=""):
+        """buildVolumeResults bicimindeki sozlugun satirlarini ekler."""
+        values = list(results.values())
+        if not values:
+            return
+        self.append([data['category'] for data in values], [data['label_id'] for data in values],
+                    [data['name'] for data in values], [data['mm3'] for data in values],
+                    [data['ml'] for data in values], subject)
+
+    def extend(self, other):
+        """Baska bir ResultTable'in satirlarini ekler (kodlar bu tabloya cevrilir).
+
+        Metinler satir basina degil, metin tablosu basina bir kez cevrilir.
+        """
+        if not other:
+            return
+        columns = {name: other.column(name) for name in RESULT_COLUMNS}
+        for name in ("subject", "category", "name"):
+            remap = self._stringTable(name).internAll(other._stringTable(name).values)
+            columns[name] = remap[columns[name]] if remap.size else columns[name]
+        self._appendCodes(columns)
+
+    def replaceCategory(self, category, results, subject=""):
+        """Kategorinin (ve denegin) satirlarini buildVolumeResults sozluguyle degistirir.
+
+        Etiketler degismediyse hacimler yerinde guncellenir (satir indeksleri
+        korunur) ve False doner; satir eklenip cikarildiysa True.
+        """
+        rows = self.select(category, subject)
+        values = sorted(results.values(), key=lambda data: data['label_id'])
+        labelIds = np.array([data['label_id'] for data in values], dtype=np.int64)
+        if rows.size == labelIds.size:
+            rows = rows[np.argsort(self._columns["label_id"][rows], kind='stable')]
+            if np.array_equal(self._columns["label_id"][rows], labelIds):
+                self._columns["mm3"][rows] = [data['mm3'] for data in values]
+                self._columns["ml"][rows] = [data['ml'] for data in values]
+                return False
+        if rows.size:
+            self._removeRows(rows)
+        if values:
+            self.append([data['category'] for data in values], labelIds, [data['name'] for data in values],
+                        [data['mm3'] for data in values], [data['ml'] for data in values], subject)
+        return True
+
+    def _removeRows(self, rows):
+        keep = np.ones(self._size, dtype=bool)
+        keep[rows] = False
+        size = int(np.count_nonzero(keep))
+        for column in self._columns.values():
+            column[:size] = column[:self._size][keep]
+        self._size = size
+
+    def clear(self):
+        self._size = 0
+
+    def sortOrder(self, keys=("subject", "category", "label_id")):
+        """Satirlari verilen sutunlara gore (ilk anahtar en onemli) siralayan indeksler.
+
+        Metin sutunlari kod sirasina degil alfabetik siraya gore siralanir.
+        """
+        sortKeys = []
+        for key in keys:
+            values = self.column(key)
+            table = self._stringTable(key)
+            if table is not None:
+                values = table.sortRanks()[values]
+            sortKeys.append(values)
+        if not sortKeys or self._size == 0:
+            return np.arange(self._size)
+        # lexsort son anahtari birincil kabul eder
+        return np.lexsort(sortKeys[::-1])
+
+    def _stringTable(self, column):
+        return {"subject": self.subjects, "category": self.categories, "name": self.names}.get(column)
+
+    def rows(self, order=None):
+        """(denek, kategori, etiket, isim, mm3, ml) demetleri uretir; varsayilan sira sortOrder()."""
+        if order is None:
+            order = self.sortOrder()
+        subjects = self.subjects.values
+        categories = self.categories.values
+        names = self.names.values
+        columns = [self._columns[name][:self._size][order].tolist() for name in RESULT_COLUMNS]
+        for subject, category, labelId, name, mm3, ml in zip(*columns):
+            yield subjects[subject], categories[category], labelId, names[name], mm3, ml
+
+    def summarizeByCategory(self):
+        """Kategori basina (kategori, satir sayisi, toplam mm3, toplam ml), kategori adina gore sirali."""
+        categoryCodes = self.column("category")
+        size = len(self.categories)
+        counts = np.bincount(categoryCodes, minlength=size)
+        totalMm3 = np.bincount(categoryCodes, weights=self.column("mm3"), minlength=size)
+        totalMl = np.bincount(categoryCodes, weights=self.column("ml"), minlength=size)
+        return [(self.categories.values[code], int(counts[code]), float(totalMm3[code]), float(totalMl[code]))
+                for code in np.argsort(self.categories.sortRanks()) if counts[code]]
+
+    def select(self, category=None, subject=None):
+        """Filtreye uyan satirlarin indeksleri (kategori/denek adina gore)."""
+        mask = np.ones(self._size, dtype=bool)
+        for column, value in (("category", category), ("subject", subject)):
+            if value is not None:
+                mask &= self.column(column) == self._stringTable(column).code(value)
+        return np.flatnonzero(mask)
+
+    def toResults(self, indices=None):
+        """Satirlari buildVolumeResults bicimine ("kategori_etiket_isim" -> sozluk) cevirir."""
+        results = {}
+        order = np.arange(self._size) if indices is None else indices
+        for _, category, labelId, name, mm3, ml in self.rows(order):
+            results[f"{category}_{labelId}_{name}"] = {
+                "category": category,
+                "label_id": labelId,
+                "name": name,
+                "mm3": mm3,
+                "ml": ml
+            }
+        return results
+
+
+class ResultTableView:
+    """Bir ResultTable uzerinde filtrelenmis ve siralanmis satir gorunumu.
+
+    Satirlar kopyalanmaz: gorunum yalnizca tablo satir indekslerini tutar.
+    Filtre ve siralama vektorel hesaplanir; hucre metinleri yalnizca
+    istendiginde (ekranda gorunen satirlar icin) bicimlendirilir. Qt
+    modeli (QAbstractTableModel) bu sinifi sarar.
+    """
+
+    COLUMNS = ("category", "label_id", "name", "mm3", "ml")
+    NUMBER_FORMATS = {"mm3": "{:.2f}", "ml": "{:.4f}"}
+
+    def __init__(self, table=None, columns=COLUMNS):
+        self.columns = tuple(columns)
+        self.category = None
+        self.nameContains = ""
+        self.volumeRange = (None, None)
+        self.sortColumn = None
+        self.descending = False
+        self.setTable(table if table is not None else ResultTable())
+
+    def setTable(self, table):
+        self.table = table
+        self.refresh()
+
+    def setFilter(self, category=None, nameContains="", volumeRange=(None, None)):
+        """Kategori (tam eslesme), isim alt dizgisi (buyuk/kucuk harf duyarsiz) ve ml araligi."""
+        self.category = category or None
+        self.nameContains = nameContains or ""
+        self.volumeRange = volumeRange
+        self.refresh()
+
+    def sort(self, column, descending=False):
+        """column: self.columns icindeki sira; None varsayilan siraya doner."""
+        self.sortColumn = column
+        self.descending = descending
+        self.refresh()
+
+    def refresh(self):
+        table = self.table
+        rows = table.sortOrder()
+        mask = np.ones(len(table), dtype=bool)
+        if self.category is not None:
+            mask &= table.column("category") == table.categories.code(self.category)
+        if self.nameContains:
+            needle = self.nameContains.lower()
+            # Tekil isimler uzerinde bir kez aranir, sonra satirlara yayilir
+            nameMask = np.array([needle in name.lower() for name in table.names.values], dtype=bool)
+            mask &= nameMask[table.column("name")] if nameMask.size else False
+        low, high = self.volumeRange
+        if low is not None:
+            mask &= table.column("ml") >= low
+        if high is not None:
+            mask &= table.column("ml") <= high
+        rows = rows[mask[rows]]
+
+        if self.sortColumn is not None and rows.size:
+            name = self.columns[self.sortColumn]
+            keys = table.column(name)[rows]
+            stringTable = table._stringTable(name)
+            if stringTable is not None:
+                keys = stringTable.sortRanks()[keys]
+            if self.descending:
+                keys = -keys.astype(np.float64)
+            # Esit anahtarlarda varsayilan sira korunur (kararli siralama)
+            rows = rows[np.argsort(keys, kind='stable')]
+        self._rows = rows
+
+    def rowCount(self):
+        return len(self._rows)
+
+    def rowIndex(self, row):
+        """Gorunumdeki satirin tablodaki indeksi."""
+        return int(self._rows[row])
+
+    def rowIndices(self):
+        return self._rows
+
+    def value(self, row, column):
+        name = self.columns[column]
+        value = self.table.column(name)[self._rows[row]]
+        stringTable = self.table._stringTable(name)
+        return stringTable.values[value] if stringTable is not None else value.item()
+
+    def displayText(self, row, column):
+        name = self.columns[column]
+        value = self.value(row, column)
+        if name == "category":
+            return value.upper()
+        if name in self.NUMBER_FORMATS:
+            return self.NUMBER_FORMATS[name].format(value)
+        return str(value)
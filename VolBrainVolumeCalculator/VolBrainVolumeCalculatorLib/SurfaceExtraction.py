@@ -0,0 +1,223 @@
+"""Etiket haritalarindan kapali yuzey (poligon) cikarimi. VTK gerektirir."""
+
+import numpy as np
+import vtk
+import vtk.util.numpy_support
+
+# Segment uzerinde kaynak etiket degerini tutan etiket (tag) adi
+LABEL_VALUE_TAG = "volBrain.LabelValue"
+
+# Tek geciste cok etiketli yuzey cikarimi (vtkSurfaceNets3D, VTK 9.3+) kullanilabilir mi
+MULTI_LABEL_SURFACES = hasattr(vtk, 'vtkSurfaceNets3D')
+
+
+def _numpyToVTKMatrix(matrix):
+    vtkMatrix = vtk.vtkMatrix4x4()
+    for row in range(4):
+        for column in range(4):
+            vtkMatrix.SetElement(row, column, float(matrix[row][column]))
+    return vtkMatrix
+
+
+def extractLabelSurface(imageData, labelValue, ijkToRAS, smoothingIterations=15, passBand=0.1, decimation=0.0):
+    """Tek bir etiket icin RAS koordinatlarinda kapali yuzey olusturur.
+
+    imageData: IJK uzayinda (orijin 0, aralik 1) etiket goruntusu
+    ijkToRAS: 4x4 matris (vtkMatrix4x4 veya ic ice liste/numpy)
+    decimation: yumusatmadan once atilacak ucgen orani (0-1, bkz. MeshCache.SURFACE_PRESETS)
+    """
+    flyingEdges = vtk.vtkDiscreteFlyingEdges3D()
+    flyingEdges.SetInputData(imageData)
+    flyingEdges.SetValue(0, labelValue)
+    flyingEdges.ComputeGradientsOff()
+    flyingEdges.ComputeNormalsOff()
+    flyingEdges.ComputeScalarsOff()
+    return _finishSurface(flyingEdges.GetOutputPort(), ijkToRAS, smoothingIterations, passBand, decimation)
+
+
+def _finishSurface(surface, ijkToRAS, smoothingIterations, passBand, decimation):
+    """Ham yuzeyi seyreltir, yumusatir, RAS'a tasir ve normallerini hesaplar."""
+    if decimation > 0:
+        decimator = vtk.vtkDecimatePro()
+        decimator.SetInputConnection(surface)
+        decimator.SetTargetReduction(decimation)
+        decimator.PreserveTopologyOn()
+        decimator.SplittingOff()
+        decimator.BoundaryVertexDeletionOff()
+        decimator.SetMaximumError(1)
+        surface = decimator.GetOutputPort()
+
+    if smoothingIterations > 0:
+        smoother = vtk.vtkWindowedSincPolyDataFilter()
+        smoother.SetInputConnection(surface)
+        smoother.SetNumberOfIterations(smoothingIterations)
+        smoother.SetPassBand(passBand)
+        smoother.BoundarySmoothingOff()
+        smoother.FeatureEdgeSmoothingOff()
+        smoother.NonManifoldSmoothingOn()
+        smoother.NormalizeCoordinatesOn()
+        surface = smoother.GetOutputPort()
+
+    if not isinstance(ijkToRAS, vtk.vtkMatrix4x4):
+        ijkToRAS = _numpyToVTKMatrix(ijkToRAS)
+    transform = vtk.vtkTransform()
+    transform.SetMatrix(ijkToRAS)
+    transformFilter = vtk.vtkTransformPolyDataFilter()
+    transformFilter.SetInputConnection(surface)
+    transformFilter.SetTransform(transform)
+
+    normals = vtk.vtkPolyDataNormals()
+    normals.SetInputConnection(transformFilter.GetOutputPort())
+    normals.ConsistencyOn()
+    normals.AutoOrientNormalsOn()
+    normals.SplittingOff()
+    normals.Update()
+
+    polyData = vtk.vtkPolyData()
+    polyData.DeepCopy(normals.GetOutput())
+    return polyData
+
+
+def extractLabelSurfaceArrays(labelArray, labelValues, ijkToRAS, smoothingIterations=15, passBand=0.1,
+                              decimation=0.0):
+    """Tum etiketlerin yuzeylerini etiket haritasinin tek gecisinde cikarir.
+
+    vtkSurfaceNets3D tum etiketlerin sinirlarini tek taramada (komsu etiketler
+    ortak noktalarla) uretir ve kisitli yumusatmayi (smoothingIterations) bir
+    kez uygular; passBand yalnizca etiket basina yolda kullanilir. Cikan yuzey
+    ucgenlerin iki yanindaki etiketlere gore bolunur; seyreltme, RAS donusumu ve
+    normaller etiket basina extractLabelSurface ile aynidir.
+    labelArray: (k, j, i) etiket dizisi (slicer.util.arrayFromVolume bicimi)
+    Donus: {etiket: polyDataToArrays bicimli diziler}; haritada olmayan
+    etiketler bos yuzey alir.
+    """
+    if not MULTI_LABEL_SURFACES:
+        raise RuntimeError("Tek geciste yuzey cikarimi icin vtkSurfaceNets3D (VTK 9.3+) gerekli")
+    labelValues = [int(labelValue) for labelValue in labelValues]
+    if not labelValues:
+        return {}
+    # Hacim kenarindaki yuzeyler de kapansin diye bir voksel bosluk
+    padded = np.pad(labelArray, 1)
+    imageData = vtk.vtkImageData()
+    imageData.SetDimensions(padded.shape[2], padded.shape[1], padded.shape[0])
+    imageData.GetPointData().SetScalars(vtk.util.numpy_support.numpy_to_vtk(padded.reshape(-1), deep=False))
+
+    surfaceNets = vtk.vtkSurfaceNets3D()
+    surfaceNets.SetInputData(imageData)
+    surfaceNets.SetBackgroundLabel(0)
+    surfaceNets.SetNumberOfLabels(len(labelValues))
+    for index, labelValue in enumerate(labelValues):
+        surfaceNets.SetLabel(index, labelValue)
+    surfaceNets.SetOutputMeshTypeToTriangles()
+    if smoothingIterations > 0:
+        surfaceNets.SmoothingOn()
+        surfaceNets.SetNumberOfIterations(smoothingIterations)
+    else:
+        surfaceNets.SmoothingOff()
+    surfaceNets.Update()
+    rawSurfaces = splitSurfaceByLabel(surfaceNets.GetOutput(), labelValues)
+    del padded, imageData, surfaceNets
+
+    if isinstance(ijkToRAS, vtk.vtkMatrix4x4):
+        ijkToRAS = [[ijkToRAS.GetElement(row, column) for column in range(4)] for row in range(4)]
+    padToIJK = np.eye(4)
+    padToIJK[:3, 3] = -1.0
+    padToRAS = np.dot(np.asarray(ijkToRAS, dtype=np.float64), padToIJK)
+    surfaces = {}
+    for labelValue, rawSurface in rawSurfaces.items():
+        if rawSurface.GetNumberOfPolys() == 0:
+            surfaces[labelValue] = polyDataToArrays(vtk.vtkPolyData())
+            continue
+        producer = vtk.vtkTrivialProducer()
+        producer.SetOutput(rawSurface)
+        surfaces[labelValue] = polyDataToArrays(_finishSurface(producer.GetOutputPort(), padToRAS, 0, passBand,
+                                                               decimation))
+    return surfaces
+
+
+def splitSurfaceByLabel(polyData, labelValues):
+    """vtkSurfaceNets3D ciktisini etiket basina ayri vtkPolyData'lara boler.
+
+    Her ucgen BoundaryLabels dizisindeki iki etiketin ortak sinirindadir; ikisinin
+    yuzeyine de girer, ikinci etiket icin yonu cevrilir.
+    """
+    pieces = {labelValue: vtk.vtkPolyData() for labelValue in labelValues}
+    boundaryLabels = polyData.GetCellData().GetArray("BoundaryLabels")
+    if boundaryLabels is None or polyData.GetNumberOfPolys() == 0:
+        return pieces
+    coordinates = vtk.util.numpy_support.vtk_to_numpy(polyData.GetPoints().GetData())
+    triangles = vtk.util.numpy_support.vtk_to_numpy(polyData.GetPolys().GetConnectivityArray()).reshape(-1, 3)
+    boundaryLabels = vtk.util.numpy_support.vtk_to_numpy(boundaryLabels)
+
+    # (etiket, ucgen) ciftleri tek siralamayla etiketlere gruplanir
+    faceLabels = np.concatenate([boundaryLabels[:, 0], boundaryLabels[:, 1]])
+    faces = np.concatenate([triangles, triangles[:, ::-1]])
+    order = np.argsort(faceLabels, kind='stable')
+    sortedLabels = faceLabels[order]
+    for labelValue in labelValues:
+        start, stop = np.searchsorted(sortedLabels, [labelValue, labelValue + 1], side='left')
+        if start == stop:
+            continue
+        used, inverse = np.unique(faces[order[start:stop]], return_inverse=True)
+        pieces[labelValue] = arraysToPolyData({
+            "points": coordinates[used],
+            "offsets": np.arange(0, 3 * (stop - start) + 1, 3),
+            "connectivity": inverse.reshape(-1),
+        })
+    return pieces
+
+
+def croppedLabelImage(labelArray, region, labelValue):
+    """Etiketin sinir kutusundan ikili (0/1) bir alt goruntu olusturur.
+
+    Yuzeyin hacim kenarinda da kapanmasi icin her yone bir voksel bosluk
+    eklenir. Donus: (vtkImageData, kirpmaIJKToIJK 4x4 numpy matrisi)
+    """
+    slices = region.slices()
+    crop = np.pad(labelArray[slices] == labelValue, 1).astype(np.uint8)
+    imageData = vtk.vtkImageData()
+    imageData.SetDimensions(crop.shape[2], crop.shape[1], crop.shape[0])
+    scalars = vtk.util.numpy_support.numpy_to_vtk(crop.reshape(-1), deep=True, array_type=vtk.VTK_UNSIGNED_CHAR)
+    imageData.GetPointData().SetScalars(scalars)
+
+    cropToIJK = np.eye(4)
+    cropToIJK[:3, 3] = [slices[2].start - 1, slices[1].start - 1, slices[0].start - 1]
+    return imageData, cropToIJK
+
+
+def polyDataToArrays(polyData):
+    """Yuzeyin noktalari, poligonlari ve (varsa) normalleri; MeshCache'te saklanmak icin."""
+    points = polyData.GetPoints()
+    polys = polyData.GetPolys()
+    arrays = {
+        "points": (vtk.util.numpy_support.vtk_to_numpy(points.GetData()).astype(np.float32)
+                   if points is not None else np.zeros((0, 3), np.float32)),
+        "offsets": vtk.util.numpy_support.vtk_to_numpy(polys.GetOffsetsArray()).astype(np.int64),
+        "connectivity": vtk.util.numpy_support.vtk_to_numpy(polys.GetConnectivityArray()).astype(np.int64),
+    }
+    normals = polyData.GetPointData().GetNormals()
+    if normals is not None:
+        arrays["normals"] = vtk.util.numpy_support.vtk_to_numpy(normals).astype(np.float32)
+    return arrays
+
+
+def _idTypeArray(values):
+    return vtk.util.numpy_support.numpy_to_vtk(np.ascontiguousarray(values), deep=True, array_type=vtk.VTK_ID_TYPE)
+
+
+def arraysToPolyData(arrays):
+    """polyDataToArrays ciktisindan vtkPolyData olusturur (diziler kopyalanir)."""
+    polyData = vtk.vtkPolyData()
+    if len(arrays["points"]) == 0:
+        return polyData
+    points = vtk.vtkPoints()
+    points.SetData(vtk.util.numpy_support.numpy_to_vtk(np.ascontiguousarray(arrays["points"]), deep=True))
+    polyData.SetPoints(points)
+    polys = vtk.vtkCellArray()
+    polys.SetData(_idTypeArray(arrays["offsets"]), _idTypeArray(arrays["connectivity"]))
+    polyData.SetPolys(polys)
+    if "normals" in arrays:
+        normals = vtk.util.numpy_support.numpy_to_vtk(np.ascontiguousarray(arrays["normals"]), deep=True)
+        normals.SetName("Normals")
+        polyData.GetPointData().SetNormals(normals)
+    return polyData
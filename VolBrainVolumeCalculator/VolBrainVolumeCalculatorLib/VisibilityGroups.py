@@ -0,0 +1,60 @@
+"""Etiket isimlerinden turetilen adlandirilmis gorunurluk gruplari.
+
+Gruplar (frontal, ventrikuller, sol hemisfer, ...) etiket semasindaki
+isimlere uygulanan duzenli ifadelerle belirlenir; boylece tum volBrain
+kategorileri ve kullanici atlaslari (benzer isimlendirmeyle) ayni kurallari
+kullanir. Bir etiket birden fazla gruba girebilir (ornegin hem "left" hem
+"frontal"); hicbir kurala uymayan etiket gruplara girmez.
+"""
+
+import re
+
+# Grup adi -> isim deseni (buyuk/kucuk harf duyarsiz, isim icinde aranir).
+# Sira arayuzdeki siradir.
+VISIBILITY_GROUPS = {
+    "left": r"^(left|l)_",
+    "right": r"^(right|r)_",
+    "frontal": r"frontal|orbital|gyrus_rectus|precentral|supplementary_motor|subcallosal",
+    "temporal": r"temporal|entorhinal|parahippocampal|planum_|(^|_)fusiform_gyrus",
+    "parietal": r"parietal|postcentral|supramarginal|angular_gyrus|precuneus",
+    "occipital": r"occipital|calcarine|(^|_)cuneus|lingual",
+    "limbic": r"cingulate|limbic",
+    "insula": r"insula",
+    "subcortical": r"accumbens|amygdala|caudate|hippocampus|pallidum|putamen|thalamus|ventral_dc|basal_forebrain",
+    "ventricles": r"ventricle|lat_vent|^csf$",
+    "whiteMatter": r"white_matter|_wm$",
+    "cerebellum": r"cerebell|lobules|vermal",
+    "brainstem": r"brainstem",
+}
+
+_compiledPatterns = {}
+
+
+def _pattern(expression):
+    pattern = _compiledPatterns.get(expression)
+    if pattern is None:
+        pattern = _compiledPatterns[expression] = re.compile(expression, re.IGNORECASE)
+    return pattern
+
+
+def labelGroups(names, groups=None):
+    """Isimlerden gorunurluk gruplari.
+
+    names: {anahtar: isim} (etiket numarasi veya segment ID'si)
+    groups: {grup adi: desen}; verilmezse VISIBILITY_GROUPS
+    Donus: {grup adi: [anahtarlar]}, groups sirasinda; bos gruplar yer almaz.
+    """
+    groups = VISIBILITY_GROUPS if groups is None else groups
+    result = {}
+    for groupName, expression in groups.items():
+        pattern = _pattern(expression)
+        members = [key for key, name in names.items() if pattern.search(name)]
+        if members:
+            result[groupName] = members
+    return result
+
+
+def schemaGroups(schema, labelIds):
+    """Derlenmis semadan (bkz. LabelRegistry.CompiledLabelSchema) etiketlerin gruplari."""
+    labelIds = [int(labelId) for labelId in labelIds]
+    return labelGroups(dict(zip(labelIds, schema.labelNames(labelIds))))
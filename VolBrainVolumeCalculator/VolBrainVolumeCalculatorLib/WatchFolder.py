@@ -0,0 +1,329 @@
+"""Gelen volBrain sonuc klasorlerini izleyen basliksiz (headless) isleme.
+
+Kok dizin belirli araliklarla taranir; beklenen tum kategorileri iceren ve
+dosyalari bir suredir degismemis (kopyalanmasi bitmis) denek klasorleri
+sinirli bir surec havuzunda hesaplanir. Sonuclar kalici bir depoya eklenir:
+her denek bir bolum dosyasidir (bkz. ResultExport) ve islenen klasorler
+icerik parmak izleriyle bir kayit dosyasina yazilir. Ayni icerik (baska bir
+klasore kopyalanmis olsa da) bir daha hesaplanmaz. Kayit dosyalarin boyut ve
+degisiklik zamanini da tutar; yeniden baslatmada yalnizca bunlari degisen
+klasorler yeniden hash'lenir. Tum kategorileri hata veren klasorler islenmis
+sayilmaz: dosyalari degisince veya izleyici yeniden baslatilinca yeniden denenir.
+
+    python -m VolBrainVolumeCalculatorLib.WatchFolder /paylasim/gelen /paylasim/sonuclar
+"""
+
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from . import LabelSchema
+from .CohortBatch import _processPool, computeSubjectVolumes, findSubjectFolders
+from .NiftiLabelReader import DEFAULT_MEMORY_BUDGET
+from .ResultCache import fileFingerprint
+from .ResultExport import appendPartition, readPartitions
+from .ResultTable import ResultTable
+
+# Taramalar arasindaki bekleme (saniye)
+DEFAULT_POLL_INTERVAL = 10.0
+
+# Klasordeki en yeni dosya bu kadar saniyedir degismemisse yazimi bitmis sayilir
+DEFAULT_SETTLE_SECONDS = 30.0
+
+DEFAULT_WORKERS = 2
+
+_MANIFEST_NAME = "processed.jsonl"
+_PARTITIONS_DIR = "partitions"
+
+
+def statSignature(files):
+    """{kategori: yol} dosyalarinin (kategori, mutlak yol, boyut, mtime_ns) imzasi; hash'lemeden degisikligi yakalar."""
+    signature = []
+    for category, filePath in sorted(files.items()):
+        stat = os.stat(filePath)
+        signature.append((category, os.path.abspath(filePath), stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def folderFingerprint(files):
+    """{kategori: yol} dosyalarinin iceriginden (SHA-256) klasor parmak izi; yol ve zamandan bagimsiz."""
+    digest = hashlib.sha256()
+    for category, filePath in sorted(files.items()):
+        digest.update(category.encode('utf-8'))
+        digest.update(fileFingerprint(filePath, contentHash=True)["sha256"].encode('ascii'))
+    return digest.hexdigest()
+
+
+def _signatureKey(signature):
+    # JSON'dan okunan listeler ile statSignature demetleri ayni anahtari vermeli
+    return tuple(tuple(item) for item in signature)
+
+
+class ProcessedStore:
+    """Izleme sonuclarinin kalici deposu.
+
+    storeDir/partitions altinda denek basina bir bolum dosyasi, storeDir/
+    processed.jsonl icinde islenen her klasor icin bir satir (denek, parmak izi,
+    dosya imzasi, zaman, hatalar) tutulur. Kayit satir satir eklenir; yarida
+    kesilen bir calisma yalnizca tamamlanmis klasorleri kaydetmis olur.
+
+    Daha once islenmis icerigin kopyalari "duplicate", hic satir uretmeden
+    yalnizca hata veren klasorler "failed" olarak yazilir; ikincisi islenmis
+    sayilmaz.
+    """
+
+    def __init__(self, storeDir, format=None):
+        self.storeDir = storeDir
+        self.format = format
+        self.partitionDir = os.path.join(storeDir, _PARTITIONS_DIR)
+        self.manifestPath = os.path.join(storeDir, _MANIFEST_NAME)
+        self._entries = {}
+        # Dosya imzasi -> parmak izi (imzasi degismeyen klasor yeniden hash'lenmez)
+        self._signatures = {}
+        self._lock = threading.Lock()
+        os.makedirs(storeDir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.manifestPath):
+            return
+        with open(self.manifestPath, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Yarim yazilmis son satir
+                    continue
+                if entry.get("failed"):
+                    continue
+                if entry.get("signature"):
+                    self._signatures[_signatureKey(entry["signature"])] = entry["fingerprint"]
+                if not entry.get("duplicate"):
+                    self._entries[entry["fingerprint"]] = entry
+
+    def isProcessed(self, fingerprint):
+        return fingerprint in self._entries
+
+    def knownFingerprint(self, signature):
+        """Ayni dosya imzasiyla kaydedilmis klasorun parmak izi, yoksa None."""
+        return self._signatures.get(_signatureKey(signature))
+
+    def entries(self):
+        """Kayitli klasorler, islenme sirasiyla."""
+        return list(self._entries.values())
+
+    def record(self, subjectId, fingerprint, rows, errors, signature=None):
+        """Denegin satirlarini bolum olarak yazar, sonra klasoru kayda ekler.
+
+        Hic satir yoksa ve hata varsa girdi "failed" olarak yazilir ve klasor
+        islenmis sayilmaz.
+        """
+        with self._lock:
+            if rows:
+                appendPartition(self.partitionDir, ResultTable.fromRows(rows), subjectId, self.format)
+            entry = {"subject": subjectId, "fingerprint": fingerprint, "signature": signature, "time": time.time(),
+                     "rows": len(rows), "errors": [list(error) for error in errors]}
+            if errors and not rows:
+                entry["failed"] = True
+            self._append(entry)
+            if not entry.get("failed"):
+                self._entries[fingerprint] = entry
+                if signature:
+                    self._signatures[_signatureKey(signature)] = fingerprint
+        return entry
+
+    def recordDuplicate(self, subjectId, fingerprint, signature):
+        """Islenmis icerigin kopyasi olan klasorun imzasini kaydeder (yeniden hash'lenmemesi icin)."""
+        with self._lock:
+            self._append({"subject": subjectId, "fingerprint": fingerprint, "signature": signature,
+                          "time": time.time(), "duplicate": True})
+            self._signatures[_signatureKey(signature)] = fingerprint
+
+    def _append(self, entry):
+        with open(self.manifestPath, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def readTable(self):
+        """Depodaki tum deneklerin sonuclari tek ResultTable olarak."""
+        if not os.path.isdir(self.partitionDir):
+            return ResultTable()
+        return readPartitions(self.partitionDir)
+
+
+class FolderWatcher:
+    """Kok dizini tarar ve hazir denek klasorlerini bir surec havuzunda hesaplar.
+
+    requiredCategories klasorun tamam sayilmasi icin gereken kategorilerdir;
+    en yeni dosyasi settleSeconds'tan eski olan klasorler hazirdir. Ayni anda
+    en fazla maxWorkers denek hesaplanir. scan/poll/drain ile adim adim,
+    run ile durdurulana kadar calisir.
+    """
+
+    def __init__(self, rootDir, storeDir, maxWorkers=DEFAULT_WORKERS, requiredCategories=LabelSchema.CATEGORIES,
+                 settleSeconds=DEFAULT_SETTLE_SECONDS, pollInterval=DEFAULT_POLL_INTERVAL,
+                 memoryBudget=DEFAULT_MEMORY_BUDGET, cacheDir=None, mpContext=None, format=None):
+        self.rootDir = rootDir
+        self.store = ProcessedStore(storeDir, format)
+        self.maxWorkers = maxWorkers
+        self.requiredCategories = tuple(requiredCategories)
+        self.settleSeconds = settleSeconds
+        self.pollInterval = pollInterval
+        self.memoryBudget = memoryBudget
+        self.cacheDir = cacheDir
+        self.mpContext = mpContext
+        self._executor = None
+        # future -> (denek, parmak izi, dosya imzasi)
+        self._inFlight = {}
+        # Denek -> bu oturumda karara baglanmis dosya imzasi (yeniden hash'lenmez)
+        self._settled = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def scan(self):
+        """Islenmeye hazir klasorler: [(denek, {kategori: yol}, parmak izi, dosya imzasi), ...].
+
+        Imzasi bu oturumda veya kayitta gorulmus klasorler hash'lenmeden atlanir.
+        """
+        ready = []
+        busySubjects = {subjectId for subjectId, _, _ in self._inFlight.values()}
+        fingerprints = {fingerprint for _, fingerprint, _ in self._inFlight.values()}
+        now = time.time()
+        for subjectId, files in findSubjectFolders(self.rootDir):
+            if subjectId in busySubjects or not set(self.requiredCategories) <= set(files):
+                continue
+            try:
+                signature = statSignature(files)
+                if self._settled.get(subjectId) == signature:
+                    continue
+                if self.store.knownFingerprint(signature):
+                    self._settled[subjectId] = signature
+                    continue
+                if now - max(mtime for _, _, _, mtime in signature) / 1e9 < self.settleSeconds:
+                    continue
+                fingerprint = folderFingerprint(files)
+            except OSError:
+                # Tarama sirasinda silinen/tasinan dosya
+                continue
+            self._settled[subjectId] = signature
+            if self.store.isProcessed(fingerprint):
+                logging.info("volBrain izleme: %s daha once islenmis icerik, atlandi" % subjectId)
+                self.store.recordDuplicate(subjectId, fingerprint, signature)
+                continue
+            if fingerprint in fingerprints:
+                # Ayni icerik zaten kuyrukta; imzasi kaydedilmez, yeniden baslatmada bir kez hash'lenir
+                logging.info("volBrain izleme: %s daha once islenmis icerik, atlandi" % subjectId)
+                continue
+            fingerprints.add(fingerprint)
+            ready.append((subjectId, files, fingerprint, signature))
+        return ready
+
+    def _ensureExecutor(self):
+        if self._executor is None:
+            self._executor = _processPool(self.maxWorkers, self.mpContext)
+        return self._executor
+
+    def poll(self):
+        """Bir tarama yapar, hazir klasorleri kuyruga ekler ve biten isleri kaydeder.
+
+        Donus: bu cagrida kaydedilen girdiler.
+        """
+        for subjectId, files, fingerprint, signature in self.scan():
+            future = self._ensureExecutor().submit(computeSubjectVolumes, subjectId, files, self.memoryBudget,
+                                                   self.cacheDir)
+            self._inFlight[future] = (subjectId, fingerprint, signature)
+        return self._collect([future for future in self._inFlight if future.done()])
+
+    def drain(self):
+        """Kuyruktaki tum isler bitene kadar bekler ve kaydeder."""
+        concurrent.futures.wait(list(self._inFlight))
+        return self._collect(list(self._inFlight))
+
+    def _collect(self, futures):
+        recorded = []
+        for future in futures:
+            subjectId, fingerprint, signature = self._inFlight.pop(future)
+            try:
+                rows, errors = future.result()
+            except Exception as e:
+                rows, errors = [], [(subjectId, None, str(e))]
+            for error in errors:
+                logging.error("volBrain izleme hatasi (%s, %s): %s" % error)
+            recorded.append(self.store.record(subjectId, fingerprint, rows, errors, signature))
+        return recorded
+
+    def processOnce(self):
+        """Tek tarama: hazir klasorleri hesaplar ve bitmelerini bekler."""
+        return self.poll() + self.drain()
+
+    def run(self, stopEvent=None, callback=None):
+        """stopEvent ayarlanana (veya KeyboardInterrupt) kadar pollInterval araliklarla tarar.
+
+        callback(girdi) kaydedilen her klasor icin cagrilir. Durdurulurken
+        kuyruktaki isler tamamlanir.
+        """
+        stopEvent = stopEvent or threading.Event()
+        try:
+            while not stopEvent.is_set():
+                for entry in self.poll():
+                    if callback:
+                        callback(entry)
+                stopEvent.wait(self.pollInterval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for entry in self.drain():
+                if callback:
+                    callback(entry)
+
+    def close(self):
+        if self._executor is not None:
+            self.drain()
+            self._executor.shutdown()
+            self._executor = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="volBrain sonuc klasorlerini izler ve hacimleri hesaplar")
+    parser.add_argument('root', help="izlenecek kok dizin")
+    parser.add_argument('store', help="sonuc deposu klasoru")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--categories', nargs='+', choices=list(LabelSchema.CATEGORIES),
+                        default=list(LabelSchema.CATEGORIES), help="klasorun tamam sayilmasi icin gerekenler")
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help="dosyalarin degismeden beklemesi gereken sure (saniye)")
+    parser.add_argument('--interval', type=float, default=DEFAULT_POLL_INTERVAL, help="tarama araligi (saniye)")
+    parser.add_argument('--cache-dir', help="dosya basina sonuc onbellegi klasoru")
+    parser.add_argument('--once', action='store_true', help="tek tarama yap ve cik")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    def report(entry):
+        status = f"{len(entry['errors'])} hata" if entry["errors"] else "tamam"
+        logging.info("volBrain izleme: %s islendi (%d satir, %s)" % (entry["subject"], entry["rows"], status))
+
+    failed = False
+    with FolderWatcher(args.root, args.store, args.workers, args.categories, args.settle, args.interval,
+                       cacheDir=args.cache_dir) as watcher:
+        if args.once:
+            for entry in watcher.processOnce():
+                report(entry)
+                failed = failed or bool(entry["errors"])
+        else:
+            watcher.run(callback=report)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
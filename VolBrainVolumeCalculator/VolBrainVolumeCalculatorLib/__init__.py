@@ -0,0 +1,69 @@
+"""volBrain hacim hesaplayici icin Slicer'dan bagimsiz yardimci moduller.
+
+Alt moduller ilk kullanimda yuklenir: `from VolBrainVolumeCalculatorLib import X`
+yalnizca X'in modulunu (ve onun bagimliliklarini) ice aktarir, boylece Slicer
+acilisinda kullanilmayan moduller (surec havuzu, izleme, pyarrow) yuklenmez.
+"""
+
+import importlib
+import sys
+import types
+
+# Etiket semalari Slicer modulunun acilisinda zaten gerekir
+from .LabelRegistry import CompiledLabelSchema, LabelRegistry, defaultRegistry, deterministicColors, getLabelSchema
+
+# Ilk erisimde yuklenen adlar: alt modul -> adlar
+_EXPORTS = {
+    "BackgroundTasks": ("BackgroundTask", "CancellationToken", "OperationCancelled"),
+    "CohortBatch": ("computeSubjects", "findSubjectFolders", "findVolBrainFiles", "runCohortBatch", "writeLongTable"),
+    "GzipIndex": ("CheckpointIndex", "GzipIndexStore", "IndexedGzipReader"),
+    "Instrumentation": ("Profiler",),
+    "LabelStatistics": ("JointLabelHistogram", "LabelHistogram", "LabelRegion", "LabelSpatialIndex",
+                        "LabelSpatialIndexBuilder", "buildLabelSpatialIndex", "computeJointVoxelCounts",
+                        "computeLabelVoxelCounts"),
+    "LabelVolumes": ("SliceSampleEstimator", "buildCompositionResults", "buildEstimatedResults", "buildVolumeResults",
+                     "checkSameGrid", "computeLabelComposition", "computeLabelVolumes", "iterProgressiveVolumes"),
+    "MeshCache": ("MeshCache", "meshCacheKey", "surfacePreset"),
+    "NiftiLabelReader": ("NiftiHeader", "NiftiLabelReader", "readNiftiHeader", "writeNiftiLabelVolume"),
+    "ResultCache": ("ResultCache", "cacheKey", "fileFingerprint"),
+    "ResultExport": ("appendPartition", "readPartitions", "readResultTable", "writeDelimited", "writeResultTable"),
+    "ResultTable": ("ResultTable", "StringTable"),
+    "VisibilityGroups": ("VISIBILITY_GROUPS", "labelGroups", "schemaGroups"),
+    "WatchFolder": ("FolderWatcher", "ProcessedStore", "folderFingerprint"),
+}
+
+_NAME_MODULES = {name: moduleName for moduleName, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(set(_NAME_MODULES) | {
+    "CompiledLabelSchema", "LabelRegistry", "defaultRegistry", "deterministicColors", "getLabelSchema"})
+
+
+class _LibPackage(types.ModuleType):
+    """Alt modulle ayni adi tasiyan sinif, alt modul yuklendikten sonra da paket ozniteligi kalir.
+
+    Ice aktarma sistemi yuklenen alt modulu pakete ayni adla yazar (ornegin
+    MeshCache); bu durumda modul yerine icindeki ayni adli sinif saklanir.
+    """
+
+    def __setattr__(self, name, value):
+        if isinstance(value, types.ModuleType) and _NAME_MODULES.get(name) == name \
+                and value.__name__ == f"{self.__name__}.{name}":
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _LibPackage
+
+
+def __getattr__(name):
+    moduleName = _NAME_MODULES.get(name)
+    if moduleName is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{moduleName}"), name)
+    # Sonraki erisimler modul sozlugunden
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))